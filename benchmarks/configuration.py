@@ -0,0 +1,76 @@
+'''
+Configuration model benchmark.
+
+Compare building backup version models with validation and through the
+trusted path used by operators. Run with
+`python -m benchmarks.configuration --records 100000`.
+'''
+
+import argparse
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, List
+
+from nfsops.configurations.backup_version import BackupVersionConfiguration
+
+
+def measure(
+    factory: Callable[..., BackupVersionConfiguration],
+    records: int
+) -> float:
+    '''
+    Measure building backup version models from prepared listing values.
+
+    Parameters:
+        factory (Callable[..., BackupVersionConfiguration]): Model factory.
+        records (int): Number of models.
+    Returns:
+        float: Elapsed time in seconds.
+    '''
+
+    root = Path('/var/nfs-shared')
+    values = [
+        (
+            version,
+            datetime.fromtimestamp(version, tz=timezone.utc),
+            root / f'namespace-{version}-resource'
+        )
+        for version in range(records)
+    ]
+    start = time.perf_counter()
+    versions: List[BackupVersionConfiguration] = [
+        factory(version=version, timestamp=timestamp, path=path)
+        for version, timestamp, path in values
+    ]
+    elapsed = time.perf_counter() - start
+
+    assert len(versions) == records
+
+    return elapsed
+
+
+def main():
+    '''
+    Run the benchmark and print models per second for each path.
+    '''
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--records', type=int, default=100000)
+    arguments = parser.parse_args()
+
+    factories = {
+        'validated': BackupVersionConfiguration,
+        'trusted': BackupVersionConfiguration.trusted
+    }
+
+    for name, factory in factories.items():
+        elapsed = measure(factory, arguments.records)
+        print(
+            f'{arguments.records} versions {name}: {elapsed:.3f}s '
+            f'({arguments.records / elapsed:.0f} models/s)'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+'''
+File table benchmark.
+
+Compare the memory used by a listing kept as merged entries and as a file
+table, and the load time of a saved table. Run with
+`python -m benchmarks.file_table --files 1000000`.
+'''
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Tuple, TypeVar
+
+from nfsops.operators.file_table import FileTable
+from nfsops.operators.merge import MergedEntry
+
+#: Measured value type.
+T = TypeVar('T')
+
+
+def measure_memory(function: Callable[[], T]) -> Tuple[T, int]:
+    '''
+    Measure the memory allocated by a function and kept by its result.
+
+    Parameters:
+        function (Callable[[], T]): Function to measure.
+    Returns:
+        Tuple[T, int]: The function result and the allocated bytes.
+    '''
+
+    tracemalloc.start()
+
+    try:
+        result = function()
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return result, current
+
+
+def create_entries(files: int):
+    '''
+    Create synthetic merged entries, 100 files per directory.
+
+    Parameters:
+        files (int): Number of files.
+    Returns:
+        List[MergedEntry]: Merged entries.
+    '''
+
+    file_stat = os.stat(__file__)
+
+    return [
+        MergedEntry(
+            f'{index // 100:05d}/{index:07d}',
+            0,
+            Path(f'/backup/{index // 100:05d}/{index:07d}'),
+            file_stat
+        )
+        for index in range(files)
+    ]
+
+
+def main():
+    '''
+    Run the benchmark and print memory usage and load times.
+    '''
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--files', type=int, default=100000)
+    arguments = parser.parse_args()
+
+    entries, entries_memory = measure_memory(
+        lambda: create_entries(arguments.files)
+    )
+    table, table_memory = measure_memory(
+        lambda: FileTable.from_entries(entries)
+    )
+
+    print(f'{arguments.files} entries: {entries_memory / 2**20:.1f} MiB')
+    print(f'{arguments.files} table rows: {table_memory / 2**20:.1f} MiB')
+
+    with tempfile.TemporaryDirectory(prefix='nfsops-benchmark-') as directory:
+        path = Path(directory) / 'table'
+        table.save(path)
+
+        start = time.perf_counter()
+
+        with FileTable.load(path) as loaded:
+            elapsed = time.perf_counter() - start
+            print(f'{len(loaded)} table rows loaded: {elapsed * 1000:.3f}ms')
+
+
+if __name__ == '__main__':
+    main()
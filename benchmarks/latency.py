@@ -0,0 +1,177 @@
+'''
+Simulated NFS latency benchmark.
+
+Measure backup version listing, restore planning (the merged walk of the
+backup versions, with and without prefetching) and native transfers on a
+local tree through the latency shim, for each latency profile preset, and
+print the elapsed time with the number of round trips. Round-trip counts do
+not depend on the host, so regressions show up even where timings are noisy.
+Run with `python -m benchmarks.latency`, or `--scale 0` to only count round
+trips.
+'''
+
+import argparse
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+from nfsops import (
+    BackupConfiguration,
+    BackupOperator,
+    ContextConfiguration,
+    ContextType
+)
+from nfsops.latency import LATENCY_PROFILES, LatencyShim
+from nfsops.operators.merge import walk_merged
+from nfsops.operators.stat_cache import ScandirPrefetcher, StatCache
+from nfsops.operators.transfer import NativeTransferEngine
+
+from .transfer import create_small_file_tree
+
+
+def create_backup_versions(path: Path, versions: int, files: int, size: int):
+    '''
+    Create backup versions of a tree of small files in a subpath volume.
+
+    Parameters:
+        path (Path): Volume path.
+        versions (int): Number of backup versions.
+        files (int): Number of files per backup version.
+        size (int): File size in bytes.
+    '''
+
+    for version in range(versions):
+        version_path = path / '.backup' / f'{version:03d}'
+        create_small_file_tree(version_path, files, size)
+
+
+def list_versions(path: Path) -> None:
+    '''
+    List the backup versions of a volume.
+
+    Parameters:
+        path (Path): Volume path.
+    '''
+
+    operator = BackupOperator(
+        ContextConfiguration(context=ContextType.SUBPATH, path=path),
+        BackupConfiguration()
+    )
+    operator.stat_cache = StatCache(maxsize=0)
+    operator.list_versions()
+
+
+def plan(path: Path, prefetch: bool) -> None:
+    '''
+    Walk the merged backup versions of a volume, as restores do.
+
+    Parameters:
+        path (Path): Volume path.
+        prefetch (bool): Whether to prefetch directory listings.
+    '''
+
+    stat_cache = StatCache(maxsize=0)
+    prefetcher: Optional[ScandirPrefetcher] = \
+        ScandirPrefetcher(stat_cache) if prefetch else None
+
+    try:
+        for _ in walk_merged(
+            sorted((path / '.backup').iterdir(), reverse=True),
+            stat_cache,
+            prefetcher=prefetcher
+        ):
+            pass
+    finally:
+        if prefetcher is not None:
+            prefetcher.close()
+
+
+def transfer(path: Path, destination: Path) -> None:
+    '''
+    Transfer the newest backup version of a volume into an empty destination.
+
+    Parameters:
+        path (Path): Volume path.
+        destination (Path): Destination directory.
+    '''
+
+    source = max((path / '.backup').iterdir())
+    NativeTransferEngine().transfer(
+        [source],
+        walk_merged([source], StatCache(maxsize=0)),
+        destination
+    )
+
+
+def measure(shim: LatencyShim, function: Callable[[], None]) -> str:
+    '''
+    Measure a function through the latency shim.
+
+    Parameters:
+        shim (LatencyShim): Latency shim, not installed.
+        function (Callable[[], None]): Function to measure.
+    Returns:
+        str: Elapsed time and round trips.
+    '''
+
+    start = time.perf_counter()
+
+    with shim:
+        function()
+
+    elapsed = time.perf_counter() - start
+    round_trips = ' '.join(
+        f'{call}={count}' for call, count in sorted(shim.round_trips.items())
+    )
+
+    return f'{elapsed:.3f}s {round_trips}'
+
+
+def main():
+    '''
+    Run the benchmark and print elapsed time and round trips for each profile.
+    '''
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--versions', type=int, default=3)
+    parser.add_argument('--files', type=int, default=2000)
+    parser.add_argument('--size', type=int, default=4096)
+    parser.add_argument('--scale', type=float, default=1.0)
+    parser.add_argument(
+        '--profile',
+        action='append',
+        choices=sorted(LATENCY_PROFILES)
+    )
+    arguments = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='nfsops-benchmark-') as directory:
+        volume = Path(directory) / 'volume'
+        destination = Path(directory) / 'destination'
+        create_backup_versions(
+            volume,
+            arguments.versions,
+            arguments.files,
+            arguments.size
+        )
+
+        operations = {
+            'list-versions': lambda: list_versions(volume),
+            'plan': lambda: plan(volume, False),
+            'plan+prefetch': lambda: plan(volume, True),
+            'transfer': lambda: transfer(volume, destination)
+        }
+
+        for profile in arguments.profile or LATENCY_PROFILES:
+            for name, function in operations.items():
+                shutil.rmtree(volume / '.nfsops', ignore_errors=True)
+                shutil.rmtree(destination, ignore_errors=True)
+                destination.mkdir()
+
+                shim = LatencyShim(profile, arguments.scale, [directory])
+                print(f'{profile} {name}: {measure(shim, function)}')
+
+
+if __name__ == '__main__':
+    main()
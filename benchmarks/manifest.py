@@ -0,0 +1,74 @@
+'''
+Manifest benchmark.
+
+Compare the time to load a backup version listing and look up a path from a
+JSON manifest and from a binary manifest. Run with
+`python -m benchmarks.manifest --files 1000000`.
+'''
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from nfsops.operators.manifest import Manifest, write_manifest
+
+from .file_table import create_entries
+
+
+def main():
+    '''
+    Run the benchmark and print load and lookup times.
+    '''
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--files', type=int, default=100000)
+    arguments = parser.parse_args()
+
+    entries = create_entries(arguments.files)
+    lookup = entries[len(entries) // 2].path
+
+    with tempfile.TemporaryDirectory(prefix='nfsops-benchmark-') as directory:
+        json_path = Path(directory) / 'manifest.json'
+        manifest_path = Path(directory) / 'manifest'
+
+        with open(json_path, 'w', encoding='utf-8') as file:
+            json.dump([
+                [
+                    entry.path,
+                    entry.stat.st_size,
+                    entry.stat.st_mtime_ns,
+                    entry.stat.st_mode,
+                    entry.stat.st_uid,
+                    entry.stat.st_gid
+                ]
+                for entry in entries
+            ], file)
+
+        write_manifest(entries, manifest_path)
+
+        start = time.perf_counter()
+
+        with open(json_path, encoding='utf-8') as file:
+            records = {record[0]: record for record in json.load(file)}
+
+        assert lookup in records
+        elapsed = time.perf_counter() - start
+        print(f'{len(records)} JSON entries: {elapsed * 1000:.3f}ms')
+
+        start = time.perf_counter()
+
+        with Manifest(manifest_path) as manifest:
+            assert manifest.get(lookup) is not None
+            elapsed = time.perf_counter() - start
+            print(f'{len(manifest)} manifest entries: {elapsed * 1000:.3f}ms')
+
+            start = time.perf_counter()
+            files = sum(1 for _ in manifest)
+            elapsed = time.perf_counter() - start
+            print(f'{files} manifest entries iterated: {elapsed * 1000:.3f}ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+'''
+Transfer engine benchmark.
+
+Compare the transfer engines, with and without chunked copies of large files,
+on a many-small-file tree and a few-large-file tree. Run with `python -m benchmarks.transfer`.
+'''
+
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict
+
+from nfsops.operators.chunked_copy import ChunkedCopier
+from nfsops.operators.merge import walk_merged
+from nfsops.operators.stat_cache import StatCache
+from nfsops.operators.transfer import TRANSFER_ENGINES, TransferEngine
+
+
+def create_small_file_tree(path: Path, files: int = 20000, size: int = 4096):
+    '''
+    Create a tree of many small files, 100 files per directory.
+
+    Parameters:
+        path (Path): Root directory.
+        files (int): Number of files.
+        size (int): File size in bytes.
+    '''
+
+    content = os.urandom(size)
+
+    for index in range(files):
+        directory = path / f'{index // 100:05d}'
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / f'{index:07d}').write_bytes(content)
+
+
+def create_large_file_tree(path: Path, files: int = 4, size: int = 256 << 20):
+    '''
+    Create a tree of a few large files.
+
+    Parameters:
+        path (Path): Root directory.
+        files (int): Number of files.
+        size (int): File size in bytes.
+    '''
+
+    path.mkdir(parents=True, exist_ok=True)
+    chunk = os.urandom(1 << 20)
+
+    for index in range(files):
+        with open(path / f'{index:03d}', 'wb') as file:
+            for _ in range(size >> 20):
+                file.write(chunk)
+
+
+def measure(engine: TransferEngine, source: Path, destination: Path) -> float:
+    '''
+    Measure a full transfer into an empty destination.
+
+    Parameters:
+        engine (TransferEngine): Transfer engine.
+        source (Path): Backup version directory.
+        destination (Path): Destination directory.
+    Returns:
+        float: Elapsed time in seconds.
+    '''
+
+    shutil.rmtree(destination, ignore_errors=True)
+    destination.mkdir()
+
+    start = time.perf_counter()
+    engine.transfer(
+        [source],
+        walk_merged([source], StatCache(maxsize=0)),
+        destination
+    )
+
+    return time.perf_counter() - start
+
+
+def main():
+    '''
+    Run the benchmark and print one line per tree and engine.
+    '''
+
+    trees: Dict[str, Callable[[Path], None]] = {
+        'many-small-files': create_small_file_tree,
+        'few-large-files': create_large_file_tree
+    }
+
+    with tempfile.TemporaryDirectory(prefix='nfsops-benchmark-') as directory:
+        for tree_name, create_tree in trees.items():
+            source = Path(directory) / tree_name
+            create_tree(source)
+
+            for engine_name, engine_type in TRANSFER_ENGINES.items():
+                for chunked_copier in [None, ChunkedCopier()]:
+                    label = f'{engine_name}{"+chunked" if chunked_copier else ""}'
+
+                    try:
+                        engine = engine_type(chunked_copier)
+                    except KeyError as exception:
+                        print(f'{tree_name} {label}: skipped ({exception})')
+                        continue
+
+                    destination = Path(directory) / 'destination'
+                    elapsed = measure(engine, source, destination)
+                    print(f'{tree_name} {label}: {elapsed:.3f}s')
+
+
+if __name__ == '__main__':
+    main()
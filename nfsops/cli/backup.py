@@ -2,15 +2,23 @@
 Backup command application.
 '''
 
-from typing import Optional, cast
+import shutil
+import stat
+import sys
+from pathlib import Path
+from typing import BinaryIO, List, Optional, cast
 
 import typer
 from pydantic import ValidationError
 
 from nfsops import (
+    ArchiveCompression,
     BackupConfiguration,
     BackupOperator,
+    ExportConfiguration,
     RestoreConfiguration,
+    RestoreEngine,
+    VersionRangeConfiguration,
     utils
 )
 
@@ -21,6 +29,14 @@ app = typer.Typer(
     add_completion=False
 )
 
+#: Manifest command application.
+manifest_app = typer.Typer(
+    name='manifest',
+    help='Manage backup version manifests.',
+    add_completion=False
+)
+app.add_typer(manifest_app)
+
 
 @app.callback(help='Manage backup versions.')
 def main(
@@ -73,7 +89,7 @@ def list_versions(ctx: typer.Context):
 
 
 @app.command(help='Restore backup versions.')
-def restore(
+def restore(  # pylint: disable=R0913,R0914,R0917
     ctx: typer.Context,
     version: str = typer.Argument(
         ...,
@@ -82,6 +98,115 @@ def restore(
     final_version: Optional[str] = typer.Argument(
         None,
         help='Final backup version.'
+    ),
+    destination: Optional[Path] = typer.Option(
+        None,
+        '--destination', '-d',
+        file_okay=False,
+        help='Destination path. Defaults to the volume path for subpath context.'
+    ),
+    prefixes: List[str] = typer.Option(
+        [],
+        '--prefix', '-P',
+        help='Relative path prefix to restore. Defaults to all paths.'
+    ),
+    include: List[str] = typer.Option(
+        [],
+        '--include',
+        help='Glob pattern selecting files to restore.'
+    ),
+    exclude: List[str] = typer.Option(
+        [],
+        '--exclude',
+        help='Glob pattern excluding files and directories from restore.'
+    ),
+    engine: str = typer.Option(
+        'auto',
+        '--engine', '-e',
+        envvar='NFSOPS_TRANSFER_ENGINE',
+        help='Transfer engine (`auto`, `rsync` or `native`).'
+    ),
+    chunk_threshold: int = typer.Option(
+        128 << 20,
+        '--chunk-threshold',
+        help='Minimum size in bytes of files copied in parallel chunks, 0 disables.'
+    ),
+    staged: bool = typer.Option(
+        False,
+        '--staged',
+        help='Restore into a staging directory, then swap it with the destination.'
+    ),
+    retries: int = typer.Option(
+        5,
+        '--retries',
+        min=0,
+        help='Maximum number of retries of each failed transfer step, 0 disables.'
+    ),
+    timeout: Optional[float] = typer.Option(
+        None,
+        '--timeout',
+        min=0,
+        help='Maximum running time in seconds of transfer subprocesses.'
+    ),
+    sharded: bool = typer.Option(
+        False,
+        '--sharded',
+        help='Split the restore into shards, also restored by `restore-worker` processes.'
+    ),
+    shard_size: int = typer.Option(
+        1 << 30,
+        '--shard-size',
+        min=1,
+        help='Target size in bytes of restore shards.'
+    ),
+    preserve_ownership: bool = typer.Option(
+        True,
+        '--preserve-ownership/--no-preserve-ownership',
+        help='Apply the source ownership, only when running as root.'
+    ),
+    uid_map: List[str] = typer.Option(
+        [],
+        '--map-uid',
+        help='Map a source user ID to a destination one (`SOURCE:TARGET`, `*` matches any other).'
+    ),
+    gid_map: List[str] = typer.Option(
+        [],
+        '--map-gid',
+        help='Map a source group ID to a destination one (`SOURCE:TARGET`, `*` matches any other).'
+    ),
+    xattrs: bool = typer.Option(
+        False,
+        '--xattrs',
+        help='Restore extended attributes.'
+    ),
+    workers: Optional[int] = typer.Option(
+        None,
+        '--workers',
+        min=1,
+        help='Number of file transfer workers (initial number with `--autotune`).'
+    ),
+    scan_workers: Optional[int] = typer.Option(
+        None,
+        '--scan-workers',
+        min=1,
+        help='Number of directory listing workers (initial number with `--autotune`).'
+    ),
+    autotune: bool = typer.Option(
+        False,
+        '--autotune',
+        help='Adjust worker counts to the measured throughput and latency.'
+    ),
+    min_workers: int = typer.Option(
+        1,
+        '--min-workers',
+        min=1,
+        help='Minimum number of workers with `--autotune`.'
+    ),
+    max_workers: int = typer.Option(
+        64,
+        '--max-workers',
+        min=1,
+        help='Maximum number of workers with `--autotune`.'
     )
 ):
     '''
@@ -91,14 +216,55 @@ def restore(
         ctx (typer.Context): Application context.
         version (str): Single/initial backup version.
         final_version (Optional[str]): Final backup version.
+        destination (Optional[Path]): Destination path.
+        prefixes (List[str]): Relative path prefixes to restore.
+        include (List[str]): Glob patterns selecting files to restore.
+        exclude (List[str]): Glob patterns excluding files and directories from restore.
+        engine (str): Transfer engine.
+        chunk_threshold (int): Minimum size in bytes of files copied in parallel chunks.
+        staged (bool): Whether to restore into a staging directory first.
+        retries (int): Maximum number of retries of each failed transfer step.
+        timeout (Optional[float]): Maximum running time in seconds of transfer subprocesses.
+        sharded (bool): Whether to split the restore into shards.
+        shard_size (int): Target size in bytes of restore shards.
+        preserve_ownership (bool): Whether to apply the source ownership.
+        uid_map (List[str]): User ID mappings.
+        gid_map (List[str]): Group ID mappings.
+        xattrs (bool): Whether to restore extended attributes.
+        workers (Optional[int]): Number of file transfer workers.
+        scan_workers (Optional[int]): Number of directory listing workers.
+        autotune (bool): Whether to adjust worker counts while restoring.
+        min_workers (int): Minimum number of autotuned workers.
+        max_workers (int): Maximum number of autotuned workers.
     Raises:
         typer.Exit: Expected parameters contain validation errors or restore operation failed.
     '''
 
     try:
         options = RestoreConfiguration(
-            version=version,
-            final_version=final_version
+            version=utils.parse_version(version),
+            final_version=utils.parse_version(final_version),
+            destination=destination,
+            prefixes=prefixes,
+            include=include,
+            exclude=exclude,
+            # Checked against the available engines by the model.
+            engine=cast(RestoreEngine, engine),
+            chunk_threshold=chunk_threshold,
+            staged=staged,
+            retries=retries,
+            timeout=timeout,
+            sharded=sharded,
+            shard_size=shard_size,
+            preserve_ownership=preserve_ownership,
+            uid_map=utils.parse_id_map(uid_map),
+            gid_map=utils.parse_id_map(gid_map),
+            xattrs=xattrs,
+            workers=workers,
+            scan_workers=scan_workers,
+            autotune=autotune,
+            min_workers=min_workers,
+            max_workers=max_workers
         )
         operator = cast(BackupOperator, ctx.obj)
         report = operator.restore(options)
@@ -109,9 +275,381 @@ def restore(
         raise typer.Exit(code=1)
 
 
+@app.command(name='restore-worker', help='Restore the shards of sharded restores.')
+def restore_worker(
+    ctx: typer.Context,
+    drain: bool = typer.Option(
+        False,
+        '--drain',
+        help='Exit once no shard is pending.'
+    ),
+    poll_interval: float = typer.Option(
+        1.0,
+        '--poll-interval',
+        min=0.1,
+        help='Time between checks for pending shards in seconds.'
+    )
+):
+    '''
+    Restore the shards of the sharded restores of the volume until interrupted.
+
+    Parameters:
+        ctx (typer.Context): Application context.
+        drain (bool): Whether to exit once no shard is pending.
+        poll_interval (float): Time between checks for pending shards in seconds.
+    Raises:
+        typer.Exit: Expected worker stopped without errors.
+    '''
+
+    try:
+        operator = cast(BackupOperator, ctx.obj)
+        shards = operator.restore_worker(drain, poll_interval)
+
+        typer.echo(f'restored {shards} shards.')
+    except Exception as exception:
+        typer.echo(exception)
+        raise typer.Exit(code=1)
+    except KeyboardInterrupt:
+        typer.echo('worker stopped, interrupted shards were queued again.')
+
+
+@app.command(help='Show differences between two backup versions.')
+def diff(
+    ctx: typer.Context,
+    version: int = typer.Argument(
+        ...,
+        min=0,
+        help='Backup version to compare from.'
+    ),
+    other_version: int = typer.Argument(
+        ...,
+        min=0,
+        help='Backup version to compare to.'
+    )
+):
+    '''
+    Show differences between two backup versions, one `<status> <path>` line
+    per added (`A`), removed (`D`) or modified (`M`) path.
+
+    Parameters:
+        ctx (typer.Context): Application context.
+        version (int): Backup version to compare from.
+        other_version (int): Backup version to compare to.
+    Raises:
+        typer.Exit: Expected diff operation failed.
+    '''
+
+    try:
+        operator = cast(BackupOperator, ctx.obj)
+
+        for entry in operator.diff(version, other_version):
+            typer.echo(f'{entry.status} {entry.path}')
+    except Exception as exception:
+        typer.echo(exception)
+        raise typer.Exit(code=1)
+
+
+@app.command(name='ls', help='List a directory of backup versions.')
+def list_directory(
+    ctx: typer.Context,
+    path: str = typer.Argument(
+        '',
+        help='Relative directory path. Defaults to the backup version root.'
+    ),
+    version: int = typer.Argument(
+        0,
+        min=0,
+        help='Backup version.'
+    ),
+    final_version: Optional[str] = typer.Argument(
+        None,
+        help='Final backup version with `--merged`. Defaults to all older versions.'
+    ),
+    merged: bool = typer.Option(
+        False,
+        '--merged',
+        help='List the merged view of the backup versions, newest wins.'
+    )
+):
+    '''
+    List a directory of a backup version, or of the merged view of backup
+    versions, one `<mode> <size> <version> <path>` line per entry, sorted by
+    name.
+
+    Parameters:
+        ctx (typer.Context): Application context.
+        path (str): Relative directory path.
+        version (int): Single/initial backup version.
+        final_version (Optional[str]): Final backup version.
+        merged (bool): Whether to list the merged view of the backup versions.
+    Raises:
+        typer.Exit: Expected parameters contain validation errors or list operation failed.
+    '''
+
+    try:
+        if final_version is not None and not merged:
+            raise ValueError('final backup version requires "--merged".')
+
+        operator = cast(BackupOperator, ctx.obj)
+        selection = VersionRangeConfiguration(
+            version=version,
+            final_version=utils.parse_version(final_version or '*')
+            if merged else None
+        )
+
+        with operator.merged_view(selection) as view:
+            for entry in view.listdir(path):
+                typer.echo(
+                    f'{stat.filemode(entry.stat.st_mode)} '
+                    f'{entry.stat.st_size:>12} {version + entry.version:>3} '
+                    f'{entry.path}'
+                )
+    except Exception as exception:
+        typer.echo(exception)
+        raise typer.Exit(code=1)
+
+
+@app.command(name='cat', help='Print a file of backup versions.')
+def print_file(
+    ctx: typer.Context,
+    path: str = typer.Argument(
+        ...,
+        help='Relative file path.'
+    ),
+    version: int = typer.Argument(
+        0,
+        min=0,
+        help='Backup version.'
+    ),
+    final_version: Optional[str] = typer.Argument(
+        None,
+        help='Final backup version with `--merged`. Defaults to all older versions.'
+    ),
+    merged: bool = typer.Option(
+        False,
+        '--merged',
+        help='Read the newest backup version containing the file.'
+    )
+):
+    '''
+    Print a file of a backup version, or of the merged view of backup
+    versions, without restoring it.
+
+    Parameters:
+        ctx (typer.Context): Application context.
+        path (str): Relative file path.
+        version (int): Single/initial backup version.
+        final_version (Optional[str]): Final backup version.
+        merged (bool): Whether to read the merged view of the backup versions.
+    Raises:
+        typer.Exit: Expected parameters contain validation errors or read operation failed.
+    '''
+
+    try:
+        if final_version is not None and not merged:
+            raise ValueError('final backup version requires "--merged".')
+
+        operator = cast(BackupOperator, ctx.obj)
+        selection = VersionRangeConfiguration(
+            version=version,
+            final_version=utils.parse_version(final_version or '*')
+            if merged else None
+        )
+
+        with operator.open_merged(path, selection) as file:
+            shutil.copyfileobj(file, sys.stdout.buffer)
+    except Exception as exception:
+        typer.echo(exception, err=True)
+        raise typer.Exit(code=1)
+
+
+@app.command(name='export', help='Export merged backup versions as a tar archive.')
+def export_archive(
+    ctx: typer.Context,
+    version: str = typer.Argument(
+        ...,
+        help='Single/initial backup version.'
+    ),
+    final_version: Optional[str] = typer.Argument(
+        None,
+        help='Final backup version.'
+    ),
+    output: Path = typer.Option(
+        '-',
+        '--output', '-o',
+        dir_okay=False,
+        help='Output archive path, `-` for standard output.'
+    ),
+    compression: str = typer.Option(
+        'zstd',
+        '--compression',
+        help='Archive compression (`zstd`, `gzip` or `none`).'
+    )
+):
+    '''
+    Export merged backup versions as a tar archive.
+
+    Parameters:
+        ctx (typer.Context): Application context.
+        version (str): Single/initial backup version.
+        final_version (Optional[str]): Final backup version.
+        output (Path): Output archive path, `-` for standard output.
+        compression (str): Archive compression.
+    Raises:
+        typer.Exit: Expected parameters contain validation errors or export operation failed.
+    '''
+
+    try:
+        options = ExportConfiguration(
+            version=utils.parse_version(version),
+            final_version=utils.parse_version(final_version),
+            # Checked against the supported compressions by the model.
+            compression=cast(ArchiveCompression, compression)
+        )
+        operator = cast(BackupOperator, ctx.obj)
+
+        if str(output) == '-':
+            operator.export_archive(options, cast(BinaryIO, sys.stdout.buffer))
+        else:
+            with utils.open_atomic_writer(output) as file:
+                operator.export_archive(options, file)
+    except Exception as exception:
+        typer.echo(exception, err=True)
+        raise typer.Exit(code=1)
+
+
+@app.command(name='import', help='Import a tar archive as a new backup version.')
+def import_archive(
+    ctx: typer.Context,
+    source: Path = typer.Option(
+        '-',
+        '--input', '-i',
+        dir_okay=False,
+        help='Input archive path, `-` for standard input.'
+    ),
+    compression: str = typer.Option(
+        'auto',
+        '--compression',
+        help='Archive compression (`zstd`, `gzip`, `none` or `auto`).'
+    )
+):
+    '''
+    Import a tar archive as a new backup version.
+
+    Parameters:
+        ctx (typer.Context): Application context.
+        source (Path): Input archive path, `-` for standard input.
+        compression (str): Archive compression.
+    Raises:
+        typer.Exit: Expected import operation failed.
+    '''
+
+    try:
+        operator = cast(BackupOperator, ctx.obj)
+
+        if str(source) == '-':
+            backup_version = operator.import_archive(
+                cast(BinaryIO, sys.stdin.buffer),
+                compression
+            )
+        else:
+            with open(source, 'rb') as file:
+                backup_version = operator.import_archive(file, compression)
+
+        typer.echo(utils.format_configuration_string(backup_version))
+    except Exception as exception:
+        typer.echo(exception)
+        raise typer.Exit(code=1)
+
+
+@manifest_app.command(name='build', help='Build the manifest of a backup version.')
+def build_manifest(
+    ctx: typer.Context,
+    version: int = typer.Argument(
+        ...,
+        min=0,
+        help='Backup version.'
+    )
+):
+    '''
+    Build the binary manifest of a backup version and print its path.
+
+    Parameters:
+        ctx (typer.Context): Application context.
+        version (int): Backup version.
+    Raises:
+        typer.Exit: Expected build operation failed.
+    '''
+
+    try:
+        operator = cast(BackupOperator, ctx.obj)
+
+        typer.echo(operator.build_manifest(version))
+    except Exception as exception:
+        typer.echo(exception)
+        raise typer.Exit(code=1)
+
+
+@manifest_app.command(name='show', help='Show the manifest of a backup version.')
+def show_manifest(
+    ctx: typer.Context,
+    version: int = typer.Argument(
+        ...,
+        min=0,
+        help='Backup version.'
+    ),
+    path: str = typer.Option(
+        '',
+        '--path', '-p',
+        help='Relative path to show with its subtree. Defaults to everything.'
+    )
+):
+    '''
+    Show the manifest of a backup version, one `<mode> <size> <path>` line
+    per entry, sorted by path.
+
+    Parameters:
+        ctx (typer.Context): Application context.
+        version (int): Backup version.
+        path (str): Relative path to show with its subtree.
+    Raises:
+        typer.Exit: Expected manifest not found or show operation failed.
+    '''
+
+    try:
+        operator = cast(BackupOperator, ctx.obj)
+        manifest = operator.open_manifest(version)
+
+        if manifest is None:
+            raise ValueError(
+                f'no up to date manifest for backup version {version}, '
+                'build it first.'
+            )
+
+        with manifest:
+            for index in manifest.subtree(path.strip('/')):
+                record = manifest[index]
+                typer.echo(
+                    f'{stat.filemode(record.mode)} {record.size:>12} '
+                    f'{record.path}'
+                )
+    except Exception as exception:
+        typer.echo(exception)
+        raise typer.Exit(code=1)
+
+
 __all__ = [
     'app',
+    'manifest_app',
     'main',
     'list_versions',
-    'restore'
+    'restore',
+    'restore_worker',
+    'diff',
+    'list_directory',
+    'print_file',
+    'export_archive',
+    'import_archive',
+    'build_manifest',
+    'show_manifest'
 ]
@@ -3,23 +3,26 @@ Main command application.
 '''
 
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 
 import typer
 from pydantic import ValidationError
 
 from nfsops import ContextConfiguration, ContextType
-from nfsops.cli import backup, version
+from nfsops.cli import backup, queue, usage, version
+from nfsops.profiler import ProfileMode, Profiler
 
 #: Main command application.
 app = typer.Typer(add_completion=False)
 
 app.add_typer(version.app)
 app.add_typer(backup.app)
+app.add_typer(usage.app)
+app.add_typer(queue.app)
 
 
 @app.callback(help='Storage management for workspaces.')
-def main(
+def main(  # pylint: disable=R0913,R0917
     ctx: typer.Context,
     context: ContextType = typer.Option(
         ContextType.SUBPATH,
@@ -38,9 +41,37 @@ def main(
         None,
         '--path', '-p',
         envvar='NFSOPS_PATH',
-        exists=True,
         dir_okay=True,
-        help='Volume path. Defaults to `$HOME` for subpath context, `/var/nfs-shared` otherwise.'
+        help='Volume path, or `host:/path` for a remote volume. '
+        'Defaults to `$HOME` for subpath context, `/var/nfs-shared` otherwise.'
+    ),
+    lock_timeout: Optional[float] = typer.Option(
+        None,
+        '--lock-timeout',
+        envvar='NFSOPS_LOCK_TIMEOUT',
+        min=0,
+        help='Maximum time to wait for workspace and backup version locks in seconds. '
+        'Defaults to waiting forever.'
+    ),
+    profile: Optional[ProfileMode] = typer.Option(
+        None,
+        '--profile',
+        envvar='NFSOPS_PROFILE',
+        case_sensitive=False,
+        help='Profile the command (`cprofile`, `tracemalloc` or `wall`).'
+    ),
+    profile_output: Optional[Path] = typer.Option(
+        None,
+        '--profile-output',
+        envvar='NFSOPS_PROFILE_OUTPUT',
+        dir_okay=False,
+        help='Profile output path prefix. Defaults to `nfsops-profile-<pid>`.'
+    ),
+    profile_phases: List[str] = typer.Option(
+        [],
+        '--profile-phase',
+        envvar='NFSOPS_PROFILE_PHASES',
+        help='Operation phase to profile, e.g. `restore.transfer`. Defaults to the whole command.'
     )
 ):
     '''
@@ -51,7 +82,12 @@ def main(
         context (ContextType): Context type.
         root_template (Optional[str]): Path template for backup name reference in the root context.
         path (Optional[Path]):
-            Volume path. Defaults to `/var/nfs-shared` for subpath context, `$HOME` otherwise.
+            Volume path, or `host:/path` for a remote volume.
+            Defaults to `/var/nfs-shared` for subpath context, `$HOME` otherwise.
+        lock_timeout (Optional[float]): Maximum time to wait for locks in seconds.
+        profile (Optional[ProfileMode]): Profiling mode or `None`.
+        profile_output (Optional[Path]): Profile output path prefix.
+        profile_phases (List[str]): Operation phases to profile.
     Raises:
         typer.Exit: Expected parameters contain validation errors.
     '''
@@ -60,12 +96,19 @@ def main(
         ctx.obj = ContextConfiguration(
             context=context,
             root_template=root_template,
-            path=path
+            path=path,
+            lock_timeout=lock_timeout
         )
     except ValidationError as exception:
         typer.echo(exception)
         raise typer.Exit(code=1)
 
+    if profile is not None:
+        profiler = Profiler(profile, profile_output, profile_phases)
+        profiler.start()
+
+        ctx.call_on_close(lambda: typer.echo(profiler.stop(), err=True))
+
 
 __all__ = [
     'app',
@@ -0,0 +1,253 @@
+'''
+Queue command application.
+'''
+
+from pathlib import Path
+from typing import List, Optional, cast
+
+import typer
+
+from nfsops import (
+    ContextConfiguration,
+    QueueOperator,
+    RestoreConfiguration,
+    utils
+)
+
+#: Queue command application.
+app = typer.Typer(
+    name='queue',
+    help='Queue restore jobs and run them.',
+    add_completion=False
+)
+
+
+@app.callback(help='Queue restore jobs and run them.')
+def main(
+    ctx: typer.Context,
+    concurrency: int = typer.Option(
+        2,
+        '--concurrency',
+        envvar='NFSOPS_QUEUE_CONCURRENCY',
+        min=1,
+        help='Maximum number of jobs running at once across all workers.'
+    )
+):
+    '''
+    Create operator context.
+
+    Parameters:
+        ctx (typer.Context): Application context.
+        concurrency (int): Maximum number of jobs running at once across all workers.
+    Raises:
+        typer.Exit: Expected job queue available.
+    '''
+
+    try:
+        ctx.obj = QueueOperator(
+            cast(ContextConfiguration, ctx.obj),
+            concurrency
+        )
+    except Exception as exception:
+        typer.echo(exception)
+        raise typer.Exit(code=1)
+
+
+@app.command(help='Queue a restore job.')
+def submit(  # pylint: disable=R0913,R0917
+    ctx: typer.Context,
+    version: str = typer.Argument(
+        ...,
+        help='Single/initial backup version.'
+    ),
+    final_version: Optional[str] = typer.Argument(
+        None,
+        help='Final backup version.'
+    ),
+    name: Optional[str] = typer.Option(
+        None,
+        '--name', '-n',
+        help='Backup name for root context.'
+    ),
+    priority: int = typer.Option(
+        0,
+        '--priority',
+        help='Job priority, higher priorities run first and preempt lower ones.'
+    ),
+    destination: Optional[Path] = typer.Option(
+        None,
+        '--destination', '-d',
+        file_okay=False,
+        help='Destination path. Defaults to the volume path for subpath context.'
+    ),
+    prefixes: List[str] = typer.Option(
+        [],
+        '--prefix', '-P',
+        help='Relative path prefix to restore. Defaults to all paths.'
+    ),
+    staged: bool = typer.Option(
+        False,
+        '--staged',
+        help='Restore into a staging directory, never preempted.'
+    )
+):
+    '''
+    Queue a restore job.
+
+    Parameters:
+        ctx (typer.Context): Application context.
+        version (str): Single/initial backup version.
+        final_version (Optional[str]): Final backup version.
+        name (Optional[str]): Backup name for root context.
+        priority (int): Job priority.
+        destination (Optional[Path]): Destination path.
+        prefixes (List[str]): Relative path prefixes to restore.
+        staged (bool): Whether to restore into a staging directory first.
+    Raises:
+        typer.Exit: Expected parameters contain validation errors or submission failed.
+    '''
+
+    try:
+        operator = cast(QueueOperator, ctx.obj)
+        job = operator.submit(
+            RestoreConfiguration(
+                version=utils.parse_version(version),
+                final_version=utils.parse_version(final_version),
+                destination=destination,
+                prefixes=prefixes,
+                staged=staged
+            ),
+            name,
+            priority
+        )
+
+        typer.echo(job.id)
+    except Exception as exception:
+        typer.echo(exception)
+        raise typer.Exit(code=1)
+
+
+@app.command(help='Show restore jobs.')
+def status(
+    ctx: typer.Context,
+    job_id: Optional[int] = typer.Argument(
+        None,
+        min=1,
+        help='Job identifier. Defaults to all unfinished jobs.'
+    ),
+    show_all: bool = typer.Option(
+        False,
+        '--all', '-a',
+        help='Show finished jobs too.'
+    )
+):
+    '''
+    Show restore jobs.
+
+    Parameters:
+        ctx (typer.Context): Application context.
+        job_id (Optional[int]): Job identifier.
+        show_all (bool): Whether to show finished jobs too.
+    Raises:
+        typer.Exit: Expected job found.
+    '''
+
+    try:
+        operator = cast(QueueOperator, ctx.obj)
+
+        if job_id is not None:
+            jobs = [operator.queue.get_job(job_id)]
+        elif show_all:
+            jobs = operator.queue.list_jobs()
+        else:
+            jobs = operator.queue.list_jobs(
+                ['queued', 'running', 'cancelling']
+            )
+
+        for job in jobs:
+            typer.echo(utils.format_configuration_string(job))
+    except Exception as exception:
+        typer.echo(exception)
+        raise typer.Exit(code=1)
+
+
+@app.command(help='Cancel a restore job.')
+def cancel(
+    ctx: typer.Context,
+    job_id: int = typer.Argument(
+        ...,
+        min=1,
+        help='Job identifier.'
+    )
+):
+    '''
+    Cancel a restore job. Running jobs stop at their next checkpoint.
+
+    Parameters:
+        ctx (typer.Context): Application context.
+        job_id (int): Job identifier.
+    Raises:
+        typer.Exit: Expected job found and not finished.
+    '''
+
+    try:
+        operator = cast(QueueOperator, ctx.obj)
+        job = operator.queue.cancel(job_id)
+
+        typer.echo(utils.format_configuration_string(job))
+    except Exception as exception:
+        typer.echo(exception)
+        raise typer.Exit(code=1)
+
+
+@app.command(help='Run queued restore jobs.')
+def worker(
+    ctx: typer.Context,
+    threads: int = typer.Option(
+        1,
+        '--threads',
+        min=1,
+        help='Number of jobs run at once by this worker.'
+    ),
+    drain: bool = typer.Option(
+        False,
+        '--drain',
+        help='Exit once no job is queued.'
+    ),
+    poll_interval: float = typer.Option(
+        1.0,
+        '--poll-interval',
+        min=0.1,
+        help='Time between queue checks in seconds.'
+    )
+):
+    '''
+    Run queued restore jobs until interrupted.
+
+    Parameters:
+        ctx (typer.Context): Application context.
+        threads (int): Number of jobs run at once by this worker.
+        drain (bool): Whether to exit once no job is queued.
+        poll_interval (float): Time between queue checks in seconds.
+    Raises:
+        typer.Exit: Expected worker stopped without errors.
+    '''
+
+    try:
+        operator = cast(QueueOperator, ctx.obj)
+        operator.work(threads, drain, poll_interval)
+    except Exception as exception:
+        typer.echo(exception)
+        raise typer.Exit(code=1)
+    except KeyboardInterrupt:
+        typer.echo('worker stopped, interrupted jobs were queued again.')
+
+
+__all__ = [
+    'app',
+    'cancel',
+    'main',
+    'status',
+    'submit',
+    'worker'
+]
@@ -0,0 +1,138 @@
+'''
+Usage command application.
+'''
+
+import csv
+import json
+import sys
+from typing import List, cast
+
+import typer
+
+from nfsops import (
+    ContextConfiguration,
+    UsageConfiguration,
+    UsageOperator,
+    UsageReportConfiguration,
+    UsageSort,
+    utils
+)
+
+#: Usage command application.
+app = typer.Typer(
+    name='usage',
+    help='Report disk usage of workspaces and backup versions.',
+    add_completion=False
+)
+
+#: Usage report fields, in output order.
+REPORT_FIELDS = [
+    'name',
+    'version',
+    'path',
+    'files',
+    'apparent_bytes',
+    'allocated_bytes'
+]
+
+
+def echo_reports(reports: List[UsageReportConfiguration], output_format: str) -> None:
+    '''
+    Print usage reports.
+
+    Parameters:
+        reports (List[UsageReportConfiguration]): Usage reports.
+        output_format (str): Output format (`text`, `json` or `csv`).
+    Raises:
+        ValueError: Expected output format not supported.
+    '''
+
+    if output_format == 'text':
+        for report in reports:
+            typer.echo(utils.format_configuration_string(report))
+    elif output_format == 'json':
+        typer.echo(
+            json.dumps([
+                json.loads(report.json(exclude={'type'}))
+                for report in reports
+            ])
+        )
+    elif output_format == 'csv':
+        writer = csv.DictWriter(sys.stdout, REPORT_FIELDS)
+        writer.writeheader()
+
+        for report in reports:
+            writer.writerow(json.loads(report.json(exclude={'type'})))
+    else:
+        raise ValueError(
+            'invalid output format, use "text", "json" or "csv" instead.'
+        )
+
+
+@app.callback(
+    help='Report disk usage of workspaces and backup versions.',
+    invoke_without_command=True
+)
+def main(  # pylint: disable=R0913,R0917
+    ctx: typer.Context,
+    names: List[str] = typer.Option(
+        [],
+        '--name', '-n',
+        help='Workspace name for root context. Defaults to all workspaces.'
+    ),
+    summarize: bool = typer.Option(
+        False,
+        '--summarize', '-s',
+        help='Report one total per workspace.'
+    ),
+    sort: str = typer.Option(
+        'name',
+        '--sort',
+        help='Sort key (`name`, `apparent` or `allocated`).'
+    ),
+    refresh: bool = typer.Option(
+        False,
+        '--refresh',
+        help='Measure backup versions again instead of using cached results.'
+    ),
+    output_format: str = typer.Option(
+        'text',
+        '--format', '-f',
+        help='Output format (`text`, `json` or `csv`).'
+    )
+):
+    '''
+    Report disk usage of workspaces and backup versions.
+
+    Parameters:
+        ctx (typer.Context): Application context.
+        names (List[str]): Workspace names for root context.
+        summarize (bool): Whether to report one total per workspace.
+        sort (str): Sort key.
+        refresh (bool): Whether to measure backup versions again.
+        output_format (str): Output format.
+    Raises:
+        typer.Exit: Expected parameters contain validation errors or usage operation failed.
+    '''
+
+    try:
+        options = UsageConfiguration(
+            names=names,
+            summarize=summarize,
+            # Checked against the allowed sort keys by the model.
+            sort=cast(UsageSort, sort),
+            refresh=refresh
+        )
+        operator = UsageOperator(cast(ContextConfiguration, ctx.obj))
+
+        echo_reports(operator.usage(options), output_format)
+    except Exception as exception:
+        typer.echo(exception, err=True)
+        raise typer.Exit(code=1)
+
+
+__all__ = [
+    'app',
+    'main',
+    'echo_reports'
+]
@@ -4,7 +4,16 @@ Configuration package initialization.
 
 from .backup import BackupConfiguration
 from .backup_version import BackupVersionConfiguration
+from .concurrency_report import ConcurrencyReportConfiguration
+from .concurrency_step import ConcurrencyStepConfiguration
 from .configuration import Configuration
 from .context import ContextConfiguration
-from .restore import RestoreConfiguration
+from .export import ArchiveCompression, ExportConfiguration
+from .file_transfer_report import FileTransferReportConfiguration
+from .job import JobConfiguration
+from .restore import RestoreConfiguration, RestoreEngine
 from .restore_report import RestoreReportConfiguration
+from .sharded_restore import ShardedRestoreConfiguration
+from .usage import UsageConfiguration, UsageSort
+from .usage_report import UsageReportConfiguration
+from .version_range import VersionRangeConfiguration
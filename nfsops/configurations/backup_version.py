@@ -3,6 +3,7 @@ Backup version configuration model.
 '''
 
 from datetime import datetime
+from pathlib import Path
 from typing import Literal
 
 from pydantic import NonNegativeInt
@@ -21,6 +22,8 @@ class BackupVersionConfiguration(Configuration):
     version: NonNegativeInt
     #: Backup timestamp
     timestamp: datetime
+    #: Backup directory path.
+    path: Path
 
 
 __all__ = [
@@ -0,0 +1,38 @@
+'''
+Concurrency report configuration model.
+'''
+
+from typing import List, Literal
+
+from pydantic import PositiveInt
+
+from .concurrency_step import ConcurrencyStepConfiguration
+from .configuration import Configuration
+
+
+class ConcurrencyReportConfiguration(Configuration):
+    '''
+    Concurrency report configuration model.
+    '''
+
+    #: Configuration type.
+    type: Literal['concurrency-report'] = 'concurrency-report'
+    #: Tuned worker pool name (`scan` or `transfer`).
+    name: str
+    #: Initial number of workers.
+    initial_workers: PositiveInt
+    #: Final number of workers.
+    workers: PositiveInt
+    #: Number of workers of the step with the highest throughput, to start the next run with.
+    best_workers: PositiveInt
+    #: Minimum number of workers.
+    min_workers: PositiveInt
+    #: Maximum number of workers.
+    max_workers: PositiveInt
+    #: Measurements and adjustments, in order.
+    trace: List[ConcurrencyStepConfiguration] = []
+
+
+__all__ = [
+    'ConcurrencyReportConfiguration'
+]
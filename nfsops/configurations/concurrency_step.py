@@ -0,0 +1,35 @@
+'''
+Concurrency step configuration model.
+'''
+
+from typing import Literal
+
+from pydantic import NonNegativeFloat, NonNegativeInt, PositiveInt
+
+from .configuration import Configuration
+
+
+class ConcurrencyStepConfiguration(Configuration):
+    '''
+    Concurrency step configuration model.
+    '''
+
+    #: Configuration type.
+    type: Literal['concurrency-step'] = 'concurrency-step'
+    #: Time since the tuner started in seconds.
+    seconds: NonNegativeFloat
+    #: Number of workers during the measurement interval.
+    workers: PositiveInt
+    #: Completed units (bytes or listed entries) per second.
+    throughput: NonNegativeFloat
+    #: Mean operation latency in seconds.
+    latency: NonNegativeFloat
+    #: Number of failed operations.
+    failures: NonNegativeInt = 0
+    #: Adjustment made after the interval.
+    action: Literal['increase', 'decrease', 'revert', 'hold']
+
+
+__all__ = [
+    'ConcurrencyStepConfiguration'
+]
@@ -2,8 +2,13 @@
 Base configuration model.
 '''
 
+from typing import Any, Type, TypeVar
+
 from pydantic import BaseModel
 
+#: Configuration model type.
+ConfigurationT = TypeVar('ConfigurationT', bound='Configuration')
+
 
 class Configuration(BaseModel):
     '''
@@ -18,6 +23,26 @@ class Configuration(BaseModel):
         #: Whether to perform validation on assignment to attributes.
         validate_assignment = True
 
+    @classmethod
+    def trusted(
+        cls: Type[ConfigurationT],
+        **values: Any
+    ) -> ConfigurationT:
+        '''
+        Create a model from values of internal sources, skipping validation.
+
+        Values must already have the field types, e.g. `stat` results or
+        enumeration indexes, defaults are filled in. Use it for models built
+        in bulk by operators, never for user input.
+
+        Parameters:
+            **values (Any): Field values.
+        Returns:
+            ConfigurationT: A model instance.
+        '''
+
+        return cls.construct(**values)
+
 
 __all__ = [
     'Configuration'
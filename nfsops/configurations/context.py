@@ -3,9 +3,16 @@ Context configuration model.
 '''
 
 import os
+from pathlib import Path
 from typing import Any, Dict, Literal, Optional
 
-from pydantic import DirectoryPath, Field, validator
+from pydantic import (
+    Field,
+    NonNegativeFloat,
+    PositiveFloat,
+    root_validator,
+    validator
+)
 
 from .. import utils
 from ..context_type import ContextType
@@ -29,10 +36,28 @@ class ContextConfiguration(Configuration):
     root_template: Optional[str] = Field(
         default_factory=lambda: os.getenv('NFSOPS_ROOT_TEMPLATE')
     )
-    #: Volume path. Defaults to `$HOME` for subpath context, `/var/nfs-shared` otherwise.
-    path: Optional[DirectoryPath] = Field(
+    #: Volume path or `host:/path`. Defaults to `$HOME` (subpath context) or `/var/nfs-shared`.
+    path: Optional[Path] = Field(
         default_factory=lambda: os.getenv('NFSOPS_PATH')
     )
+    #: Remote host of the volume, set from `host:/path` volume paths, `None` for a local volume.
+    host: Optional[str] = None
+    #: Maximum time to wait for operation locks in seconds, `None` waits forever.
+    lock_timeout: Optional[NonNegativeFloat] = Field(
+        default_factory=lambda: os.getenv('NFSOPS_LOCK_TIMEOUT') or None
+    )
+    #: Operation lock lease duration in seconds.
+    lock_lease: PositiveFloat = Field(
+        default_factory=lambda: os.getenv('NFSOPS_LOCK_LEASE', '60')
+    )
+
+    class Config:
+        '''
+        Model configuration properties.
+        '''
+
+        #: Whether to validate default values, read from the environment.
+        validate_all = True
 
     @validator('root_template', always=True)
     @classmethod
@@ -65,18 +90,18 @@ class ContextConfiguration(Configuration):
     @classmethod
     def validate_path(
         cls,
-        value: Optional[DirectoryPath],
+        value: Optional[Path],
         values: Dict[str, Any]
-    ) -> Optional[DirectoryPath]:
+    ) -> Optional[Path]:
         '''
         Return the default volume path based on context if the value is "None",
         original value otherwise.
 
         Parameters:
-            value (Optional[DirectoryPath]): Directory path or `None`.
+            value (Optional[Path]): Directory path or `None`.
             values (Dict[str, Any]): Dictionary containing all parameter values.
         Returns:
-            Optional[DirectoryPath]: A default directory path or `None`.
+            Optional[Path]: A default directory path or `None`.
         '''
 
         if value is None:
@@ -93,6 +118,33 @@ class ContextConfiguration(Configuration):
 
         return value
 
+    @root_validator(skip_on_failure=True)
+    @classmethod
+    def validate_host(cls, values: Dict[str, Any]) -> Dict[str, Any]:
+        '''
+        Split remote `host:/path` volume paths into host and path, and check
+        that local volume paths are directories.
+
+        Parameters:
+            values (Dict[str, Any]): Dictionary containing all parameter values.
+        Returns:
+            Dict[str, Any]: Parameter values with the host set for remote volumes.
+        Raises:
+            ValueError: Expected volume path is a directory or a valid remote path.
+        '''
+
+        path = values['path']
+
+        if values['host'] is None:
+            values['host'], remote_path = utils.parse_remote_path(str(path))
+
+            if values['host'] is not None:
+                values['path'] = Path(remote_path)
+            elif not path.is_dir():
+                raise ValueError(f'volume path "{path}" is not a directory.')
+
+        return values
+
 
 __all__ = [
     'ContextConfiguration'
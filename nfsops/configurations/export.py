@@ -0,0 +1,27 @@
+'''
+Export configuration model.
+'''
+
+from typing import Literal
+
+from .version_range import VersionRangeConfiguration
+
+#: Archive compression name.
+ArchiveCompression = Literal['zstd', 'gzip', 'none']
+
+
+class ExportConfiguration(VersionRangeConfiguration):
+    '''
+    Export configuration model.
+    '''
+
+    #: Configuration type.
+    type: Literal['export'] = 'export'
+    #: Archive compression.
+    compression: ArchiveCompression = 'zstd'
+
+
+__all__ = [
+    'ArchiveCompression',
+    'ExportConfiguration'
+]
@@ -0,0 +1,33 @@
+'''
+File transfer report configuration model.
+'''
+
+from typing import Literal
+
+from pydantic import NonNegativeFloat, NonNegativeInt
+
+from .configuration import Configuration
+
+
+class FileTransferReportConfiguration(Configuration):
+    '''
+    File transfer report configuration model.
+    '''
+
+    #: Configuration type.
+    type: Literal['file-transfer-report'] = 'file-transfer-report'
+    #: Relative file path.
+    path: str
+    #: File size in bytes.
+    bytes: NonNegativeInt
+    #: Number of copied bytes, excluding holes.
+    data_bytes: NonNegativeInt
+    #: Number of copied chunks.
+    chunks: NonNegativeInt
+    #: Copy duration in seconds.
+    seconds: NonNegativeFloat
+
+
+__all__ = [
+    'FileTransferReportConfiguration'
+]
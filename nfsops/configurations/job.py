@@ -0,0 +1,61 @@
+'''
+Restore job configuration model.
+'''
+
+from datetime import datetime
+from typing import Literal, Optional
+
+from pydantic import NonNegativeInt, PositiveInt
+
+from .configuration import Configuration
+from .restore import RestoreConfiguration
+from .restore_report import RestoreReportConfiguration
+
+#: Restore job state.
+JobState = Literal[
+    'queued',
+    'running',
+    'cancelling',
+    'done',
+    'failed',
+    'cancelled'
+]
+
+
+class JobConfiguration(Configuration):
+    '''
+    Restore job configuration model.
+    '''
+
+    #: Configuration type.
+    type: Literal['job'] = 'job'
+    #: Job identifier.
+    id: PositiveInt
+    #: Backup name for root context, `None` for subpath context.
+    name: Optional[str] = None
+    #: Job priority, higher priorities run first.
+    priority: int = 0
+    #: Job state.
+    state: JobState = 'queued'
+    #: Restore configuration.
+    options: RestoreConfiguration
+    #: Submission timestamp.
+    submitted: datetime
+    #: Start timestamp of the last run.
+    started: Optional[datetime] = None
+    #: End timestamp.
+    finished: Optional[datetime] = None
+    #: Worker running the job.
+    worker: Optional[str] = None
+    #: Number of times the job was preempted by higher priority jobs.
+    preemptions: NonNegativeInt = 0
+    #: Restore report of the last run.
+    report: Optional[RestoreReportConfiguration] = None
+    #: Error message of failed jobs.
+    error: Optional[str] = None
+
+
+__all__ = [
+    'JobConfiguration',
+    'JobState'
+]
@@ -2,59 +2,96 @@
 Restore configuration model.
 '''
 
-from typing import Any, Dict, Literal, Optional, Union
+from pathlib import Path
+from typing import Any, Dict, List, Literal, Optional
 
-from pydantic import NonNegativeInt, validator
+from pydantic import NonNegativeInt, PositiveFloat, PositiveInt, validator
 
-from .configuration import Configuration
+from .version_range import VersionRangeConfiguration
 
+#: Restore transfer engine name.
+RestoreEngine = Literal['auto', 'rsync', 'native']
 
-class RestoreConfiguration(Configuration):
+
+class RestoreConfiguration(VersionRangeConfiguration):
     '''
     Restore configuration model.
     '''
 
     #: Configuration type.
     type: Literal['restore'] = 'restore'
-    #: Single/initial backup version.
-    version: Union[Literal['*'], NonNegativeInt]
-    #: Final backup version.
-    final_version: Optional[Union[Literal['*'], NonNegativeInt]] = None
+    #: Destination path. Defaults to the volume path for subpath context.
+    destination: Optional[Path] = None
+    #: Relative path prefixes to restore. Defaults to all paths.
+    prefixes: List[str] = []
+    #: Glob patterns selecting files to restore. Defaults to all files.
+    include: List[str] = []
+    #: Glob patterns excluding files and directories from restore.
+    exclude: List[str] = []
+    #: Transfer engine, `auto` uses `rsync` if available and `native` otherwise.
+    engine: RestoreEngine = 'auto'
+    #: Minimum size in bytes of files copied in parallel chunks, `0` disables.
+    chunk_threshold: NonNegativeInt = 128 << 20
+    #: Chunk size in bytes for parallel chunked copies.
+    chunk_size: PositiveInt = 32 << 20
+    #: Whether to restore into a staging directory swapped into place once verified.
+    staged: bool = False
+    #: Maximum number of retries of each failed transfer step, `0` disables.
+    retries: NonNegativeInt = 5
+    #: Upper bound in seconds of the first backoff delay between retries.
+    retry_delay: PositiveFloat = 0.5
+    #: Maximum running time in seconds of transfer subprocesses, `None` waits forever.
+    timeout: Optional[PositiveFloat] = None
+    #: Number of consecutive failures aborting the restore.
+    failure_threshold: PositiveInt = 50
+    #: Whether to split the restore into shards run by `restore-worker` processes too.
+    sharded: bool = False
+    #: Target size in bytes of restore shards.
+    shard_size: PositiveInt = 1 << 30
+    #: Whether to apply the source ownership, only when running as root.
+    preserve_ownership: bool = True
+    #: Destination user IDs by source user ID, key `-1` matching any other user.
+    uid_map: Dict[int, NonNegativeInt] = {}
+    #: Destination group IDs by source group ID, key `-1` matching any other group.
+    gid_map: Dict[int, NonNegativeInt] = {}
+    #: Whether to restore extended attributes.
+    xattrs: bool = False
+    #: Number of file transfer workers. Defaults to four per CPU, at most 32.
+    workers: Optional[PositiveInt] = None
+    #: Number of directory listing workers. Defaults to four per CPU, at most 32.
+    scan_workers: Optional[PositiveInt] = None
+    #: Whether to adjust worker counts to the measured throughput and latency.
+    autotune: bool = False
+    #: Minimum number of workers of autotuned restores.
+    min_workers: PositiveInt = 1
+    #: Maximum number of workers of autotuned restores.
+    max_workers: PositiveInt = 64
 
-    @validator('final_version', always=True)
+    @validator('max_workers')
     @classmethod
-    def validate_root_template(
-        cls,
-        value: Optional[Union[Literal['*'], NonNegativeInt]],
-        values: Dict[str, Any]
-    ) -> Optional[Union[Literal['*'], NonNegativeInt]]:
+    def validate_max_workers(cls, value: int, values: Dict[str, Any]) -> int:
         '''
-        Return original value if the range of backup versions is valid,
-        raise exception otherwise.
+        Return original value if it is not lower than the minimum number of
+        workers, raise exception otherwise.
 
         Parameters:
-            value (Optional[Union[Literal['*'], NonNegativeInt]]): Final backup version or `None`.
+            value (int): Maximum number of workers.
             values (Dict[str, Any]): Dictionary containing all parameter values.
         Returns:
-            Optional[Union[Literal['*'], NonNegativeInt]]: A valid final backup version.
+            int: A valid maximum number of workers.
         Raises:
-            ValueError: Expected range of backup versions is invalid.
+            ValueError: Expected value not lower than "min_workers" value.
         '''
 
-        if value is None:
-            return value
-
-        if isinstance(value, str) or isinstance(values['version'], str):
-            return value
-
-        if value < values['version']:
+        if 'min_workers' in values and value < values['min_workers']:
             raise ValueError(
-                'parameter value must be greater than "version" value.'
+                'parameter value must not be lower than "min_workers" value.'
             )
 
         return value
 
 
 __all__ = [
-    'RestoreConfiguration'
+    'RestoreConfiguration',
+    'RestoreEngine'
 ]
@@ -2,11 +2,13 @@
 Restore report configuration model.
 '''
 
-from typing import Literal, Optional
+from typing import List, Literal, Optional
 
 from pydantic import NonNegativeInt
 
+from .concurrency_report import ConcurrencyReportConfiguration
 from .configuration import Configuration
+from .file_transfer_report import FileTransferReportConfiguration
 
 
 class RestoreReportConfiguration(Configuration):
@@ -20,6 +22,28 @@ class RestoreReportConfiguration(Configuration):
     version: NonNegativeInt
     #: Final backup version.
     final_version: Optional[NonNegativeInt] = None
+    #: Number of restored entries (files, directories and links).
+    files: NonNegativeInt = 0
+    #: Number of restored bytes.
+    bytes: NonNegativeInt = 0
+    #: Transfer engine name.
+    engine: Optional[str] = None
+    #: Reports of the files copied in parallel chunks.
+    chunked_files: List[FileTransferReportConfiguration] = []
+    #: Number of ownership, permission, timestamp and extended attribute updates.
+    metadata_calls: NonNegativeInt = 0
+    #: Worker counts and convergence traces of autotuned restores.
+    concurrency: List[ConcurrencyReportConfiguration] = []
+    #: Number of retried transfer steps.
+    retries: NonNegativeInt = 0
+    #: Whether the restore stopped early, leaving a partial restore to resume.
+    stopped: bool = False
+    #: Staging directory swap method (`exchange` or `rename`), `None` for direct restores.
+    swap: Optional[Literal['exchange', 'rename']] = None
+    #: Number of shards of sharded restores.
+    shards: NonNegativeInt = 0
+    #: Names of the processes that restored shards, sorted.
+    workers: List[str] = []
 
 
 __all__ = [
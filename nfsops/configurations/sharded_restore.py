@@ -0,0 +1,37 @@
+'''
+Sharded restore configuration model.
+'''
+
+from pathlib import Path
+from typing import List, Literal
+
+from pydantic import NonNegativeInt
+
+from .configuration import Configuration
+from .restore import RestoreConfiguration
+
+
+class ShardedRestoreConfiguration(Configuration):
+    '''
+    Sharded restore configuration model.
+    '''
+
+    #: Configuration type.
+    type: Literal['sharded-restore'] = 'sharded-restore'
+    #: Restore configuration.
+    options: RestoreConfiguration
+    #: Backup version directories, newest first.
+    sources: List[Path]
+    #: Destination directory.
+    destination: Path
+    #: Backup version numbers of the sources.
+    versions: List[NonNegativeInt]
+    #: Number of shards.
+    shards: NonNegativeInt = 0
+    #: Name of the coordinating process.
+    coordinator: str
+
+
+__all__ = [
+    'ShardedRestoreConfiguration'
+]
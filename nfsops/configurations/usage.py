@@ -0,0 +1,33 @@
+'''
+Usage configuration model.
+'''
+
+from typing import List, Literal
+
+from .configuration import Configuration
+
+#: Usage report sort key.
+UsageSort = Literal['name', 'apparent', 'allocated']
+
+
+class UsageConfiguration(Configuration):
+    '''
+    Usage configuration model.
+    '''
+
+    #: Configuration type.
+    type: Literal['usage'] = 'usage'
+    #: Workspace names for root context. Defaults to all workspaces.
+    names: List[str] = []
+    #: Whether to report one total per workspace instead of one row per tree.
+    summarize: bool = False
+    #: Sort key, sizes are sorted in descending order.
+    sort: UsageSort = 'name'
+    #: Whether to measure backup versions again instead of using cached results.
+    refresh: bool = False
+
+
+__all__ = [
+    'UsageConfiguration',
+    'UsageSort'
+]
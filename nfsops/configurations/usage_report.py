@@ -0,0 +1,36 @@
+'''
+Usage report configuration model.
+'''
+
+from pathlib import Path
+from typing import Literal, Optional
+
+from pydantic import NonNegativeInt
+
+from .configuration import Configuration
+
+
+class UsageReportConfiguration(Configuration):
+    '''
+    Usage report configuration model.
+    '''
+
+    #: Configuration type.
+    type: Literal['usage-report'] = 'usage-report'
+    #: Workspace name.
+    name: str
+    #: Backup version, `None` for the workspace itself or workspace totals.
+    version: Optional[NonNegativeInt] = None
+    #: Measured directory path, `None` for workspace totals.
+    path: Optional[Path] = None
+    #: Number of entries (files, directories and links), hard links counted once.
+    files: NonNegativeInt = 0
+    #: Apparent size in bytes.
+    apparent_bytes: NonNegativeInt = 0
+    #: Allocated size in bytes.
+    allocated_bytes: NonNegativeInt = 0
+
+
+__all__ = [
+    'UsageReportConfiguration'
+]
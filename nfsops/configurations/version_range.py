@@ -0,0 +1,58 @@
+'''
+Backup version range configuration model.
+'''
+
+from typing import Any, Dict, Literal, Optional, Union
+
+from pydantic import NonNegativeInt, validator
+
+from .configuration import Configuration
+
+
+class VersionRangeConfiguration(Configuration):
+    '''
+    Backup version range configuration model.
+    '''
+
+    #: Single/initial backup version.
+    version: Union[Literal['*'], NonNegativeInt]
+    #: Final backup version.
+    final_version: Optional[Union[Literal['*'], NonNegativeInt]] = None
+
+    @validator('final_version', always=True)
+    @classmethod
+    def validate_final_version(
+        cls,
+        value: Optional[Union[Literal['*'], NonNegativeInt]],
+        values: Dict[str, Any]
+    ) -> Optional[Union[Literal['*'], NonNegativeInt]]:
+        '''
+        Return original value if the range of backup versions is valid,
+        raise exception otherwise.
+
+        Parameters:
+            value (Optional[Union[Literal['*'], NonNegativeInt]]): Final backup version or `None`.
+            values (Dict[str, Any]): Dictionary containing all parameter values.
+        Returns:
+            Optional[Union[Literal['*'], NonNegativeInt]]: A valid final backup version.
+        Raises:
+            ValueError: Expected range of backup versions is invalid.
+        '''
+
+        if value is None or 'version' not in values:
+            return value
+
+        if isinstance(value, str) or isinstance(values['version'], str):
+            return value
+
+        if value < values['version']:
+            raise ValueError(
+                'parameter value must be greater than "version" value.'
+            )
+
+        return value
+
+
+__all__ = [
+    'VersionRangeConfiguration'
+]
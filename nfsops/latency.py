@@ -0,0 +1,423 @@
+'''
+Latency-injecting filesystem functions.
+'''
+
+import builtins
+import os
+import threading
+import time
+from collections import Counter
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Union
+)
+
+
+class LatencyProfile(NamedTuple):
+    '''
+    Simulated filesystem latency profile.
+    '''
+
+    #: Profile name.
+    name: str
+    #: Round-trip time of `stat` and `lstat` calls in seconds.
+    stat: float = 0.0
+    #: Round-trip time of `open` calls in seconds.
+    open: float = 0.0
+    #: Round-trip time of each batch of directory entries in seconds.
+    readdir: float = 0.0
+    #: Number of directory entries, with their attributes, per batch.
+    readdir_batch: int = 128
+    #: Round-trip time of `rename` and `replace` calls in seconds.
+    rename: float = 0.0
+    #: Read throughput in bytes per second, `None` for unlimited.
+    read_bandwidth: Optional[float] = None
+    #: Write throughput in bytes per second, `None` for unlimited.
+    write_bandwidth: Optional[float] = None
+
+
+#: Latency profile presets. NFSv3 on a LAN pays about one 0.3ms round trip
+#: per call over 1 GbE; NFSv4.1 over a WAN pays 20ms round trips, two for
+#: opens (OPEN and GETATTR for close-to-open consistency), over 100 Mbit/s.
+LATENCY_PROFILES: Dict[str, LatencyProfile] = {
+    profile.name: profile for profile in (
+        LatencyProfile('local'),
+        LatencyProfile(
+            'lan-nfsv3',
+            stat=0.0003,
+            open=0.0003,
+            readdir=0.0003,
+            rename=0.0003,
+            read_bandwidth=110e6,
+            write_bandwidth=110e6
+        ),
+        LatencyProfile(
+            'wan-nfsv4.1',
+            stat=0.02,
+            open=0.04,
+            readdir=0.02,
+            rename=0.02,
+            read_bandwidth=12.5e6,
+            write_bandwidth=12.5e6
+        )
+    )
+}
+
+
+class DirectoryListing:
+    '''
+    Directory listing object, returned instead of `os.scandir` iterators.
+    '''
+
+    def __init__(self, entries: Iterable['os.DirEntry[str]']):
+        '''
+        Initialize directory listing object.
+
+        Parameters:
+            entries (Iterable[os.DirEntry[str]]): Directory entries.
+        '''
+
+        self._entries = iter(entries)
+
+    def __iter__(self) -> Iterator['os.DirEntry[str]']:
+        return self
+
+    def __next__(self) -> 'os.DirEntry[str]':
+        return next(self._entries)
+
+    def __enter__(self) -> 'DirectoryListing':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        '''
+        Discard the remaining entries.
+        '''
+
+        self._entries = iter(())
+
+
+class LatencyShim:  # pylint: disable=R0902
+    '''
+    Latency-injecting filesystem shim object.
+
+    Replace the `os` functions used by operators, and the `open` builtin,
+    while used as context manager, so every `stat`, `open`, directory
+    listing and rename under the simulated mount waits for the round-trip
+    time of the profile, and reads and writes of descriptors opened there
+    share throughput-capped links. Directory entries carry their attributes,
+    as with READDIRPLUS. Round trips and bytes are counted even with a
+    `scale` of `0`, which disables the waits.
+    '''
+
+    #: Latency profile.
+    profile: LatencyProfile
+    #: Latency multiplier, `0` only counts round trips.
+    scale: float
+    #: Absolute paths of the simulated mounts, all paths if empty.
+    prefixes: List[str]
+    #: Number of round trips by call type (`stat`, `open`, `readdir` and `rename`).
+    round_trips: Counter
+    #: Number of bytes by direction (`read` and `write`).
+    transferred: Counter
+
+    def __init__(
+        self,
+        profile: Union[str, LatencyProfile] = 'lan-nfsv3',
+        scale: float = 1.0,
+        prefixes: Sequence['os.PathLike[str]'] = ()
+    ):
+        '''
+        Initialize latency-injecting filesystem shim object.
+
+        Parameters:
+            profile (Union[str, LatencyProfile]): Latency profile or preset name.
+            scale (float): Latency multiplier, `0` only counts round trips.
+            prefixes (Sequence[os.PathLike[str]]): Simulated mount paths, all paths if empty.
+        Raises:
+            KeyError: Expected latency profile preset found.
+        '''
+
+        self.profile = LATENCY_PROFILES[profile] \
+            if isinstance(profile, str) else profile
+        self.scale = scale
+        self.prefixes = [
+            os.path.join(os.path.abspath(prefix), '') for prefix in prefixes
+        ]
+        self.round_trips = Counter()
+        self.transferred = Counter()
+
+        self._lock = threading.Lock()
+        self._descriptors: Set[int] = set()
+        self._links: Dict[str, float] = {'read': 0.0, 'write': 0.0}
+        self._originals: Dict[str, Callable] = {}
+
+    def __enter__(self) -> 'LatencyShim':
+        self.install()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.uninstall()
+
+    def install(self) -> None:
+        '''
+        Replace the filesystem functions.
+
+        Raises:
+            RuntimeError: Expected shim not installed yet.
+        '''
+
+        if self._originals:
+            raise RuntimeError('latency shim already installed.')
+
+        replacements: Dict[str, Callable] = {
+            'stat': self._stat,
+            'lstat': self._lstat,
+            'scandir': self._scandir,
+            'listdir': self._listdir,
+            'open': self._open,
+            'close': self._close,
+            'rename': self._rename,
+            'replace': self._replace,
+            'read': self._read,
+            'pread': self._pread,
+            'write': self._write,
+            'pwrite': self._pwrite,
+            'sendfile': self._sendfile
+        }
+
+        if hasattr(os, 'copy_file_range'):
+            replacements['copy_file_range'] = self._copy_file_range
+
+        for name, replacement in replacements.items():
+            self._originals[name] = getattr(os, name)
+            setattr(os, name, replacement)
+
+        self._originals['builtins.open'] = builtins.open
+        builtins.open = self._open_file
+
+    def uninstall(self) -> None:
+        '''
+        Restore the original filesystem functions.
+        '''
+
+        builtins.open = self._originals.pop('builtins.open', builtins.open)
+
+        for name, original in self._originals.items():
+            setattr(os, name, original)
+
+        self._originals.clear()
+
+    def matches(self, path: Any) -> bool:
+        '''
+        Check whether a path or descriptor belongs to the simulated mount.
+
+        Parameters:
+            path (Any): Path, descriptor or `None`.
+        Returns:
+            bool: `True` if calls on the path are delayed, `False` otherwise.
+        '''
+
+        if isinstance(path, int):
+            return path in self._descriptors
+
+        if not self.prefixes:
+            return True
+
+        try:
+            absolute = os.path.abspath(os.fsdecode(path))
+        except TypeError:
+            return False
+
+        return any(
+            os.path.join(absolute, '').startswith(prefix)
+            for prefix in self.prefixes
+        )
+
+    def wait(self, call: str, latency: float, count: int = 1) -> None:
+        '''
+        Count round trips and wait for them.
+
+        Parameters:
+            call (str): Call type.
+            latency (float): Round-trip time in seconds.
+            count (int): Number of round trips.
+        '''
+
+        with self._lock:
+            self.round_trips[call] += count
+
+        if latency and self.scale:
+            time.sleep(latency * count * self.scale)
+
+    def throttle(self, direction: str, size: int) -> None:
+        '''
+        Count transferred bytes and wait for their turn on the shared link.
+
+        Parameters:
+            direction (str): Transfer direction (`read` or `write`).
+            size (int): Number of bytes.
+        '''
+
+        bandwidth = self.profile.read_bandwidth if direction == 'read' \
+            else self.profile.write_bandwidth
+
+        with self._lock:
+            self.transferred[direction] += size
+
+            if not bandwidth or not self.scale or size <= 0:
+                return
+
+            start = max(time.monotonic(), self._links[direction])
+            end = start + size / bandwidth * self.scale
+            self._links[direction] = end
+
+        time.sleep(max(0.0, end - time.monotonic()))
+
+    def _stat(self, path: Any, *args: Any, **kwargs: Any) -> os.stat_result:
+        if self.matches(path):
+            self.wait('stat', self.profile.stat)
+
+        return self._originals['stat'](path, *args, **kwargs)
+
+    def _lstat(self, path: Any, *args: Any, **kwargs: Any) -> os.stat_result:
+        if self.matches(path):
+            self.wait('stat', self.profile.stat)
+
+        return self._originals['lstat'](path, *args, **kwargs)
+
+    def _list(self, path: Any, entries: int) -> None:
+        if self.matches(path):
+            self.wait(
+                'readdir',
+                self.profile.readdir,
+                1 + entries // self.profile.readdir_batch
+            )
+
+    def _scandir(self, path: Any = '.') -> DirectoryListing:
+        with self._originals['scandir'](path) as iterator:
+            entries = list(iterator)
+
+        self._list(path, len(entries))
+
+        return DirectoryListing(entries)
+
+    def _listdir(self, path: Any = '.') -> List[str]:
+        names = self._originals['listdir'](path)
+        self._list(path, len(names))
+
+        return names
+
+    def _open(self, path: Any, *args: Any, **kwargs: Any) -> int:
+        matches = self.matches(path)
+
+        if matches:
+            self.wait('open', self.profile.open)
+
+        descriptor = self._originals['open'](path, *args, **kwargs)
+
+        if matches:
+            with self._lock:
+                self._descriptors.add(descriptor)
+
+        return descriptor
+
+    def _open_file(self, file: Any, *args: Any, **kwargs: Any) -> Any:
+        if not isinstance(file, int) and self.matches(file):
+            self.wait('open', self.profile.open)
+
+        return self._originals['builtins.open'](file, *args, **kwargs)
+
+    def _close(self, descriptor: int) -> None:
+        with self._lock:
+            self._descriptors.discard(descriptor)
+
+        self._originals['close'](descriptor)
+
+    def _rename(self, source: Any, *args: Any, **kwargs: Any) -> None:
+        if self.matches(source):
+            self.wait('rename', self.profile.rename)
+
+        self._originals['rename'](source, *args, **kwargs)
+
+    def _replace(self, source: Any, *args: Any, **kwargs: Any) -> None:
+        if self.matches(source):
+            self.wait('rename', self.profile.rename)
+
+        self._originals['replace'](source, *args, **kwargs)
+
+    def _transfer(
+        self,
+        name: str,
+        descriptors: Dict[str, int],
+        *args: Any
+    ) -> Any:
+        result = self._originals[name](*args)
+        size = len(result) if isinstance(result, bytes) else result
+
+        for direction, descriptor in descriptors.items():
+            if self.matches(descriptor):
+                self.throttle(direction, size)
+
+        return result
+
+    def _read(self, descriptor: int, size: int) -> bytes:
+        return self._transfer('read', {'read': descriptor}, descriptor, size)
+
+    def _pread(self, descriptor: int, size: int, offset: int) -> bytes:
+        return self._transfer(
+            'pread',
+            {'read': descriptor},
+            descriptor,
+            size,
+            offset
+        )
+
+    def _write(self, descriptor: int, data: bytes) -> int:
+        return self._transfer('write', {'write': descriptor}, descriptor, data)
+
+    def _pwrite(self, descriptor: int, data: bytes, offset: int) -> int:
+        return self._transfer(
+            'pwrite',
+            {'write': descriptor},
+            descriptor,
+            data,
+            offset
+        )
+
+    def _sendfile(self, destination: int, source: int, *args: Any) -> int:
+        return self._transfer(
+            'sendfile',
+            {'read': source, 'write': destination},
+            destination,
+            source,
+            *args
+        )
+
+    def _copy_file_range(self, source: int, destination: int, *args: Any) -> int:
+        return self._transfer(
+            'copy_file_range',
+            {'read': source, 'write': destination},
+            source,
+            destination,
+            *args
+        )
+
+
+__all__ = [
+    'DirectoryListing',
+    'LATENCY_PROFILES',
+    'LatencyProfile',
+    'LatencyShim'
+]
@@ -3,4 +3,28 @@ Operator package initialization.
 '''
 
 from .backup import BackupOperator
+from .file_table import FileRecord, FileTable, FileTableTree
+from .job_queue import JobQueue, QueueOperator
+from .manifest import Manifest, ManifestRecord, write_manifest
+from .merged_view import MergedView, get_merged_view
+from .metadata import MetadataStage, OwnershipMap
 from .operator import Operator
+from .scheduler import IOScheduler
+from .shard import ShardedRestore
+from .stat_cache import (
+    ScandirPrefetcher,
+    StatCache,
+    StatCacheInfo,
+    get_default_stat_cache
+)
+from .transfer import (
+    NativeTransferEngine,
+    RsyncTransferEngine,
+    TransferEngine,
+    get_restore_engine,
+    get_transfer_engine
+)
+from .transport import RemoteStatCache, SshTransport, get_transport
+from .usage import UsageOperator
+from .version_index import VersionIndex
+from .watcher import VersionWatcher
@@ -0,0 +1,383 @@
+'''
+Backup archive functions.
+'''
+
+import gzip
+import io
+import os
+import shutil
+import stat
+import subprocess
+import tarfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path, PurePosixPath
+from typing import BinaryIO, Iterable, Iterator, Optional, Tuple, cast
+
+from .. import utils
+from .merge import MergedEntry
+
+#: Zstandard frame magic number.
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+#: Gzip member magic number.
+GZIP_MAGIC = b'\x1f\x8b'
+
+
+def _get_fileno(stream: BinaryIO) -> Optional[int]:
+    '''
+    Return the file descriptor of a stream, if any.
+
+    Parameters:
+        stream (BinaryIO): Binary stream.
+    Returns:
+        Optional[int]: A file descriptor or `None`.
+    '''
+
+    try:
+        return stream.fileno()
+    except (AttributeError, io.UnsupportedOperation):
+        return None
+
+
+def _copy_in_background(source: BinaryIO, target: BinaryIO) -> threading.Thread:
+    '''
+    Copy a stream into another one in a background thread, closing the target.
+
+    Parameters:
+        source (BinaryIO): Source stream.
+        target (BinaryIO): Target stream.
+    Returns:
+        threading.Thread: A started thread.
+    '''
+
+    def copy():
+        try:
+            shutil.copyfileobj(source, target, 1024 * 1024)
+        except BrokenPipeError:
+            pass
+        finally:
+            try:
+                target.close()
+            except BrokenPipeError:
+                pass
+
+    thread = threading.Thread(target=copy, daemon=True)
+    thread.start()
+
+    return thread
+
+
+class _NonClosingWriter(io.RawIOBase):
+    '''
+    Writable stream wrapper leaving the wrapped stream open.
+    '''
+
+    def __init__(self, stream: BinaryIO):
+        super().__init__()
+        self._stream = stream
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:  # type: ignore
+        self._stream.write(data)
+
+        return len(data)
+
+    def close(self) -> None:
+        self._stream.flush()
+        super().close()
+
+
+def detect_compression(stream: BinaryIO) -> str:
+    '''
+    Detect the compression of a stream without consuming it.
+
+    Parameters:
+        stream (BinaryIO): Seekable or peekable binary stream.
+    Returns:
+        str: A compression name (`zstd`, `gzip` or `none`).
+    '''
+
+    if stream.seekable():
+        position = stream.tell()
+        head = stream.read(len(ZSTD_MAGIC))
+        stream.seek(position)
+    else:
+        head = cast(io.BufferedReader, stream).peek(len(ZSTD_MAGIC))
+
+    if head.startswith(ZSTD_MAGIC):
+        return 'zstd'
+
+    if head.startswith(GZIP_MAGIC):
+        return 'gzip'
+
+    return 'none'
+
+
+@contextmanager
+def open_compressed_writer(
+    output: BinaryIO,
+    compression: str
+) -> Iterator[BinaryIO]:
+    '''
+    Open a stream compressing everything written into the output stream.
+
+    Zstandard compression runs through the multithreaded `zstd` executable.
+
+    Parameters:
+        output (BinaryIO): Output stream.
+        compression (str): Compression name (`zstd`, `gzip` or `none`).
+    Yields:
+        BinaryIO: A writable stream.
+    Raises:
+        KeyError: Expected `zstd` executable not found.
+        subprocess.CalledProcessError: Expected compression process failed.
+    '''
+
+    if compression == 'none':
+        yield output
+        output.flush()
+        return
+
+    if compression == 'gzip':
+        with gzip.GzipFile(fileobj=output, mode='wb') as file:
+            yield cast(BinaryIO, file)
+
+        output.flush()
+        return
+
+    command = [str(utils.find_executable('zstd')), '-q', '-T0', '-c']
+    fileno = _get_fileno(output)
+    output.flush()
+
+    with subprocess.Popen(
+        command,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE if fileno is None else fileno
+    ) as process:
+        thread = None if process.stdout is None else _copy_in_background(
+            cast(BinaryIO, process.stdout),
+            cast(BinaryIO, _NonClosingWriter(output))
+        )
+
+        try:
+            yield cast(BinaryIO, process.stdin)
+        finally:
+            cast(BinaryIO, process.stdin).close()
+            process.wait()
+
+            if thread is not None:
+                thread.join()
+
+    if process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, command)
+
+
+@contextmanager
+def open_compressed_reader(
+    source: BinaryIO,
+    compression: str = 'auto'
+) -> Iterator[BinaryIO]:
+    '''
+    Open a stream decompressing the source stream.
+
+    Parameters:
+        source (BinaryIO): Source stream.
+        compression (str): Compression name (`zstd`, `gzip`, `none` or `auto`).
+    Yields:
+        BinaryIO: A readable stream.
+    Raises:
+        KeyError: Expected `zstd` executable not found.
+        subprocess.CalledProcessError: Expected decompression process failed.
+    '''
+
+    if compression == 'auto':
+        compression = detect_compression(source)
+
+    if compression == 'none':
+        yield source
+        return
+
+    if compression == 'gzip':
+        with gzip.GzipFile(fileobj=source, mode='rb') as file:
+            yield cast(BinaryIO, file)
+
+        return
+
+    command = [str(utils.find_executable('zstd')), '-q', '-d', '-c']
+    fileno = _get_fileno(source) if source.seekable() else None
+
+    with subprocess.Popen(
+        command,
+        stdin=subprocess.PIPE if fileno is None else fileno,
+        stdout=subprocess.PIPE
+    ) as process:
+        thread = None if process.stdin is None else _copy_in_background(
+            source,
+            cast(BinaryIO, process.stdin)
+        )
+        stream = cast(BinaryIO, process.stdout)
+
+        try:
+            yield stream
+        finally:
+            while stream.read(1024 * 1024):
+                pass
+
+            process.wait()
+
+            if thread is not None:
+                thread.join()
+
+    if process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, command)
+
+
+def _get_tar_info(entry: MergedEntry) -> Optional[tarfile.TarInfo]:
+    '''
+    Build the archive member header of a merged entry from its cached `stat` result.
+
+    Parameters:
+        entry (MergedEntry): Merged entry.
+    Returns:
+        Optional[tarfile.TarInfo]: A member header or `None` for unsupported file types.
+    '''
+
+    info = tarfile.TarInfo(entry.path)
+    info.mode = stat.S_IMODE(entry.stat.st_mode)
+    info.uid = entry.stat.st_uid
+    info.gid = entry.stat.st_gid
+    info.mtime = int(entry.stat.st_mtime)
+
+    if stat.S_ISREG(entry.stat.st_mode):
+        info.type = tarfile.REGTYPE
+        info.size = entry.stat.st_size
+    elif stat.S_ISDIR(entry.stat.st_mode):
+        info.type = tarfile.DIRTYPE
+    elif stat.S_ISLNK(entry.stat.st_mode):
+        info.type = tarfile.SYMTYPE
+        info.linkname = os.readlink(entry.source)
+    else:
+        return None
+
+    return info
+
+
+def write_archive(
+    entries: Iterable[MergedEntry],
+    output: BinaryIO
+) -> Tuple[int, int]:
+    '''
+    Stream merged entries into an uncompressed tar archive.
+
+    Parameters:
+        entries (Iterable[MergedEntry]): Merged entries, parents before children.
+        output (BinaryIO): Output stream.
+    Returns:
+        Tuple[int, int]: Number of archived entries and bytes.
+    '''
+
+    files = 0
+    size = 0
+
+    with tarfile.open(
+        fileobj=output,
+        mode='w|',
+        format=tarfile.PAX_FORMAT
+    ) as archive:
+        for entry in entries:
+            info = _get_tar_info(entry)
+
+            if info is None:
+                continue
+
+            if info.isreg():
+                with open(entry.source, 'rb') as file:
+                    archive.addfile(info, file)
+            else:
+                archive.addfile(info)
+
+            files += 1
+            size += info.size
+
+    return files, size
+
+
+def _check_member(member: tarfile.TarInfo) -> None:
+    '''
+    Reject archive members escaping the extraction directory.
+
+    Parameters:
+        member (tarfile.TarInfo): Archive member.
+    Raises:
+        ValueError: Expected archive member is unsafe.
+    '''
+
+    path = PurePosixPath(member.name)
+
+    if path.is_absolute() or '..' in path.parts:
+        raise ValueError(f'unsafe archive member "{member.name}".')
+
+    if member.isdev():
+        raise ValueError(f'unsupported device archive member "{member.name}".')
+
+    if member.issym() or member.islnk():
+        target = PurePosixPath(member.linkname)
+        parent = path.parent if member.issym() else PurePosixPath()
+        depth = len(parent.parts)
+
+        for part in target.parts:
+            depth += -1 if part == '..' else 0 if part == '.' else 1
+
+            if depth < 0:
+                break
+
+        if target.is_absolute() or depth < 0:
+            raise ValueError(
+                f'unsafe archive link "{member.name}" -> "{member.linkname}".'
+            )
+
+
+def extract_archive(source: BinaryIO, destination: Path) -> Tuple[int, int]:
+    '''
+    Stream an uncompressed tar archive into a directory.
+
+    Parameters:
+        source (BinaryIO): Source stream.
+        destination (Path): Destination directory.
+    Returns:
+        Tuple[int, int]: Number of extracted entries and bytes.
+    Raises:
+        ValueError: Expected archive member is unsafe.
+    '''
+
+    files = 0
+    size = 0
+    options = {'filter': 'tar'} if hasattr(tarfile, 'tar_filter') else {}
+
+    with tarfile.open(fileobj=source, mode='r|') as archive:
+        for member in archive:
+            _check_member(member)
+            archive.extract(
+                member,
+                destination,
+                numeric_owner=True,
+                **options  # type: ignore
+            )
+
+            files += 1
+            size += member.size if member.isreg() else 0
+
+    return files, size
+
+
+__all__ = [
+    'ZSTD_MAGIC',
+    'GZIP_MAGIC',
+    'detect_compression',
+    'open_compressed_writer',
+    'open_compressed_reader',
+    'write_archive',
+    'extract_archive'
+]
@@ -0,0 +1,300 @@
+'''
+Concurrency tuner objects.
+'''
+
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
+
+from .. import utils
+from ..configurations.concurrency_report import ConcurrencyReportConfiguration
+from ..configurations.concurrency_step import ConcurrencyStepConfiguration
+from ..configurations.restore import RestoreConfiguration
+
+#: Factor applied to the number of workers on latency increases and failures.
+DECREASE_FACTOR = 0.5
+#: Change of the mean operation size, in units, resetting the latency baseline.
+WORKLOAD_CHANGE_FACTOR = 2.0
+
+ResultT = TypeVar('ResultT')
+
+
+class ConcurrencyTuner:  # pylint: disable=R0902
+    '''
+    Concurrency tuner object.
+
+    Limit the number of operations running at once and adjust the limit with
+    an additive-increase/multiplicative-decrease controller. Every `interval`
+    seconds, the throughput and mean latency of the completed operations are
+    measured, then:
+
+    - the limit is halved if operations failed or if latency exceeds
+      `latency_factor` times the lowest latency seen for operations of a
+      similar size, e.g. on an overloaded server;
+    - the last increase is reverted if throughput dropped by more than
+      `tolerance`, and the limit is held for `hold_intervals` intervals;
+    - the limit grows by one otherwise, if every worker was busy.
+
+    Latency follows the operation size (e.g. batches of small files or single
+    large files), so the lowest latency is measured again whenever the mean
+    number of units per operation changes by more than
+    `WORKLOAD_CHANGE_FACTOR`.
+    '''
+
+    #: Tuned worker pool name, e.g. `scan` or `transfer`.
+    name: str
+    #: Minimum number of workers.
+    minimum: int
+    #: Maximum number of workers, the size of the thread pools to create.
+    maximum: int
+    #: Initial number of workers.
+    initial_workers: int
+    #: Current number of workers.
+    workers: int
+    #: Measurement interval in seconds.
+    interval: float
+    #: Latency increase, relative to the lowest latency seen, decreasing the limit.
+    latency_factor: float
+    #: Relative throughput drop reverting an increase.
+    tolerance: float
+    #: Number of intervals the limit is held after a revert.
+    hold_intervals: int
+    #: Measurements and adjustments, in order.
+    trace: List[ConcurrencyStepConfiguration]
+
+    def __init__(  # pylint: disable=R0913,R0917
+        self,
+        name: str,
+        workers: Optional[int] = None,
+        minimum: int = 1,
+        maximum: int = 64,
+        interval: float = 1.0,
+        latency_factor: float = 2.0,
+        tolerance: float = 0.1,
+        hold_intervals: int = 5
+    ):
+        '''
+        Initialize concurrency tuner object.
+
+        Parameters:
+            name (str): Tuned worker pool name.
+            workers (Optional[int]): Initial number of workers, defaults to four per CPU.
+            minimum (int): Minimum number of workers.
+            maximum (int): Maximum number of workers.
+            interval (float): Measurement interval in seconds.
+            latency_factor (float): Latency increase decreasing the limit.
+            tolerance (float): Relative throughput drop reverting an increase.
+            hold_intervals (int): Number of intervals the limit is held after a revert.
+        '''
+
+        self.name = name
+        self.minimum = minimum
+        self.maximum = max(maximum, minimum)
+        self.workers = min(
+            max(workers or utils.get_default_workers(), self.minimum),
+            self.maximum
+        )
+        self.initial_workers = self.workers
+        self.interval = interval
+        self.latency_factor = latency_factor
+        self.tolerance = tolerance
+        self.hold_intervals = hold_intervals
+        self.trace = []
+
+        self._condition = threading.Condition()
+        self._active = 0
+        self._start = self._window_start = time.monotonic()
+        self._window = [0, 0, 0.0, 0]
+        self._saturated = False
+        self._best_latency: Optional[float] = None
+        self._best_size = 0.0
+        self._previous: Optional[Tuple[str, float]] = None
+        self._hold = 0
+
+    def call(
+        self,
+        function: Callable[[], ResultT],
+        units: Optional[Callable[[ResultT], int]] = None
+    ) -> ResultT:
+        '''
+        Call a function once a worker is available, measuring it.
+
+        Parameters:
+            function (Callable[[], ResultT]): Operation.
+            units (Optional[Callable[[ResultT], int]]): Number of units done, `1` if `None`.
+        Returns:
+            ResultT: The function result.
+        Raises:
+            Exception: Expected operation failed.
+        '''
+
+        self.acquire()
+        start = time.perf_counter()
+
+        try:
+            result = function()
+        except BaseException:
+            self.release(time.perf_counter() - start, 0, failed=True)
+            raise
+
+        self.release(
+            time.perf_counter() - start,
+            1 if units is None else units(result)
+        )
+
+        return result
+
+    def acquire(self) -> None:
+        '''
+        Wait until fewer operations than the current limit are running.
+        '''
+
+        with self._condition:
+            self._condition.wait_for(lambda: self._active < self.workers)
+            self._active += 1
+            self._saturated |= self._active >= self.workers
+
+    def release(self, seconds: float, units: int, failed: bool = False) -> None:
+        '''
+        Record a completed operation, adjusting the limit at the end of each
+        measurement interval.
+
+        Parameters:
+            seconds (float): Operation latency in seconds.
+            units (int): Number of units done by the operation (bytes or listed entries).
+            failed (bool): Whether the operation failed.
+        '''
+
+        with self._condition:
+            self._active -= 1
+            self._window[0] += 1
+            self._window[1] += units
+            self._window[2] += seconds
+            self._window[3] += failed
+
+            now = time.monotonic()
+
+            if now - self._window_start >= self.interval:
+                self._adjust(now)
+
+            self._condition.notify_all()
+
+    def report(self) -> ConcurrencyReportConfiguration:
+        '''
+        Return the chosen worker counts and the convergence trace.
+
+        Returns:
+            ConcurrencyReportConfiguration: A concurrency report.
+        '''
+
+        with self._condition:
+            best = max(
+                self.trace,
+                key=lambda step: step.throughput,
+                default=None
+            )
+
+            return ConcurrencyReportConfiguration(
+                name=self.name,
+                initial_workers=self.initial_workers,
+                workers=self.workers,
+                best_workers=self.workers if best is None else best.workers,
+                min_workers=self.minimum,
+                max_workers=self.maximum,
+                trace=list(self.trace)
+            )
+
+    def _adjust(self, now: float) -> None:
+        '''
+        Adjust the limit from the measurements of the interval ending now,
+        called with the condition held.
+
+        Parameters:
+            now (float): Monotonic time of the interval end.
+        '''
+
+        operations, units, seconds, failures = self._window
+        throughput = units / max(now - self._window_start, 1e-9)
+        latency = seconds / operations
+        size = units / operations
+        workers = self.workers
+        best = self._best_latency
+
+        if not (
+            self._best_size / WORKLOAD_CHANGE_FACTOR <= size <=
+            self._best_size * WORKLOAD_CHANGE_FACTOR
+        ):
+            # Latency of operations of another size is not comparable.
+            best = None
+
+        if failures or (best is not None and latency > best * self.latency_factor):
+            action = 'decrease'
+            self.workers = max(self.minimum, int(workers * DECREASE_FACTOR))
+        elif self._previous is not None and self._previous[0] == 'increase' \
+                and throughput < self._previous[1] * (1 - self.tolerance):
+            action = 'revert'
+            self.workers = max(self.minimum, workers - 1)
+            self._hold = self.hold_intervals
+        elif self._hold or not self._saturated or workers >= self.maximum:
+            action = 'hold'
+            self._hold = max(self._hold - 1, 0)
+        else:
+            action = 'increase'
+            self.workers = workers + 1
+
+        if not failures and (best is None or latency < best):
+            self._best_latency = latency
+            self._best_size = size
+
+        self.trace.append(
+            ConcurrencyStepConfiguration.trusted(
+                seconds=now - self._start,
+                workers=workers,
+                throughput=throughput,
+                latency=latency,
+                failures=failures,
+                action=action
+            )
+        )
+
+        self._previous = (action, throughput)
+        self._window = [0, 0, 0.0, 0]
+        self._window_start = now
+        self._saturated = self._active >= self.workers
+
+
+def get_restore_tuners(
+    options: RestoreConfiguration
+) -> Dict[str, ConcurrencyTuner]:
+    '''
+    Return the concurrency tuners of a restore by worker pool name.
+
+    Parameters:
+        options (RestoreConfiguration): Restore configuration.
+    Returns:
+        Dict[str, ConcurrencyTuner]: Tuners of the `scan` and `transfer` pools, if autotuned.
+    '''
+
+    if not options.autotune:
+        return {}
+
+    return {
+        name: ConcurrencyTuner(
+            name,
+            workers,
+            options.min_workers,
+            options.max_workers
+        )
+        for name, workers in [
+            ('scan', options.scan_workers),
+            ('transfer', options.workers)
+        ]
+    }
+
+
+__all__ = [
+    'DECREASE_FACTOR',
+    'WORKLOAD_CHANGE_FACTOR',
+    'ConcurrencyTuner',
+    'get_restore_tuners'
+]
@@ -2,17 +2,75 @@
 Backup operator object.
 '''
 
-from datetime import datetime
-from typing import List
+import os
+import shutil
+import time
+import uuid
+from contextlib import ExitStack, contextmanager
+from datetime import datetime, timezone
+from functools import cached_property
+from pathlib import Path
+from typing import (
+    BinaryIO,
+    Callable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+    cast
+)
+from urllib.parse import quote
 
 from .. import utils
 from ..configurations.backup import BackupConfiguration
 from ..configurations.backup_version import BackupVersionConfiguration
 from ..configurations.context import ContextConfiguration
+from ..configurations.export import ExportConfiguration
 from ..configurations.restore import RestoreConfiguration
 from ..configurations.restore_report import RestoreReportConfiguration
+from ..configurations.sharded_restore import ShardedRestoreConfiguration
+from ..configurations.version_range import VersionRangeConfiguration
 from ..context_type import ContextType
+from ..profiler import profile_phase
+from . import archive
+from .autotune import get_restore_tuners
+from .diff import DiffEntry, FileSystemTree, Tree, diff_trees
+from .file_table import FileTable, FileTableTree
+from .lock import EXCLUSIVE, SHARED, LockStack
+from .manifest import Manifest, write_manifest
+from .merge import MergedEntry, walk_merged
+from .merged_view import MergedView, get_merged_view
+from .metadata import MetadataStage
 from .operator import Operator
+from .path_filter import PathFilter
+from .shard import (
+    SHARD_DIRECTORY_NAME,
+    ShardedRestore,
+    create_plan_directories,
+    get_shard_restorer,
+    get_worker_name,
+    merge_shard_reports,
+    plan_restore,
+    run_active_restores
+)
+from .staging import (
+    clone_tree,
+    commit_staging_directory,
+    create_staging_directory
+)
+from .stat_cache import ScandirPrefetcher
+from .transfer import get_restore_engine
+from .version_index import VersionIndex
+from .watcher import VersionWatcher
+
+#: Backup version directory pattern for subpath context, relative to the volume path.
+SUBPATH_VERSION_PATTERN = '.backup/*'
+#: Manifest directory name, inside the metadata directory.
+MANIFEST_DIRECTORY_NAME = 'manifests'
+#: Number of restored entries between two checks of the restore stop callback.
+CHECKPOINT_INTERVAL = 1000
 
 
 class BackupOperator(Operator):
@@ -48,9 +106,43 @@ class BackupOperator(Operator):
                 f'ignoring [name={self.configuration.name}] parameter for non-root context.'
             )
 
+    @cached_property
+    def index(self) -> VersionIndex:
+        '''
+        Return the backup version index.
+
+        Backup versions are the directories matching the expanded root template
+        in the root context, or the `.backup/*` directories otherwise.
+
+        Returns:
+            VersionIndex: A backup version index.
+        Raises:
+            ValueError: Expected backup name not available for root context.
+        '''
+
+        if self.context.context == ContextType.ROOT:
+            if self.configuration.name is None:
+                raise ValueError(
+                    '"name" parameter is required for root context.'
+                )
+
+            pattern = utils.expand_name_template(
+                str(self.context.root_template),
+                self.configuration.name
+            )
+        else:
+            pattern = SUBPATH_VERSION_PATTERN
+
+        return VersionIndex.from_pattern(
+            cast(Path, self.context.path),
+            pattern,
+            self.stat_cache,
+            self.metadata_path
+        )
+
     def list_versions(self) -> List[BackupVersionConfiguration]:
         '''
-        Restore backup versions.
+        List backup versions, newest first.
 
         Returns:
             List[BackupVersionConfiguration]: A list reporting available backup versions.
@@ -58,36 +150,849 @@ class BackupOperator(Operator):
             Exception: Expected operation failed.
         '''
 
-        # TODO: implement it.
-
         return [
-            BackupVersionConfiguration(
-                version=0,
-                timestamp=datetime.now()
-            ),
-            BackupVersionConfiguration(
-                version=1,
-                timestamp=datetime.now()
+            BackupVersionConfiguration.trusted(
+                version=version,
+                timestamp=datetime.fromtimestamp(
+                    mtime_ns / 1e9,
+                    tz=timezone.utc
+                ),
+                path=path
             )
+            for version, (path, mtime_ns) in enumerate(self.index.refresh())
         ]
 
-    def restore(self, options: RestoreConfiguration) -> RestoreReportConfiguration:
+    def watch(
+        self,
+        interval: float = 30.0,
+        use_inotify: bool = True
+    ) -> VersionWatcher:
+        '''
+        Start watching backup versions so listings are served from memory.
+
+        Parameters:
+            interval (float): Periodic check interval in seconds if inotify is unavailable.
+            use_inotify (bool): Whether to try inotify before falling back to periodic checks.
+        Returns:
+            VersionWatcher: A started watcher, stop it with `stop()` or use it as context manager.
+        '''
+
+        watcher = VersionWatcher(
+            self.index,
+            interval=interval,
+            use_inotify=use_inotify
+        )
+        watcher.start()
+
+        return watcher
+
+    def select_versions(
+        self,
+        options: VersionRangeConfiguration
+    ) -> List[BackupVersionConfiguration]:
+        '''
+        Select the backup versions of a version range, newest first.
+
+        Parameters:
+            options (VersionRangeConfiguration): Version range configuration.
+        Returns:
+            List[BackupVersionConfiguration]: A list of selected backup versions.
+        Raises:
+            ValueError: Expected backup versions not found.
+        '''
+
+        versions = self.list_versions()
+
+        if not versions:
+            raise ValueError('no backup versions found.')
+
+        last_version = len(versions) - 1
+
+        if options.version == '*':
+            start, end = 0, last_version
+        else:
+            start, end = options.version, options.version
+
+        if options.final_version == '*':
+            end = last_version
+        elif options.final_version is not None:
+            end = options.final_version
+
+        if start > last_version or end > last_version:
+            raise ValueError(
+                f'backup version {max(start, end)} not found, '
+                f'the oldest version is {last_version}.'
+            )
+
+        return versions[start:end + 1]
+
+    @property
+    def lock_name(self) -> str:
+        '''
+        Return the workspace lock name.
+
+        Returns:
+            str: A lock name.
+        Raises:
+            ValueError: Expected backup name not available for root context.
+        '''
+
+        if self.context.context == ContextType.ROOT:
+            if self.configuration.name is None:
+                raise ValueError(
+                    '"name" parameter is required for root context.'
+                )
+
+            return f'workspace/{self.configuration.name}'
+
+        return 'workspace'
+
+    def get_version_lock_name(
+        self,
+        backup_version: BackupVersionConfiguration
+    ) -> str:
+        '''
+        Return the lock name of a backup version.
+
+        Parameters:
+            backup_version (BackupVersionConfiguration): Backup version.
+        Returns:
+            str: A lock name.
+        '''
+
+        path = cast(Path, self.context.path)
+
+        return f'version/{backup_version.path.relative_to(path).as_posix()}'
+
+    def lock_versions(
+        self,
+        stack: ExitStack,
+        selection: Union[VersionRangeConfiguration, Sequence[int]],
+        mode: str = SHARED
+    ) -> List[BackupVersionConfiguration]:
+        '''
+        Select backup versions and lock them until the stack is closed.
+
+        Versions are selected and locked in order under a shared workspace
+        lock, so they cannot be removed in between, and the workspace lock is
+        released before returning.
+
+        Parameters:
+            stack (ExitStack): Exit stack holding the version locks.
+            selection (Union[VersionRangeConfiguration, Sequence[int]]): Version range or versions.
+            mode (str): Version lock mode (`shared` or `exclusive`).
+        Returns:
+            List[BackupVersionConfiguration]: Selected backup versions, in selection order.
+        Raises:
+            ValueError: Expected backup versions not found.
+            TimeoutError: Expected locks not available before the timeout.
+        '''
+
+        with self.lock(self.lock_name, SHARED):
+            if isinstance(selection, VersionRangeConfiguration):
+                versions = self.select_versions(selection)
+            else:
+                versions = [self.get_version(version) for version in selection]
+
+            for backup_version in sorted(
+                {version.version: version for version in versions}.values(),
+                key=lambda version: version.version
+            ):
+                stack.enter_context(
+                    self.lock(self.get_version_lock_name(backup_version), mode)
+                )
+
+        return versions
+
+    def get_version(self, version: int) -> BackupVersionConfiguration:
+        '''
+        Return a single backup version.
+
+        Parameters:
+            version (int): Backup version.
+        Returns:
+            BackupVersionConfiguration: The backup version.
+        Raises:
+            ValueError: Expected backup version not found.
+        '''
+
+        versions = self.list_versions()
+
+        if version < 0 or version >= len(versions):
+            raise ValueError(f'backup version {version} not found.')
+
+        return versions[version]
+
+    def get_manifest_path(self, backup_version: BackupVersionConfiguration) -> Path:
+        '''
+        Return the manifest path of a backup version.
+
+        Parameters:
+            backup_version (BackupVersionConfiguration): Backup version.
+        Returns:
+            Path: A path object referencing the manifest file.
+        '''
+
+        path = cast(Path, self.context.path)
+        name = quote(backup_version.path.relative_to(path).as_posix(), safe='')
+
+        return self.metadata_path / MANIFEST_DIRECTORY_NAME / f'{name}.manifest'
+
+    def build_manifest(self, version: int) -> Path:
+        '''
+        Write the binary manifest of a backup version.
+
+        Parameters:
+            version (int): Backup version.
+        Returns:
+            Path: A path object referencing the manifest file.
+        Raises:
+            ValueError: Expected backup version not found.
+        '''
+
+        self.check_local('manifests')
+
+        with ExitStack() as stack:
+            backup_version, = self.lock_versions(stack, [version])
+            manifest_path = self.get_manifest_path(backup_version)
+            version_stat = os.stat(backup_version.path)
+
+            manifest_path.parent.mkdir(parents=True, exist_ok=True)
+
+            with profile_phase('manifest.build'):
+                entries = write_manifest(
+                    walk_merged([backup_version.path], self.stat_cache),
+                    manifest_path,
+                    (version_stat.st_ino, version_stat.st_mtime_ns)
+                )
+
+        self.logger.info(
+            f'wrote manifest "{manifest_path}" with {entries} entries.'
+        )
+
+        return manifest_path
+
+    def open_manifest(self, version: int) -> Optional[Manifest]:
+        '''
+        Open the binary manifest of a backup version.
+
+        Manifests are ignored if their backup version directory was replaced
+        or modified since they were built.
+
+        Parameters:
+            version (int): Backup version.
+        Returns:
+            Optional[Manifest]: A manifest or `None` if missing or outdated.
+        Raises:
+            ValueError: Expected backup version not found.
+        '''
+
+        backup_version = self.get_version(version)
+        manifest_path = self.get_manifest_path(backup_version)
+
+        try:
+            manifest = Manifest(manifest_path)
+        except FileNotFoundError:
+            return None
+        except ValueError as exception:
+            self.logger.warning(f'ignoring manifest: {exception}')
+            return None
+
+        version_stat = os.stat(backup_version.path)
+
+        if manifest.source_key != (
+            version_stat.st_ino,
+            version_stat.st_mtime_ns
+        ):
+            self.logger.info(f'ignoring outdated manifest "{manifest_path}".')
+            manifest.close()
+            return None
+
+        return manifest
+
+    def get_destination(self, options: RestoreConfiguration) -> Path:
+        '''
+        Return the restore destination path.
+
+        Parameters:
+            options (RestoreConfiguration): Restore configuration.
+        Returns:
+            Path: A path object referencing the destination directory.
+        Raises:
+            ValueError: Expected destination not available for root context.
+        '''
+
+        if options.destination is not None:
+            return options.destination
+
+        if self.context.context == ContextType.ROOT or self.transport is not None:
+            raise ValueError(
+                '"destination" parameter is required for root context '
+                'and remote volumes.'
+            )
+
+        return cast(Path, self.context.path)
+
+    def restore(
+        self,
+        options: RestoreConfiguration,
+        should_stop: Optional[Callable[[], bool]] = None
+    ) -> RestoreReportConfiguration:
+        '''
+        Restore and merge backup versions, the most recent files win.
+
+        Path prefixes and include/exclude patterns are applied while walking
+        the backup versions, so only the selected subtrees are scanned, and
+        directory listings are prefetched in parallel ahead of the walk. The
+        backup versions are locked for reading and the destination for
+        writing, so concurrent restores only wait for each other when they
+        write into the same destination.
+
+        Staged restores write into a staging directory completed with hard
+        links to the destination, verify the restored entries and swap it
+        into place, so users of the destination never see a partial restore.
+
+        Sharded restores write their plan into the metadata directory, split
+        into shards restored by this process and by any `restore_worker`
+        running on other hosts, see `_restore_sharded`.
+
+        Direct restores call `should_stop` every `CHECKPOINT_INTERVAL` entries
+        and stop early when it returns `True`, leaving a partial restore that
+        is resumed by running it again. Staged and sharded restores always
+        complete. Every restore fails at its checkpoints once a lock is lost.
+
+        Parameters:
+            options (RestoreConfiguration): Restore configuration.
+            should_stop (Optional[Callable[[], bool]]): Callback stopping direct restores early.
+        Returns:
+            RestoreReportConfiguration: A restore report for operation.
+        Raises:
+            Exception: Expected operation failed.
+        '''
+
+        if options.staged and options.sharded:
+            raise ValueError('sharded restores cannot be staged.')
+
+        if options.sharded:
+            self.check_local('sharded restores')
+
+        with LockStack() as stack:
+            with profile_phase('restore.lock'):
+                versions = self.lock_versions(stack, options)
+                destination = self.get_destination(options)
+                stack.enter_context(
+                    self.lock(
+                        f'destination/{destination.resolve()}',
+                        EXCLUSIVE
+                    )
+                )
+
+            if options.staged:
+                return self._restore_staged(options, versions, destination, stack.check)
+
+            if options.sharded:
+                return self._restore_sharded(options, versions, destination, stack.check)
+
+            return self._restore(
+                options,
+                versions,
+                destination,
+                should_stop=lambda: stack.check() or (
+                    should_stop is not None and should_stop()
+                )
+            )
+
+    def _restore_staged(
+        self,
+        options: RestoreConfiguration,
+        versions: List[BackupVersionConfiguration],
+        destination: Path,
+        check_locks: Callable[[], bool]
+    ) -> RestoreReportConfiguration:
         '''
-        Restore backup versions.
+        Restore into a staging directory next to the destination, then swap it
+        into place.
+
+        Transfer engines hard-link the destination files identical to the
+        restored ones, then the staging directory is completed with links to
+        the other destination entries, so the destination is never modified
+        and paths outside the restored selection are kept.
 
         Parameters:
             options (RestoreConfiguration): Restore configuration.
+            versions (List[BackupVersionConfiguration]): Backup versions, newest first.
+            destination (Path): Destination directory.
+            check_locks (Callable[[], bool]): Checkpoint raising if a lock was lost.
+        Returns:
+            RestoreReportConfiguration: A restore report for operation.
+        Raises:
+            ValueError: Expected destination is not the volume or one of its parents.
+            RuntimeError: Expected restored entries verified and locks held.
+        '''
+
+        destination = destination.resolve()
+        staging = create_staging_directory(
+            destination,
+            cast(Path, self.context.path)
+        )
+
+        try:
+            link_dest = destination if destination.is_dir() else None
+            table = FileTable()
+            report = self._restore(
+                options,
+                versions,
+                staging,
+                table,
+                should_stop=check_locks,
+                link_dest=link_dest
+            )
+
+            if link_dest is not None:
+                with profile_phase('restore.clone'):
+                    links = clone_tree(link_dest, staging, self.stat_cache)
+
+                self.logger.info(f'linked {links} existing entries.')
+
+            check_locks()
+            report.swap = commit_staging_directory(table, staging, destination)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        return report
+
+    def _restore(  # pylint: disable=R0913,R0914,R0917
+        self,
+        options: RestoreConfiguration,
+        versions: List[BackupVersionConfiguration],
+        destination: Path,
+        table: Optional[FileTable] = None,
+        should_stop: Optional[Callable[[], bool]] = None,
+        link_dest: Optional[Path] = None
+    ) -> RestoreReportConfiguration:
+        '''
+        Restore and merge locked backup versions into a locked destination.
+
+        Parameters:
+            options (RestoreConfiguration): Restore configuration.
+            versions (List[BackupVersionConfiguration]): Backup versions, newest first.
+            destination (Path): Destination directory.
+            table (Optional[FileTable]): File table recording the restored entries.
+            should_stop (Optional[Callable[[], bool]]): Callback stopping the restore early.
+            link_dest (Optional[Path]): Directory of identical files to hard-link.
         Returns:
             RestoreReportConfiguration: A restore report for operation.
         Raises:
             Exception: Expected operation failed.
         '''
 
-        # TODO: implement it.
+        tuners = get_restore_tuners(options)
+        engine = get_restore_engine(
+            options,
+            self.transport,
+            tuners.get('transfer')
+        )
+        engine.link_dest = link_dest
+        path_filter = PathFilter(
+            options.prefixes,
+            options.include,
+            options.exclude
+        )
+        sources = [version.path for version in versions]
+        totals = [0, 0]
+        stopped = False
+
+        def count(entries: Iterator[MergedEntry]) -> Iterator[MergedEntry]:
+            nonlocal stopped
+
+            for entry in entries:
+                if (
+                    should_stop is not None and
+                    totals[0] and
+                    totals[0] % CHECKPOINT_INTERVAL == 0 and
+                    should_stop()
+                ):
+                    self.logger.info(f'stopping after {totals[0]} entries.')
+                    stopped = True
+                    return
+
+                totals[0] += 1
+                totals[1] += 0 if entry.is_dir else entry.stat.st_size
+
+                if table is not None:
+                    table.append_entry(entry)
+
+                yield entry
+
+        destination.mkdir(parents=True, exist_ok=True)
+
+        self.logger.info(f'restoring with "{engine.name}" transfer engine.')
+
+        with profile_phase('restore.transfer'), ScandirPrefetcher(
+            self.stat_cache,
+            options.scan_workers,
+            retry_policy=engine.retry_policy,
+            tuner=tuners.get('scan')
+        ) as prefetcher:
+            chunked_files = engine.transfer(
+                sources,
+                count(
+                    walk_merged(
+                        sources,
+                        self.stat_cache,
+                        path_filter,
+                        prefetcher
+                    )
+                ),
+                destination
+            )
+
+        with profile_phase('restore.metadata'):
+            metadata_calls = cast(
+                MetadataStage,
+                engine.metadata
+            ).apply(destination)
+
+        return RestoreReportConfiguration(
+            version=versions[0].version,
+            final_version=versions[-1].version if len(versions) > 1 else None,
+            files=totals[0],
+            bytes=totals[1],
+            engine=engine.name,
+            chunked_files=chunked_files,
+            metadata_calls=metadata_calls,
+            concurrency=[tuner.report() for tuner in tuners.values()],
+            retries=engine.retry_policy.retry_count,
+            stopped=stopped
+        )
+
+    def _restore_sharded(
+        self,
+        options: RestoreConfiguration,
+        versions: List[BackupVersionConfiguration],
+        destination: Path,
+        check_locks: Callable[[], bool]
+    ) -> RestoreReportConfiguration:
+        '''
+        Restore and merge locked backup versions in shards, also restored by
+        the `restore_worker` processes of other hosts.
+
+        The plan is built once here, from the backup version manifests when
+        they are all up to date: directories are created right away, and the
+        other entries are written as a plan into the metadata directory,
+        split into shards by subtree and size. Workers only need
+        the plan, the locks stay with this process. Directory metadata is
+        applied once all shards are restored, and the report merges the
+        shard reports.
+
+        Parameters:
+            options (RestoreConfiguration): Restore configuration.
+            versions (List[BackupVersionConfiguration]): Backup versions, newest first.
+            destination (Path): Destination directory.
+            check_locks (Callable[[], bool]): Checkpoint raising if a lock was lost.
+        Returns:
+            RestoreReportConfiguration: A restore report for operation.
+        Raises:
+            RuntimeError: Expected every shard restored and locks held.
+        '''
+
+        engine = get_restore_engine(options, self.transport)
+        path_filter = PathFilter(
+            options.prefixes,
+            options.include,
+            options.exclude
+        )
+        sources = [version.path for version in versions]
+        root = self.metadata_path / SHARD_DIRECTORY_NAME
+
+        ShardedRestore.remove_abandoned(root, self.context.lock_lease)
+        destination.mkdir(parents=True, exist_ok=True)
+
+        with profile_phase('restore.plan'), ScandirPrefetcher(
+            self.stat_cache,
+            options.scan_workers,
+            retry_policy=engine.retry_policy
+        ) as prefetcher:
+            table = plan_restore(
+                sources,
+                (self.open_manifest(version.version) for version in versions),
+                path_filter,
+                self.stat_cache,
+                prefetcher
+            )
+            create_plan_directories(
+                table,
+                sources,
+                destination,
+                engine,
+                self.stat_cache
+            )
+            check_locks()
+            work = ShardedRestore.create(
+                root,
+                ShardedRestoreConfiguration(
+                    options=options,
+                    sources=sources,
+                    destination=destination,
+                    versions=[version.version for version in versions],
+                    coordinator=get_worker_name()
+                ),
+                table,
+                self.context.lock_lease
+            )
+
+        self.logger.info(
+            f'split {len(table)} entries into '
+            f'{work.configuration.shards} shards in "{work.path}".'
+        )
+
+        try:
+            with work.renew(work.coordinator_path), \
+                    profile_phase('restore.transfer'):
+                work.run(get_shard_restorer(work, self.stat_cache), wait=True)
+
+            failures = work.failures()
+
+            if failures:
+                raise RuntimeError(
+                    f'{len(failures)} restore shards failed: {failures[0]}'
+                )
+
+            check_locks()
+
+            reports = work.reports()
+        finally:
+            work.remove()
+
+        with profile_phase('restore.metadata'):
+            metadata_calls = cast(
+                MetadataStage,
+                engine.metadata
+            ).apply(destination)
+
+        return merge_shard_reports(
+            work.configuration,
+            reports,
+            engine,
+            len(table) - sum(report.files for report in reports),
+            metadata_calls
+        )
+
+    def restore_worker(
+        self,
+        drain: bool = False,
+        poll_interval: float = 1.0
+    ) -> int:
+        '''
+        Restore the shards of the sharded restores of the volume until stopped.
+
+        Parameters:
+            drain (bool): Whether to return once no shard is pending.
+            poll_interval (float): Time between checks for pending shards in seconds.
+        Returns:
+            int: Number of restored shards.
+        '''
+
+        restored = 0
+
+        while True:
+            claimed = run_active_restores(
+                self.metadata_path / SHARD_DIRECTORY_NAME,
+                self.context.lock_lease,
+                self.stat_cache
+            )
+            restored += claimed
+
+            if drain and not claimed:
+                return restored
+
+            if not claimed:
+                time.sleep(poll_interval)
+
+    def diff(self, version: int, other_version: int) -> Iterator[DiffEntry]:
+        '''
+        Stream the differences between two backup versions.
+
+        Backup versions are listed from their manifests when available and up
+        to date, from the filesystem otherwise.
+
+        Parameters:
+            version (int): Backup version to compare from.
+            other_version (int): Backup version to compare to.
+        Yields:
+            DiffEntry: Differences, paths only in `other_version` are reported as added.
+        Raises:
+            ValueError: Expected backup versions not found.
+        '''
+
+        with ExitStack() as stack:
+            trees: List[Tree] = []
+
+            for backup_version in self.lock_versions(
+                stack,
+                [version, other_version]
+            ):
+                path = backup_version.path
+                manifest = self.open_manifest(backup_version.version)
+
+                if manifest is None:
+                    trees.append(FileSystemTree(path, self.stat_cache))
+                else:
+                    trees.append(
+                        FileTableTree(stack.enter_context(manifest), path)
+                    )
+
+            yield from diff_trees(trees[0], trees[1])
+
+    @contextmanager
+    def merged_view(
+        self,
+        selection: VersionRangeConfiguration
+    ) -> Iterator[MergedView]:
+        '''
+        Lock backup versions and return their merged view, to read single
+        paths without restoring them.
+
+        Views are shared between calls reading the same backup versions, so
+        repeated lookups of a path are served from memory.
+
+        Parameters:
+            selection (VersionRangeConfiguration): Version range.
+        Yields:
+            MergedView: The merged view, the backup versions stay locked until closed.
+        Raises:
+            ValueError: Expected local volume and backup versions found.
+        '''
+
+        self.check_local('file reads')
+
+        with ExitStack() as stack:
+            versions = self.lock_versions(stack, selection)
+
+            yield get_merged_view(
+                [version.path for version in versions],
+                self.stat_cache
+            )
+
+    @contextmanager
+    def open_merged(
+        self,
+        path: str,
+        selection: VersionRangeConfiguration
+    ) -> Iterator[BinaryIO]:
+        '''
+        Open a file of the merged view of backup versions for reading,
+        straight from the newest backup version owning it.
+
+        Parameters:
+            path (str): Relative path using `/` separators.
+            selection (VersionRangeConfiguration): Version range.
+        Yields:
+            BinaryIO: A binary file object, the backup versions stay locked until closed.
+        Raises:
+            FileNotFoundError: Expected path found in the backup versions.
+            IsADirectoryError: Expected path not to be a directory.
+        '''
+
+        with self.merged_view(selection) as view, view.open(path) as file:
+            yield file
+
+    def export_archive(
+        self,
+        options: ExportConfiguration,
+        output: BinaryIO
+    ) -> Tuple[int, int]:
+        '''
+        Stream the merged view of backup versions into a compressed tar archive.
+
+        Parameters:
+            options (ExportConfiguration): Export configuration.
+            output (BinaryIO): Output stream, e.g. a file or `sys.stdout.buffer`.
+        Returns:
+            Tuple[int, int]: Number of archived entries and bytes.
+        Raises:
+            Exception: Expected operation failed.
+        '''
+
+        self.check_local('exports')
+
+        with ExitStack() as stack:
+            versions = self.lock_versions(stack, options)
+            stream = stack.enter_context(
+                archive.open_compressed_writer(output, options.compression)
+            )
+            with profile_phase('export'):
+                files, size = archive.write_archive(
+                    walk_merged(
+                        [version.path for version in versions],
+                        self.stat_cache
+                    ),
+                    stream
+                )
+
+        self.logger.info(f'exported {files} entries ({size} bytes).')
+
+        return files, size
+
+    def import_archive(
+        self,
+        source: BinaryIO,
+        compression: str = 'auto'
+    ) -> BackupVersionConfiguration:
+        '''
+        Stream a tar archive into a new backup version.
+
+        The archive is extracted into the volume metadata directory first and
+        moved into place once complete, so partial imports never show up as
+        backup versions. The workspace is only locked while moving it.
+
+        Parameters:
+            source (BinaryIO): Source stream, e.g. a file or `sys.stdin.buffer`.
+            compression (str): Compression name (`zstd`, `gzip`, `none` or `auto`).
+        Returns:
+            BackupVersionConfiguration: The imported backup version.
+        Raises:
+            Exception: Expected operation failed.
+        '''
+
+        self.check_local('imports')
+
+        timestamp = datetime.now(tz=timezone.utc).strftime('%Y%m%d%H%M%S')
+        name = self.index.new_name(
+            f'import-{timestamp}-{uuid.uuid4().hex[:8]}'
+        )
+        staging_path = self.metadata_path / 'staging' / uuid.uuid4().hex
+
+        staging_path.mkdir(parents=True)
+
+        try:
+            with archive.open_compressed_reader(source, compression) as stream:
+                with profile_phase('import'):
+                    files, size = archive.extract_archive(stream, staging_path)
+
+            with self.lock(self.lock_name, EXCLUSIVE):
+                self.index.parent.mkdir(parents=True, exist_ok=True)
+                os.utime(staging_path)
+                os.rename(staging_path, self.index.parent / name)
+                self.index.update(name)
+        except BaseException:
+            shutil.rmtree(staging_path, ignore_errors=True)
+            raise
+
+        self.logger.info(
+            f'imported {files} entries ({size} bytes) as "{name}".'
+        )
+
+        for version in self.list_versions():
+            if version.path.name == name:
+                return version
 
-        return RestoreReportConfiguration(version=0)
+        raise FileNotFoundError(f'imported backup version "{name}" not found.')
 
 
 __all__ = [
+    'MANIFEST_DIRECTORY_NAME',
+    'SUBPATH_VERSION_PATTERN',
     'BackupOperator'
 ]
@@ -0,0 +1,256 @@
+'''
+Chunked file copy objects.
+'''
+
+import errno
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, NamedTuple, Tuple
+
+#: Data range offset and length.
+DataRange = Tuple[int, int]
+
+#: Error numbers of unsupported in-kernel copies and preallocations.
+UNSUPPORTED_ERRNOS = (
+    errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP
+)
+
+
+class ChunkedCopyResult(NamedTuple):
+    '''
+    Chunked copy statistics.
+    '''
+
+    #: Number of copied bytes, excluding holes.
+    data_bytes: int
+    #: Number of copied chunks.
+    chunks: int
+
+
+def get_data_ranges(fd: int, size: int) -> List[DataRange]:
+    '''
+    Return the data ranges of a file, skipping holes.
+
+    Uses `SEEK_DATA`/`SEEK_HOLE` when supported, the whole file otherwise.
+
+    Parameters:
+        fd (int): File descriptor.
+        size (int): File size in bytes.
+    Returns:
+        List[DataRange]: Sorted data ranges.
+    '''
+
+    if not hasattr(os, 'SEEK_DATA'):
+        return [(0, size)] if size else []
+
+    ranges: List[DataRange] = []
+    offset = 0
+
+    try:
+        while offset < size:
+            try:
+                start = os.lseek(fd, offset, os.SEEK_DATA)
+            except OSError as exception:
+                if exception.errno == errno.ENXIO:
+                    break
+
+                raise
+
+            end = min(os.lseek(fd, start, os.SEEK_HOLE), size)
+
+            if start >= end:
+                break
+
+            ranges.append((start, end - start))
+            offset = end
+    except OSError as exception:
+        if exception.errno not in (errno.EINVAL, errno.EOPNOTSUPP):
+            raise
+
+        return [(0, size)] if size else []
+
+    return ranges
+
+
+def copy_range(
+    source_fd: int,
+    destination_fd: int,
+    offset: int,
+    length: int
+) -> int:
+    '''
+    Copy a byte range between descriptors at the same offset.
+
+    Uses `copy_file_range` when supported and `pread`/`pwrite` otherwise,
+    without moving the file offsets, so ranges can be copied concurrently.
+
+    Parameters:
+        source_fd (int): Source file descriptor.
+        destination_fd (int): Destination file descriptor.
+        offset (int): Range offset.
+        length (int): Range length.
+    Returns:
+        int: Number of copied bytes, less than `length` if the source is shorter.
+    '''
+
+    end = offset + length
+    position = offset
+
+    if hasattr(os, 'copy_file_range'):
+        try:
+            while position < end:
+                copied = os.copy_file_range(  # type: ignore
+                    source_fd,
+                    destination_fd,
+                    end - position,
+                    position,
+                    position
+                )
+
+                if copied == 0:
+                    return position - offset
+
+                position += copied
+
+            return length
+        except OSError as exception:
+            if exception.errno not in UNSUPPORTED_ERRNOS:
+                raise
+
+    while position < end:
+        data = os.pread(source_fd, min(end - position, 1 << 20), position)
+
+        if not data:
+            break
+
+        view = memoryview(data)
+
+        while view:
+            written = os.pwrite(destination_fd, view, position)
+            view = view[written:]
+            position += written
+
+    return position - offset
+
+
+class ChunkedCopier:
+    '''
+    Chunked file copier object.
+
+    Copy large files as concurrent byte ranges, so a single file uses several
+    streams. Only data ranges are copied and preallocated, holes are kept.
+    '''
+
+    #: Minimum file size in bytes for chunked copies.
+    threshold: int
+    #: Chunk size in bytes.
+    chunk_size: int
+    #: Number of concurrent chunks per file.
+    max_workers: int
+    #: Whether to preallocate data ranges with `posix_fallocate`.
+    preallocate: bool
+
+    def __init__(
+        self,
+        threshold: int = 128 << 20,
+        chunk_size: int = 32 << 20,
+        max_workers: int = 8,
+        preallocate: bool = True
+    ):
+        '''
+        Initialize chunked file copier object.
+
+        Parameters:
+            threshold (int): Minimum file size in bytes for chunked copies.
+            chunk_size (int): Chunk size in bytes.
+            max_workers (int): Number of concurrent chunks per file.
+            preallocate (bool): Whether to preallocate data ranges with `posix_fallocate`.
+        '''
+
+        self.threshold = threshold
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.preallocate = preallocate
+
+    def accepts(self, size: int) -> bool:
+        '''
+        Check whether a file is large enough for a chunked copy.
+
+        Parameters:
+            size (int): File size in bytes.
+        Returns:
+            bool: `True` if the file should be copied in chunks, `False` otherwise.
+        '''
+
+        return size >= self.threshold
+
+    def split(self, ranges: List[DataRange]) -> List[DataRange]:
+        '''
+        Split data ranges into chunks.
+
+        Parameters:
+            ranges (List[DataRange]): Data ranges.
+        Returns:
+            List[DataRange]: Chunks of at most `chunk_size` bytes.
+        '''
+
+        return [
+            (offset, min(self.chunk_size, start + length - offset))
+            for start, length in ranges
+            for offset in range(start, start + length, self.chunk_size)
+        ]
+
+    def copy(
+        self,
+        source_fd: int,
+        destination_fd: int,
+        size: int
+    ) -> ChunkedCopyResult:
+        '''
+        Copy a file between descriptors in concurrent chunks, keeping holes.
+
+        Parameters:
+            source_fd (int): Source file descriptor.
+            destination_fd (int): Destination file descriptor, truncated to `size`.
+            size (int): File size in bytes.
+        Returns:
+            ChunkedCopyResult: Chunked copy statistics.
+        '''
+
+        ranges = get_data_ranges(source_fd, size)
+        os.ftruncate(destination_fd, size)
+
+        if self.preallocate and hasattr(os, 'posix_fallocate'):
+            try:
+                for offset, length in ranges:
+                    os.posix_fallocate(destination_fd, offset, length)
+            except OSError as exception:
+                if exception.errno not in UNSUPPORTED_ERRNOS:
+                    raise
+
+        chunks = self.split(ranges)
+
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix='nfsops-chunk'
+        ) as executor:
+            copied = sum(
+                executor.map(
+                    lambda chunk: copy_range(
+                        source_fd,
+                        destination_fd,
+                        *chunk
+                    ),
+                    chunks
+                )
+            )
+
+        return ChunkedCopyResult(copied, len(chunks))
+
+
+__all__ = [
+    'ChunkedCopyResult',
+    'ChunkedCopier',
+    'get_data_ranges',
+    'copy_range'
+]
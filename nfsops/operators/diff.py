@@ -0,0 +1,277 @@
+'''
+Backup version diff functions.
+'''
+
+import hashlib
+import os
+import stat
+from pathlib import Path
+from typing import Iterator, List, NamedTuple, Optional, Protocol, cast
+
+from .merge import scan_directory
+from .stat_cache import StatCache, get_default_stat_cache
+
+#: Entry only exists in the second tree.
+ADDED = 'A'
+#: Entry only exists in the first tree.
+REMOVED = 'D'
+#: Entry exists in both trees with different type or content.
+MODIFIED = 'M'
+
+
+class DiffEntry(NamedTuple):
+    '''
+    Difference between two trees.
+    '''
+
+    #: Difference status (`A`, `D` or `M`).
+    status: str
+    #: Relative path using `/` separators, directories end with `/`.
+    path: str
+
+
+class TreeEntry(NamedTuple):
+    '''
+    Entry of a tree listing.
+    '''
+
+    #: Entry name.
+    name: str
+    #: File mode, including the file type bits.
+    mode: int
+    #: Size in bytes.
+    size: int
+    #: Modification time in nanoseconds.
+    mtime_ns: int
+
+
+class Tree(Protocol):
+    '''
+    Tree listing protocol.
+
+    Implemented by the filesystem and by any other source of backup version
+    listings (e.g. per-version manifests), so they can be diffed interchangeably.
+    '''
+
+    def list(self, relative_path: str) -> List[TreeEntry]:
+        '''
+        List a directory, sorted by name.
+
+        Parameters:
+            relative_path (str): Relative directory path, `''` for the root.
+        Returns:
+            List[TreeEntry]: A sorted list of entries, empty if the directory is missing.
+        '''
+
+    def digest(self, relative_path: str) -> bytes:
+        '''
+        Return the content digest of a file, or the target of a link.
+
+        Parameters:
+            relative_path (str): Relative file path.
+        Returns:
+            bytes: A content digest.
+        '''
+
+
+class FileSystemTree:
+    '''
+    Tree listing object reading a directory on the filesystem.
+    '''
+
+    #: Root directory.
+    root: Path
+    #: Stat cache instance.
+    stat_cache: StatCache
+
+    def __init__(self, root: Path, stat_cache: Optional[StatCache] = None):
+        '''
+        Initialize filesystem tree listing object.
+
+        Parameters:
+            root (Path): Root directory.
+            stat_cache (Optional[StatCache]): Stat cache instance, defaults to the shared one.
+        '''
+
+        self.root = root
+        self.stat_cache = stat_cache or get_default_stat_cache()
+
+    def list(self, relative_path: str) -> List[TreeEntry]:
+        '''
+        List a directory, sorted by name.
+
+        Parameters:
+            relative_path (str): Relative directory path, `''` for the root.
+        Returns:
+            List[TreeEntry]: A sorted list of entries, empty if the directory is missing.
+        '''
+
+        listing = [
+            TreeEntry(
+                entry.name,
+                entry_stat.st_mode,
+                entry_stat.st_size,
+                entry_stat.st_mtime_ns
+            )
+            for entry, entry_stat in scan_directory(
+                self.root / relative_path,
+                self.stat_cache
+            )
+        ]
+        listing.sort()
+
+        return listing
+
+    def digest(self, relative_path: str) -> bytes:
+        '''
+        Return the content digest of a file, or the target of a link.
+
+        Parameters:
+            relative_path (str): Relative file path.
+        Returns:
+            bytes: A BLAKE2b digest.
+        '''
+
+        path = self.root / relative_path
+        digest = hashlib.blake2b()
+
+        if os.path.islink(path):
+            digest.update(os.fsencode(os.readlink(path)))
+
+            return digest.digest()
+
+        with open(path, 'rb') as file:
+            for chunk in iter(lambda: file.read(1024 * 1024), b''):
+                digest.update(chunk)
+
+        return digest.digest()
+
+
+def _is_modified(
+    first_tree: Tree,
+    second_tree: Tree,
+    relative_path: str,
+    first_entry: TreeEntry,
+    second_entry: TreeEntry
+) -> bool:
+    '''
+    Compare two non-directory entries, metadata first and digests only if unclear.
+
+    Parameters:
+        first_tree (Tree): First tree listing.
+        second_tree (Tree): Second tree listing.
+        relative_path (str): Relative path of both entries.
+        first_entry (TreeEntry): First entry.
+        second_entry (TreeEntry): Second entry.
+    Returns:
+        bool: `True` if the entries differ, `False` otherwise.
+    '''
+
+    if stat.S_IFMT(first_entry.mode) != stat.S_IFMT(second_entry.mode):
+        return True
+
+    if first_entry.size != second_entry.size:
+        return True
+
+    if first_entry.mtime_ns == second_entry.mtime_ns:
+        return False
+
+    return first_tree.digest(relative_path) != second_tree.digest(relative_path)
+
+
+def _report(
+    tree: Tree,
+    path: str,
+    entry: TreeEntry,
+    status: str
+) -> Iterator[DiffEntry]:
+    '''
+    Report an entry existing in one tree only, including its subtree.
+
+    Parameters:
+        tree (Tree): Tree listing containing the entry.
+        path (str): Relative entry path.
+        entry (TreeEntry): Tree entry.
+        status (str): Difference status for every reported path.
+    Yields:
+        DiffEntry: Differences.
+    '''
+
+    if not stat.S_ISDIR(entry.mode):
+        yield DiffEntry(status, path)
+        return
+
+    yield DiffEntry(status, f'{path}/')
+
+    for child in tree.list(path):
+        yield from _report(tree, f'{path}/{child.name}', child, status)
+
+
+def diff_trees(
+    first_tree: Tree,
+    second_tree: Tree,
+    relative_path: str = ''
+) -> Iterator[DiffEntry]:
+    '''
+    Stream the differences between two trees.
+
+    Both trees are merge-walked in sorted order, one directory level at a
+    time, so the walk is linear in the tree sizes. Entries with equal type,
+    size and modification time are considered unchanged, and content digests
+    are only computed when sizes match but modification times differ.
+
+    Parameters:
+        first_tree (Tree): First tree listing.
+        second_tree (Tree): Second tree listing.
+        relative_path (str): Relative directory to start from.
+    Yields:
+        DiffEntry: Differences, paths only in the second tree are reported as added.
+    '''
+
+    first_entries = iter(first_tree.list(relative_path))
+    second_entries = iter(second_tree.list(relative_path))
+    first_entry = next(first_entries, None)
+    second_entry = next(second_entries, None)
+
+    while first_entry is not None or second_entry is not None:
+        name = min(
+            entry.name for entry in (first_entry, second_entry)
+            if entry is not None
+        )
+        path = f'{relative_path}/{name}' if relative_path else name
+        first = first_entry if first_entry and first_entry.name == name \
+            else None
+        second = second_entry if second_entry and second_entry.name == name \
+            else None
+
+        if first is not None:
+            first_entry = next(first_entries, None)
+
+        if second is not None:
+            second_entry = next(second_entries, None)
+
+        if first is None or second is None:
+            yield from _report(
+                first_tree if first else second_tree,
+                path,
+                cast(TreeEntry, first or second),
+                REMOVED if first else ADDED
+            )
+        elif stat.S_ISDIR(first.mode) and stat.S_ISDIR(second.mode):
+            yield from diff_trees(first_tree, second_tree, path)
+        elif stat.S_ISDIR(first.mode) or stat.S_ISDIR(second.mode):
+            yield from _report(first_tree, path, first, REMOVED)
+            yield from _report(second_tree, path, second, ADDED)
+        elif _is_modified(first_tree, second_tree, path, first, second):
+            yield DiffEntry(MODIFIED, path)
+
+
+__all__ = [
+    'ADDED',
+    'REMOVED',
+    'MODIFIED',
+    'DiffEntry',
+    'TreeEntry',
+    'Tree',
+    'diff_trees'
+]
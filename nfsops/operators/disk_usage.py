@@ -0,0 +1,172 @@
+'''
+Disk usage functions.
+'''
+
+import os
+import stat
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    wait
+)
+from typing import Collection, List, NamedTuple, Optional, Set, Tuple
+
+from .. import utils
+
+#: Device and inode numbers identifying a file.
+FileKey = Tuple[int, int]
+
+
+class DiskUsage(NamedTuple):
+    '''
+    Disk usage totals.
+    '''
+
+    #: Number of entries (files, directories and links).
+    files: int
+    #: Apparent size in bytes.
+    apparent_bytes: int
+    #: Allocated size in bytes.
+    allocated_bytes: int
+
+
+class _DirectoryUsage(NamedTuple):
+    '''
+    Disk usage of a single directory listing.
+    '''
+
+    #: Subdirectory paths to scan next.
+    subdirectories: List[str]
+    #: Totals of the entries with a single link.
+    usage: DiskUsage
+    #: Entries with several links, counted once across the walk.
+    links: List[Tuple[FileKey, DiskUsage]]
+
+
+def _add_usage(first: DiskUsage, second: DiskUsage) -> DiskUsage:
+    '''
+    Add disk usage totals.
+
+    Parameters:
+        first (DiskUsage): First totals.
+        second (DiskUsage): Second totals.
+    Returns:
+        DiskUsage: The sum of both totals.
+    '''
+
+    return DiskUsage(*[a + b for a, b in zip(first, second)])
+
+
+def _scan_directory(path: str, exclude: Collection[str]) -> _DirectoryUsage:
+    '''
+    Sum the entries of one directory.
+
+    Parameters:
+        path (str): Directory path.
+        exclude (Collection[str]): Entry names to skip.
+    Returns:
+        _DirectoryUsage: The directory usage and the subdirectories to scan.
+    '''
+
+    subdirectories = []
+    links = []
+    files = 0
+    apparent_bytes = 0
+    allocated_bytes = 0
+
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.name in exclude:
+                    continue
+
+                try:
+                    entry_stat = entry.stat(follow_symlinks=False)
+                except FileNotFoundError:
+                    continue
+
+                if stat.S_ISDIR(entry_stat.st_mode):
+                    subdirectories.append(entry.path)
+                elif entry_stat.st_nlink > 1:
+                    links.append((
+                        (entry_stat.st_dev, entry_stat.st_ino),
+                        DiskUsage(
+                            1,
+                            entry_stat.st_size,
+                            entry_stat.st_blocks * 512
+                        )
+                    ))
+                    continue
+
+                files += 1
+                apparent_bytes += entry_stat.st_size
+                allocated_bytes += entry_stat.st_blocks * 512
+    except (FileNotFoundError, NotADirectoryError):
+        pass
+
+    return _DirectoryUsage(
+        subdirectories,
+        DiskUsage(files, apparent_bytes, allocated_bytes),
+        links
+    )
+
+
+def measure_disk_usage(
+    path: 'os.PathLike[str]',
+    exclude: Collection[str] = (),
+    max_workers: Optional[int] = None
+) -> DiskUsage:
+    '''
+    Measure the disk usage of a directory tree, like `du`.
+
+    Directories are listed in parallel, so the round trips of many directory
+    listings overlap. Files with several hard links are counted once. The
+    root directory is included in the totals.
+
+    Parameters:
+        path (os.PathLike[str]): Root directory.
+        exclude (Collection[str]): Entry names to skip at the top level.
+        max_workers (Optional[int]): Number of listing threads.
+    Returns:
+        DiskUsage: Disk usage totals.
+    Raises:
+        OSError: Expected root directory not accessible.
+    '''
+
+    root_stat = os.lstat(path)
+    seen: Set[FileKey] = set()
+    usage = DiskUsage(1, root_stat.st_size, root_stat.st_blocks * 512)
+
+    with ThreadPoolExecutor(
+        max_workers=max_workers or utils.get_default_workers(),
+        thread_name_prefix='nfsops-usage'
+    ) as executor:
+        pending: Set['Future[_DirectoryUsage]'] = {
+            executor.submit(_scan_directory, os.fspath(path), exclude)
+        }
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                result = future.result()
+                usage = _add_usage(usage, result.usage)
+
+                for key, link_usage in result.links:
+                    if key not in seen:
+                        seen.add(key)
+                        usage = _add_usage(usage, link_usage)
+
+                pending.update(
+                    executor.submit(_scan_directory, subdirectory, ())
+                    for subdirectory in result.subdirectories
+                )
+
+    return usage
+
+
+__all__ = [
+    'DiskUsage',
+    'measure_disk_usage'
+]
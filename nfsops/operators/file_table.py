@@ -0,0 +1,967 @@
+'''
+File table object.
+'''
+
+import heapq
+import mmap
+import os
+import posixpath
+import stat
+import struct
+from abc import ABC, abstractmethod
+from array import array
+from pathlib import Path
+from typing import (
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union
+)
+
+from .. import utils
+from .diff import FileSystemTree, TreeEntry
+from .merge import MergedEntry
+from .path_filter import PathFilter
+
+try:
+    import numpy  # type: ignore
+except ImportError:  # pragma: no cover
+    numpy = None  # type: ignore  # pylint: disable=C0103
+
+#: File table magic number, including the format version.
+FILE_TABLE_MAGIC = b'NFSTBL\x00\x01'
+#: File table header layout (magic, byte order marker, rows, arena size).
+FILE_TABLE_HEADER = struct.Struct('=8sQQQ')
+#: Byte order marker, read back differently on other byte orders.
+BYTE_ORDER_MARKER = 0x0102030405060708
+
+#: Integer column, writable array or read-only memory-mapped view.
+Column = Union['array[int]', memoryview]
+#: Row indexes, sequence or NumPy array.
+Rows = Union[Sequence[int], 'numpy.ndarray']
+
+#: Number of row pairs compared at once by vectorised path comparisons.
+COMPARE_BLOCK_ROWS = 1 << 16
+
+#: Column names and array type codes, in file order.
+COLUMNS = [
+    ('sizes', 'q'),
+    ('mtimes', 'q'),
+    ('modes', 'I'),
+    ('versions', 'I')
+]
+
+
+class FileRecord(NamedTuple):
+    '''
+    Row of a file table.
+    '''
+
+    #: Relative path using `/` separators.
+    path: str
+    #: Size in bytes.
+    size: int
+    #: Modification time in nanoseconds.
+    mtime_ns: int
+    #: File mode, including the file type bits.
+    mode: int
+    #: Index of the backup version owning the entry (lower is newer).
+    version: int
+
+    @property
+    def is_dir(self) -> bool:
+        '''
+        Check whether the record is a directory.
+
+        Returns:
+            bool: `True` if the record is a directory, `False` otherwise.
+        '''
+
+        return stat.S_ISDIR(self.mode)
+
+
+def get_sort_key(path: bytes) -> bytes:
+    '''
+    Return the sort key of an encoded relative path.
+
+    Sorting `/` before any other character keeps every directory followed by
+    its whole subtree, which is the order of `walk_merged`.
+
+    Parameters:
+        path (bytes): Encoded relative path.
+    Returns:
+        bytes: A sort key.
+    '''
+
+    return path.replace(b'/', b'\0')
+
+
+def align_offset(offset: int) -> int:
+    '''
+    Round an offset up to the next multiple of 8.
+
+    Parameters:
+        offset (int): File offset.
+    Returns:
+        int: An aligned offset.
+    '''
+
+    return (offset + 7) & ~7
+
+
+def _equal_prefixes(
+    arena: Union[bytearray, memoryview],
+    offsets: 'numpy.ndarray',
+    first: 'numpy.ndarray',
+    second: 'numpy.ndarray',
+    lengths: 'numpy.ndarray'
+) -> 'numpy.ndarray':
+    '''
+    Compare the path prefixes of pairs of rows with NumPy, a block of rows at
+    a time.
+
+    Parameters:
+        arena (Union[bytearray, memoryview]): Encoded paths, stored back to back.
+        offsets (numpy.ndarray): Path offsets into the arena.
+        first (numpy.ndarray): First row of every pair.
+        second (numpy.ndarray): Second row of every pair.
+        lengths (numpy.ndarray): Positive number of bytes to compare per pair.
+    Returns:
+        numpy.ndarray: Whether the prefixes of every pair are equal.
+    '''
+
+    data = numpy.frombuffer(arena, dtype=numpy.uint8)
+    equal = numpy.ones(len(first), dtype=bool)
+
+    for block in range(0, len(first), COMPARE_BLOCK_ROWS):
+        rows = slice(block, block + COMPARE_BLOCK_ROWS)
+        block_lengths = lengths[rows]
+        starts = numpy.cumsum(block_lengths) - block_lengths
+        positions = numpy.arange(int(block_lengths.sum())) - \
+            numpy.repeat(starts, block_lengths)
+        differs = data[
+            numpy.repeat(offsets[first[rows]], block_lengths) + positions
+        ] != data[
+            numpy.repeat(offsets[second[rows]], block_lengths) + positions
+        ]
+        equal[rows] = ~numpy.logical_or.reduceat(differs, starts)
+
+    return equal
+
+
+class SortedPaths(ABC):
+    '''
+    Base class of row sequences sorted by path sort key.
+
+    Subclasses provide the number of rows, the encoded path and the tree entry
+    of a row, and get path lookups and directory listings by binary search.
+    '''
+
+    @abstractmethod
+    def __len__(self) -> int:
+        '''
+        Return the number of rows.
+
+        Returns:
+            int: The number of rows.
+        '''
+
+    @abstractmethod
+    def path_bytes(self, index: int) -> bytes:
+        '''
+        Return the encoded path of a row.
+
+        Parameters:
+            index (int): Row index.
+        Returns:
+            bytes: An encoded relative path.
+        '''
+
+    @abstractmethod
+    def tree_entry(self, index: int) -> TreeEntry:
+        '''
+        Return the tree entry of a row.
+
+        Parameters:
+            index (int): Row index.
+        Returns:
+            TreeEntry: A tree entry named after the last path component.
+        '''
+
+    def bisect(self, key: bytes) -> int:
+        '''
+        Find the first row whose path sort key is not lower than a key.
+
+        Parameters:
+            key (bytes): Path sort key.
+        Returns:
+            int: A row index, `len(self)` if every key is lower.
+        '''
+
+        low = 0
+        high = len(self)
+
+        while low < high:
+            middle = (low + high) // 2
+
+            if get_sort_key(self.path_bytes(middle)) < key:
+                low = middle + 1
+            else:
+                high = middle
+
+        return low
+
+    def find(self, path: str) -> Optional[int]:
+        '''
+        Find the first row of a path in a sorted table.
+
+        Parameters:
+            path (str): Relative path using `/` separators.
+        Returns:
+            Optional[int]: A row index or `None` if the path is missing.
+        '''
+
+        encoded_path = os.fsencode(path)
+        index = self.bisect(get_sort_key(encoded_path))
+
+        if index < len(self) and self.path_bytes(index) == encoded_path:
+            return index
+
+        return None
+
+    def iter_children(self, path: str) -> Iterator[int]:
+        '''
+        Iterate over the rows directly inside a directory of a sorted table.
+
+        Subtrees are skipped with binary searches, so listing a directory costs
+        a few lookups per child instead of a scan of the whole subtree.
+
+        Parameters:
+            path (str): Relative directory path, `''` for the root.
+        Yields:
+            int: Row indexes of the children, sorted by name.
+        '''
+
+        prefix = get_sort_key(os.fsencode(path)) + b'\0' if path else b''
+        end = self.bisect(prefix[:-1] + b'\1') if path else len(self)
+        index = self.bisect(prefix)
+
+        while index < end:
+            key = get_sort_key(self.path_bytes(index))
+            yield index
+            index = max(index + 1, self.bisect(key + b'\1'))
+
+    def subtree(self, path: str) -> range:
+        '''
+        Return the rows of a path and of its whole subtree.
+
+        Parameters:
+            path (str): Relative path, `''` for the root.
+        Returns:
+            range: Row indexes, empty if the path is missing.
+        '''
+
+        if not path:
+            return range(len(self))
+
+        key = get_sort_key(os.fsencode(path))
+
+        return range(self.bisect(key), self.bisect(key + b'\1'))
+
+
+class FileTable(SortedPaths):  # pylint: disable=R0902
+    '''
+    Columnar file table object.
+
+    Keep file listings in a few flat buffers instead of one Python object per
+    file: paths are stored back to back in a bytes arena indexed by an offset
+    column, and sizes, modification times, modes and owning versions are
+    stored in typed integer columns. Tables can be saved to a file and mapped
+    back with `mmap` without parsing, mapped tables are read-only.
+    '''
+
+    #: Encoded paths, stored back to back.
+    arena: Union[bytearray, memoryview]
+    #: Path offsets into the arena, one more than the number of rows.
+    offsets: Column
+    #: Sizes in bytes.
+    sizes: Column
+    #: Modification times in nanoseconds.
+    mtimes: Column
+    #: File modes.
+    modes: Column
+    #: Owning version indexes.
+    versions: Column
+
+    def __init__(self):
+        '''
+        Initialize an empty file table object.
+        '''
+
+        self._mmap: Optional[mmap.mmap] = None
+        self._views: List[memoryview] = []
+        self._reset()
+
+    def __enter__(self) -> 'FileTable':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> FileRecord:
+        return FileRecord(
+            self.path(index),
+            self.sizes[index],
+            self.mtimes[index],
+            self.modes[index],
+            self.versions[index]
+        )
+
+    def __iter__(self) -> Iterator[FileRecord]:
+        for index in range(len(self)):
+            yield self[index]
+
+    @classmethod
+    def from_entries(
+        cls,
+        entries: Iterable[MergedEntry],
+        version: Optional[int] = None
+    ) -> 'FileTable':
+        '''
+        Build a file table from merged entries, keeping their order.
+
+        Parameters:
+            entries (Iterable[MergedEntry]): Merged entries.
+            version (Optional[int]): Version index overriding the entry versions.
+        Returns:
+            FileTable: A file table.
+        '''
+
+        table = cls()
+
+        for entry in entries:
+            table.append_entry(entry, version)
+
+        return table
+
+    def append(
+        self,
+        path: str,
+        size: int,
+        mtime_ns: int,
+        mode: int,
+        version: int
+    ) -> None:
+        '''
+        Append a row.
+
+        Parameters:
+            path (str): Relative path using `/` separators.
+            size (int): Size in bytes.
+            mtime_ns (int): Modification time in nanoseconds.
+            mode (int): File mode.
+            version (int): Owning version index.
+        Raises:
+            TypeError: Expected table is not memory-mapped.
+        '''
+
+        self._append_raw(os.fsencode(path), size, mtime_ns, mode, version)
+
+    def append_entry(
+        self,
+        entry: MergedEntry,
+        version: Optional[int] = None
+    ) -> None:
+        '''
+        Append a row for a merged entry.
+
+        Parameters:
+            entry (MergedEntry): Merged entry.
+            version (Optional[int]): Version index overriding the entry version.
+        Raises:
+            TypeError: Expected table is not memory-mapped.
+        '''
+
+        self.append(
+            entry.path,
+            entry.stat.st_size,
+            entry.stat.st_mtime_ns,
+            entry.stat.st_mode,
+            entry.version if version is None else version
+        )
+
+    def path_bytes(self, index: int) -> bytes:
+        '''
+        Return the encoded path of a row.
+
+        Parameters:
+            index (int): Row index.
+        Returns:
+            bytes: An encoded relative path.
+        '''
+
+        return bytes(self.arena[self.offsets[index]:self.offsets[index + 1]])
+
+    def path(self, index: int) -> str:
+        '''
+        Return the path of a row.
+
+        Parameters:
+            index (int): Row index.
+        Returns:
+            str: A relative path using `/` separators.
+        '''
+
+        return os.fsdecode(self.path_bytes(index))
+
+    def tree_entry(self, index: int) -> TreeEntry:
+        '''
+        Return the tree entry of a row.
+
+        Parameters:
+            index (int): Row index.
+        Returns:
+            TreeEntry: A tree entry named after the last path component.
+        '''
+
+        return TreeEntry(
+            posixpath.basename(self.path(index)),
+            self.modes[index],
+            self.sizes[index],
+            self.mtimes[index]
+        )
+
+    def take(self, indices: Rows) -> 'FileTable':
+        '''
+        Build a new table from selected rows.
+
+        Columns are gathered with NumPy when available.
+
+        Parameters:
+            indices (Rows): Row indexes, in output order.
+        Returns:
+            FileTable: A new writable table.
+        '''
+
+        table = FileTable()
+        arena = bytearray()
+        offsets = array('Q', [0])
+
+        for index in indices:
+            arena += self.arena[self.offsets[index]:self.offsets[index + 1]]
+            offsets.append(len(arena))
+
+        table.arena = arena
+        table.offsets = offsets
+
+        for name, typecode in COLUMNS:
+            column = getattr(self, name)
+
+            if numpy is not None and len(indices):
+                selected = numpy.frombuffer(column, dtype=typecode)[
+                    numpy.asarray(indices, dtype=numpy.intp)
+                ]
+                getattr(table, name).frombytes(selected.tobytes())
+            else:
+                getattr(table, name).extend(column[index] for index in indices)
+
+        return table
+
+    def sort(self) -> 'FileTable':
+        '''
+        Return a copy sorted by path, then by version.
+
+        Returns:
+            FileTable: A new sorted table.
+        '''
+
+        return self.take(
+            sorted(
+                range(len(self)),
+                key=lambda index: (
+                    get_sort_key(self.path_bytes(index)),
+                    self.versions[index]
+                )
+            )
+        )
+
+    def filter(
+        self,
+        predicate: Union[PathFilter, Callable[[FileRecord], bool]]
+    ) -> 'FileTable':
+        '''
+        Return a copy with the selected rows.
+
+        Path filters follow the `walk_merged` rules on sorted tables: only
+        paths inside the prefixes are kept along with the directories leading
+        to them, excluded paths drop their whole subtree and include patterns
+        only select non-directories.
+
+        Parameters:
+            predicate (Union[PathFilter, Callable[[FileRecord], bool]]):
+                Path filter or row predicate.
+        Returns:
+            FileTable: A new table.
+        '''
+
+        if not isinstance(predicate, PathFilter):
+            return self.take([
+                index for index, record in enumerate(self)
+                if predicate(record)
+            ])
+
+        path_filter = predicate
+        indices: List[int] = []
+        ancestors: List[Tuple[str, int]] = []
+        excluded: Optional[str] = None
+
+        for index in range(len(self)):
+            path = self.path(index)
+
+            if excluded is not None and path.startswith(f'{excluded}/'):
+                continue
+
+            if path_filter.is_excluded(path):
+                excluded = path
+                continue
+
+            while ancestors and not path.startswith(f'{ancestors[-1][0]}/'):
+                ancestors.pop()
+
+            is_directory = stat.S_ISDIR(self.modes[index])
+
+            if path_filter.prefixes and not any(
+                path == prefix or path.startswith(f'{prefix}/')
+                for prefix in path_filter.prefixes
+            ):
+                # Parents of prefixes are only kept if the prefix exists.
+                if is_directory and any(
+                    prefix.startswith(f'{path}/')
+                    for prefix in path_filter.prefixes
+                ):
+                    ancestors.append((path, index))
+
+                continue
+
+            indices.extend(ancestor for _, ancestor in ancestors)
+            ancestors.clear()
+
+            if is_directory or path_filter.is_included(path):
+                indices.append(index)
+
+        return self.take(indices)
+
+    def newest_wins(self) -> 'FileTable':
+        '''
+        Select the merged view of a table sorted by path and version.
+
+        Applies the `walk_merged` rules to tables merged from complete
+        per-version listings: every path is owned by the newest version
+        containing it, directories merge with the directories of the same
+        name in older versions, and files hide older subtrees. Path owners
+        and hiding files are found with column operations when NumPy is
+        available, only the subtrees of hiding files are searched one by one.
+
+        Returns:
+            FileTable: A new table with one row per visible path.
+        '''
+
+        if len(self) == 0:
+            return FileTable()
+
+        owners = self._get_path_owners()
+        hidden = [
+            (end, self.bisect(get_sort_key(self.path_bytes(owner)) + b'\1'))
+            for owner, end in self._get_hiding_files(owners)
+        ]
+
+        if numpy is None:
+            hidden_rows = {
+                index for start, stop in hidden for index in range(start, stop)
+            }
+
+            return self.take([
+                owner for owner in owners if owner not in hidden_rows
+            ])
+
+        keep = numpy.zeros(len(self), dtype=bool)
+        keep[owners] = True
+
+        for start, stop in hidden:
+            keep[start:stop] = False
+
+        return self.take(numpy.flatnonzero(keep))
+
+    def _get_path_owners(self) -> Rows:
+        '''
+        Return the first row of every path of a sorted table, owned by its
+        newest version.
+
+        Returns:
+            Rows: Row indexes, in order.
+        '''
+
+        if numpy is None:
+            return [
+                index for index in range(len(self))
+                if index == 0 or
+                self.path_bytes(index) != self.path_bytes(index - 1)
+            ]
+
+        offsets = self._get_offsets_array()
+        lengths = numpy.diff(offsets)
+        candidates = numpy.flatnonzero(lengths[1:] == lengths[:-1]) + 1
+        owners = numpy.ones(len(self), dtype=bool)
+        owners[
+            candidates[
+                _equal_prefixes(
+                    self.arena,
+                    offsets,
+                    candidates,
+                    candidates - 1,
+                    lengths[candidates]
+                )
+            ]
+        ] = False
+
+        return numpy.flatnonzero(owners)
+
+    def _get_hiding_files(
+        self,
+        owners: Rows
+    ) -> List[Tuple[int, int]]:
+        '''
+        Find the path owners that are not directories and are followed by
+        their own subtree, listed by older versions.
+
+        Parameters:
+            owners (Rows): First row of every path, in order.
+        Returns:
+            List[Tuple[int, int]]: Owner rows and the first row of their hidden subtree.
+        '''
+
+        count = len(self)
+
+        if numpy is None:
+            return [
+                (owner, end)
+                for owner, end in zip(owners, [*owners[1:], count])
+                if end < count and
+                not stat.S_ISDIR(self.modes[owner]) and
+                self.path_bytes(end).startswith(self.path_bytes(owner) + b'/')
+            ]
+
+        offsets = self._get_offsets_array()
+        lengths = numpy.diff(offsets)
+        modes = numpy.frombuffer(self.modes, dtype=numpy.uint32)
+        starts = numpy.asarray(owners, dtype=numpy.int64)
+        ends = numpy.append(starts[1:], count)
+        selected = (ends < count) & \
+            ((modes[starts] & 0o170000) != stat.S_IFDIR)
+        starts, ends = starts[selected], ends[selected]
+        # Subtrees continue the owner path with a separator.
+        selected = lengths[ends] > lengths[starts]
+        selected[selected] = numpy.frombuffer(self.arena, dtype=numpy.uint8)[
+            offsets[ends[selected]] + lengths[starts[selected]]
+        ] == ord('/')
+        starts, ends = starts[selected], ends[selected]
+        selected = _equal_prefixes(
+            self.arena,
+            offsets,
+            starts,
+            ends,
+            lengths[starts]
+        )
+
+        return list(zip(starts[selected].tolist(), ends[selected].tolist()))
+
+    def _get_offsets_array(self) -> 'numpy.ndarray':
+        '''
+        Return the path offsets as a NumPy array.
+
+        Returns:
+            numpy.ndarray: Signed path offsets, one more than the number of rows.
+        '''
+
+        return numpy.frombuffer(self.offsets, dtype=numpy.uint64) \
+            .astype(numpy.int64)
+
+    @staticmethod
+    def merge(tables: Sequence['FileTable']) -> 'FileTable':
+        '''
+        Merge sorted tables into a single sorted table.
+
+        Parameters:
+            tables (Sequence[FileTable]): Tables sorted by path and version.
+        Returns:
+            FileTable: A new sorted table.
+        '''
+
+        merged = FileTable()
+
+        for _, _, table_index, index in heapq.merge(*[
+            table.iter_sort_keys(table_index)
+            for table_index, table in enumerate(tables)
+        ]):
+            table = tables[table_index]
+            merged._append_raw(  # pylint: disable=W0212
+                table.path_bytes(index),
+                table.sizes[index],
+                table.mtimes[index],
+                table.modes[index],
+                table.versions[index]
+            )
+
+        return merged
+
+    def iter_sort_keys(
+        self,
+        table_index: int = 0
+    ) -> Iterator[Tuple[bytes, int, int, int]]:
+        '''
+        Iterate over the sort keys of the rows.
+
+        Parameters:
+            table_index (int): Table index, breaking ties between tables.
+        Yields:
+            Tuple[bytes, int, int, int]: Path sort key, version, table index and row index.
+        '''
+
+        for index in range(len(self)):
+            yield (
+                get_sort_key(self.path_bytes(index)),
+                self.versions[index],
+                table_index,
+                index
+            )
+
+    def save(self, path: 'os.PathLike[str]') -> None:
+        '''
+        Write the table into a file, atomically.
+
+        Parameters:
+            path (os.PathLike[str]): File path.
+        '''
+
+        with utils.open_atomic_writer(path) as file:
+            file.write(
+                FILE_TABLE_HEADER.pack(
+                    FILE_TABLE_MAGIC,
+                    BYTE_ORDER_MARKER,
+                    len(self),
+                    len(self.arena)
+                )
+            )
+
+            for column in [
+                self.offsets,
+                *[getattr(self, name) for name, _ in COLUMNS],
+                self.arena
+            ]:
+                file.write(b'\0' * (align_offset(file.tell()) - file.tell()))
+                file.write(memoryview(column).cast('B'))
+
+    @classmethod
+    def load(cls, path: 'os.PathLike[str]') -> 'FileTable':
+        '''
+        Map a table file into memory, without reading its rows.
+
+        Parameters:
+            path (os.PathLike[str]): File path.
+        Returns:
+            FileTable: A read-only table, close it with `close()` or use it as context manager.
+        Raises:
+            ValueError: Expected file is not a compatible file table.
+        '''
+
+        with open(path, 'rb') as file:
+            mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        table = cls()
+        table._mmap = mapping  # pylint: disable=W0212
+        table._views = [memoryview(mapping)]  # pylint: disable=W0212
+
+        try:
+            magic, marker, rows, arena_size = FILE_TABLE_HEADER.unpack_from(
+                mapping
+            )
+
+            if magic != FILE_TABLE_MAGIC or marker != BYTE_ORDER_MARKER:
+                raise ValueError(f'"{path}" is not a compatible file table.')
+
+            table._map_sections(rows, arena_size)  # pylint: disable=W0212
+
+            return table
+        except (struct.error, ValueError, TypeError):
+            table.close()
+            raise
+
+    def _map_sections(self, rows: int, arena_size: int) -> None:
+        '''
+        Point the columns and the arena at the sections of the mapped file.
+
+        Parameters:
+            rows (int): Number of rows.
+            arena_size (int): Arena size in bytes.
+        Raises:
+            ValueError: Expected file is truncated.
+        '''
+
+        mapping = self._views[0]
+        offset = FILE_TABLE_HEADER.size
+        sections = [('offsets', 'Q', rows + 1), *[
+            (name, typecode, rows) for name, typecode in COLUMNS
+        ], ('arena', 'B', arena_size)]
+
+        for name, typecode, count in sections:
+            offset = align_offset(offset)
+            size = array(typecode).itemsize * count
+
+            if offset + size > len(mapping):
+                raise ValueError('truncated file table.')
+
+            section = mapping[offset:offset + size]
+            column = section.cast(typecode)  # type: ignore
+            self._views.extend([section, column])
+            setattr(self, name, column)
+            offset += size
+
+    def close(self) -> None:
+        '''
+        Release the memory mapping of a loaded table, leaving it empty.
+        '''
+
+        if self._mmap is None:
+            return
+
+        for view in reversed(self._views):
+            view.release()
+
+        self._mmap.close()
+        self._mmap = None
+        self._views = []
+        self._reset()
+
+    def _reset(self) -> None:
+        '''
+        Replace the columns with empty writable arrays.
+        '''
+
+        self.arena = bytearray()
+        self.offsets = array('Q', [0])
+        self.sizes = array('q')
+        self.mtimes = array('q')
+        self.modes = array('I')
+        self.versions = array('I')
+
+    def _append_raw(
+        self,
+        path: bytes,
+        size: int,
+        mtime_ns: int,
+        mode: int,
+        version: int
+    ) -> None:
+        '''
+        Append a row with an encoded path.
+
+        Parameters:
+            path (bytes): Encoded relative path.
+            size (int): Size in bytes.
+            mtime_ns (int): Modification time in nanoseconds.
+            mode (int): File mode.
+            version (int): Owning version index.
+        Raises:
+            TypeError: Expected table is not memory-mapped.
+        '''
+
+        if self._mmap is not None:
+            raise TypeError('memory-mapped file tables are read-only.')
+
+        self.arena += path  # type: ignore
+        self.offsets.append(len(self.arena))  # type: ignore
+        self.sizes.append(size)  # type: ignore
+        self.mtimes.append(mtime_ns)  # type: ignore
+        self.modes.append(mode)  # type: ignore
+        self.versions.append(version)  # type: ignore
+
+
+class FileTableTree:
+    '''
+    Tree listing object reading a sorted file table or manifest.
+
+    Content digests are read from the backup version directory if given,
+    otherwise entries with different modification times are reported as
+    modified.
+    '''
+
+    #: Sorted file table or manifest.
+    table: SortedPaths
+    #: Backup version directory used for content digests.
+    root: Optional[Path]
+
+    def __init__(self, table: SortedPaths, root: Optional[Path] = None):
+        '''
+        Initialize file table tree listing object.
+
+        Parameters:
+            table (SortedPaths): Sorted file table or manifest with a single row per path.
+            root (Optional[Path]): Backup version directory used for content digests.
+        '''
+
+        self.table = table
+        self.root = root
+
+    def list(self, relative_path: str) -> List[TreeEntry]:
+        '''
+        List a directory, sorted by name.
+
+        Parameters:
+            relative_path (str): Relative directory path, `''` for the root.
+        Returns:
+            List[TreeEntry]: A sorted list of entries, empty if the directory is missing.
+        '''
+
+        return [
+            self.table.tree_entry(index)
+            for index in self.table.iter_children(relative_path)
+        ]
+
+    def digest(self, relative_path: str) -> bytes:
+        '''
+        Return the content digest of a file, or the target of a link.
+
+        Parameters:
+            relative_path (str): Relative file path.
+        Returns:
+            bytes: A content digest.
+        '''
+
+        if self.root is not None:
+            return FileSystemTree(self.root).digest(relative_path)
+
+        index = self.table.find(relative_path)
+
+        return struct.pack(
+            '=q',
+            self.table.tree_entry(index).mtime_ns if index is not None else -1
+        )
+
+
+__all__ = [
+    'FILE_TABLE_MAGIC',
+    'FileRecord',
+    'FileTable',
+    'FileTableTree',
+    'SortedPaths',
+    'align_offset',
+    'get_sort_key'
+]
@@ -0,0 +1,711 @@
+'''
+Restore job queue objects.
+'''
+
+import os
+import socket
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence, Set
+
+from ..configurations.backup import BackupConfiguration
+from ..configurations.context import ContextConfiguration
+from ..configurations.job import JobConfiguration, JobState
+from ..configurations.restore import RestoreConfiguration
+from ..configurations.restore_report import RestoreReportConfiguration
+from ..context_type import ContextType
+from .backup import BackupOperator
+from .operator import Operator
+from .shard import get_server_time
+
+#: Job queue database file name, inside the metadata directory.
+QUEUE_FILE_NAME = 'queue.sqlite'
+#: Job queue clock file name, next to the database, touched to read the server time.
+QUEUE_CLOCK_FILE_NAME = 'queue.clock'
+#: Job states of finished jobs.
+FINAL_STATES = ('done', 'failed', 'cancelled')
+#: Job states of jobs holding a concurrency slot.
+ACTIVE_STATES = ('running', 'cancelling')
+
+#: Job queue database schema.
+QUEUE_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT,
+    priority INTEGER NOT NULL,
+    state TEXT NOT NULL,
+    options TEXT NOT NULL,
+    submitted REAL NOT NULL,
+    started REAL,
+    finished REAL,
+    heartbeat REAL,
+    worker TEXT,
+    preemptions INTEGER NOT NULL DEFAULT 0,
+    report TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, priority);
+'''
+
+
+def to_datetime(timestamp: Optional[float]) -> Optional[datetime]:
+    '''
+    Convert an optional POSIX timestamp to a timezone-aware datetime.
+
+    Parameters:
+        timestamp (Optional[float]): POSIX timestamp or `None`.
+    Returns:
+        Optional[datetime]: A datetime (UTC timezone) or `None`.
+    '''
+
+    if timestamp is None:
+        return None
+
+    return datetime.fromtimestamp(timestamp, timezone.utc)
+
+
+class JobQueue:
+    '''
+    Restore job queue object.
+
+    Jobs are stored in a SQLite database on the volume, so every worker and
+    client sharing the volume sees the same queue. Every change runs in an
+    immediate transaction, and the default rollback journal is kept since
+    write-ahead logging needs shared memory, which NFS does not provide.
+
+    Jobs are claimed by priority, then by the number of active jobs of their
+    workspace, so a workspace submitting many jobs does not starve the
+    others, then in submission order. At most `concurrency` jobs are active
+    across all workers. Running jobs report to the queue at every checkpoint
+    and are preempted there when a higher priority job waits for a slot.
+    Jobs of workers missing their heartbeats for a lease are queued again.
+    Job times are read from the server clock, so leases hold across hosts
+    whose clocks disagree.
+    '''
+
+    #: Database file path.
+    path: Path
+    #: Maximum number of active jobs across all workers.
+    concurrency: int
+    #: Heartbeat lease duration in seconds.
+    lease: float
+
+    def __init__(self, path: Path, concurrency: int = 2, lease: float = 60.0):
+        '''
+        Initialize restore job queue object, creating the database if needed.
+
+        Parameters:
+            path (Path): Database file path.
+            concurrency (int): Maximum number of active jobs across all workers.
+            lease (float): Heartbeat lease duration in seconds.
+        '''
+
+        self.path = path
+        self.concurrency = concurrency
+        self.lease = lease
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        connection = sqlite3.connect(path, timeout=30.0)
+
+        try:
+            connection.executescript(QUEUE_SCHEMA)
+        finally:
+            connection.close()
+
+    def now(self) -> float:
+        '''
+        Return the server time.
+
+        Returns:
+            float: The modification time of the freshly touched clock file.
+        '''
+
+        return get_server_time(self.path.with_name(QUEUE_CLOCK_FILE_NAME))
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        '''
+        Open a database connection inside an immediate transaction.
+
+        Yields:
+            sqlite3.Connection: A connection, committed on success and rolled back otherwise.
+        '''
+
+        connection = sqlite3.connect(
+            self.path,
+            timeout=30.0,
+            isolation_level=None
+        )
+        connection.row_factory = sqlite3.Row
+
+        try:
+            connection.execute('BEGIN IMMEDIATE')
+
+            try:
+                yield connection
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+
+            connection.execute('COMMIT')
+        finally:
+            connection.close()
+
+    @staticmethod
+    def to_job(row: sqlite3.Row) -> JobConfiguration:
+        '''
+        Convert a database row to a job configuration.
+
+        Parameters:
+            row (sqlite3.Row): Job row.
+        Returns:
+            JobConfiguration: A job configuration instance.
+        '''
+
+        return JobConfiguration(
+            id=row['id'],
+            name=row['name'],
+            priority=row['priority'],
+            state=row['state'],
+            options=RestoreConfiguration.parse_raw(row['options']),
+            submitted=datetime.fromtimestamp(row['submitted'], timezone.utc),
+            started=to_datetime(row['started']),
+            finished=to_datetime(row['finished']),
+            worker=row['worker'],
+            preemptions=row['preemptions'],
+            report=RestoreReportConfiguration.parse_raw(row['report'])
+            if row['report'] is not None else None,
+            error=row['error']
+        )
+
+    def submit(
+        self,
+        options: RestoreConfiguration,
+        name: Optional[str] = None,
+        priority: int = 0
+    ) -> JobConfiguration:
+        '''
+        Queue a restore job.
+
+        Parameters:
+            options (RestoreConfiguration): Restore configuration.
+            name (Optional[str]): Backup name for root context.
+            priority (int): Job priority, higher priorities run first.
+        Returns:
+            JobConfiguration: The queued job.
+        '''
+
+        with self.transaction() as connection:
+            cursor = connection.execute(
+                'INSERT INTO jobs (name, priority, state, options, submitted) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (name, priority, 'queued', options.json(), self.now())
+            )
+
+            return self.to_job(
+                connection.execute(
+                    'SELECT * FROM jobs WHERE id = ?',
+                    (cursor.lastrowid,)
+                ).fetchone()
+            )
+
+    def get_job(self, job_id: int) -> JobConfiguration:
+        '''
+        Return a job.
+
+        Parameters:
+            job_id (int): Job identifier.
+        Returns:
+            JobConfiguration: A job configuration instance.
+        Raises:
+            ValueError: Expected job found.
+        '''
+
+        with self.transaction() as connection:
+            row = connection.execute(
+                'SELECT * FROM jobs WHERE id = ?',
+                (job_id,)
+            ).fetchone()
+
+        if row is None:
+            raise ValueError(f'job {job_id} not found.')
+
+        return self.to_job(row)
+
+    def list_jobs(
+        self,
+        states: Optional[Sequence[JobState]] = None
+    ) -> List[JobConfiguration]:
+        '''
+        List jobs in submission order.
+
+        Parameters:
+            states (Optional[Sequence[JobState]]): Job states to list, defaults to all.
+        Returns:
+            List[JobConfiguration]: A list of job configurations.
+        '''
+
+        query = 'SELECT * FROM jobs'
+        parameters: Sequence[str] = ()
+
+        if states is not None:
+            parameters = tuple(states)
+            query += f' WHERE state IN ({", ".join("?" * len(states))})'
+
+        with self.transaction() as connection:
+            rows = connection.execute(f'{query} ORDER BY id', parameters)
+
+            return [self.to_job(row) for row in rows]
+
+    def cancel(self, job_id: int) -> JobConfiguration:
+        '''
+        Cancel a job. Queued jobs are cancelled immediately, active jobs at
+        their next checkpoint.
+
+        Parameters:
+            job_id (int): Job identifier.
+        Returns:
+            JobConfiguration: The cancelled job.
+        Raises:
+            ValueError: Expected job found and not finished.
+        '''
+
+        job = self.get_job(job_id)
+
+        if job.state in FINAL_STATES:
+            raise ValueError(f'job {job_id} is already {job.state}.')
+
+        with self.transaction() as connection:
+            connection.execute(
+                "UPDATE jobs SET state = 'cancelled', finished = ? "
+                "WHERE id = ? AND state = 'queued'",
+                (self.now(), job_id)
+            )
+            connection.execute(
+                "UPDATE jobs SET state = 'cancelling' "
+                "WHERE id = ? AND state = 'running'",
+                (job_id,)
+            )
+
+        return self.get_job(job_id)
+
+    def claim(self, worker: str) -> Optional[JobConfiguration]:
+        '''
+        Claim the next job if a concurrency slot is free.
+
+        Parameters:
+            worker (str): Worker name.
+        Returns:
+            Optional[JobConfiguration]: The claimed job or `None`.
+        '''
+
+        now = self.now()
+
+        with self.transaction() as connection:
+            connection.execute(
+                "UPDATE jobs SET state = 'queued', worker = NULL "
+                "WHERE state = 'running' AND heartbeat < ?",
+                (now - self.lease,)
+            )
+            connection.execute(
+                "UPDATE jobs SET state = 'cancelled', finished = ? "
+                "WHERE state = 'cancelling' AND heartbeat < ?",
+                (now, now - self.lease)
+            )
+
+            active, = connection.execute(
+                'SELECT COUNT(*) FROM jobs WHERE state IN (?, ?)',
+                ACTIVE_STATES
+            ).fetchone()
+
+            if active >= self.concurrency:
+                return None
+
+            row = connection.execute(
+                'SELECT * FROM jobs AS job WHERE state = ? ORDER BY '
+                'priority DESC, ('
+                '    SELECT COUNT(*) FROM jobs AS other '
+                '    WHERE other.state IN (?, ?) AND other.name IS job.name'
+                '), submitted, id LIMIT 1',
+                ('queued', *ACTIVE_STATES)
+            ).fetchone()
+
+            if row is None:
+                return None
+
+            connection.execute(
+                "UPDATE jobs SET state = 'running', started = ?, "
+                'heartbeat = ?, worker = ?, report = NULL, error = NULL '
+                'WHERE id = ?',
+                (now, now, worker, row['id'])
+            )
+
+            return self.to_job(
+                connection.execute(
+                    'SELECT * FROM jobs WHERE id = ?',
+                    (row['id'],)
+                ).fetchone()
+            )
+
+    def heartbeat(self, job_ids: Sequence[int], worker: str) -> None:
+        '''
+        Renew the leases of active jobs.
+
+        Parameters:
+            job_ids (Sequence[int]): Job identifiers.
+            worker (str): Worker name.
+        '''
+
+        if not job_ids:
+            return
+
+        with self.transaction() as connection:
+            connection.execute(
+                'UPDATE jobs SET heartbeat = ? WHERE worker = ? AND '
+                f'id IN ({", ".join("?" * len(job_ids))})',
+                (self.now(), worker, *job_ids)
+            )
+
+    def checkpoint(self, job_id: int, worker: str) -> Optional[str]:
+        '''
+        Renew the lease of an active job and check whether it should stop.
+
+        Among the running jobs, only the lowest priority one started last is
+        preempted, and it is queued again in the same transaction, so a
+        waiting job preempts a single job.
+
+        Parameters:
+            job_id (int): Job identifier.
+            worker (str): Worker name.
+        Returns:
+            Optional[str]: Stop reason (`cancelled`, `preempted` or `lost`), `None` to continue.
+        '''
+
+        now = self.now()
+
+        with self.transaction() as connection:
+            row = connection.execute(
+                'SELECT * FROM jobs WHERE id = ?',
+                (job_id,)
+            ).fetchone()
+
+            if row['worker'] != worker or row['state'] not in ACTIVE_STATES:
+                return 'lost'
+
+            connection.execute(
+                'UPDATE jobs SET heartbeat = ? WHERE id = ?',
+                (now, job_id)
+            )
+
+            if row['state'] == 'cancelling':
+                return 'cancelled'
+
+            active, = connection.execute(
+                'SELECT COUNT(*) FROM jobs WHERE state IN (?, ?)',
+                ACTIVE_STATES
+            ).fetchone()
+            waiting = connection.execute(
+                "SELECT 1 FROM jobs WHERE state = 'queued' AND priority > ?",
+                (row['priority'],)
+            ).fetchone()
+            victim = connection.execute(
+                "SELECT id FROM jobs WHERE state = 'running' "
+                'ORDER BY priority, started DESC LIMIT 1'
+            ).fetchone()
+
+            if (
+                active < self.concurrency or
+                waiting is None or
+                victim['id'] != job_id
+            ):
+                return None
+
+            connection.execute(
+                "UPDATE jobs SET state = 'queued', worker = NULL, "
+                'preemptions = preemptions + 1 WHERE id = ?',
+                (job_id,)
+            )
+
+        return 'preempted'
+
+    def requeue(self, job_id: int, worker: str) -> None:
+        '''
+        Queue an interrupted job again.
+
+        Parameters:
+            job_id (int): Job identifier.
+            worker (str): Worker name.
+        '''
+
+        with self.transaction() as connection:
+            connection.execute(
+                "UPDATE jobs SET state = 'queued', worker = NULL "
+                "WHERE id = ? AND worker = ? AND state = 'running'",
+                (job_id, worker)
+            )
+            connection.execute(
+                "UPDATE jobs SET state = 'cancelled', finished = ? "
+                "WHERE id = ? AND worker = ? AND state = 'cancelling'",
+                (self.now(), job_id, worker)
+            )
+
+    def finish(  # pylint: disable=R0913,R0917
+        self,
+        job_id: int,
+        worker: str,
+        state: JobState,
+        report: Optional[RestoreReportConfiguration] = None,
+        error: Optional[str] = None
+    ) -> bool:
+        '''
+        Record the end of an active job, unless it was queued again or claimed
+        by another worker meanwhile.
+
+        Parameters:
+            job_id (int): Job identifier.
+            worker (str): Worker name.
+            state (JobState): Final job state.
+            report (Optional[RestoreReportConfiguration]): Restore report.
+            error (Optional[str]): Error message of failed jobs.
+        Returns:
+            bool: `True` if the job was still active for the worker, `False` otherwise.
+        '''
+
+        with self.transaction() as connection:
+            return connection.execute(
+                'UPDATE jobs SET state = ?, finished = ?, report = ?, '
+                'error = ? WHERE id = ? AND worker = ? AND state IN (?, ?)',
+                (
+                    state,
+                    self.now(),
+                    report.json() if report is not None else None,
+                    error,
+                    job_id,
+                    worker,
+                    *ACTIVE_STATES
+                )
+            ).rowcount > 0
+
+
+class QueueOperator(Operator):
+    '''
+    Restore job queue operator object.
+
+    Submit restore jobs to the queue of the volume and run them on worker
+    threads. Direct restores are stopped at their checkpoints when cancelled
+    or preempted, and preempted jobs resume later, skipping the files they
+    already restored. Staged restores are never interrupted.
+    '''
+
+    #: Restore job queue.
+    queue: JobQueue
+    #: Worker name, unique across the hosts sharing the volume.
+    worker: str
+
+    def __init__(self, context: ContextConfiguration, concurrency: int = 2):
+        '''
+        Initialize restore job queue operator object.
+
+        Parameters:
+            context (ContextConfiguration): Context configuration.
+            concurrency (int): Maximum number of active jobs across all workers.
+        '''
+
+        super().__init__(context)
+        self.queue = JobQueue(
+            self.metadata_path / QUEUE_FILE_NAME,
+            concurrency,
+            self.context.lock_lease
+        )
+        self.worker = f'{socket.gethostname()}.{os.getpid()}'
+
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._active: Set[int] = set()
+
+    def get_backup_operator(self, name: Optional[str]) -> BackupOperator:
+        '''
+        Return the backup operator of a workspace.
+
+        Parameters:
+            name (Optional[str]): Backup name for root context.
+        Returns:
+            BackupOperator: A backup operator instance.
+        '''
+
+        return BackupOperator(self.context, BackupConfiguration(name=name))
+
+    def submit(
+        self,
+        options: RestoreConfiguration,
+        name: Optional[str] = None,
+        priority: int = 0
+    ) -> JobConfiguration:
+        '''
+        Queue a restore job, checking its workspace and destination first.
+
+        Parameters:
+            options (RestoreConfiguration): Restore configuration.
+            name (Optional[str]): Backup name for root context.
+            priority (int): Job priority, higher priorities run first.
+        Returns:
+            JobConfiguration: The queued job.
+        Raises:
+            ValueError: Expected workspace and destination available for the context.
+        '''
+
+        if self.context.context == ContextType.ROOT and name is None:
+            raise ValueError('"name" parameter is required for root context.')
+
+        self.get_backup_operator(name).get_destination(options)
+
+        return self.queue.submit(options, name, priority)
+
+    def run_job(self, job: JobConfiguration) -> JobConfiguration:
+        '''
+        Run a claimed job until it completes, fails or stops at a checkpoint.
+
+        Parameters:
+            job (JobConfiguration): Claimed job.
+        Returns:
+            JobConfiguration: The job after the run.
+        '''
+
+        reason: Optional[str] = None
+
+        def should_stop() -> bool:
+            nonlocal reason
+
+            reason = 'stopped' if self._stopping.is_set() else \
+                self.queue.checkpoint(job.id, self.worker)
+
+            return reason is not None
+
+        self.logger.info(f'running job {job.id} (priority {job.priority}).')
+
+        with self._lock:
+            self._active.add(job.id)
+
+        report: Optional[RestoreReportConfiguration] = None
+
+        try:
+            report = self.get_backup_operator(job.name).restore(
+                job.options,
+                should_stop
+            )
+        except Exception as exception:  # pylint: disable=W0703
+            # Jobs stopped at a checkpoint are requeued or cancelled instead.
+            if reason is None:
+                self.logger.error(f'job {job.id} failed: {exception}')
+                self.queue.finish(
+                    job.id,
+                    self.worker,
+                    'failed',
+                    error=str(exception)
+                )
+                return self.queue.get_job(job.id)
+
+            self.logger.warning(f'job {job.id} stopped: {exception}')
+        finally:
+            with self._lock:
+                self._active.discard(job.id)
+
+        if reason == 'stopped':
+            self.queue.requeue(job.id, self.worker)
+        elif reason is None or reason == 'cancelled':
+            if not self.queue.finish(
+                job.id,
+                self.worker,
+                'done' if reason is None else 'cancelled',
+                report
+            ):
+                reason = 'lost'
+
+        self.logger.info(f'job {job.id} ended ({reason or "done"}).')
+
+        return self.queue.get_job(job.id)
+
+    def work(
+        self,
+        threads: int = 1,
+        drain: bool = False,
+        poll_interval: float = 1.0
+    ) -> None:
+        '''
+        Claim and run jobs on worker threads until stopped.
+
+        Parameters:
+            threads (int): Number of jobs run concurrently by this worker.
+            drain (bool): Whether to return once no job is queued.
+            poll_interval (float): Time between queue checks in seconds.
+        '''
+
+        def run_jobs() -> None:
+            while not self._stopping.is_set():
+                job = self.queue.claim(self.worker)
+
+                if job is not None:
+                    self.run_job(job)
+                    continue
+
+                if drain and not self.queue.list_jobs(['queued']):
+                    return
+
+                self._stopping.wait(poll_interval)
+
+        def renew() -> None:
+            while not self._stopping.wait(self.queue.lease / 3):
+                with self._lock:
+                    active = sorted(self._active)
+
+                self.queue.heartbeat(active, self.worker)
+
+        self._stopping.clear()
+
+        heartbeat = threading.Thread(
+            target=renew,
+            name='nfsops-heartbeat',
+            daemon=True
+        )
+        workers = [
+            threading.Thread(target=run_jobs, name=f'nfsops-worker-{index}')
+            for index in range(threads)
+        ]
+
+        heartbeat.start()
+
+        for worker in workers:
+            worker.start()
+
+        try:
+            for worker in workers:
+                worker.join()
+        finally:
+            self.stop()
+
+            for worker in workers:
+                worker.join()
+
+            heartbeat.join()
+
+    def stop(self) -> None:
+        '''
+        Stop the workers, queuing their active direct restores again at their
+        next checkpoint.
+        '''
+
+        self._stopping.set()
+
+
+__all__ = [
+    'ACTIVE_STATES',
+    'FINAL_STATES',
+    'JobQueue',
+    'QUEUE_CLOCK_FILE_NAME',
+    'QUEUE_FILE_NAME',
+    'QueueOperator'
+]
@@ -0,0 +1,403 @@
+'''
+Operation lock object.
+'''
+
+import errno
+import fcntl
+import json
+import os
+import random
+import socket
+import threading
+import time
+import uuid
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+from typing import ContextManager, Iterator, List, Optional, TypeVar
+
+from .. import utils
+
+#: Shared lock mode, for operations reading a resource.
+SHARED = 'shared'
+#: Exclusive lock mode, for operations modifying a resource.
+EXCLUSIVE = 'exclusive'
+#: Holder state of a waiting exclusive lock, blocking new shared locks.
+WAITING = 'waiting'
+#: Guard file name, inside every lock directory.
+GUARD_NAME = '.guard'
+
+#: Serialize guard sections of the process, record locks are per process.
+_GUARD_LOCK = threading.Lock()
+
+#: Context manager result type.
+T = TypeVar('T')
+
+
+class OperationLock:  # pylint: disable=R0902
+    '''
+    Shared or exclusive lock on a named resource of a volume.
+
+    Every holder is recorded as a lease file in the lock directory, renewed in
+    the background while the lock is held, so holders of crashed or
+    disconnected hosts are detected and removed once their lease expires.
+    Holder files are only listed and created under a short record lock on a
+    guard file (`fcntl`), which NFS clients forward to the server and use to
+    revalidate their caches. Lease ages are measured against the guard file
+    modification time, set by the server, so client clocks may be skewed.
+
+    Waiting exclusive locks block new shared locks, so writers are not starved
+    by a steady stream of readers.
+    '''
+
+    #: Lock directory.
+    path: Path
+    #: Lock mode (`shared` or `exclusive`).
+    mode: str
+    #: Lease duration in seconds.
+    lease: float
+    #: Maximum time to wait for the lock in seconds or `None` to wait forever.
+    timeout: Optional[float]
+    #: Time between attempts in seconds, randomized by ±50%.
+    poll_interval: float
+    #: Unique holder identifier (host, process and random suffix).
+    holder_id: str
+    #: Whether the lease of the held lock expired and was removed by another holder.
+    lost: bool
+
+    def __init__(  # pylint: disable=R0913,R0917
+        self,
+        path: Path,
+        mode: str = EXCLUSIVE,
+        lease: float = 60.0,
+        timeout: Optional[float] = None,
+        poll_interval: float = 0.5
+    ):
+        '''
+        Initialize operation lock object.
+
+        Parameters:
+            path (Path): Lock directory, created on demand.
+            mode (str): Lock mode (`shared` or `exclusive`).
+            lease (float): Lease duration in seconds.
+            timeout (Optional[float]): Maximum time to wait for the lock in seconds.
+            poll_interval (float): Time between attempts in seconds.
+        Raises:
+            ValueError: Expected lock mode not supported.
+        '''
+
+        if mode not in (SHARED, EXCLUSIVE):
+            raise ValueError(
+                f'invalid lock mode "{mode}", use "shared" or "exclusive" '
+                'instead.'
+            )
+
+        self.path = path
+        self.mode = mode
+        self.lease = lease
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.holder_id = \
+            f'{socket.gethostname()}.{os.getpid()}.{uuid.uuid4().hex[:8]}'
+        self.lost = False
+        self.logger = utils.get_default_logger()
+        self._holder_path: Optional[Path] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> 'OperationLock':
+        self.acquire()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.release()
+
+    @property
+    def held(self) -> bool:
+        '''
+        Check whether the lock is held.
+
+        Returns:
+            bool: `True` if the lock is held, `False` otherwise.
+        '''
+
+        return self._holder_path is not None
+
+    def acquire(self) -> None:
+        '''
+        Wait for the lock and start renewing its lease.
+
+        Raises:
+            TimeoutError: Expected lock not available before the timeout.
+            RuntimeError: Expected lock is not already held.
+        '''
+
+        if self.held:
+            raise RuntimeError(f'lock "{self.path}" is already held.')
+
+        deadline = None if self.timeout is None \
+            else time.monotonic() + self.timeout
+        holder_path = self.path / f'{self.mode}.{self.holder_id}'
+        waiting_path = self.path / f'{WAITING}.{self.holder_id}'
+
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        try:
+            while True:
+                with self._guard() as now:
+                    conflicts = [
+                        name for name in self._list_holders(now)
+                        if self._conflicts(name)
+                    ]
+
+                    if not conflicts:
+                        self._write_holder(holder_path)
+                        break
+
+                    if self.mode == EXCLUSIVE:
+                        self._write_holder(waiting_path)
+
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise TimeoutError(
+                        f'lock "{self.path}" not acquired in {self.timeout}s, '
+                        f'held by {", ".join(sorted(conflicts))}.'
+                    )
+
+                time.sleep(self.poll_interval * random.uniform(0.5, 1.5))
+        finally:
+            self._remove(waiting_path)
+
+        self._holder_path = holder_path
+        self.lost = False
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._renew_lease,
+            name='nfsops-lock',
+            daemon=True
+        )
+        self._thread.start()
+
+    def renew(self) -> bool:
+        '''
+        Renew the lease of the held lock.
+
+        Returns:
+            bool: `True` if the lease was renewed, `False` if the lock was lost.
+        '''
+
+        if self._holder_path is None:
+            return False
+
+        try:
+            os.utime(self._holder_path)
+        except FileNotFoundError:
+            self.lost = True
+            self.logger.error(
+                f'lost lock "{self.path}", its lease expired and was removed.'
+            )
+            return False
+
+        return True
+
+    def check(self) -> None:
+        '''
+        Check that the lock is still held, at the checkpoints of long
+        operations.
+
+        Raises:
+            RuntimeError: Expected lock lease not expired.
+        '''
+
+        if self.lost:
+            raise RuntimeError(
+                f'lost lock "{self.path}", its lease expired and was removed.'
+            )
+
+    def release(self) -> None:
+        '''
+        Stop renewing the lease and release the lock.
+        '''
+
+        if self._holder_path is None:
+            return
+
+        self._stop.set()
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+        self._remove(self._holder_path)
+        self._holder_path = None
+
+    @contextmanager
+    def _guard(self) -> Iterator[float]:
+        '''
+        Hold the guard record lock of the lock directory.
+
+        Yields:
+            float: Current time of the volume, in seconds since the epoch.
+        '''
+
+        with _GUARD_LOCK:
+            fd = os.open(self.path / GUARD_NAME, os.O_RDWR | os.O_CREAT, 0o666)
+
+            try:
+                try:
+                    fcntl.lockf(fd, fcntl.LOCK_EX)
+                except OSError as exception:
+                    if exception.errno not in (errno.ENOLCK, errno.EOPNOTSUPP):
+                        raise
+
+                    self.logger.warning(
+                        f'record locks not supported for "{self.path}", '
+                        'relying on leases only.'
+                    )
+
+                os.utime(fd)
+
+                yield os.fstat(fd).st_mtime
+            finally:
+                os.close(fd)
+
+    def _list_holders(self, now: float) -> List[str]:
+        '''
+        List the holder files of the lock directory, removing expired ones.
+
+        Parameters:
+            now (float): Current time of the volume, in seconds since the epoch.
+        Returns:
+            List[str]: Holder file names (`<state>.<holder identifier>`).
+        '''
+
+        holders = []
+
+        with os.scandir(self.path) as entries:
+            for entry in entries:
+                if entry.name.startswith('.'):
+                    continue
+
+                try:
+                    mtime = entry.stat(follow_symlinks=False).st_mtime
+                except FileNotFoundError:
+                    continue
+
+                if mtime + self.lease < now:
+                    self.logger.warning(
+                        f'removing expired lock holder "{entry.path}".'
+                    )
+                    self._remove(Path(entry.path))
+                else:
+                    holders.append(entry.name)
+
+        return holders
+
+    def _conflicts(self, name: str) -> bool:
+        '''
+        Check whether a holder file conflicts with the lock mode.
+
+        Parameters:
+            name (str): Holder file name.
+        Returns:
+            bool: `True` if the lock must wait for the holder, `False` otherwise.
+        '''
+
+        state, _, holder_id = name.partition('.')
+
+        if holder_id == self.holder_id:
+            return False
+
+        if self.mode == EXCLUSIVE:
+            return state in (SHARED, EXCLUSIVE)
+
+        return state in (EXCLUSIVE, WAITING)
+
+    def _write_holder(self, path: Path) -> None:
+        '''
+        Create or refresh a holder file, describing its owner.
+
+        Parameters:
+            path (Path): Holder file path.
+        '''
+
+        temporary_path = self.path / f'.{path.name}.tmp'
+
+        with open(temporary_path, 'w', encoding='utf-8') as file:
+            json.dump({
+                'host': socket.gethostname(),
+                'pid': os.getpid(),
+                'mode': self.mode
+            }, file)
+
+        os.replace(temporary_path, path)
+
+    def _renew_lease(self) -> None:
+        '''
+        Renew the lease every third of its duration until released or lost.
+        '''
+
+        while not self._stop.wait(self.lease / 3):
+            if not self.renew():
+                break
+
+    @staticmethod
+    def _remove(path: Path) -> None:
+        '''
+        Remove a holder file, ignoring missing files.
+
+        Parameters:
+            path (Path): Holder file path.
+        '''
+
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+class LockStack(ExitStack):
+    '''
+    Exit stack recording the operation locks entered into it, to check them
+    at the checkpoints of long operations.
+    '''
+
+    #: Entered operation locks, in order.
+    locks: List[OperationLock]
+
+    def __init__(self):
+        '''
+        Initialize lock stack object.
+        '''
+
+        super().__init__()
+        self.locks = []
+
+    def enter_context(self, cm: ContextManager[T]) -> T:
+        result = super().enter_context(cm)
+
+        if isinstance(result, OperationLock):
+            self.locks.append(result)
+
+        return result
+
+    def check(self) -> bool:
+        '''
+        Check that every entered lock is still held.
+
+        Returns:
+            bool: Always `False`, to be used as a callback stopping operations early.
+        Raises:
+            RuntimeError: Expected lock leases not expired.
+        '''
+
+        for lock in self.locks:
+            lock.check()
+
+        return False
+
+
+__all__ = [
+    'EXCLUSIVE',
+    'SHARED',
+    'LockStack',
+    'OperationLock'
+]
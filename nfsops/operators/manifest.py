@@ -0,0 +1,339 @@
+'''
+Backup version manifest functions.
+
+A manifest is a binary listing of a backup version, read through `mmap`:
+
+- a header with the format version and the section sizes,
+- a table of fixed-width records (sizes, times, modes and path locations),
+- a sorted path index, mapping sorted positions to record numbers,
+- a string arena holding the encoded paths back to back.
+
+Readers binary-search the path index, so a lookup or a directory listing only
+touches a few pages of the file whatever the number of entries.
+'''
+
+import mmap
+import os
+import posixpath
+import struct
+from array import array
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from .. import utils
+from .diff import TreeEntry
+from .file_table import SortedPaths, align_offset, get_sort_key
+from .merge import MergedEntry
+
+#: Manifest magic number.
+MANIFEST_MAGIC = b'NFSMAN\x00\x00'
+#: Manifest format version, incremented on incompatible changes.
+MANIFEST_FORMAT_VERSION = 1
+#: Manifest header layout (magic, format version, record size, byte order
+#: marker, records, arena size, source inode and modification time).
+MANIFEST_HEADER = struct.Struct('=8sIIQQQQq')
+#: Manifest record layout (path offset, size, modification time, path length,
+#: mode, user and group).
+MANIFEST_RECORD = struct.Struct('=QqqIIII')
+#: Path location layout, at the start of every record.
+MANIFEST_PATH = struct.Struct('=Q16xI')
+#: Path index item layout.
+MANIFEST_INDEX_ITEM = struct.Struct('=I')
+#: Byte order marker, read back differently on other byte orders.
+BYTE_ORDER_MARKER = 0x0102030405060708
+
+
+class ManifestRecord(NamedTuple):
+    '''
+    Entry of a backup version manifest.
+    '''
+
+    #: Relative path using `/` separators.
+    path: str
+    #: Size in bytes.
+    size: int
+    #: Modification time in nanoseconds.
+    mtime_ns: int
+    #: File mode, including the file type bits.
+    mode: int
+    #: Owner user ID.
+    uid: int
+    #: Owner group ID.
+    gid: int
+
+
+def write_manifest(
+    entries: Iterable[MergedEntry],
+    path: 'os.PathLike[str]',
+    source_key: Tuple[int, int] = (0, 0)
+) -> int:
+    '''
+    Write the manifest of a listing into a file, atomically.
+
+    Entries may come in any order, the path index is sorted while writing.
+
+    Parameters:
+        entries (Iterable[MergedEntry]): Listing entries, one per path.
+        path (os.PathLike[str]): Manifest file path.
+        source_key (Tuple[int, int]): Inode number and modification time of the listed directory.
+    Returns:
+        int: Number of written records.
+    '''
+
+    records = bytearray()
+    arena = bytearray()
+    keys = []
+
+    for entry in entries:
+        encoded_path = os.fsencode(entry.path)
+        records += MANIFEST_RECORD.pack(
+            len(arena),
+            entry.stat.st_size,
+            entry.stat.st_mtime_ns,
+            len(encoded_path),
+            entry.stat.st_mode,
+            entry.stat.st_uid,
+            entry.stat.st_gid
+        )
+        keys.append(get_sort_key(encoded_path))
+        arena += encoded_path
+
+    sections: List[Union[bytes, bytearray]] = [
+        records,
+        array('I', sorted(range(len(keys)), key=keys.__getitem__)).tobytes(),
+        arena
+    ]
+
+    with utils.open_atomic_writer(path) as file:
+        file.write(
+            MANIFEST_HEADER.pack(
+                MANIFEST_MAGIC,
+                MANIFEST_FORMAT_VERSION,
+                MANIFEST_RECORD.size,
+                BYTE_ORDER_MARKER,
+                len(keys),
+                len(arena),
+                *source_key
+            )
+        )
+
+        for section in sections:
+            file.write(b'\0' * (align_offset(file.tell()) - file.tell()))
+            file.write(section)
+
+    return len(keys)
+
+
+class Manifest(SortedPaths):  # pylint: disable=R0902
+    '''
+    Memory-mapped backup version manifest object.
+
+    Rows are numbered in path order: `manifest[0]` is the first path of the
+    sorted index, whatever the record order in the file. Records are decoded
+    on access only, close the manifest with `close()` or use it as context
+    manager.
+    '''
+
+    #: Inode number and modification time of the listed directory.
+    source_key: Tuple[int, int]
+
+    def __init__(self, path: 'os.PathLike[str]'):
+        '''
+        Map a manifest file into memory, without reading its records.
+
+        Parameters:
+            path (os.PathLike[str]): Manifest file path.
+        Raises:
+            ValueError: Expected file is not a compatible manifest.
+        '''
+
+        with open(path, 'rb') as file:
+            self._mmap: Optional[mmap.mmap] = mmap.mmap(
+                file.fileno(),
+                0,
+                access=mmap.ACCESS_READ
+            )
+
+        if len(self._mmap) < MANIFEST_HEADER.size:
+            self.close()
+            raise ValueError(f'"{path}" is not a compatible manifest.')
+
+        (
+            magic,
+            format_version,
+            record_size,
+            marker,
+            self._records,
+            arena_size,
+            *source_key
+        ) = MANIFEST_HEADER.unpack_from(self._mmap)
+
+        if (
+            magic != MANIFEST_MAGIC or
+            format_version != MANIFEST_FORMAT_VERSION or
+            record_size != MANIFEST_RECORD.size or
+            marker != BYTE_ORDER_MARKER
+        ):
+            self.close()
+            raise ValueError(f'"{path}" is not a compatible manifest.')
+
+        self.source_key = (source_key[0], source_key[1])
+        self._records_offset = align_offset(MANIFEST_HEADER.size)
+        self._index_offset = align_offset(
+            self._records_offset + self._records * MANIFEST_RECORD.size
+        )
+        self._arena_offset = align_offset(
+            self._index_offset + self._records * MANIFEST_INDEX_ITEM.size
+        )
+
+        if self._arena_offset + arena_size > len(self._mmap):
+            self.close()
+            raise ValueError(f'"{path}" is a truncated manifest.')
+
+    def __enter__(self) -> 'Manifest':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._records if self._mmap is not None else 0
+
+    def __getitem__(self, index: int) -> ManifestRecord:
+        path_offset, size, mtime_ns, path_length, mode, uid, gid = \
+            MANIFEST_RECORD.unpack_from(
+                self._get_mapping(),
+                self._get_record_offset(index)
+            )
+
+        return ManifestRecord(
+            os.fsdecode(self._read_path(path_offset, path_length)),
+            size,
+            mtime_ns,
+            mode,
+            uid,
+            gid
+        )
+
+    def __iter__(self) -> Iterator[ManifestRecord]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def path_bytes(self, index: int) -> bytes:
+        '''
+        Return the encoded path of a row.
+
+        Parameters:
+            index (int): Row index, in path order.
+        Returns:
+            bytes: An encoded relative path.
+        '''
+
+        return self._read_path(
+            *MANIFEST_PATH.unpack_from(
+                self._get_mapping(),
+                self._get_record_offset(index)
+            )
+        )
+
+    def tree_entry(self, index: int) -> TreeEntry:
+        '''
+        Return the tree entry of a row.
+
+        Parameters:
+            index (int): Row index, in path order.
+        Returns:
+            TreeEntry: A tree entry named after the last path component.
+        '''
+
+        record = self[index]
+
+        return TreeEntry(
+            posixpath.basename(record.path),
+            record.mode,
+            record.size,
+            record.mtime_ns
+        )
+
+    def get(self, path: str) -> Optional[ManifestRecord]:
+        '''
+        Look up the record of a path.
+
+        Parameters:
+            path (str): Relative path using `/` separators.
+        Returns:
+            Optional[ManifestRecord]: The record or `None` if the path is missing.
+        '''
+
+        index = self.find(path)
+
+        return self[index] if index is not None else None
+
+    def close(self) -> None:
+        '''
+        Release the memory mapping, leaving the manifest empty.
+        '''
+
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def _get_mapping(self) -> mmap.mmap:
+        '''
+        Return the memory mapping.
+
+        Returns:
+            mmap.mmap: The memory mapping.
+        Raises:
+            ValueError: Expected manifest is not closed.
+        '''
+
+        if self._mmap is None:
+            raise ValueError('manifest is closed.')
+
+        return self._mmap
+
+    def _get_record_offset(self, index: int) -> int:
+        '''
+        Return the file offset of a row record.
+
+        Parameters:
+            index (int): Row index, in path order.
+        Returns:
+            int: A file offset.
+        Raises:
+            IndexError: Expected row index is in range.
+        '''
+
+        if not 0 <= index < len(self):
+            raise IndexError('manifest index out of range.')
+
+        record, = MANIFEST_INDEX_ITEM.unpack_from(
+            self._get_mapping(),
+            self._index_offset + index * MANIFEST_INDEX_ITEM.size
+        )
+
+        return self._records_offset + record * MANIFEST_RECORD.size
+
+    def _read_path(self, path_offset: int, path_length: int) -> bytes:
+        '''
+        Read an encoded path from the string arena.
+
+        Parameters:
+            path_offset (int): Path offset into the arena.
+            path_length (int): Path length in bytes.
+        Returns:
+            bytes: An encoded relative path.
+        '''
+
+        start = self._arena_offset + path_offset
+
+        return self._get_mapping()[start:start + path_length]
+
+
+__all__ = [
+    'MANIFEST_FORMAT_VERSION',
+    'MANIFEST_MAGIC',
+    'Manifest',
+    'ManifestRecord',
+    'write_manifest'
+]
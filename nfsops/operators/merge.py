@@ -0,0 +1,339 @@
+'''
+Backup version merge functions.
+'''
+
+import os
+import stat
+from pathlib import Path
+from typing import (
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union
+)
+
+from .path_filter import PathFilter
+from .stat_cache import ScandirPrefetcher, StatCache, get_default_stat_cache
+
+#: Backup version index and root directory.
+VersionSource = Tuple[int, Path]
+
+
+class MergedEntry(NamedTuple):
+    '''
+    Entry of the merged view of backup versions.
+    '''
+
+    #: Relative path using `/` separators.
+    path: str
+    #: Index of the backup version owning the entry (lower is newer).
+    version: int
+    #: Absolute source path inside the owning backup version.
+    source: Path
+    #: Source `stat` result, not following symbolic links.
+    stat: os.stat_result
+
+    @property
+    def is_dir(self) -> bool:
+        '''
+        Check whether the entry is a directory.
+
+        Returns:
+            bool: `True` if the entry is a directory, `False` otherwise.
+        '''
+
+        return stat.S_ISDIR(self.stat.st_mode)
+
+
+def walk_merged(
+    sources: Sequence[Path],
+    stat_cache: Optional[StatCache] = None,
+    path_filter: Optional[PathFilter] = None,
+    prefetcher: Optional[ScandirPrefetcher] = None
+) -> Iterator[MergedEntry]:
+    '''
+    Walk the merged view of backup versions, newest wins.
+
+    Every relative path is owned by the newest version containing it. A
+    directory is merged with the directories of the same name in older
+    versions, while a file or link hides everything with the same name in older
+    versions. Entries are yielded in sorted order, parents before children,
+    and only one directory level per version is kept in memory at a time.
+
+    The path filter is applied during the walk: only the prefix subtrees are
+    visited (resolving their parents with single `stat` calls) and excluded
+    directories are never scanned. Include patterns only select files, and
+    the ancestors of every prefix are yielded once, so the walk is always a
+    self-contained tree.
+
+    With a prefetcher, the subdirectories of each level are listed in the
+    background while the walk is still yielding the current level.
+
+    Parameters:
+        sources (Sequence[Path]): Backup version directories, newest first.
+        stat_cache (Optional[StatCache]): Stat cache instance, defaults to the shared one.
+        path_filter (Optional[PathFilter]): Path filter, all paths if `None`.
+        prefetcher (Optional[ScandirPrefetcher]): Directory listing prefetcher.
+    Yields:
+        MergedEntry: Merged entries.
+    '''
+
+    stat_cache = stat_cache or get_default_stat_cache()
+    path_filter = path_filter or PathFilter()
+    lister = prefetcher or stat_cache
+    roots = [
+        (version, source) for version, source in enumerate(sources)
+        if _is_directory(source, stat_cache)
+    ]
+
+    if not path_filter.prefixes:
+        yield from _walk_directory(roots, '', lister, path_filter)
+        return
+
+    yielded_ancestors: Set[str] = set()
+
+    for prefix in path_filter.prefixes:
+        resolved = _resolve_prefix(roots, prefix, stat_cache)
+
+        if resolved is None:
+            continue
+
+        entries, owner_sources = resolved
+
+        if any(path_filter.is_excluded(entry.path) for entry in entries):
+            continue
+
+        *ancestors, owner = entries
+
+        for ancestor in ancestors:
+            if ancestor.path not in yielded_ancestors:
+                yielded_ancestors.add(ancestor.path)
+                yield ancestor
+
+        if not owner.is_dir:
+            if path_filter.is_included(owner.path):
+                yield owner
+
+            continue
+
+        yield owner
+        yield from _walk_directory(
+            owner_sources,
+            owner.path,
+            lister,
+            path_filter
+        )
+
+
+def _resolve_prefix(
+    sources: List[VersionSource],
+    prefix: str,
+    stat_cache: StatCache
+) -> Optional[Tuple[List[MergedEntry], List[VersionSource]]]:
+    '''
+    Resolve the owners of a relative path and its ancestors one component at
+    a time.
+
+    Parameters:
+        sources (List[VersionSource]): Version indexes and roots, newest first.
+        prefix (str): Relative path using `/` separators.
+        stat_cache (StatCache): Stat cache instance.
+    Returns:
+        Optional[Tuple[List[MergedEntry], List[VersionSource]]]:
+            The owner entries, outermost first, and the versions merged into
+            the last one if it is a directory, `None` if the path is missing
+            or hidden by a newer file.
+    '''
+
+    entries: List[MergedEntry] = []
+    relative_path = ''
+
+    for name in prefix.split('/'):
+        if entries and not entries[-1].is_dir:
+            return None
+
+        relative_path = f'{relative_path}/{name}' if relative_path else name
+        owner, sources = resolve_child(sources, relative_path, stat_cache)
+
+        if owner is None:
+            return None
+
+        entries.append(owner)
+
+    return (entries, sources) if entries else None
+
+
+def resolve_child(
+    sources: List[VersionSource],
+    relative_path: str,
+    stat_cache: StatCache
+) -> Tuple[Optional[MergedEntry], List[VersionSource]]:
+    '''
+    Resolve the owner of a relative path in the versions merged into its
+    parent directory.
+
+    Parameters:
+        sources (List[VersionSource]): Versions merged into the parent directory, newest first.
+        relative_path (str): Relative path using `/` separators.
+        stat_cache (StatCache): Stat cache instance.
+    Returns:
+        Tuple[Optional[MergedEntry], List[VersionSource]]:
+            The owner entry (`None` if missing) and the versions merged into it
+            if it is a directory.
+    '''
+
+    owner = None
+    directory_sources = []
+
+    for version, root in sources:
+        try:
+            entry_stat = stat_cache.lstat(root / relative_path)
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+
+        if owner is None:
+            owner = MergedEntry(
+                relative_path,
+                version,
+                root / relative_path,
+                entry_stat
+            )
+
+        if owner.is_dir and stat.S_ISDIR(entry_stat.st_mode):
+            directory_sources.append((version, root))
+
+    return owner, directory_sources
+
+
+def _is_directory(path: Path, stat_cache: StatCache) -> bool:
+    '''
+    Check whether a path is a directory, treating missing paths as not.
+
+    Parameters:
+        path (Path): Path to check.
+        stat_cache (StatCache): Stat cache instance.
+    Returns:
+        bool: `True` if the path is a directory, `False` otherwise.
+    '''
+
+    try:
+        return stat.S_ISDIR(stat_cache.stat(path).st_mode)
+    except (FileNotFoundError, NotADirectoryError):
+        return False
+
+
+def scan_directory(
+    directory: Path,
+    lister: Union[StatCache, ScandirPrefetcher]
+) -> List[Tuple['os.DirEntry[str]', os.stat_result]]:
+    '''
+    List a directory with the `stat` results of its entries, not following
+    symbolic links.
+
+    Missing directories are listed as empty and entries removed while listing
+    are skipped.
+
+    Parameters:
+        directory (Path): Directory path.
+        lister (Union[StatCache, ScandirPrefetcher]): Stat cache or prefetcher listing directories.
+    Returns:
+        List[Tuple[os.DirEntry[str], os.stat_result]]: Directory entries and their `stat` results.
+    '''
+
+    try:
+        entries = lister.scandir(directory)
+    except (FileNotFoundError, NotADirectoryError):
+        return []
+
+    listing = []
+
+    for entry in entries:
+        try:
+            listing.append((entry, entry.stat(follow_symlinks=False)))
+        except FileNotFoundError:
+            continue
+
+    return listing
+
+
+def _walk_directory(
+    sources: List[VersionSource],
+    relative_path: str,
+    lister: Union[StatCache, ScandirPrefetcher],
+    path_filter: PathFilter
+) -> Iterator[MergedEntry]:
+    '''
+    Walk one merged directory level and recurse into merged subdirectories.
+
+    Parameters:
+        sources (List[VersionSource]): Version indexes and roots, newest first.
+        relative_path (str): Relative directory path.
+        lister (Union[StatCache, ScandirPrefetcher]): Stat cache or prefetcher listing directories.
+        path_filter (PathFilter): Path filter.
+    Yields:
+        MergedEntry: Merged entries.
+    '''
+
+    owners: Dict[str, MergedEntry] = {}
+    subdirectories: Dict[str, List[VersionSource]] = {}
+
+    for version, root in sources:
+        for entry, entry_stat in scan_directory(
+            root / relative_path if relative_path else root,
+            lister
+        ):
+            owner = owners.get(entry.name)
+            is_directory = stat.S_ISDIR(entry_stat.st_mode)
+
+            if owner is None:
+                owners[entry.name] = MergedEntry(
+                    f'{relative_path}/{entry.name}' if relative_path
+                    else entry.name,
+                    version,
+                    Path(entry.path),
+                    entry_stat
+                )
+
+                if is_directory:
+                    subdirectories[entry.name] = [(version, root)]
+            elif owner.is_dir and is_directory:
+                subdirectories[entry.name].append((version, root))
+
+    if isinstance(lister, ScandirPrefetcher):
+        lister.prefetch(
+            root / owners[name].path
+            for name in sorted(subdirectories)
+            if not path_filter.is_excluded(owners[name].path)
+            for _, root in subdirectories[name]
+        )
+
+    for name in sorted(owners):
+        owner = owners.pop(name)
+
+        if path_filter.is_excluded(owner.path):
+            continue
+
+        if owner.is_dir or path_filter.is_included(owner.path):
+            yield owner
+
+        if owner.is_dir:
+            yield from _walk_directory(
+                subdirectories.pop(name),
+                owner.path,
+                lister,
+                path_filter
+            )
+
+
+__all__ = [
+    'MergedEntry',
+    'VersionSource',
+    'resolve_child',
+    'scan_directory',
+    'walk_merged'
+]
@@ -0,0 +1,236 @@
+'''
+Merged view objects.
+'''
+
+import posixpath
+import stat
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import BinaryIO, List, Optional, Sequence, Tuple
+
+from .merge import MergedEntry, VersionSource, resolve_child
+from .path_filter import normalize_prefix
+from .stat_cache import StatCache, get_default_stat_cache
+
+#: Resolved path owner and the versions merged into it if it is a directory.
+Resolution = Tuple[Optional[MergedEntry], List[VersionSource]]
+
+#: Maximum number of merged views kept by `get_merged_view`.
+MERGED_VIEW_CACHE_SIZE = 16
+
+_merged_views: 'OrderedDict[Tuple[Tuple[Path, int, int], ...], MergedView]' = \
+    OrderedDict()
+_merged_views_lock = threading.Lock()
+
+
+class MergedView:
+    '''
+    Merged view object.
+
+    Read single paths of the merged view of backup versions, newest wins,
+    without walking them. A path is resolved one component at a time with
+    `lstat` calls in the versions merged into its parent directory, and
+    every resolved path, missing ones included, is kept in memory, so
+    repeated lookups of the same path or of its siblings cost no round trip.
+    '''
+
+    #: Backup version directories, newest first.
+    sources: List[Path]
+    #: Stat cache instance.
+    stat_cache: StatCache
+    #: Maximum number of resolved paths kept in memory.
+    maxsize: int
+
+    def __init__(
+        self,
+        sources: Sequence[Path],
+        stat_cache: Optional[StatCache] = None,
+        maxsize: int = 65536
+    ):
+        '''
+        Initialize merged view object.
+
+        Parameters:
+            sources (Sequence[Path]): Backup version directories, newest first.
+            stat_cache (Optional[StatCache]): Stat cache instance, defaults to the shared one.
+            maxsize (int): Maximum number of resolved paths kept in memory.
+        '''
+
+        self.sources = list(sources)
+        self.stat_cache = stat_cache or get_default_stat_cache()
+        self.maxsize = maxsize
+
+        self._lock = threading.Lock()
+        self._resolved: 'OrderedDict[str, Resolution]' = OrderedDict()
+
+    def resolve(self, path: str) -> MergedEntry:
+        '''
+        Return the merged entry owning a relative path.
+
+        Parameters:
+            path (str): Relative path using `/` separators.
+        Returns:
+            MergedEntry: The entry of the newest backup version owning the path.
+        Raises:
+            FileNotFoundError: Expected path found in the backup versions.
+            ValueError: Expected path inside the backup version directories.
+        '''
+
+        owner, _ = self._resolve(normalize_prefix(path))
+
+        if owner is None:
+            raise FileNotFoundError(f'"{path}" not found in backup versions.')
+
+        return owner
+
+    def listdir(self, path: str = '') -> List[MergedEntry]:
+        '''
+        List the merged entries of a directory, sorted by name.
+
+        Parameters:
+            path (str): Relative directory path using `/` separators.
+        Returns:
+            List[MergedEntry]: Entries of the newest backup versions owning each name.
+        Raises:
+            FileNotFoundError: Expected directory found in the backup versions.
+            NotADirectoryError: Expected path to be a directory.
+        '''
+
+        path = normalize_prefix(path)
+        owner, sources = self._resolve(path)
+
+        if path and owner is None:
+            raise FileNotFoundError(f'"{path}" not found in backup versions.')
+
+        if owner is not None and not owner.is_dir:
+            raise NotADirectoryError(f'"{path}" is not a directory.')
+
+        owners = {}
+
+        for version, root in sources:
+            try:
+                entries = self.stat_cache.scandir(root / path)
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+
+            for entry in entries:
+                if entry.name not in owners:
+                    owners[entry.name] = MergedEntry(
+                        posixpath.join(path, entry.name),
+                        version,
+                        Path(entry.path),
+                        entry.stat(follow_symlinks=False)
+                    )
+
+        return [owners[name] for name in sorted(owners)]
+
+    def open(self, path: str) -> BinaryIO:
+        '''
+        Open the file owning a relative path for reading, straight from its
+        backup version directory.
+
+        Parameters:
+            path (str): Relative path using `/` separators.
+        Returns:
+            BinaryIO: A binary file object, to close once read.
+        Raises:
+            FileNotFoundError: Expected path found in the backup versions.
+            IsADirectoryError: Expected path not to be a directory.
+        '''
+
+        owner = self.resolve(path)
+
+        if owner.is_dir:
+            raise IsADirectoryError(f'"{path}" is a directory.')
+
+        return open(owner.source, 'rb')  # pylint: disable=R1732
+
+    def _resolve(self, path: str) -> Resolution:
+        '''
+        Resolve a normalized relative path, using and filling the memory cache.
+
+        Parameters:
+            path (str): Normalized relative path, `''` for the root directory.
+        Returns:
+            Resolution: The owner (`None` if missing or hidden by a newer file)
+                and the versions merged into it if it is a directory.
+        '''
+
+        with self._lock:
+            if path in self._resolved:
+                self._resolved.move_to_end(path)
+                return self._resolved[path]
+
+        if path:
+            resolution = resolve_child(
+                self._resolve(posixpath.dirname(path))[1],
+                path,
+                self.stat_cache
+            )
+        else:
+            resolution = (None, [])
+
+            for version, source in enumerate(self.sources):
+                try:
+                    if stat.S_ISDIR(self.stat_cache.stat(source).st_mode):
+                        resolution[1].append((version, source))
+                except FileNotFoundError:
+                    continue
+
+        with self._lock:
+            self._resolved[path] = resolution
+
+            while len(self._resolved) > self.maxsize:
+                self._resolved.popitem(last=False)
+
+        return resolution
+
+
+def get_merged_view(
+    sources: Sequence[Path],
+    stat_cache: Optional[StatCache] = None
+) -> MergedView:
+    '''
+    Return the merged view of backup versions, shared by callers reading the
+    same versions so that resolved paths stay in memory between calls.
+
+    Views are looked up by the paths, inode numbers and modification times
+    of the backup version directories, so renamed or replaced versions get
+    a new view.
+
+    Parameters:
+        sources (Sequence[Path]): Backup version directories, newest first.
+        stat_cache (Optional[StatCache]): Stat cache instance, defaults to the shared one.
+    Returns:
+        MergedView: A merged view instance.
+    '''
+
+    stat_cache = stat_cache or get_default_stat_cache()
+    key = tuple(
+        (source, source_stat.st_ino, source_stat.st_mtime_ns)
+        for source, source_stat in (
+            (source, stat_cache.stat(source)) for source in sources
+        )
+    )
+
+    with _merged_views_lock:
+        view = _merged_views.get(key)
+
+        if view is None:
+            view = MergedView(sources, stat_cache)
+            _merged_views[key] = view
+
+            while len(_merged_views) > MERGED_VIEW_CACHE_SIZE:
+                _merged_views.popitem(last=False)
+
+        _merged_views.move_to_end(key)
+
+        return view
+
+
+__all__ = [
+    'MERGED_VIEW_CACHE_SIZE',
+    'MergedView',
+    'get_merged_view'
+]
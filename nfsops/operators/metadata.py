@@ -0,0 +1,356 @@
+'''
+Metadata application objects.
+'''
+
+import errno
+import os
+import posixpath
+import stat
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from .. import utils
+from .merge import MergedEntry
+from .retry import RetryPolicy
+
+#: Ownership map key matching every other user or group.
+ANY_ID = -1
+
+
+class OwnershipMap:
+    '''
+    Ownership map object.
+
+    Translate source owners and groups into the ones of restored entries,
+    e.g. to restore the files of a user into another user's workspace.
+    '''
+
+    #: Whether to apply ownership at all.
+    preserve: bool
+    #: Destination user IDs by source user ID, `ANY_ID` matching any other.
+    uids: Dict[int, int]
+    #: Destination group IDs by source group ID, `ANY_ID` matching any other.
+    gids: Dict[int, int]
+
+    def __init__(
+        self,
+        preserve: bool = True,
+        uids: Optional[Mapping[int, int]] = None,
+        gids: Optional[Mapping[int, int]] = None
+    ):
+        '''
+        Initialize ownership map object.
+
+        Parameters:
+            preserve (bool): Whether to apply ownership at all.
+            uids (Optional[Mapping[int, int]]): Destination user IDs by source user ID.
+            gids (Optional[Mapping[int, int]]): Destination group IDs by source group ID.
+        '''
+
+        self.preserve = preserve
+        self.uids = dict(uids or {})
+        self.gids = dict(gids or {})
+
+    def get_owner(self, stat_result: os.stat_result) -> Tuple[int, int]:
+        '''
+        Return the owner and group of a restored entry.
+
+        Parameters:
+            stat_result (os.stat_result): Source `stat` result.
+        Returns:
+            Tuple[int, int]: User and group IDs, `-1` leaving them unchanged.
+        '''
+
+        if not self.preserve:
+            return -1, -1
+
+        return (
+            self.uids.get(
+                stat_result.st_uid,
+                self.uids.get(ANY_ID, stat_result.st_uid)
+            ),
+            self.gids.get(
+                stat_result.st_gid,
+                self.gids.get(ANY_ID, stat_result.st_gid)
+            )
+        )
+
+    def get_rsync_arguments(self) -> List[str]:
+        '''
+        Return the `rsync` arguments applying the same ownership.
+
+        Returns:
+            List[str]: `rsync` arguments.
+        '''
+
+        if not self.preserve:
+            return ['--no-owner', '--no-group']
+
+        arguments = []
+
+        for option, ids in [('--usermap', self.uids), ('--groupmap', self.gids)]:
+            if ids:
+                pairs = sorted(ids.items(), key=lambda pair: pair[0] == ANY_ID)
+                arguments.append(
+                    f'{option}=' + ','.join(
+                        f'{"*" if source == ANY_ID else source}:{target}'
+                        for source, target in pairs
+                    )
+                )
+
+        return arguments
+
+
+class MetadataStage:
+    '''
+    Metadata stage object.
+
+    Collect the entries written by a transfer and apply their ownership,
+    extended attributes, permissions and timestamps once data transfer is
+    done. Entries are grouped per parent directory: each group opens its
+    directory once, lists it to get the current attributes in one batch and
+    only issues the fd-relative calls whose values differ. Groups run on a
+    thread pool, deepest directories first so that restrictive directory
+    permissions are applied after their children.
+    '''
+
+    #: Ownership of restored entries.
+    ownership: OwnershipMap
+    #: Whether to copy extended attributes.
+    xattrs: bool
+    #: Number of worker threads.
+    max_workers: int
+    #: Retry policy for transient errors.
+    retry_policy: RetryPolicy
+    #: Pending entries by parent directory path.
+    _groups: Dict[str, List[MergedEntry]]
+    #: Lock guarding pending entries.
+    _lock: threading.Lock
+
+    def __init__(
+        self,
+        ownership: Optional[OwnershipMap] = None,
+        xattrs: bool = False,
+        max_workers: Optional[int] = None,
+        retry_policy: Optional[RetryPolicy] = None
+    ):
+        '''
+        Initialize metadata stage object.
+
+        Parameters:
+            ownership (Optional[OwnershipMap]): Ownership of restored entries.
+            xattrs (bool): Whether to copy extended attributes.
+            max_workers (Optional[int]): Number of worker threads.
+            retry_policy (Optional[RetryPolicy]): Retry policy, defaults to no retries.
+        '''
+
+        self.ownership = ownership or OwnershipMap()
+        self.xattrs = xattrs and hasattr(os, 'setxattr')
+        self.max_workers = max_workers or utils.get_default_workers()
+        self.retry_policy = retry_policy or RetryPolicy(retries=0)
+        self._groups = {}
+        self._lock = threading.Lock()
+
+    def add(self, entry: MergedEntry) -> None:
+        '''
+        Add a written entry, safe to call from several threads.
+
+        Parameters:
+            entry (MergedEntry): Merged entry.
+        '''
+
+        with self._lock:
+            self._groups.setdefault(
+                posixpath.dirname(entry.path),
+                []
+            ).append(entry)
+
+    def apply(self, destination: Path) -> int:
+        '''
+        Apply the metadata of the pending entries and clear them.
+
+        Parameters:
+            destination (Path): Destination directory.
+        Returns:
+            int: Number of metadata calls issued.
+        Raises:
+            Exception: Expected metadata application failed.
+        '''
+
+        with self._lock:
+            groups, self._groups = self._groups, {}
+
+        levels: Dict[int, List[str]] = {}
+
+        for parent in groups:
+            levels.setdefault(
+                parent.count('/') + 1 if parent else 0,
+                []
+            ).append(parent)
+
+        calls = 0
+
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix='nfsops-metadata'
+        ) as executor:
+            for depth in sorted(levels, reverse=True):
+                calls += sum(
+                    executor.map(
+                        lambda parent: self.retry_policy.call(
+                            partial(
+                                self._apply_directory,
+                                destination / parent,
+                                groups[parent]
+                            )
+                        ),
+                        sorted(levels[depth])
+                    )
+                )
+
+        return calls
+
+    def _apply_directory(
+        self,
+        directory: Path,
+        entries: List[MergedEntry]
+    ) -> int:
+        '''
+        Apply the metadata of the entries of a directory.
+
+        Parameters:
+            directory (Path): Parent directory of the entries.
+            entries (List[MergedEntry]): Entries of the directory.
+        Returns:
+            int: Number of metadata calls issued.
+        '''
+
+        directory_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+
+        try:
+            with os.scandir(directory_fd) as iterator:
+                current = {
+                    os.fsdecode(item.name): item.stat(follow_symlinks=False)
+                    for item in iterator
+                }
+
+            return sum(
+                self._apply_entry(
+                    directory_fd,
+                    directory / name,
+                    entry,
+                    current[name]
+                )
+                for entry, name in (
+                    (entry, posixpath.basename(entry.path))
+                    for entry in entries
+                )
+                if name in current
+            )
+        finally:
+            os.close(directory_fd)
+
+    def _apply_entry(
+        self,
+        directory_fd: int,
+        target: Path,
+        entry: MergedEntry,
+        current: os.stat_result
+    ) -> int:
+        '''
+        Apply the metadata of an entry, skipping the values already in place.
+
+        Ownership is only applied when running as root. Changing ownership
+        may clear set-user-ID bits, permissions are then always applied.
+        Timestamps are compared by modification time, as listing directories
+        updates their access time.
+
+        Parameters:
+            directory_fd (int): Parent directory file descriptor.
+            target (Path): Destination path.
+            entry (MergedEntry): Merged entry.
+            current (os.stat_result): Destination `stat` result.
+        Returns:
+            int: Number of metadata calls issued.
+        '''
+
+        source = entry.stat
+        is_link = stat.S_ISLNK(source.st_mode)
+        calls = 0
+        uid, gid = self.ownership.get_owner(source) \
+            if os.geteuid() == 0 else (-1, -1)
+
+        if uid not in (-1, current.st_uid) or gid not in (-1, current.st_gid):
+            os.chown(
+                target.name,
+                uid,
+                gid,
+                dir_fd=directory_fd,
+                follow_symlinks=False
+            )
+            calls += 1
+
+        if self.xattrs and not is_link:
+            calls += self._copy_xattrs(entry.source, target)
+
+        mode = stat.S_IMODE(source.st_mode)
+
+        if not is_link and (calls or stat.S_IMODE(current.st_mode) != mode):
+            os.chmod(target.name, mode, dir_fd=directory_fd)
+            calls += 1
+
+        if current.st_mtime_ns != source.st_mtime_ns:
+            os.utime(
+                target.name,
+                ns=(source.st_atime_ns, source.st_mtime_ns),
+                dir_fd=directory_fd,
+                follow_symlinks=False
+            )
+            calls += 1
+
+        return calls
+
+    @staticmethod
+    def _copy_xattrs(source: Path, target: Path) -> int:
+        '''
+        Copy the extended attributes of a file whose values differ.
+
+        Filesystems without extended attribute support are skipped.
+
+        Parameters:
+            source (Path): Source path.
+            target (Path): Destination path.
+        Returns:
+            int: Number of metadata calls issued.
+        '''
+
+        calls = 0
+
+        try:
+            for name in os.listxattr(source):
+                value = os.getxattr(source, name)
+
+                try:
+                    if os.getxattr(target, name) == value:
+                        continue
+                except OSError as exception:
+                    if exception.errno != errno.ENODATA:
+                        raise
+
+                os.setxattr(target, name, value)
+                calls += 1
+        except OSError as exception:
+            if exception.errno not in (errno.ENOTSUP, errno.EOPNOTSUPP):
+                raise
+
+        return calls
+
+
+__all__ = [
+    'ANY_ID',
+    'OwnershipMap',
+    'MetadataStage'
+]
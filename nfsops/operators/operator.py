@@ -4,9 +4,18 @@ Base operator object.
 
 import logging
 from abc import ABC
+from pathlib import Path
+from typing import Optional, cast
+from urllib.parse import quote
 
 from .. import utils
 from ..configurations.context import ContextConfiguration
+from .lock import EXCLUSIVE, OperationLock
+from .stat_cache import StatCache, get_default_stat_cache
+from .transport import SshTransport, get_transport
+
+#: Lock directory name, inside the metadata directory.
+LOCK_DIRECTORY_NAME = 'locks'
 
 
 class Operator(ABC):
@@ -18,6 +27,10 @@ class Operator(ABC):
     context: ContextConfiguration
     #: Logger instance.
     logger: logging.Logger
+    #: Stat cache shared by components accessing the volume.
+    stat_cache: StatCache
+    #: Transport of the remote host, `None` for a local volume.
+    transport: Optional[SshTransport]
 
     def __init__(self, context: ContextConfiguration):
         '''
@@ -29,13 +42,67 @@ class Operator(ABC):
 
         self.context = context
         self.logger = utils.get_default_logger()
+        self.transport = None if context.host is None \
+            else get_transport(context.host)
+        self.stat_cache = get_default_stat_cache() if self.transport is None \
+            else self.transport.stat_cache
 
         self.logger.info(
             'using context configuration %s.',
             utils.format_configuration_string(self.context)
         )
 
+    @property
+    def metadata_path(self) -> Path:
+        '''
+        Return the metadata directory of the volume, kept on this host for
+        remote volumes.
+
+        Returns:
+            Path: A path object referencing the metadata directory.
+        '''
+
+        return utils.get_metadata_path(
+            cast(Path, self.context.path),
+            self.context.host
+        )
+
+    def check_local(self, operation: str) -> None:
+        '''
+        Check that the volume is local before an operation needing direct
+        access to its files.
+
+        Parameters:
+            operation (str): Operation description, for the error message.
+        Raises:
+            ValueError: Expected local volume.
+        '''
+
+        if self.transport is not None:
+            raise ValueError(f'{operation} need a local volume.')
+
+    def lock(self, name: str, mode: str = EXCLUSIVE) -> OperationLock:
+        '''
+        Return a lock on a named resource of the volume, e.g. a workspace or
+        a backup version, shared by every process using the volume. Locks of
+        remote volumes are only shared by the processes of this host.
+
+        Parameters:
+            name (str): Resource name.
+            mode (str): Lock mode (`shared` or `exclusive`).
+        Returns:
+            OperationLock: A lock to use as context manager.
+        '''
+
+        return OperationLock(
+            self.metadata_path / LOCK_DIRECTORY_NAME / quote(name, safe=''),
+            mode,
+            lease=self.context.lock_lease,
+            timeout=self.context.lock_timeout
+        )
+
 
 __all__ = [
+    'LOCK_DIRECTORY_NAME',
     'Operator'
 ]
@@ -0,0 +1,137 @@
+'''
+Path filter object.
+'''
+
+import fnmatch
+import posixpath
+from typing import Iterable, List
+
+
+def match_pattern(pattern: str, path: str) -> bool:
+    '''
+    Check whether a relative path matches a glob pattern.
+
+    Patterns without `/` match the last path component at any depth,
+    patterns with `/` match the whole relative path.
+
+    Parameters:
+        pattern (str): Glob pattern (`fnmatch` syntax).
+        path (str): Relative path using `/` separators.
+    Returns:
+        bool: `True` if the path matches the pattern, `False` otherwise.
+    '''
+
+    pattern = pattern.strip('/')
+
+    if '/' in pattern:
+        return fnmatch.fnmatchcase(path, pattern)
+
+    return fnmatch.fnmatchcase(posixpath.basename(path), pattern)
+
+
+def normalize_prefix(prefix: str) -> str:
+    '''
+    Normalize a relative path prefix.
+
+    Parameters:
+        prefix (str): Relative path prefix.
+    Returns:
+        str: A normalized prefix without leading, trailing or duplicated separators.
+    Raises:
+        ValueError: Expected prefix escapes the backup version directory.
+    '''
+
+    if '..' in prefix.split('/'):
+        raise ValueError(f'"{prefix}" path prefix must not contain "..".')
+
+    return posixpath.normpath(f'/{prefix}').lstrip('/')
+
+
+class PathFilter:
+    '''
+    Path filter object.
+
+    Select relative paths by prefix and include/exclude glob patterns while
+    walking backup versions, so excluded subtrees are never scanned.
+    '''
+
+    #: Relative path prefixes to restrict the walk to (all paths if empty).
+    prefixes: List[str]
+    #: Glob patterns selecting files (all files if empty).
+    include: List[str]
+    #: Glob patterns excluding files and whole directories.
+    exclude: List[str]
+
+    def __init__(
+        self,
+        prefixes: Iterable[str] = (),
+        include: Iterable[str] = (),
+        exclude: Iterable[str] = ()
+    ):
+        '''
+        Initialize path filter object.
+
+        Nested prefixes are merged into their outermost prefix.
+
+        Parameters:
+            prefixes (Iterable[str]): Relative path prefixes.
+            include (Iterable[str]): Glob patterns selecting files.
+            exclude (Iterable[str]): Glob patterns excluding files and whole directories.
+        Raises:
+            ValueError: Expected prefix escapes the backup version directory.
+        '''
+
+        normalized_prefixes = sorted(
+            {normalize_prefix(prefix) for prefix in prefixes}
+        )
+
+        self.prefixes = []
+
+        for prefix in normalized_prefixes:
+            if prefix == '':
+                self.prefixes = []
+                break
+
+            if not any(
+                prefix.startswith(f'{parent}/') for parent in self.prefixes
+            ):
+                self.prefixes.append(prefix)
+
+        self.include = list(include)
+        self.exclude = list(exclude)
+
+    def is_excluded(self, path: str) -> bool:
+        '''
+        Check whether a path (and its subtree, for directories) is excluded.
+
+        Parameters:
+            path (str): Relative path using `/` separators.
+        Returns:
+            bool: `True` if the path is excluded, `False` otherwise.
+        '''
+
+        return any(match_pattern(pattern, path) for pattern in self.exclude)
+
+    def is_included(self, path: str) -> bool:
+        '''
+        Check whether a path matches the include patterns.
+
+        Include patterns only select files: walks keep directories whatever
+        their name, so the selected files always have their parents.
+
+        Parameters:
+            path (str): Relative path using `/` separators.
+        Returns:
+            bool: `True` if there are no include patterns or the path matches one.
+        '''
+
+        return not self.include or any(
+            match_pattern(pattern, path) for pattern in self.include
+        )
+
+
+__all__ = [
+    'match_pattern',
+    'normalize_prefix',
+    'PathFilter'
+]
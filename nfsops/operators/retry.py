@@ -0,0 +1,267 @@
+'''
+Retry policy functions.
+'''
+
+import errno
+import os
+import random
+import signal
+import subprocess
+import threading
+import time
+from typing import Callable, Optional, Sequence, TypeVar
+
+from .. import utils
+
+#: Return type of retried operations.
+T = TypeVar('T')
+
+#: Errors of transient NFS conditions (stale handles, server timeouts, ...).
+RETRYABLE_ERRNOS = frozenset({
+    errno.ESTALE,
+    errno.EIO,
+    errno.ETIMEDOUT,
+    errno.EAGAIN,
+    errno.EBUSY,
+    errno.EINTR
+})
+#: `rsync` exit codes of transient failures (I/O, partial transfers, timeouts).
+RETRYABLE_RSYNC_CODES = frozenset({10, 12, 23, 24, 30, 35})
+
+
+def run_with_watchdog(
+    command: Sequence[str],
+    timeout: Optional[float] = None
+) -> None:
+    '''
+    Run a subprocess, killing its process group if it runs for too long.
+
+    Parameters:
+        command (Sequence[str]): Command line.
+        timeout (Optional[float]): Maximum running time in seconds, `None` waits forever.
+    Raises:
+        subprocess.CalledProcessError: Expected process exited successfully.
+        subprocess.TimeoutExpired: Expected process finished before the timeout.
+    '''
+
+    with subprocess.Popen(command, start_new_session=True) as process:
+        try:
+            process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            utils.get_default_logger().warning(
+                f'killing "{command[0]}" process {process.pid} '
+                f'after {timeout}s.'
+            )
+
+            for signal_number, grace in (
+                (signal.SIGTERM, 5.0),
+                (signal.SIGKILL, None)
+            ):
+                try:
+                    os.killpg(process.pid, signal_number)
+                    process.wait(grace)
+                    break
+                except (ProcessLookupError, subprocess.TimeoutExpired):
+                    continue
+
+            raise
+
+    if process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, list(command))
+
+
+class RetryPolicy:  # pylint: disable=R0902
+    '''
+    Retry policy object.
+
+    Retries operations failing with transient errors, waiting with exponential
+    backoff and full jitter between attempts, so retries of concurrent
+    workers spread out instead of hitting a recovering server together.
+    Consecutive transient failures are counted across all operations, and
+    once they reach the failure threshold the circuit opens: every operation
+    then fails immediately instead of retrying against a broken volume. After
+    `max_delay` seconds the circuit is half-open, letting the next operation
+    through: its success closes the circuit, its failure opens it again.
+    '''
+
+    #: Maximum number of retries per operation.
+    retries: int
+    #: Upper bound of the first backoff delay in seconds.
+    initial_delay: float
+    #: Maximum backoff delay in seconds.
+    max_delay: float
+    #: Maximum running time of subprocesses in seconds, `None` waits forever.
+    timeout: Optional[float]
+    #: Number of consecutive failures opening the circuit.
+    failure_threshold: int
+    #: Number of retried attempts so far.
+    retry_count: int
+
+    def __init__(  # pylint: disable=R0913,R0917
+        self,
+        retries: int = 5,
+        initial_delay: float = 0.5,
+        max_delay: float = 30.0,
+        timeout: Optional[float] = None,
+        failure_threshold: int = 50
+    ):
+        '''
+        Initialize retry policy object.
+
+        Parameters:
+            retries (int): Maximum number of retries per operation, `0` disables retries.
+            initial_delay (float): Upper bound of the first backoff delay in seconds.
+            max_delay (float): Maximum backoff delay in seconds.
+            timeout (Optional[float]): Maximum running time of subprocesses in seconds.
+            failure_threshold (int): Number of consecutive failures opening the circuit.
+        '''
+
+        self.retries = retries
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.timeout = timeout
+        self.failure_threshold = failure_threshold
+        self.retry_count = 0
+        self.logger = utils.get_default_logger()
+        self._failures = 0
+        self._opened = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        '''
+        Check whether the circuit is open.
+
+        Returns:
+            bool: `True` if operations fail immediately, `False` otherwise.
+        '''
+
+        return self._failures >= self.failure_threshold and \
+            time.monotonic() - self._opened < self.max_delay
+
+    @staticmethod
+    def is_retryable(exception: BaseException) -> bool:
+        '''
+        Check whether an error is transient.
+
+        Parameters:
+            exception (BaseException): Raised exception.
+        Returns:
+            bool: `True` if the operation may succeed when retried, `False` otherwise.
+        '''
+
+        if isinstance(exception, subprocess.TimeoutExpired):
+            return True
+
+        if isinstance(exception, subprocess.CalledProcessError):
+            return exception.returncode in RETRYABLE_RSYNC_CODES
+
+        return isinstance(exception, OSError) and \
+            exception.errno in RETRYABLE_ERRNOS
+
+    def get_delay(self, attempt: int) -> float:
+        '''
+        Return a random backoff delay for an attempt.
+
+        Parameters:
+            attempt (int): Number of failed attempts, starting at 1.
+        Returns:
+            float: A delay in seconds.
+        '''
+
+        return random.uniform(
+            0,
+            min(self.max_delay, self.initial_delay * 2 ** (attempt - 1))
+        )
+
+    def backoff(self, exception: BaseException, attempt: int) -> None:
+        '''
+        Record a failed attempt and wait before the next one.
+
+        Only transient errors count towards the failure threshold, errors
+        such as missing files are expected by callers.
+
+        Parameters:
+            exception (BaseException): Raised exception.
+            attempt (int): Number of failed attempts of the operation, starting at 1.
+        Raises:
+            BaseException: Expected error is transient and retries are left.
+            RuntimeError: Expected circuit is closed.
+        '''
+
+        if not self.is_retryable(exception):
+            raise exception
+
+        with self._lock:
+            self._failures += 1
+            failures = self._failures
+
+            if failures >= self.failure_threshold:
+                self._opened = time.monotonic()
+
+        if failures >= self.failure_threshold:
+            raise RuntimeError(
+                f'giving up after {failures} consecutive failures, '
+                f'last error: {exception}'
+            ) from exception
+
+        if attempt > self.retries:
+            raise exception
+
+        with self._lock:
+            self.retry_count += 1
+
+        delay = self.get_delay(attempt)
+
+        self.logger.warning(
+            f'retrying in {delay:.2f}s (attempt {attempt + 1}/{self.retries + 1}) '
+            f'after error: {exception}'
+        )
+        time.sleep(delay)
+
+    def record_success(self) -> None:
+        '''
+        Record a successful operation, closing the circuit.
+        '''
+
+        with self._lock:
+            self._failures = 0
+
+    def call(self, function: Callable[[], T], attempt: int = 0) -> T:
+        '''
+        Call a function, retrying it on transient errors.
+
+        Parameters:
+            function (Callable[[], T]): Operation to call.
+            attempt (int): Number of attempts already failed, e.g. by a background listing.
+        Returns:
+            T: The function result.
+        Raises:
+            Exception: Expected operation succeeded within the retries.
+            RuntimeError: Expected circuit is closed.
+        '''
+
+        if self.is_open:
+            raise RuntimeError(
+                f'giving up after {self._failures} consecutive failures.'
+            )
+
+        while True:
+            try:
+                result = function()
+            except Exception as exception:  # pylint: disable=W0703
+                attempt += 1
+                self.backoff(exception, attempt)
+                continue
+
+            self.record_success()
+
+            return result
+
+
+__all__ = [
+    'RETRYABLE_ERRNOS',
+    'RETRYABLE_RSYNC_CODES',
+    'RetryPolicy',
+    'run_with_watchdog'
+]
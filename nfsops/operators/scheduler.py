@@ -0,0 +1,232 @@
+'''
+I/O scheduler objects.
+'''
+
+import posixpath
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    wait
+)
+from functools import partial
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set
+
+from .. import utils
+from .autotune import ConcurrencyTuner
+from .merge import MergedEntry
+
+
+class IOScheduler:
+    '''
+    I/O scheduler object.
+
+    Buffer a window of file entries, group them by parent directory and
+    dispatch the groups in inode order to a thread pool. Small files of the
+    same directory are copied as one task, large files get a task each, and
+    the number of tasks in flight is bounded. With a concurrency tuner, the
+    number of tasks running at once follows the tuner limit instead.
+    '''
+
+    #: Number of worker threads.
+    max_workers: int
+    #: Maximum number of tasks in flight.
+    max_in_flight: int
+    #: Number of file entries buffered before dispatching.
+    window_size: int
+    #: Size limit in bytes for files batched together.
+    small_file_size: int
+    #: Maximum number of small files per task.
+    batch_size: int
+    #: Concurrency tuner measuring tasks in bytes, `None` runs `max_workers` tasks at once.
+    tuner: Optional[ConcurrencyTuner]
+
+    def __init__(  # pylint: disable=R0913,R0917
+        self,
+        max_workers: Optional[int] = None,
+        max_in_flight: int = 128,
+        window_size: int = 4096,
+        small_file_size: int = 1 << 20,
+        batch_size: int = 64,
+        tuner: Optional[ConcurrencyTuner] = None
+    ):
+        '''
+        Initialize I/O scheduler object.
+
+        Parameters:
+            max_workers (Optional[int]): Number of worker threads.
+            max_in_flight (int): Maximum number of tasks in flight.
+            window_size (int): Number of file entries buffered before dispatching.
+            small_file_size (int): Size limit in bytes for files batched together.
+            batch_size (int): Maximum number of small files per task.
+            tuner (Optional[ConcurrencyTuner]): Concurrency tuner of tasks.
+        '''
+
+        self.max_workers = max_workers or utils.get_default_workers()
+        self.max_in_flight = max_in_flight
+        self.window_size = window_size
+        self.small_file_size = small_file_size
+        self.batch_size = batch_size
+        self.tuner = tuner
+
+    def run(
+        self,
+        entries: Iterable[MergedEntry],
+        process_directory: Callable[[MergedEntry], None],
+        process_file: Callable[[MergedEntry], None]
+    ) -> None:
+        '''
+        Process merged entries, directories inline and files on worker threads.
+
+        Directories are processed in walk order before any file they contain.
+
+        Parameters:
+            entries (Iterable[MergedEntry]): Merged entries, parents before children.
+            process_directory (Callable[[MergedEntry], None]): Directory callback.
+            process_file (Callable[[MergedEntry], None]): Non-directory callback.
+        Raises:
+            Exception: Expected callback failed.
+        '''
+
+        directory_inodes: Dict[str, int] = {}
+        window: List[MergedEntry] = []
+        in_flight: Set['Future[None]'] = set()
+
+        def process_files(batch: Sequence[MergedEntry]) -> None:
+            for entry in batch:
+                process_file(entry)
+
+        def process_batch(batch: Sequence[MergedEntry]) -> None:
+            if self.tuner is None:
+                process_files(batch)
+                return
+
+            self.tuner.call(
+                partial(process_files, batch),
+                lambda _: sum(entry.stat.st_size for entry in batch)
+            )
+
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers if self.tuner is None
+            else self.tuner.maximum,
+            thread_name_prefix='nfsops-io'
+        ) as executor:
+            try:
+                for entry in entries:
+                    if entry.is_dir:
+                        process_directory(entry)
+                        directory_inodes[entry.path] = entry.stat.st_ino
+                        continue
+
+                    window.append(entry)
+
+                    if len(window) >= self.window_size:
+                        self._dispatch(
+                            executor,
+                            self.schedule(window, directory_inodes),
+                            process_batch,
+                            in_flight
+                        )
+                        window = []
+
+                self._dispatch(
+                    executor,
+                    self.schedule(window, directory_inodes),
+                    process_batch,
+                    in_flight
+                )
+
+                self._wait(in_flight, 0)
+            finally:
+                for future in in_flight:
+                    future.cancel()
+
+    def schedule(
+        self,
+        window: Sequence[MergedEntry],
+        directory_inodes: Dict[str, int]
+    ) -> List[List[MergedEntry]]:
+        '''
+        Split a window of file entries into tasks.
+
+        Parameters:
+            window (Sequence[MergedEntry]): File entries.
+            directory_inodes (Dict[str, int]): Inode numbers of the directories seen so far.
+        Returns:
+            List[List[MergedEntry]]: Tasks, ordered by directory and file inode.
+        '''
+
+        groups: Dict[str, List[MergedEntry]] = {}
+
+        for entry in window:
+            groups.setdefault(posixpath.dirname(entry.path), []).append(entry)
+
+        batches: List[List[MergedEntry]] = []
+
+        for parent in sorted(
+            groups,
+            key=lambda parent: (directory_inodes.get(parent, 0), parent)
+        ):
+            batch: List[MergedEntry] = []
+
+            for entry in sorted(
+                groups[parent],
+                key=lambda entry: (entry.version, entry.stat.st_ino)
+            ):
+                if entry.stat.st_size >= self.small_file_size:
+                    batches.append([entry])
+                    continue
+
+                batch.append(entry)
+
+                if len(batch) >= self.batch_size:
+                    batches.append(batch)
+                    batch = []
+
+            if batch:
+                batches.append(batch)
+
+        return batches
+
+    def _dispatch(
+        self,
+        executor: ThreadPoolExecutor,
+        batches: List[List[MergedEntry]],
+        process_batch: Callable[[Sequence[MergedEntry]], None],
+        in_flight: Set['Future[None]']
+    ) -> None:
+        '''
+        Submit tasks, waiting for free slots in the in-flight window.
+
+        Parameters:
+            executor (ThreadPoolExecutor): Worker threads.
+            batches (List[List[MergedEntry]]): Tasks to submit.
+            process_batch (Callable[[Sequence[MergedEntry]], None]): Task function.
+            in_flight (Set[Future[None]]): Tasks in flight, updated in place.
+        '''
+
+        for batch in batches:
+            self._wait(in_flight, self.max_in_flight - 1)
+            in_flight.add(executor.submit(process_batch, batch))
+
+    @staticmethod
+    def _wait(in_flight: Set['Future[None]'], remaining: int) -> None:
+        '''
+        Wait until at most `remaining` tasks are in flight, raising their errors.
+
+        Parameters:
+            in_flight (Set[Future[None]]): Tasks in flight, updated in place.
+            remaining (int): Number of tasks allowed to stay in flight.
+        '''
+
+        while len(in_flight) > max(remaining, 0):
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                in_flight.discard(future)
+                future.result()
+
+
+__all__ = [
+    'IOScheduler'
+]
@@ -0,0 +1,961 @@
+'''
+Sharded restore objects.
+'''
+
+import os
+import shutil
+import socket
+import stat
+import threading
+import time
+import uuid
+from contextlib import ExitStack, contextmanager
+from functools import partial
+from pathlib import Path
+from typing import (
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set
+)
+
+from .. import utils
+from ..configurations.restore_report import RestoreReportConfiguration
+from ..configurations.sharded_restore import ShardedRestoreConfiguration
+from .file_table import FileTable
+from .manifest import Manifest
+from .merge import MergedEntry, walk_merged
+from .path_filter import PathFilter
+from .retry import RetryPolicy
+from .stat_cache import ScandirPrefetcher, StatCache
+from .transfer import TransferEngine, get_restore_engine
+
+#: Sharded restore directory name, inside the metadata directory.
+SHARD_DIRECTORY_NAME = 'restores'
+#: Restore plan file name, inside every sharded restore directory.
+PLAN_FILE_NAME = 'plan.table'
+#: Sharded restore configuration file name.
+CONFIGURATION_FILE_NAME = 'restore.json'
+#: Coordinator lease file name.
+COORDINATOR_FILE_NAME = 'coordinator'
+#: Clock file name, touched to read the server time.
+CLOCK_FILE_NAME = '.clock'
+#: Maximum number of entries per shard.
+SHARD_MAX_FILES = 10000
+#: Time between checks of the shards claimed by other processes in seconds.
+SHARD_POLL_INTERVAL = 1.0
+#: Shard state directory names.
+PENDING, CLAIMED, DONE, FAILED = 'pending', 'claimed', 'done', 'failed'
+
+
+class Shard(NamedTuple):
+    '''
+    Range of restore plan rows.
+    '''
+
+    #: Shard number.
+    number: int
+    #: First row.
+    start: int
+    #: Row after the last row.
+    end: int
+
+
+#: Function restoring a shard of a restore plan.
+ShardRestorer = Callable[[FileTable, Shard], RestoreReportConfiguration]
+
+
+def split_shards(
+    table: FileTable,
+    shard_size: int,
+    max_files: int = SHARD_MAX_FILES
+) -> List[Shard]:
+    '''
+    Split a restore plan into shards of contiguous rows.
+
+    Rows are in walk order, so every directory is followed by its whole
+    subtree. Shards are closed before the next directory once they hold
+    `shard_size` bytes or `max_files` rows, and only split a directory whose
+    own files exceed twice these limits.
+
+    Parameters:
+        table (FileTable): Restore plan.
+        shard_size (int): Target shard size in bytes.
+        max_files (int): Target number of rows per shard.
+    Returns:
+        List[Shard]: Shards covering every row, in row order.
+    '''
+
+    shards: List[Shard] = []
+    start = 0
+    size = 0
+
+    for index in range(len(table)):
+        rows = index - start
+        is_dir = stat.S_ISDIR(table.modes[index])
+        full = size >= shard_size or rows >= max_files
+        overfull = size >= 2 * shard_size or rows >= 2 * max_files
+
+        if rows and (is_dir and full or overfull):
+            shards.append(Shard(len(shards), start, index))
+            start = index
+            size = 0
+
+        if not is_dir:
+            size += table.sizes[index]
+
+    if start < len(table):
+        shards.append(Shard(len(shards), start, len(table)))
+
+    return shards
+
+
+def get_worker_name() -> str:
+    '''
+    Return the name of the current process, unique across hosts.
+
+    Returns:
+        str: A host name and process identifier.
+    '''
+
+    return f'{socket.gethostname()}.{os.getpid()}'
+
+
+class ShardedRestore:
+    '''
+    Work directory of a sharded restore, shared by all hosts using the volume.
+
+    Shards are files moved between the `pending`, `claimed`, `done` and
+    `failed` directories with `rename`, which is atomic on the server, so
+    exactly one process claims each shard. Claims and the coordinator are
+    leases renewed by touching their files, whose ages are measured against
+    the server time, so client clocks may be skewed. Claims whose lease
+    expired are moved back to `pending` by any process.
+    '''
+
+    #: Work directory.
+    path: Path
+    #: Lease duration in seconds.
+    lease: float
+    #: Sharded restore configuration.
+    configuration: ShardedRestoreConfiguration
+
+    def __init__(self, path: Path, lease: float = 60.0):
+        '''
+        Open a sharded restore work directory.
+
+        Parameters:
+            path (Path): Work directory.
+            lease (float): Lease duration in seconds.
+        Raises:
+            FileNotFoundError: Expected work directory found.
+        '''
+
+        self.path = path
+        self.lease = lease
+        self.configuration = ShardedRestoreConfiguration.parse_file(
+            path / CONFIGURATION_FILE_NAME
+        )
+
+    @classmethod
+    def create(
+        cls,
+        root: Path,
+        configuration: ShardedRestoreConfiguration,
+        table: FileTable,
+        lease: float = 60.0
+    ) -> 'ShardedRestore':
+        '''
+        Write the plan of a sharded restore and publish its shards.
+
+        The work directory is written under a temporary name and renamed into
+        place once complete, so workers never see a partial plan.
+
+        Parameters:
+            root (Path): Directory of the sharded restores.
+            configuration (ShardedRestoreConfiguration): Configuration, shards are counted here.
+            table (FileTable): Restore plan, in walk order.
+            lease (float): Lease duration in seconds.
+        Returns:
+            ShardedRestore: The published sharded restore.
+        '''
+
+        name = uuid.uuid4().hex
+        temporary = root / f'.{name}'
+        shards = split_shards(table, configuration.options.shard_size)
+        configuration.shards = len(shards)
+
+        for state in (PENDING, CLAIMED, DONE, FAILED):
+            (temporary / state).mkdir(parents=True)
+
+        (temporary / COORDINATOR_FILE_NAME).touch()
+        table.save(temporary / PLAN_FILE_NAME)
+        (temporary / CONFIGURATION_FILE_NAME).write_text(
+            configuration.json(),
+            encoding='utf-8'
+        )
+
+        for shard in shards:
+            (temporary / PENDING / f'{shard.number:06d}').write_text(
+                f'{shard.start} {shard.end}',
+                encoding='utf-8'
+            )
+
+        os.rename(temporary, root / name)
+
+        return cls(root / name, lease)
+
+    @classmethod
+    def list_active(
+        cls,
+        root: Path,
+        lease: float = 60.0
+    ) -> List['ShardedRestore']:
+        '''
+        List the sharded restores whose coordinator is alive.
+
+        Parameters:
+            root (Path): Directory of the sharded restores.
+            lease (float): Lease duration in seconds.
+        Returns:
+            List[ShardedRestore]: Active sharded restores.
+        '''
+
+        restores = []
+
+        try:
+            paths = [
+                path for path in root.iterdir()
+                if not path.name.startswith('.')
+            ]
+        except FileNotFoundError:
+            return []
+
+        for path in paths:
+            try:
+                restore = cls(path, lease)
+
+                if restore.is_alive():
+                    restores.append(restore)
+            except (FileNotFoundError, ValueError):
+                continue
+
+        return sorted(restores, key=lambda restore: restore.path.name)
+
+    @staticmethod
+    def remove_abandoned(root: Path, lease: float = 60.0) -> int:
+        '''
+        Remove the work directories of crashed coordinators, including the
+        partial ones.
+
+        Parameters:
+            root (Path): Directory of the sharded restores.
+            lease (float): Lease duration in seconds.
+        Returns:
+            int: Number of removed work directories.
+        '''
+
+        try:
+            paths = list(root.iterdir())
+        except FileNotFoundError:
+            return 0
+
+        now = get_server_time(root / CLOCK_FILE_NAME)
+        removed = 0
+
+        for path in paths:
+            try:
+                mtime = (path / COORDINATOR_FILE_NAME).stat().st_mtime
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+
+            if now - mtime > lease:
+                shutil.rmtree(path, ignore_errors=True)
+                removed += 1
+
+        return removed
+
+    @property
+    def plan_path(self) -> Path:
+        '''
+        Return the restore plan path.
+
+        Returns:
+            Path: A path object referencing the restore plan file.
+        '''
+
+        return self.path / PLAN_FILE_NAME
+
+    @property
+    def coordinator_path(self) -> Path:
+        '''
+        Return the coordinator lease path.
+
+        Returns:
+            Path: A path object referencing the coordinator lease file.
+        '''
+
+        return self.path / COORDINATOR_FILE_NAME
+
+    def get_claim_path(self, shard: Shard, worker: str) -> Path:
+        '''
+        Return the claim path of a shard.
+
+        Parameters:
+            shard (Shard): Shard.
+            worker (str): Worker name.
+        Returns:
+            Path: A path object referencing the claim file.
+        '''
+
+        return self.path / CLAIMED / f'{shard.number:06d}.{worker}'
+
+    def now(self) -> float:
+        '''
+        Return the server time.
+
+        Returns:
+            float: The modification time of the freshly touched clock file.
+        '''
+
+        return get_server_time(self.path / CLOCK_FILE_NAME)
+
+    def is_alive(self) -> bool:
+        '''
+        Check whether the coordinator renewed its lease recently.
+
+        Returns:
+            bool: `True` if the coordinator lease is valid, `False` otherwise.
+        '''
+
+        try:
+            age = self.now() - self.coordinator_path.stat().st_mtime
+        except FileNotFoundError:
+            return False
+
+        return age <= self.lease
+
+    def claim(self, worker: str) -> Optional[Shard]:
+        '''
+        Claim the first pending shard.
+
+        Parameters:
+            worker (str): Worker name.
+        Returns:
+            Optional[Shard]: The claimed shard, `None` if no shard is pending.
+        '''
+
+        try:
+            names = sorted(os.listdir(self.path / PENDING))
+        except FileNotFoundError:
+            return None
+
+        for name in names:
+            claim_path = self.path / CLAIMED / f'{name}.{worker}'
+
+            try:
+                os.rename(self.path / PENDING / name, claim_path)
+                os.utime(claim_path)
+                start, end = claim_path.read_text(encoding='utf-8').split()
+            except FileNotFoundError:
+                continue
+
+            return Shard(int(name), int(start), int(end))
+
+        return None
+
+    def release(self, shard: Shard, worker: str) -> None:
+        '''
+        Move a claimed shard back to `pending`, e.g. when interrupted.
+
+        Parameters:
+            shard (Shard): Claimed shard.
+            worker (str): Worker name.
+        '''
+
+        try:
+            os.rename(
+                self.get_claim_path(shard, worker),
+                self.path / PENDING / f'{shard.number:06d}'
+            )
+        except FileNotFoundError:
+            pass
+
+    def expire(self) -> int:
+        '''
+        Move the claims whose lease expired back to `pending`.
+
+        Returns:
+            int: Number of expired claims.
+        '''
+
+        try:
+            names = os.listdir(self.path / CLAIMED)
+            now = self.now()
+        except FileNotFoundError:
+            return 0
+
+        expired = 0
+
+        for name in names:
+            claim_path = self.path / CLAIMED / name
+
+            try:
+                if now - claim_path.stat().st_mtime <= self.lease:
+                    continue
+
+                os.rename(
+                    claim_path,
+                    self.path / PENDING / name.split('.', 1)[0]
+                )
+            except FileNotFoundError:
+                continue
+
+            expired += 1
+
+        return expired
+
+    def complete(
+        self,
+        shard: Shard,
+        worker: str,
+        report: RestoreReportConfiguration
+    ) -> bool:
+        '''
+        Record the report of a restored shard.
+
+        Parameters:
+            shard (Shard): Claimed shard.
+            worker (str): Worker name.
+            report (RestoreReportConfiguration): Shard report.
+        Returns:
+            bool: `True` if recorded, `False` if the claim expired meanwhile.
+        '''
+
+        return self._record(shard, worker, DONE, report.json())
+
+    def fail(self, shard: Shard, worker: str, error: str) -> bool:
+        '''
+        Record the error of a failed shard.
+
+        Parameters:
+            shard (Shard): Claimed shard.
+            worker (str): Worker name.
+            error (str): Error message.
+        Returns:
+            bool: `True` if recorded, `False` if the claim expired meanwhile.
+        '''
+
+        return self._record(shard, worker, FAILED, error)
+
+    def is_finished(self) -> bool:
+        '''
+        Check whether every shard is restored or failed.
+
+        Returns:
+            bool: `True` if no shard is pending or claimed, `False` otherwise.
+        '''
+
+        return len(self._list_names(DONE) | self._list_names(FAILED)) >= \
+            self.configuration.shards
+
+    def reports(self) -> List[RestoreReportConfiguration]:
+        '''
+        Return the reports of the restored shards.
+
+        Returns:
+            List[RestoreReportConfiguration]: Shard reports, in shard order.
+        '''
+
+        return [
+            RestoreReportConfiguration.parse_file(self.path / DONE / name)
+            for name in sorted(self._list_names(DONE))
+        ]
+
+    def failures(self) -> List[str]:
+        '''
+        Return the errors of the failed shards not restored since.
+
+        Returns:
+            List[str]: Error messages, in shard order.
+        '''
+
+        return [
+            (self.path / FAILED / name).read_text(encoding='utf-8')
+            for name in sorted(
+                self._list_names(FAILED) - self._list_names(DONE)
+            )
+        ]
+
+    @contextmanager
+    def renew(self, path: Path) -> Iterator[threading.Event]:
+        '''
+        Renew a lease in the background by touching its file.
+
+        Parameters:
+            path (Path): Lease file.
+        Yields:
+            threading.Event: An event set once the lease file was removed by another process.
+        '''
+
+        lost = threading.Event()
+        stopping = threading.Event()
+
+        def run() -> None:
+            while not stopping.wait(self.lease / 3):
+                try:
+                    os.utime(path)
+                except FileNotFoundError:
+                    lost.set()
+                    return
+
+        thread = threading.Thread(target=run, name='nfsops-lease', daemon=True)
+        thread.start()
+
+        try:
+            yield lost
+        finally:
+            stopping.set()
+            thread.join()
+
+    def run(self, restore: 'ShardRestorer', wait: bool = False) -> int:
+        '''
+        Claim and restore shards until none is pending.
+
+        Parameters:
+            restore (ShardRestorer): Function restoring a shard of the plan.
+            wait (bool): Whether to wait until every shard is restored, restoring expired claims.
+        Returns:
+            int: Number of claimed shards.
+        '''
+
+        logger = utils.get_default_logger()
+        worker = get_worker_name()
+        claimed = 0
+
+        with ExitStack() as stack:
+            plan: Optional[FileTable] = None
+
+            while True:
+                shard = self.claim(worker)
+
+                if shard is None:
+                    if not wait or self.is_finished():
+                        return claimed
+
+                    self.expire()
+                    time.sleep(SHARD_POLL_INTERVAL)
+                    continue
+
+                if plan is None:
+                    plan = stack.enter_context(FileTable.load(self.plan_path))
+
+                claimed += 1
+
+                with self.renew(self.get_claim_path(shard, worker)) as lost:
+                    try:
+                        report = restore(plan, shard)
+                    except Exception as exception:  # pylint: disable=W0703
+                        logger.error(
+                            f'restore shard {shard.number} failed: {exception}'
+                        )
+                        self.fail(shard, worker, str(exception))
+                        continue
+                    except BaseException:
+                        self.release(shard, worker)
+                        raise
+
+                if lost.is_set() or not self.complete(shard, worker, report):
+                    logger.warning(
+                        f'lost restore shard {shard.number}, its lease expired.'
+                    )
+
+    def remove(self) -> None:
+        '''
+        Remove the work directory.
+        '''
+
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def _record(
+        self,
+        shard: Shard,
+        worker: str,
+        state: str,
+        content: str
+    ) -> bool:
+        '''
+        Write the outcome of a claimed shard and release the claim.
+
+        Parameters:
+            shard (Shard): Claimed shard.
+            worker (str): Worker name.
+            state (str): State directory name (`done` or `failed`).
+            content (str): Shard report or error message.
+        Returns:
+            bool: `True` if recorded, `False` if the claim expired meanwhile.
+        '''
+
+        claim_path = self.get_claim_path(shard, worker)
+
+        if not claim_path.exists():
+            return False
+
+        with utils.open_atomic_writer(
+            self.path / state / f'{shard.number:06d}'
+        ) as file:
+            file.write(content.encode())
+
+        try:
+            os.unlink(claim_path)
+        except FileNotFoundError:
+            pass
+
+        return True
+
+    def _list_names(self, state: str) -> Set[str]:
+        '''
+        List the shard names of a state directory.
+
+        Parameters:
+            state (str): State directory name.
+        Returns:
+            Set[str]: Shard names, without temporary files.
+        '''
+
+        try:
+            return {
+                name for name in os.listdir(self.path / state)
+                if name.isdigit()
+            }
+        except FileNotFoundError:
+            return set()
+
+
+def get_server_time(clock: Path) -> float:
+    '''
+    Return the server time by touching a clock file.
+
+    Parameters:
+        clock (Path): Clock file, created on demand.
+    Returns:
+        float: The modification time of the touched clock file.
+    '''
+
+    clock.touch()
+
+    return clock.stat().st_mtime
+
+
+def plan_restore(  # pylint: disable=R0913,R0917
+    sources: Sequence[Path],
+    manifests: Iterable[Optional[Manifest]],
+    path_filter: PathFilter,
+    stat_cache: StatCache,
+    prefetcher: Optional[ScandirPrefetcher] = None
+) -> FileTable:
+    '''
+    Plan a restore, in sorted path order.
+
+    When every backup version has an up-to-date manifest, the plan is built
+    from the manifests without listing any directory: the per-version tables
+    are merged, newest wins and the path filter is applied on the columns.
+    Otherwise the merged view of the backup versions is walked.
+
+    Parameters:
+        sources (Sequence[Path]): Backup version directories, newest first.
+        manifests (Iterable[Optional[Manifest]]):
+            Backup version manifests, `None` if missing or outdated, closed
+            once read.
+        path_filter (PathFilter): Path filter.
+        stat_cache (StatCache): Stat cache.
+        prefetcher (Optional[ScandirPrefetcher]): Directory listing prefetcher, for walks.
+    Returns:
+        FileTable: A restore plan.
+    '''
+
+    tables: List[FileTable] = []
+
+    with ExitStack() as stack:
+        for version, manifest in enumerate(manifests):
+            if manifest is None:
+                tables.clear()
+                break
+
+            table = FileTable()
+
+            for record in stack.enter_context(manifest):
+                table.append(
+                    record.path,
+                    record.size,
+                    record.mtime_ns,
+                    record.mode,
+                    version
+                )
+
+            tables.append(table)
+
+    if not tables:
+        return FileTable.from_entries(
+            walk_merged(sources, stat_cache, path_filter, prefetcher)
+        )
+
+    return FileTable.merge(tables).newest_wins().filter(path_filter)
+
+
+def iter_plan_entries(
+    plan: FileTable,
+    rows: Iterable[int],
+    sources: Sequence[Path],
+    retry_policy: RetryPolicy,
+    stat_cache: StatCache
+) -> Iterator[MergedEntry]:
+    '''
+    Iterate over the merged entries of restore plan rows, reading their
+    source status again.
+
+    Parameters:
+        plan (FileTable): Restore plan.
+        rows (Iterable[int]): Row indexes.
+        sources (Sequence[Path]): Backup version directories, newest first.
+        retry_policy (RetryPolicy): Retry policy for the `lstat` calls.
+        stat_cache (StatCache): Stat cache.
+    Yields:
+        MergedEntry: Merged entries.
+    '''
+
+    for index in rows:
+        path = plan.path(index)
+        version = plan.versions[index]
+        source = sources[version] / path
+
+        yield MergedEntry(
+            path,
+            version,
+            source,
+            retry_policy.call(partial(stat_cache.lstat, source))
+        )
+
+
+def create_plan_directories(
+    plan: FileTable,
+    sources: Sequence[Path],
+    destination: Path,
+    engine: TransferEngine,
+    stat_cache: StatCache
+) -> int:
+    '''
+    Create the directories of a restore plan and stage their metadata, before
+    the shards are restored.
+
+    Parameters:
+        plan (FileTable): Restore plan.
+        sources (Sequence[Path]): Backup version directories, newest first.
+        destination (Path): Destination directory.
+        engine (TransferEngine): Coordinator transfer engine.
+        stat_cache (StatCache): Stat cache.
+    Returns:
+        int: Number of directories.
+    '''
+
+    directories = 0
+
+    for entry in iter_plan_entries(
+        plan,
+        (
+            index for index in range(len(plan))
+            if stat.S_ISDIR(plan.modes[index])
+        ),
+        sources,
+        engine.retry_policy,
+        stat_cache
+    ):
+        if engine.metadata is not None:
+            engine.metadata.add(entry)
+
+        engine.retry_policy.call(
+            partial(
+                (destination / entry.path).mkdir,
+                parents=True,
+                exist_ok=True
+            )
+        )
+        directories += 1
+
+    return directories
+
+
+def restore_shard(
+    configuration: ShardedRestoreConfiguration,
+    plan: FileTable,
+    shard: Shard,
+    engine: TransferEngine,
+    stat_cache: StatCache
+) -> RestoreReportConfiguration:
+    '''
+    Restore the non-directory entries of a shard and apply their metadata,
+    directories are created by the coordinator.
+
+    Parameters:
+        configuration (ShardedRestoreConfiguration): Sharded restore configuration.
+        plan (FileTable): Restore plan.
+        shard (Shard): Claimed shard.
+        engine (TransferEngine): Transfer engine.
+        stat_cache (StatCache): Stat cache.
+    Returns:
+        RestoreReportConfiguration: A shard report.
+    Raises:
+        Exception: Expected operation failed.
+    '''
+
+    sources = configuration.sources
+    rows = [
+        index for index in range(shard.start, shard.end)
+        if not stat.S_ISDIR(plan.modes[index])
+    ]
+
+    utils.get_default_logger().info(
+        f'restoring shard {shard.number} ({len(rows)} entries) '
+        f'with "{engine.name}" transfer engine.'
+    )
+
+    chunked_files = engine.transfer(
+        sources,
+        iter_plan_entries(
+            plan,
+            rows,
+            sources,
+            engine.retry_policy,
+            stat_cache
+        ),
+        configuration.destination
+    )
+    metadata_calls = 0 if engine.metadata is None else \
+        engine.metadata.apply(configuration.destination)
+
+    return RestoreReportConfiguration(
+        version=configuration.versions[0],
+        final_version=configuration.versions[-1]
+        if len(configuration.versions) > 1 else None,
+        files=len(rows),
+        bytes=sum(plan.sizes[index] for index in rows),
+        engine=engine.name,
+        chunked_files=chunked_files,
+        metadata_calls=metadata_calls,
+        retries=engine.retry_policy.retry_count,
+        shards=1,
+        workers=[get_worker_name()]
+    )
+
+
+def get_shard_restorer(
+    work: ShardedRestore,
+    stat_cache: StatCache
+) -> ShardRestorer:
+    '''
+    Return the function restoring the shards of a sharded restore, each with
+    its own transfer engine.
+
+    Parameters:
+        work (ShardedRestore): Sharded restore.
+        stat_cache (StatCache): Stat cache.
+    Returns:
+        ShardRestorer: A function restoring a shard of the plan.
+    '''
+
+    return lambda plan, shard: restore_shard(
+        work.configuration,
+        plan,
+        shard,
+        get_restore_engine(work.configuration.options),
+        stat_cache
+    )
+
+
+def run_active_restores(
+    root: Path,
+    lease: float,
+    stat_cache: StatCache
+) -> int:
+    '''
+    Restore the pending shards of every active sharded restore once,
+    expiring abandoned claims first.
+
+    Parameters:
+        root (Path): Directory of the sharded restores.
+        lease (float): Lease duration in seconds.
+        stat_cache (StatCache): Stat cache.
+    Returns:
+        int: Number of claimed shards.
+    '''
+
+    claimed = 0
+
+    for work in ShardedRestore.list_active(root, lease):
+        work.expire()
+        claimed += work.run(get_shard_restorer(work, stat_cache))
+
+    return claimed
+
+
+def merge_shard_reports(
+    configuration: ShardedRestoreConfiguration,
+    reports: List[RestoreReportConfiguration],
+    engine: TransferEngine,
+    directories: int,
+    metadata_calls: int
+) -> RestoreReportConfiguration:
+    '''
+    Merge the shard reports of a sharded restore with the coordinator work.
+
+    Parameters:
+        configuration (ShardedRestoreConfiguration): Sharded restore configuration.
+        reports (List[RestoreReportConfiguration]): Shard reports.
+        engine (TransferEngine): Transfer engine of the coordinator.
+        directories (int): Number of directories created by the coordinator.
+        metadata_calls (int): Number of metadata calls of the coordinator.
+    Returns:
+        RestoreReportConfiguration: A restore report for operation.
+    '''
+
+    return RestoreReportConfiguration(
+        version=configuration.versions[0],
+        final_version=configuration.versions[-1]
+        if len(configuration.versions) > 1 else None,
+        files=directories + sum(report.files for report in reports),
+        bytes=sum(report.bytes for report in reports),
+        engine=engine.name,
+        chunked_files=sorted(
+            (file for report in reports for file in report.chunked_files),
+            key=lambda file: file.path
+        ),
+        metadata_calls=metadata_calls +
+        sum(report.metadata_calls for report in reports),
+        retries=engine.retry_policy.retry_count +
+        sum(report.retries for report in reports),
+        shards=len(reports),
+        workers=sorted(
+            {worker for report in reports for worker in report.workers}
+        )
+    )
+
+
+__all__ = [
+    'SHARD_DIRECTORY_NAME',
+    'Shard',
+    'ShardRestorer',
+    'ShardedRestore',
+    'create_plan_directories',
+    'get_shard_restorer',
+    'get_worker_name',
+    'iter_plan_entries',
+    'merge_shard_reports',
+    'plan_restore',
+    'restore_shard',
+    'run_active_restores',
+    'split_shards'
+]
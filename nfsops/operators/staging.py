@@ -0,0 +1,291 @@
+'''
+Staged restore functions.
+'''
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import shutil
+import stat
+import uuid
+from pathlib import Path
+from typing import Dict, List, Literal, Optional, Set, Tuple
+
+from .. import utils
+from ..profiler import profile_phase
+from .file_table import FileTable
+from .merge import walk_merged
+from .stat_cache import StatCache
+from .transfer import apply_metadata
+
+#: Use the current working directory for relative `renameat2` paths.
+AT_FDCWD = -100
+#: Exchange both paths atomically (`renameat2` flag).
+RENAME_EXCHANGE = 2
+
+#: Staging directory swap method.
+SwapMethod = Literal['exchange', 'rename']
+#: Swap errors meaning the exchange is not supported, not that it failed.
+UNSUPPORTED_ERRNOS = (errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP)
+
+
+def rename_exchange(first: Path, second: Path) -> None:
+    '''
+    Exchange two paths atomically with `renameat2(RENAME_EXCHANGE)`.
+
+    Parameters:
+        first (Path): First path.
+        second (Path): Second path.
+    Raises:
+        OSError: Expected exchange supported and successful (`ENOSYS` or `EINVAL` if unsupported).
+    '''
+
+    libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+
+    if not hasattr(libc, 'renameat2'):
+        raise OSError(errno.ENOSYS, 'renameat2 is not supported.')
+
+    if libc.renameat2(
+        AT_FDCWD,
+        os.fsencode(first),
+        AT_FDCWD,
+        os.fsencode(second),
+        ctypes.c_uint(RENAME_EXCHANGE)
+    ) != 0:
+        code = ctypes.get_errno()
+        raise OSError(code, os.strerror(code), str(first), None, str(second))
+
+
+def swap_directories(
+    staging: Path,
+    destination: Path
+) -> Tuple[Optional[Path], SwapMethod]:
+    '''
+    Move a staging directory into place, keeping the replaced directory aside.
+
+    Both directories are exchanged atomically when supported. Otherwise the
+    destination is renamed aside first, so it is briefly missing, and moved
+    back if the staging directory cannot be renamed.
+
+    Parameters:
+        staging (Path): Staging directory, on the same filesystem.
+        destination (Path): Destination directory.
+    Returns:
+        Tuple[Optional[Path], SwapMethod]: The replaced directory to remove (`None` if
+            the destination did not exist) and the swap method (`exchange` or `rename`).
+    Raises:
+        OSError: Expected directories swapped.
+    '''
+
+    if not os.path.lexists(destination):
+        os.rename(staging, destination)
+        return None, 'rename'
+
+    try:
+        rename_exchange(staging, destination)
+        return staging, 'exchange'
+    except OSError as exception:
+        if exception.errno not in UNSUPPORTED_ERRNOS:
+            raise
+
+    utils.get_default_logger().info(
+        f'atomic exchange not supported for "{destination}", renaming instead.'
+    )
+
+    replaced = staging.with_name(f'{staging.name}-replaced')
+    os.rename(destination, replaced)
+
+    try:
+        os.rename(staging, destination)
+    except BaseException:
+        os.rename(replaced, destination)
+        raise
+
+    return replaced, 'rename'
+
+
+def create_staging_directory(destination: Path, volume: Path) -> Path:
+    '''
+    Create a hidden staging directory next to a destination directory.
+
+    Parameters:
+        destination (Path): Destination directory.
+        volume (Path): Volume directory, never replaced.
+    Returns:
+        Path: A new empty staging directory, on the same filesystem.
+    Raises:
+        ValueError: Expected destination is not the volume or one of its parents.
+    '''
+
+    destination = destination.resolve()
+    volume = volume.resolve()
+
+    if destination == volume or destination in volume.parents:
+        raise ValueError(
+            'staged restores cannot replace the volume directory, '
+            'use "destination" parameter.'
+        )
+
+    staging = destination.with_name(
+        f'.{destination.name}.nfsops-staging-{uuid.uuid4().hex[:8]}'
+    )
+    staging.mkdir(parents=True)
+
+    return staging
+
+
+def commit_staging_directory(
+    table: FileTable,
+    staging: Path,
+    destination: Path
+) -> SwapMethod:
+    '''
+    Verify the restored entries of a staging directory, then swap it into
+    place and remove the replaced directory.
+
+    Parameters:
+        table (FileTable): Restored entries.
+        staging (Path): Staging directory.
+        destination (Path): Destination directory.
+    Returns:
+        SwapMethod: The swap method (`exchange` or `rename`).
+    Raises:
+        RuntimeError: Expected restored entries verified.
+        OSError: Expected directories swapped.
+    '''
+
+    with profile_phase('restore.verify'):
+        mismatches = verify_tree(table, staging)
+
+    if mismatches:
+        raise RuntimeError(
+            f'staged restore verification failed for '
+            f'{len(mismatches)} entries: {", ".join(mismatches[:10])}.'
+        )
+
+    with profile_phase('restore.swap'):
+        replaced, method = swap_directories(staging, destination)
+
+    if replaced is not None:
+        shutil.rmtree(replaced, ignore_errors=True)
+
+    return method
+
+
+def clone_tree(
+    source: Path,
+    destination: Path,
+    stat_cache: Optional[StatCache] = None
+) -> int:
+    '''
+    Complete a directory tree with hard links to the entries of another one
+    it is missing, copying only directories.
+
+    Existing destination entries are kept, along with their subtree if the
+    source entry is not a directory too, and the timestamps of existing
+    directories are restored once completed. Linked files are never written
+    afterwards, so the source tree is left unchanged.
+
+    Parameters:
+        source (Path): Source directory.
+        destination (Path): Existing destination directory, on the same filesystem.
+        stat_cache (Optional[StatCache]): Stat cache instance, defaults to the shared one.
+    Returns:
+        int: Number of linked entries.
+    '''
+
+    directories = []
+    created: Set[Path] = set()
+    parents: Dict[Path, os.stat_result] = {}
+    links = 0
+    kept: Optional[str] = None
+
+    for entry in walk_merged([source], stat_cache):
+        if kept is not None and entry.path.startswith(f'{kept}/'):
+            continue
+
+        target = destination / entry.path
+
+        try:
+            target_stat: Optional[os.stat_result] = os.lstat(target)
+        except FileNotFoundError:
+            target_stat = None
+
+        if target_stat is not None:
+            if not (entry.is_dir and stat.S_ISDIR(target_stat.st_mode)):
+                kept = entry.path
+
+            continue
+
+        if target.parent not in created and target.parent not in parents:
+            parents[target.parent] = os.lstat(target.parent)
+
+        if entry.is_dir:
+            target.mkdir()
+            created.add(target)
+            directories.append(entry)
+        else:
+            os.link(entry.source, target, follow_symlinks=False)
+            links += 1
+
+    for entry in reversed(directories):
+        apply_metadata(destination / entry.path, entry.stat)
+
+    for parent, parent_stat in parents.items():
+        os.utime(parent, ns=(parent_stat.st_atime_ns, parent_stat.st_mtime_ns))
+
+    return links
+
+
+def verify_tree(table: FileTable, root: Path) -> List[str]:
+    '''
+    Check that restored entries are in place with their expected metadata.
+
+    Directories and links are checked by type, links by target size too, and
+    regular files by size and modification time. Special files are skipped,
+    as transfer engines do not restore them.
+
+    Parameters:
+        table (FileTable): Restored entries.
+        root (Path): Restored directory.
+    Returns:
+        List[str]: Relative paths of the missing or mismatching entries.
+    '''
+
+    mismatches = []
+
+    for record in table:
+        if not (
+            stat.S_ISDIR(record.mode) or
+            stat.S_ISREG(record.mode) or
+            stat.S_ISLNK(record.mode)
+        ):
+            continue
+
+        try:
+            path_stat = os.lstat(root / record.path)
+        except (FileNotFoundError, NotADirectoryError):
+            mismatches.append(record.path)
+            continue
+
+        same_type = stat.S_IFMT(path_stat.st_mode) == stat.S_IFMT(record.mode)
+        same_size = record.is_dir or path_stat.st_size == record.size
+        same_mtime = not stat.S_ISREG(record.mode) or \
+            path_stat.st_mtime_ns == record.mtime_ns
+
+        if not (same_type and same_size and same_mtime):
+            mismatches.append(record.path)
+
+    return mismatches
+
+
+__all__ = [
+    'RENAME_EXCHANGE',
+    'clone_tree',
+    'commit_staging_directory',
+    'create_staging_directory',
+    'rename_exchange',
+    'swap_directories',
+    'verify_tree'
+]
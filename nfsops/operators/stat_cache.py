@@ -0,0 +1,528 @@
+'''
+Stat cache object.
+'''
+
+import os
+import stat
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+from .. import utils
+from .autotune import ConcurrencyTuner
+from .retry import RetryPolicy
+
+#: Path-like type accepted by the stat cache.
+PathLike = Union[str, 'os.PathLike[str]']
+
+#: Cached `stat` result and expiration time.
+CacheItem = Tuple[os.stat_result, float]
+
+#: NFS default minimum attribute cache timeouts (`acregmin`, `acdirmin`).
+NFS_DEFAULT_TIMEOUTS = (3.0, 30.0)
+
+
+class StatCacheInfo(NamedTuple):
+    '''
+    Stat cache statistics.
+    '''
+
+    #: Number of lookups served from the cache.
+    hits: int
+    #: Number of lookups requiring a `stat` call.
+    misses: int
+    #: Maximum number of cached entries.
+    maxsize: int
+    #: Current number of cached entries.
+    currsize: int
+
+
+def get_attribute_cache_timeouts(options: Dict[str, str]) -> Tuple[float, float]:
+    '''
+    Return the file and directory attribute cache timeouts for mount options.
+
+    NFS mounts use the `acregmin`/`acdirmin` values (or `actimeo`, `noac`),
+    so cached entries never outlive what the kernel would serve from its own
+    attribute cache.
+
+    Parameters:
+        options (Dict[str, str]): NFS mount options.
+    Returns:
+        Tuple[float, float]: File and directory timeouts in seconds.
+    '''
+
+    if 'noac' in options:
+        return 0.0, 0.0
+
+    if 'actimeo' in options:
+        timeout = float(options['actimeo'])
+
+        return timeout, timeout
+
+    return (
+        float(options.get('acregmin', NFS_DEFAULT_TIMEOUTS[0])),
+        float(options.get('acdirmin', NFS_DEFAULT_TIMEOUTS[1]))
+    )
+
+
+class StatCache:
+    '''
+    Stat cache object.
+
+    Bounded LRU cache of `stat` results keyed by path. Entries expire after
+    the attribute cache timeout of the filesystem they belong to, and can be
+    filled in bulk from `os.scandir` results.
+    '''
+
+    #: Maximum number of cached entries.
+    maxsize: int
+    #: Timeout in seconds for non-NFS filesystems.
+    default_timeout: float
+
+    def __init__(self, maxsize: int = 65536, default_timeout: float = 1.0):
+        '''
+        Initialize stat cache object.
+
+        Parameters:
+            maxsize (int): Maximum number of cached entries.
+            default_timeout (float): Timeout in seconds for non-NFS filesystems.
+        '''
+
+        self.maxsize = maxsize
+        self.default_timeout = default_timeout
+
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[Tuple[str, bool], CacheItem]' = \
+            OrderedDict()
+        self._timeouts: Dict[int, Tuple[float, float]] = {}
+        self._hits = 0
+        self._misses = 0
+
+    def stat(
+        self,
+        path: PathLike,
+        follow_symlinks: bool = True
+    ) -> os.stat_result:
+        '''
+        Return the cached `stat` result of a path, calling `os.stat` on a miss.
+
+        Parameters:
+            path (PathLike): File path.
+            follow_symlinks (bool): Whether to follow symbolic links.
+        Returns:
+            os.stat_result: A `stat` result.
+        Raises:
+            OSError: Expected `stat` call failed.
+        '''
+
+        key = (os.fspath(path), follow_symlinks)
+        now = time.monotonic()
+
+        with self._lock:
+            cached = self._entries.get(key)
+
+            if cached is not None and cached[1] > now:
+                self._entries.move_to_end(key)
+                self._hits += 1
+
+                return cached[0]
+
+            self._misses += 1
+
+        stat_result = self._fetch_stat(key[0], follow_symlinks)
+        self._put(key, stat_result, now)
+
+        return stat_result
+
+    def lstat(self, path: PathLike) -> os.stat_result:
+        '''
+        Return the cached `lstat` result of a path.
+
+        Parameters:
+            path (PathLike): File path.
+        Returns:
+            os.stat_result: A `stat` result, not following symbolic links.
+        Raises:
+            OSError: Expected `stat` call failed.
+        '''
+
+        return self.stat(path, follow_symlinks=False)
+
+    def add_entry(self, entry: 'os.DirEntry[str]') -> os.stat_result:
+        '''
+        Fill the cache from a directory entry.
+
+        Parameters:
+            entry (os.DirEntry[str]): Directory entry returned by `os.scandir`.
+        Returns:
+            os.stat_result: A `stat` result, not following symbolic links.
+        Raises:
+            OSError: Expected `stat` call failed.
+        '''
+
+        stat_result = entry.stat(follow_symlinks=False)
+        now = time.monotonic()
+
+        self._put((entry.path, False), stat_result, now)
+
+        if not stat.S_ISLNK(stat_result.st_mode):
+            self._put((entry.path, True), stat_result, now)
+
+        return stat_result
+
+    def scandir(self, path: PathLike) -> List['os.DirEntry[str]']:
+        '''
+        List a directory, filling the cache with the `stat` results of its entries.
+
+        Parameters:
+            path (PathLike): Directory path.
+        Returns:
+            List[os.DirEntry[str]]: A list of directory entries.
+        Raises:
+            OSError: Expected directory listing failed.
+        '''
+
+        entries = self._fetch_entries(path)
+
+        for entry in entries:
+            try:
+                self.add_entry(entry)
+            except FileNotFoundError:
+                continue
+
+        return entries
+
+    def invalidate(self, path: PathLike) -> None:
+        '''
+        Remove the cached entries of a path.
+
+        Parameters:
+            path (PathLike): File path.
+        '''
+
+        path_string = os.fspath(path)
+
+        with self._lock:
+            self._entries.pop((path_string, True), None)
+            self._entries.pop((path_string, False), None)
+
+    def invalidate_tree(self, path: PathLike) -> None:
+        '''
+        Remove the cached entries of a path and everything below it.
+
+        Parameters:
+            path (PathLike): Directory path.
+        '''
+
+        path_string = os.fspath(path)
+        prefix = os.path.join(path_string, '')
+
+        with self._lock:
+            for key in [
+                key for key in self._entries
+                if key[0] == path_string or key[0].startswith(prefix)
+            ]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        '''
+        Remove all cached entries and reset statistics.
+        '''
+
+        with self._lock:
+            self._entries.clear()
+            self._timeouts.clear()
+            self._hits = 0
+            self._misses = 0
+
+    def cache_info(self) -> StatCacheInfo:
+        '''
+        Return cache statistics.
+
+        Returns:
+            StatCacheInfo: A named tuple with hits, misses, maximum and current size.
+        '''
+
+        with self._lock:
+            return StatCacheInfo(
+                self._hits,
+                self._misses,
+                self.maxsize,
+                len(self._entries)
+            )
+
+    def _fetch_stat(self, path: str, follow_symlinks: bool) -> os.stat_result:
+        '''
+        Return the `stat` result of a path on a cache miss.
+
+        Parameters:
+            path (str): File path.
+            follow_symlinks (bool): Whether to follow symbolic links.
+        Returns:
+            os.stat_result: A `stat` result.
+        Raises:
+            OSError: Expected `stat` call failed.
+        '''
+
+        return os.stat(path, follow_symlinks=follow_symlinks)
+
+    def _fetch_entries(self, path: PathLike) -> List['os.DirEntry[str]']:
+        '''
+        Return the entries of a directory.
+
+        Parameters:
+            path (PathLike): Directory path.
+        Returns:
+            List[os.DirEntry[str]]: A list of directory entries.
+        Raises:
+            OSError: Expected directory listing failed.
+        '''
+
+        with os.scandir(path) as iterator:
+            return list(iterator)
+
+    def _put(
+        self,
+        key: Tuple[str, bool],
+        stat_result: os.stat_result,
+        now: float
+    ) -> None:
+        '''
+        Store a `stat` result, evicting the least recently used entries.
+
+        Parameters:
+            key (Tuple[str, bool]): Path and whether symbolic links were followed.
+            stat_result (os.stat_result): A `stat` result.
+            now (float): Monotonic time of the `stat` call.
+        '''
+
+        file_timeout, directory_timeout = self._get_timeouts(
+            stat_result.st_dev
+        )
+        timeout = (
+            directory_timeout if stat.S_ISDIR(stat_result.st_mode)
+            else file_timeout
+        )
+
+        if timeout <= 0 or self.maxsize <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (stat_result, now + timeout)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def _get_timeouts(self, device: int) -> Tuple[float, float]:
+        '''
+        Return the attribute cache timeouts of a device, reading mount
+        information on first use.
+
+        Parameters:
+            device (int): Device number.
+        Returns:
+            Tuple[float, float]: File and directory timeouts in seconds.
+        '''
+
+        timeouts = self._timeouts.get(device)
+
+        if timeouts is None:
+            _, filesystem_type, options = utils.get_mount_table().get(
+                device, ('', '', {})
+            )
+
+            if filesystem_type.startswith('nfs'):
+                timeouts = get_attribute_cache_timeouts(options)
+            else:
+                timeouts = (self.default_timeout, self.default_timeout)
+
+            self._timeouts[device] = timeouts
+
+        return timeouts
+
+
+_default_stat_cache: Optional[StatCache] = None  # pylint: disable=C0103
+
+
+def get_default_stat_cache() -> StatCache:
+    '''
+    Return the stat cache instance shared by operators.
+
+    Returns:
+        StatCache: A shared stat cache instance.
+    '''
+
+    global _default_stat_cache  # pylint: disable=W0603
+
+    if _default_stat_cache is None:
+        _default_stat_cache = StatCache()
+
+    return _default_stat_cache
+
+
+class ScandirPrefetcher:
+    '''
+    Directory listing prefetcher object.
+
+    List directories on a thread pool ahead of the walk, so the round trips of
+    many directory listings overlap instead of adding up. At most
+    `max_pending` listings are kept in memory ahead of the walk. Failed
+    listings are listed again under the retry policy, if any. With a
+    concurrency tuner, the number of listings running at once follows the
+    tuner limit instead of `max_workers`.
+    '''
+
+    #: Stat cache filled by the prefetched listings.
+    stat_cache: StatCache
+    #: Maximum number of prefetched listings kept ahead of the walk.
+    max_pending: int
+    #: Retry policy of failed listings, `None` raises errors immediately.
+    retry_policy: Optional[RetryPolicy]
+    #: Concurrency tuner measuring listings in entries, `None` to run `max_workers` at once.
+    tuner: Optional[ConcurrencyTuner]
+
+    def __init__(
+        self,
+        stat_cache: Optional[StatCache] = None,
+        max_workers: Optional[int] = None,
+        max_pending: int = 256,
+        retry_policy: Optional[RetryPolicy] = None,
+        tuner: Optional[ConcurrencyTuner] = None
+    ):
+        '''
+        Initialize directory listing prefetcher object.
+
+        Parameters:
+            stat_cache (Optional[StatCache]): Stat cache instance, defaults to the shared one.
+            max_workers (Optional[int]): Number of listing threads.
+            max_pending (int): Maximum number of prefetched listings kept ahead of the walk.
+            retry_policy (Optional[RetryPolicy]): Retry policy of failed listings.
+            tuner (Optional[ConcurrencyTuner]): Concurrency tuner of listings.
+        '''
+
+        self.stat_cache = stat_cache or get_default_stat_cache()
+        self.max_pending = max_pending
+        self.retry_policy = retry_policy
+        self.tuner = tuner
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=tuner.maximum if tuner is not None
+            else max_workers or utils.get_default_workers(),
+            thread_name_prefix='nfsops-prefetch'
+        )
+        self._lock = threading.Lock()
+        self._pending: Dict[str, 'Future[List[os.DirEntry[str]]]'] = {}
+
+    def __enter__(self) -> 'ScandirPrefetcher':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def prefetch(self, directories: Iterable[PathLike]) -> None:
+        '''
+        Start listing directories in the background.
+
+        Parameters:
+            directories (Iterable[PathLike]): Directories the walk will list next.
+        '''
+
+        with self._lock:
+            for directory in directories:
+                if len(self._pending) >= self.max_pending:
+                    return
+
+                key = os.fspath(directory)
+
+                if key not in self._pending:
+                    self._pending[key] = self._executor.submit(
+                        self._list,
+                        directory
+                    )
+
+    def scandir(self, directory: PathLike) -> List['os.DirEntry[str]']:
+        '''
+        List a directory, using the prefetched listing if available.
+
+        Parameters:
+            directory (PathLike): Directory path.
+        Returns:
+            List[os.DirEntry[str]]: A list of directory entries with cached `stat` results.
+        Raises:
+            OSError: Expected directory listing failed.
+        '''
+
+        with self._lock:
+            future = self._pending.pop(os.fspath(directory), None)
+
+        if self.retry_policy is None:
+            if future is None:
+                return self.stat_cache.scandir(directory)
+
+            return future.result()
+
+        if future is None:
+            return self.retry_policy.call(
+                partial(self.stat_cache.scandir, directory)
+            )
+
+        try:
+            entries = future.result()
+        except Exception as exception:  # pylint: disable=W0703
+            self.retry_policy.backoff(exception, 1)
+        else:
+            self.retry_policy.record_success()
+
+            return entries
+
+        return self.retry_policy.call(
+            partial(self.stat_cache.scandir, directory),
+            attempt=1
+        )
+
+    def _list(self, directory: PathLike) -> List['os.DirEntry[str]']:
+        '''
+        List a directory on a listing thread, measured by the tuner if any.
+
+        Parameters:
+            directory (PathLike): Directory path.
+        Returns:
+            List[os.DirEntry[str]]: A list of directory entries.
+        Raises:
+            OSError: Expected directory listing failed.
+        '''
+
+        if self.tuner is None:
+            return self.stat_cache.scandir(directory)
+
+        return self.tuner.call(
+            partial(self.stat_cache.scandir, directory),
+            len
+        )
+
+    def close(self) -> None:
+        '''
+        Discard pending listings and stop the listing threads.
+        '''
+
+        with self._lock:
+            for future in self._pending.values():
+                future.cancel()
+
+            self._pending.clear()
+
+        self._executor.shutdown(wait=True)
+
+
+__all__ = [
+    'NFS_DEFAULT_TIMEOUTS',
+    'StatCacheInfo',
+    'StatCache',
+    'get_attribute_cache_timeouts',
+    'get_default_stat_cache',
+    'ScandirPrefetcher'
+]
@@ -0,0 +1,787 @@
+'''
+Transfer engine objects.
+'''
+
+import errno
+import logging
+import os
+import posixpath
+import stat
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from functools import partial
+from pathlib import Path
+from typing import IO, Dict, Iterable, List, Optional, Sequence, Set
+
+from .. import utils
+from ..configurations.file_transfer_report import (
+    FileTransferReportConfiguration
+)
+from ..configurations.restore import RestoreConfiguration
+from .autotune import ConcurrencyTuner
+from .chunked_copy import ChunkedCopier
+from .merge import MergedEntry
+from .metadata import MetadataStage, OwnershipMap
+from .retry import RetryPolicy, run_with_watchdog
+from .scheduler import IOScheduler
+from .transport import SshTransport
+
+
+def copy_file_data(source_fd: int, destination_fd: int, size: int) -> None:
+    '''
+    Copy file data between descriptors inside the kernel when possible.
+
+    Uses `copy_file_range` (server-side copy on NFSv4.2), then `sendfile`,
+    then a userspace loop, depending on platform and filesystem support.
+
+    Parameters:
+        source_fd (int): Source file descriptor.
+        destination_fd (int): Destination file descriptor.
+        size (int): Number of bytes to copy.
+    '''
+
+    offset = 0
+
+    if hasattr(os, 'copy_file_range'):
+        try:
+            while offset < size:
+                copied = os.copy_file_range(  # type: ignore
+                    source_fd,
+                    destination_fd,
+                    size - offset
+                )
+
+                if copied == 0:
+                    return
+
+                offset += copied
+
+            return
+        except OSError as exception:
+            if exception.errno not in (
+                errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP
+            ) or offset:
+                raise
+
+    try:
+        while offset < size:
+            copied = os.sendfile(
+                destination_fd,
+                source_fd,
+                offset,
+                size - offset
+            )
+
+            if copied == 0:
+                return
+
+            offset += copied
+
+        return
+    except OSError as exception:
+        if exception.errno not in (errno.EINVAL, errno.ENOSYS) or offset:
+            raise
+
+    while True:
+        chunk = os.read(source_fd, 1024 * 1024)
+
+        if not chunk:
+            return
+
+        # Writes may be partial, e.g. on pipes or when interrupted.
+        view = memoryview(chunk)
+
+        while view:
+            view = view[os.write(destination_fd, view):]
+
+
+def apply_metadata(path: Path, stat_result: os.stat_result) -> None:
+    '''
+    Apply ownership, permissions and timestamps to a path, not following links.
+
+    Ownership is only applied when running as root.
+
+    Parameters:
+        path (Path): Destination path.
+        stat_result (os.stat_result): Source `stat` result.
+    '''
+
+    is_link = stat.S_ISLNK(stat_result.st_mode)
+
+    if os.geteuid() == 0:
+        os.chown(
+            path,
+            stat_result.st_uid,
+            stat_result.st_gid,
+            follow_symlinks=False
+        )
+
+    if not is_link:
+        os.chmod(path, stat.S_IMODE(stat_result.st_mode))
+
+    if not is_link or os.utime in os.supports_follow_symlinks:
+        os.utime(
+            path,
+            ns=(stat_result.st_atime_ns, stat_result.st_mtime_ns),
+            follow_symlinks=False
+        )
+
+
+class TransferEngine(ABC):
+    '''
+    Base transfer engine object.
+
+    Transfer engines copy merged entries from their backup versions into a
+    destination directory, skipping files whose size and modification time
+    already match. Files accepted by the chunked copier are copied in
+    concurrent chunks and reported individually. Every file, directory or
+    subprocess is retried on its own under the retry policy, so transient
+    errors only repeat the failed step. With a metadata stage, the metadata of
+    written entries is left to the stage instead of being applied inline.
+    With a link directory, missing files are hard-linked from it when their
+    data and metadata are identical, instead of being copied.
+    '''
+
+    #: Engine name.
+    name: str = ''
+    #: Logger instance.
+    logger: logging.Logger
+    #: Chunked copier for large files, disabled if `None`.
+    chunked_copier: Optional[ChunkedCopier]
+    #: Retry policy for transient errors.
+    retry_policy: RetryPolicy
+    #: Metadata stage collecting written entries, metadata applied inline if `None`.
+    metadata: Optional[MetadataStage]
+    #: Directory of identical files to hard-link, e.g. the destination of staged restores.
+    link_dest: Optional[Path]
+
+    def __init__(
+        self,
+        chunked_copier: Optional[ChunkedCopier] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        metadata: Optional[MetadataStage] = None
+    ):
+        '''
+        Initialize base transfer engine object.
+
+        Parameters:
+            chunked_copier (Optional[ChunkedCopier]): Chunked copier for large files.
+            retry_policy (Optional[RetryPolicy]): Retry policy, defaults to no retries.
+            metadata (Optional[MetadataStage]): Metadata stage, applied inline if `None`.
+        '''
+
+        self.logger = utils.get_default_logger()
+        self.chunked_copier = chunked_copier
+        self.retry_policy = retry_policy or RetryPolicy(retries=0)
+        self.metadata = metadata
+        self.link_dest = None
+
+    @abstractmethod
+    def transfer(
+        self,
+        sources: Sequence[Path],
+        entries: Iterable[MergedEntry],
+        destination: Path
+    ) -> List[FileTransferReportConfiguration]:
+        '''
+        Transfer merged entries into a destination directory.
+
+        Parameters:
+            sources (Sequence[Path]): Backup version directories, newest first.
+            entries (Iterable[MergedEntry]): Merged entries, parents before children.
+            destination (Path): Destination directory.
+        Returns:
+            List[FileTransferReportConfiguration]: Reports of the files copied in chunks.
+        Raises:
+            Exception: Expected transfer failed.
+        '''
+
+    def is_chunked(self, entry: MergedEntry) -> bool:
+        '''
+        Check whether an entry is a regular file to copy in chunks.
+
+        Parameters:
+            entry (MergedEntry): Merged entry.
+        Returns:
+            bool: `True` if the entry is copied in chunks, `False` otherwise.
+        '''
+
+        return (
+            self.chunked_copier is not None and
+            stat.S_ISREG(entry.stat.st_mode) and
+            self.chunked_copier.accepts(entry.stat.st_size)
+        )
+
+    def transfer_entry(
+        self,
+        entry: MergedEntry,
+        target: Path,
+        may_exist: bool = True
+    ) -> Optional[FileTransferReportConfiguration]:
+        '''
+        Transfer a single non-directory entry, replacing the target atomically.
+
+        Parameters:
+            entry (MergedEntry): Merged entry.
+            target (Path): Destination path.
+            may_exist (bool): Whether to check for an up-to-date target first.
+        Returns:
+            Optional[FileTransferReportConfiguration]: A report if the file was copied in chunks.
+        '''
+
+        try:
+            target_stat: Optional[os.stat_result] = \
+                os.lstat(target) if may_exist else None
+        except FileNotFoundError:
+            target_stat = None
+
+        if (
+            target_stat is not None and
+            stat.S_IFMT(target_stat.st_mode) == stat.S_IFMT(entry.stat.st_mode) and
+            target_stat.st_size == entry.stat.st_size and
+            target_stat.st_mtime_ns == entry.stat.st_mtime_ns
+        ):
+            self._refresh_metadata(entry, target, target_stat)
+
+            return None
+
+        if target_stat is None and self._link_identical(entry, target):
+            return None
+
+        temporary = target.with_name(f'.{target.name}.nfsops-{os.getpid()}')
+
+        report = None
+
+        try:
+            os.unlink(temporary)
+        except FileNotFoundError:
+            pass
+
+        try:
+            if stat.S_ISLNK(entry.stat.st_mode):
+                os.symlink(os.readlink(entry.source), temporary)
+            elif stat.S_ISREG(entry.stat.st_mode):
+                report = self._copy_file(entry, temporary)
+            else:
+                self.logger.info(f'skipping special file "{entry.source}".')
+                return None
+
+            if self.metadata is None:
+                apply_metadata(temporary, entry.stat)
+
+            os.replace(temporary, target)
+        except BaseException:
+            try:
+                os.unlink(temporary)
+            except FileNotFoundError:
+                pass
+
+            raise
+
+        if self.metadata is not None:
+            self.metadata.add(entry)
+
+        return report
+
+    def _refresh_metadata(
+        self,
+        entry: MergedEntry,
+        target: Path,
+        target_stat: os.stat_result
+    ) -> None:
+        '''
+        Reapply the metadata of an entry to a target whose data is up to date,
+        since its permissions or ownership may have changed since.
+
+        Parameters:
+            entry (MergedEntry): Merged entry.
+            target (Path): Destination path.
+            target_stat (os.stat_result): Destination `stat` result.
+        '''
+
+        if self.metadata is not None:
+            self.metadata.add(entry)
+        elif target_stat.st_mode != entry.stat.st_mode or (
+            os.geteuid() == 0 and
+            (target_stat.st_uid, target_stat.st_gid) !=
+            (entry.stat.st_uid, entry.stat.st_gid)
+        ):
+            apply_metadata(target, entry.stat)
+
+    def _link_identical(self, entry: MergedEntry, target: Path) -> bool:
+        '''
+        Hard-link a regular file of the link directory identical to an entry,
+        whose metadata would then be left unchanged.
+
+        Parameters:
+            entry (MergedEntry): Merged entry.
+            target (Path): Missing destination path.
+        Returns:
+            bool: `True` if the file was linked, `False` if it must be copied.
+        '''
+
+        if self.link_dest is None or not stat.S_ISREG(entry.stat.st_mode) or (
+            self.metadata is not None and self.metadata.xattrs
+        ):
+            return False
+
+        existing = self.link_dest / entry.path
+
+        try:
+            existing_stat = os.lstat(existing)
+        except (FileNotFoundError, NotADirectoryError):
+            return False
+
+        ownership = OwnershipMap() if self.metadata is None \
+            else self.metadata.ownership
+        uid, gid = ownership.get_owner(entry.stat) \
+            if os.geteuid() == 0 else (-1, -1)
+
+        if not (
+            existing_stat.st_mode == entry.stat.st_mode and
+            existing_stat.st_size == entry.stat.st_size and
+            existing_stat.st_mtime_ns == entry.stat.st_mtime_ns and
+            uid in (-1, existing_stat.st_uid) and
+            gid in (-1, existing_stat.st_gid)
+        ):
+            return False
+
+        os.link(existing, target, follow_symlinks=False)
+
+        return True
+
+    def _copy_file(
+        self,
+        entry: MergedEntry,
+        temporary: Path
+    ) -> Optional[FileTransferReportConfiguration]:
+        '''
+        Copy a regular file into a temporary path.
+
+        Parameters:
+            entry (MergedEntry): Merged entry.
+            temporary (Path): Temporary destination path.
+        Returns:
+            Optional[FileTransferReportConfiguration]: A report if the file was copied in chunks.
+        '''
+
+        source_fd = os.open(entry.source, os.O_RDONLY)
+
+        try:
+            destination_fd = os.open(
+                temporary,
+                os.O_WRONLY | os.O_CREAT | os.O_EXCL,
+                0o600
+            )
+
+            try:
+                if self.chunked_copier is None or not self.is_chunked(entry):
+                    copy_file_data(
+                        source_fd,
+                        destination_fd,
+                        entry.stat.st_size
+                    )
+
+                    return None
+
+                start = time.perf_counter()
+                result = self.chunked_copier.copy(
+                    source_fd,
+                    destination_fd,
+                    entry.stat.st_size
+                )
+
+                return FileTransferReportConfiguration(
+                    path=entry.path,
+                    bytes=entry.stat.st_size,
+                    data_bytes=result.data_bytes,
+                    chunks=result.chunks,
+                    seconds=time.perf_counter() - start
+                )
+            finally:
+                os.close(destination_fd)
+        finally:
+            os.close(source_fd)
+
+
+class RsyncTransferEngine(TransferEngine):
+    '''
+    Transfer engine running one `rsync` process per backup version.
+
+    Ownership and extended attributes follow the metadata stage options, as
+    `rsync` applies the metadata of the files it copies. Files accepted by
+    the chunked copier are left out of the `rsync` file lists and copied in
+    chunks afterwards, restoring the metadata of their parent directories.
+    Remote backup versions are read over the master connection of their
+    transport.
+    '''
+
+    name = 'rsync'
+
+    #: Path to the `rsync` executable.
+    executable: Path
+    #: Transport of remote backup versions, `None` for local ones.
+    transport: Optional[SshTransport]
+
+    def __init__(
+        self,
+        chunked_copier: Optional[ChunkedCopier] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        metadata: Optional[MetadataStage] = None,
+        transport: Optional[SshTransport] = None
+    ):
+        '''
+        Initialize rsync transfer engine object.
+
+        Parameters:
+            chunked_copier (Optional[ChunkedCopier]): Chunked copier for large files.
+            retry_policy (Optional[RetryPolicy]): Retry policy, defaults to no retries.
+            metadata (Optional[MetadataStage]): Metadata stage, applied inline if `None`.
+            transport (Optional[SshTransport]): Transport of remote backup versions.
+        Raises:
+            KeyError: Expected `rsync` executable not found.
+        '''
+
+        super().__init__(chunked_copier, retry_policy, metadata)
+        self.executable = utils.find_executable('rsync')
+        self.transport = transport
+
+    def transfer(
+        self,
+        sources: Sequence[Path],
+        entries: Iterable[MergedEntry],
+        destination: Path
+    ) -> List[FileTransferReportConfiguration]:
+        directories: Dict[str, MergedEntry] = {}
+        chunked: List[MergedEntry] = []
+        arguments = [] if self.metadata is None else [
+            *self.metadata.ownership.get_rsync_arguments(),
+            *(['--xattrs'] if self.metadata.xattrs else [])
+        ]
+
+        if self.transport is not None:
+            self.transport.connect()
+            arguments.append(f'--rsh={self.transport.get_rsync_shell()}')
+
+        if self.link_dest is not None:
+            arguments.append(f'--link-dest={self.link_dest.resolve()}')
+
+        with tempfile.TemporaryDirectory(prefix='nfsops-') as directory:
+            file_lists: Dict[int, IO[bytes]] = {}
+
+            try:
+                for entry in entries:
+                    if entry.is_dir:
+                        directories[entry.path] = entry
+                    elif self.is_chunked(entry):
+                        chunked.append(entry)
+                        continue
+
+                    if entry.version not in file_lists:
+                        file_lists[entry.version] = open(  # pylint: disable=R1732
+                            os.path.join(directory, str(entry.version)),
+                            'wb'
+                        )
+
+                    file_lists[entry.version].write(
+                        os.fsencode(entry.path) + b'\0'
+                    )
+            finally:
+                for file in file_lists.values():
+                    file.close()
+
+            for version in sorted(file_lists, reverse=True):
+                self.logger.info(
+                    f'restoring files owned by "{sources[version]}".'
+                )
+
+                self.retry_policy.call(
+                    partial(
+                        run_with_watchdog,
+                        [
+                            str(self.executable),
+                            '--archive',
+                            *arguments,
+                            '--from0',
+                            f'--files-from={file_lists[version].name}',
+                            f'{self.get_location(sources[version])}/',
+                            f'{destination}/'
+                        ],
+                        self.retry_policy.timeout
+                    )
+                )
+
+        reports = [
+            report for report in (
+                self.retry_policy.call(
+                    partial(
+                        self.transfer_entry,
+                        entry,
+                        destination / entry.path
+                    )
+                )
+                for entry in chunked
+            )
+            if report is not None
+        ]
+
+        for path in sorted(
+            {posixpath.dirname(entry.path) for entry in chunked},
+            reverse=True
+        ):
+            if path in directories and self.metadata is not None:
+                self.metadata.add(directories[path])
+            elif path in directories:
+                self.retry_policy.call(
+                    partial(
+                        apply_metadata,
+                        destination / path,
+                        directories[path].stat
+                    )
+                )
+
+        return reports
+
+    def get_location(self, source: Path) -> str:
+        '''
+        Return the `rsync` location of a backup version directory.
+
+        Parameters:
+            source (Path): Backup version directory.
+        Returns:
+            str: A local path or a `host:path` location.
+        '''
+
+        if self.transport is None:
+            return str(source)
+
+        return self.transport.get_location(source)
+
+
+class NativeTransferEngine(TransferEngine):
+    '''
+    Transfer engine copying files with Python, without external executables.
+
+    Directories are created in walk order, file copies are dispatched by an
+    I/O scheduler in per-directory batches using in-kernel copies, and
+    directory metadata is applied once all their children are in place.
+    '''
+
+    name = 'native'
+
+    #: I/O scheduler dispatching file copies.
+    scheduler: IOScheduler
+
+    def __init__(
+        self,
+        chunked_copier: Optional[ChunkedCopier] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        metadata: Optional[MetadataStage] = None,
+        scheduler: Optional[IOScheduler] = None
+    ):
+        '''
+        Initialize native transfer engine object.
+
+        Parameters:
+            chunked_copier (Optional[ChunkedCopier]): Chunked copier for large files.
+            retry_policy (Optional[RetryPolicy]): Retry policy, defaults to no retries.
+            metadata (Optional[MetadataStage]): Metadata stage, applied inline if `None`.
+            scheduler (Optional[IOScheduler]): I/O scheduler, defaults to a new one.
+        '''
+
+        super().__init__(chunked_copier, retry_policy, metadata)
+        self.scheduler = scheduler or IOScheduler()
+
+    def transfer(
+        self,
+        sources: Sequence[Path],
+        entries: Iterable[MergedEntry],
+        destination: Path
+    ) -> List[FileTransferReportConfiguration]:
+        directories: List[MergedEntry] = []
+        created: Set[str] = set()
+        reports: List[FileTransferReportConfiguration] = []
+
+        def create_directory(entry: MergedEntry) -> None:
+            try:
+                (destination / entry.path).mkdir(parents=True)
+                created.add(entry.path)
+            except FileExistsError:
+                pass
+
+        def process_directory(entry: MergedEntry) -> None:
+            self.retry_policy.call(partial(create_directory, entry))
+            directories.append(entry)
+
+        def process_file(entry: MergedEntry) -> None:
+            report = self.retry_policy.call(
+                partial(
+                    self.transfer_entry,
+                    entry,
+                    destination / entry.path,
+                    posixpath.dirname(entry.path) not in created
+                )
+            )
+
+            if report is not None:
+                reports.append(report)
+
+        self.scheduler.run(entries, process_directory, process_file)
+
+        for entry in reversed(directories):
+            if self.metadata is not None:
+                self.metadata.add(entry)
+                continue
+
+            self.retry_policy.call(
+                partial(apply_metadata, destination / entry.path, entry.stat)
+            )
+
+        return sorted(reports, key=lambda report: report.path)
+
+
+#: Transfer engines by name.
+TRANSFER_ENGINES = {
+    RsyncTransferEngine.name: RsyncTransferEngine,
+    NativeTransferEngine.name: NativeTransferEngine
+}
+
+
+def get_transfer_engine(  # pylint: disable=R0913,R0917
+    name: str = 'auto',
+    chunked_copier: Optional[ChunkedCopier] = None,
+    retry_policy: Optional[RetryPolicy] = None,
+    metadata: Optional[MetadataStage] = None,
+    transport: Optional[SshTransport] = None,
+    scheduler: Optional[IOScheduler] = None
+) -> TransferEngine:
+    '''
+    Return a transfer engine by name.
+
+    The `auto` engine uses `rsync` if available and the native engine otherwise.
+    Remote backup versions are only read by the `rsync` engine.
+
+    Parameters:
+        name (str): Engine name (`auto`, `rsync` or `native`).
+        chunked_copier (Optional[ChunkedCopier]): Chunked copier for large files.
+        retry_policy (Optional[RetryPolicy]): Retry policy, defaults to no retries.
+        metadata (Optional[MetadataStage]): Metadata stage, applied inline if `None`.
+        transport (Optional[SshTransport]): Transport of remote backup versions.
+        scheduler (Optional[IOScheduler]): I/O scheduler of the native engine.
+    Returns:
+        TransferEngine: A transfer engine instance.
+    Raises:
+        KeyError: Expected engine (or its executable) not available.
+    '''
+
+    if transport is not None:
+        if name not in ('auto', RsyncTransferEngine.name):
+            raise KeyError(
+                'remote volumes are only restored by the "rsync" transfer engine.'
+            )
+
+        return RsyncTransferEngine(
+            chunked_copier,
+            retry_policy,
+            metadata,
+            transport
+        )
+
+    if name == NativeTransferEngine.name:
+        return NativeTransferEngine(
+            chunked_copier,
+            retry_policy,
+            metadata,
+            scheduler
+        )
+
+    if name != 'auto':
+        try:
+            engine_type = TRANSFER_ENGINES[name]
+        except KeyError as exception:
+            engine_options = ', '.join(
+                [f'"{key}"' for key in ['auto', *TRANSFER_ENGINES]]
+            )
+
+            raise KeyError(
+                f'invalid transfer engine, use {engine_options} instead.'
+            ) from exception
+
+        return engine_type(chunked_copier, retry_policy, metadata)
+
+    try:
+        return RsyncTransferEngine(chunked_copier, retry_policy, metadata)
+    except KeyError:
+        utils.get_default_logger().info(
+            'rsync executable not found, using native transfer engine.'
+        )
+
+        return NativeTransferEngine(
+            chunked_copier,
+            retry_policy,
+            metadata,
+            scheduler
+        )
+
+
+def get_restore_engine(
+    options: RestoreConfiguration,
+    transport: Optional[SshTransport] = None,
+    tuner: Optional[ConcurrencyTuner] = None
+) -> TransferEngine:
+    '''
+    Return the transfer engine of a restore, with its own retry policy and a
+    metadata stage applying the ownership options.
+
+    Files of remote backup versions are never copied in chunks, as the
+    chunked copier reads local files. The file copies of the native engine
+    run on `options.workers` threads, or as many as the tuner allows.
+
+    Parameters:
+        options (RestoreConfiguration): Restore configuration.
+        transport (Optional[SshTransport]): Transport of remote backup versions.
+        tuner (Optional[ConcurrencyTuner]): Concurrency tuner of file copies.
+    Returns:
+        TransferEngine: A transfer engine instance.
+    Raises:
+        KeyError: Expected engine (or its executable) not available.
+    '''
+
+    retry_policy = RetryPolicy(
+        retries=options.retries,
+        initial_delay=options.retry_delay,
+        timeout=options.timeout,
+        failure_threshold=options.failure_threshold
+    )
+
+    return get_transfer_engine(
+        options.engine,
+        ChunkedCopier(options.chunk_threshold, options.chunk_size)
+        if options.chunk_threshold and transport is None else None,
+        retry_policy,
+        MetadataStage(
+            OwnershipMap(
+                options.preserve_ownership,
+                options.uid_map,
+                options.gid_map
+            ),
+            options.xattrs,
+            options.workers,
+            retry_policy
+        ),
+        transport,
+        IOScheduler(options.workers, tuner=tuner)
+    )
+
+
+__all__ = [
+    'TransferEngine',
+    'RsyncTransferEngine',
+    'NativeTransferEngine',
+    'TRANSFER_ENGINES',
+    'copy_file_data',
+    'apply_metadata',
+    'get_transfer_engine',
+    'get_restore_engine'
+]
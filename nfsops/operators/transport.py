@@ -0,0 +1,579 @@
+'''
+Remote transport objects.
+'''
+
+import errno
+import hashlib
+import os
+import shlex
+import stat
+import subprocess
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, cast
+
+from .. import utils
+from .stat_cache import PathLike, StatCache
+
+#: Seconds an idle master connection stays open, shared by later processes.
+CONTROL_PERSIST = 600
+#: Maximum number of concurrent sessions on a master connection (`MaxSessions`).
+MAX_SESSIONS = 8
+#: `ssh` exit status of connection errors.
+SSH_ERROR_STATUS = 255
+#: Error numbers recognized in remote error messages, in order.
+REMOTE_ERRNOS = (
+    errno.ENOENT,
+    errno.ENOTDIR,
+    errno.EACCES,
+    errno.ELOOP,
+    errno.ESTALE,
+    errno.EIO
+)
+#: `find -printf` format of a `stat` record, the name coming last.
+FIND_FORMAT = '%y %m %i %D %n %U %G %s %A@ %T@ %C@ %f\\0'
+#: File type bits by `find` type letter.
+FILE_TYPES = {
+    'f': stat.S_IFREG,
+    'd': stat.S_IFDIR,
+    'l': stat.S_IFLNK,
+    'b': stat.S_IFBLK,
+    'c': stat.S_IFCHR,
+    'p': stat.S_IFIFO,
+    's': stat.S_IFSOCK
+}
+
+_transports: Dict[str, 'SshTransport'] = {}
+_transports_lock = threading.Lock()
+
+
+def parse_timestamp(value: str) -> int:
+    '''
+    Parse a `find` timestamp with fractional seconds into nanoseconds.
+
+    Parameters:
+        value (str): Timestamp, e.g. `1700000000.1234567890`.
+    Returns:
+        int: Timestamp in nanoseconds.
+    '''
+
+    seconds, _, fraction = value.partition('.')
+
+    return int(seconds) * 10**9 + int(fraction[:9].ljust(9, '0'))
+
+
+def parse_find_record(record: bytes) -> Tuple[str, os.stat_result]:
+    '''
+    Parse a `find` record printed with `FIND_FORMAT`.
+
+    Parameters:
+        record (bytes): Record, without its terminating null byte.
+    Returns:
+        Tuple[str, os.stat_result]: File name and `stat` result.
+    '''
+
+    fields = record.split(b' ', 11)
+    file_type, mode, *numbers = [field.decode() for field in fields[:8]]
+    times = [parse_timestamp(field.decode()) for field in fields[8:11]]
+
+    return os.fsdecode(fields[11]), os.stat_result((
+        FILE_TYPES.get(file_type, 0) | int(mode, 8),
+        *[int(number) for number in numbers],
+        *[time // 10**9 for time in times],
+        *[time / 10**9 for time in times],
+        *times
+    ))
+
+
+def get_remote_error(message: bytes, path: str) -> OSError:
+    '''
+    Return the error of a failed remote command from its error output.
+
+    Parameters:
+        message (bytes): Error output.
+        path (str): Path the command was run on.
+    Returns:
+        OSError: An error, `OSError` subclasses matching the error number.
+    '''
+
+    text = message.decode(errors='replace').strip()
+
+    for code in REMOTE_ERRNOS:
+        if os.strerror(code) in text:
+            return OSError(code, os.strerror(code), path)
+
+    return OSError(errno.EIO, text or os.strerror(errno.EIO), path)
+
+
+def get_control_directory() -> Path:
+    '''
+    Return the private directory of control sockets, creating it if needed.
+
+    Control sockets live in the user runtime directory (`XDG_RUNTIME_DIR`),
+    or in `~/.ssh` without one, rather than in the shared temporary directory
+    where another user could create them first.
+
+    Returns:
+        Path: A path object referencing the directory.
+    Raises:
+        PermissionError: Expected directory owned by the user and private to them.
+    '''
+
+    runtime = os.getenv('XDG_RUNTIME_DIR')
+    directory = (Path(runtime) if runtime else Path.home() / '.ssh') / 'nfsops'
+    directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+
+    status = os.lstat(directory)
+
+    if (
+        not stat.S_ISDIR(status.st_mode) or
+        status.st_uid != os.getuid() or
+        status.st_mode & 0o077
+    ):
+        raise PermissionError(
+            errno.EPERM,
+            'control directory must be a directory private to the user',
+            str(directory)
+        )
+
+    return directory
+
+
+class RemoteDirEntry:
+    '''
+    Remote directory entry object.
+
+    Mirror the `os.DirEntry` interface for the entries of remote listings,
+    with the `stat` result returned by the listing.
+    '''
+
+    #: Entry name.
+    name: str
+    #: Entry path, the listed directory path joined with the name.
+    path: str
+
+    def __init__(
+        self,
+        path: str,
+        name: str,
+        stat_result: os.stat_result,
+        stat_cache: StatCache
+    ):
+        '''
+        Initialize remote directory entry object.
+
+        Parameters:
+            path (str): Entry path.
+            name (str): Entry name.
+            stat_result (os.stat_result): `stat` result, not following symbolic links.
+            stat_cache (StatCache): Stat cache following symbolic links.
+        '''
+
+        self.path = path
+        self.name = name
+        self._stat = stat_result
+        self._stat_cache = stat_cache
+
+    def __fspath__(self) -> str:
+        return self.path
+
+    def __repr__(self) -> str:
+        return f'<RemoteDirEntry {self.name!r}>'
+
+    def inode(self) -> int:
+        '''
+        Return the inode number of the entry.
+
+        Returns:
+            int: An inode number.
+        '''
+
+        return self._stat.st_ino
+
+    def stat(self, follow_symlinks: bool = True) -> os.stat_result:
+        '''
+        Return the `stat` result of the entry.
+
+        Parameters:
+            follow_symlinks (bool): Whether to follow symbolic links.
+        Returns:
+            os.stat_result: A `stat` result.
+        Raises:
+            OSError: Expected symbolic link target found.
+        '''
+
+        if follow_symlinks and self.is_symlink():
+            return self._stat_cache.stat(self.path)
+
+        return self._stat
+
+    def is_dir(self, follow_symlinks: bool = True) -> bool:
+        '''
+        Check whether the entry is a directory.
+
+        Parameters:
+            follow_symlinks (bool): Whether to follow symbolic links.
+        Returns:
+            bool: Whether the entry is a directory.
+        '''
+
+        try:
+            return stat.S_ISDIR(self.stat(follow_symlinks).st_mode)
+        except FileNotFoundError:
+            return False
+
+    def is_file(self, follow_symlinks: bool = True) -> bool:
+        '''
+        Check whether the entry is a regular file.
+
+        Parameters:
+            follow_symlinks (bool): Whether to follow symbolic links.
+        Returns:
+            bool: Whether the entry is a regular file.
+        '''
+
+        try:
+            return stat.S_ISREG(self.stat(follow_symlinks).st_mode)
+        except FileNotFoundError:
+            return False
+
+    def is_symlink(self) -> bool:
+        '''
+        Check whether the entry is a symbolic link.
+
+        Returns:
+            bool: Whether the entry is a symbolic link.
+        '''
+
+        return stat.S_ISLNK(self._stat.st_mode)
+
+
+class RemoteStatCache(StatCache):
+    '''
+    Remote stat cache object.
+
+    Stat cache of a remote volume, answering misses with `find` commands run
+    through the transport: listing a directory returns the `stat` results of
+    its entries in the same round trip. Entries expire after the default
+    timeout, as remote mount options are unknown.
+    '''
+
+    #: Transport of the remote host.
+    transport: 'SshTransport'
+
+    def __init__(
+        self,
+        transport: 'SshTransport',
+        maxsize: int = 65536,
+        default_timeout: float = 1.0
+    ):
+        '''
+        Initialize remote stat cache object.
+
+        Parameters:
+            transport (SshTransport): Transport of the remote host.
+            maxsize (int): Maximum number of cached entries.
+            default_timeout (float): Timeout in seconds of cached entries.
+        '''
+
+        super().__init__(maxsize, default_timeout)
+        self.transport = transport
+
+    def _fetch_stat(self, path: str, follow_symlinks: bool) -> os.stat_result:
+        mode = '-L' if follow_symlinks else '-P'
+        _, stat_result = self._find(path, mode, 0)[0]
+
+        if follow_symlinks and stat.S_ISLNK(stat_result.st_mode):
+            raise FileNotFoundError(
+                errno.ENOENT,
+                os.strerror(errno.ENOENT),
+                path
+            )
+
+        return stat_result
+
+    def _fetch_entries(self, path: PathLike) -> List['os.DirEntry[str]']:
+        path = os.fspath(path)
+        (_, stat_result), *records = self._find(path, '-H', 1)
+
+        if not stat.S_ISDIR(stat_result.st_mode):
+            raise NotADirectoryError(
+                errno.ENOTDIR,
+                os.strerror(errno.ENOTDIR),
+                path
+            )
+
+        return cast(List['os.DirEntry[str]'], [
+            RemoteDirEntry(os.path.join(path, name), name, record, self)
+            for name, record in records
+        ])
+
+    def _get_timeouts(self, device: int) -> Tuple[float, float]:
+        return self.default_timeout, self.default_timeout
+
+    def _find(
+        self,
+        path: str,
+        mode: str,
+        depth: int
+    ) -> List[Tuple[str, os.stat_result]]:
+        '''
+        Return the `stat` records of a path and its entries, up to a depth.
+
+        Parameters:
+            path (str): Remote path.
+            mode (str): `find` symbolic link option (`-P`, `-H` or `-L`).
+            depth (int): Maximum depth, `0` for the path only.
+        Returns:
+            List[Tuple[str, os.stat_result]]: Names and `stat` results, the path first.
+        Raises:
+            OSError: Expected remote command succeeded.
+        '''
+
+        process = self.transport.run(
+            [
+                'find', mode, path,
+                '-maxdepth', str(depth),
+                '-printf', FIND_FORMAT
+            ],
+            check=False
+        )
+
+        if process.returncode != 0 or not process.stdout:
+            raise get_remote_error(process.stderr, path)
+
+        return [
+            parse_find_record(record)
+            for record in process.stdout.split(b'\0')[:-1]
+        ]
+
+
+class SshTransport:  # pylint: disable=R0902
+    '''
+    SSH transport object.
+
+    Run commands on a remote host through one multiplexed `ssh` connection
+    (`ControlMaster`), opened on first use and shared by every metadata query
+    and `rsync` transfer, so that each call opens a session on the existing
+    connection instead of a new connection and key exchange. The connection
+    outlives the process for `CONTROL_PERSIST` seconds, to be reused by the
+    next one.
+    '''
+
+    #: Remote host, in `ssh` syntax (`[user@]host`).
+    host: str
+    #: Path to the `ssh` executable.
+    executable: Path
+    #: Control socket path of the master connection.
+    control_path: Path
+    #: Maximum running time of remote commands in seconds, `None` waits forever.
+    timeout: Optional[float]
+    #: Stat cache of the remote host.
+    stat_cache: RemoteStatCache
+
+    def __init__(self, host: str, timeout: Optional[float] = None):
+        '''
+        Initialize SSH transport object.
+
+        Parameters:
+            host (str): Remote host, in `ssh` syntax (`[user@]host`).
+            timeout (Optional[float]): Maximum running time of remote commands in seconds.
+        Raises:
+            KeyError: Expected `ssh` executable found.
+            PermissionError: Expected private control socket directory.
+        '''
+
+        digest = hashlib.sha1(f'{os.getuid()}\0{host}'.encode()).hexdigest()
+
+        self.host = host
+        self.executable = utils.find_executable('ssh')
+        self.control_path = get_control_directory() / f'ssh-{digest[:16]}'
+        self.timeout = timeout
+        self.stat_cache = RemoteStatCache(self)
+
+        self._lock = threading.Lock()
+        self._sessions = threading.BoundedSemaphore(MAX_SESSIONS)
+        self._connected = False
+
+    def get_command(self) -> List[str]:
+        '''
+        Return the `ssh` command line using the master connection.
+
+        Returns:
+            List[str]: Command line, without host and remote command.
+        '''
+
+        return [
+            str(self.executable),
+            '-o', f'ControlPath={self.control_path}',
+            '-o', 'ControlMaster=no',
+            '-o', 'BatchMode=yes'
+        ]
+
+    def get_rsync_shell(self) -> str:
+        '''
+        Return the `rsync --rsh` value running `rsync` over the master connection.
+
+        Returns:
+            str: A remote shell command.
+        '''
+
+        return shlex.join(self.get_command())
+
+    def get_location(self, path: PathLike) -> str:
+        '''
+        Return the `rsync` location of a remote path.
+
+        Parameters:
+            path (PathLike): Remote path.
+        Returns:
+            str: A `host:path` location.
+        '''
+
+        return f'{self.host}:{os.fspath(path)}'
+
+    def connect(self) -> None:
+        '''
+        Open the master connection, unless this or another process did.
+
+        Raises:
+            ConnectionError: Expected connection opened.
+        '''
+
+        with self._lock:
+            if self._connected:
+                return
+
+            control = [*self.get_command(), '-O', 'check', '--', self.host]
+
+            if subprocess.run(
+                control,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                check=False
+            ).returncode != 0:
+                utils.get_default_logger().info(
+                    f'opening ssh connection to "{self.host}".'
+                )
+
+                # The master keeps running in the background, so its output
+                # goes to a file: pipes would stay open until it exits.
+                with tempfile.TemporaryFile() as errors:
+                    if subprocess.run(
+                        [
+                            str(self.executable),
+                            '-o', f'ControlPath={self.control_path}',
+                            '-o', 'ControlMaster=yes',
+                            '-o', f'ControlPersist={CONTROL_PERSIST}',
+                            '-o', 'BatchMode=yes',
+                            '-f', '-N',
+                            '--', self.host
+                        ],
+                        stdin=subprocess.DEVNULL,
+                        stdout=subprocess.DEVNULL,
+                        stderr=errors,
+                        timeout=self.timeout,
+                        check=False
+                    ).returncode != 0:
+                        errors.seek(0)
+
+                        raise ConnectionError(
+                            f'cannot connect to "{self.host}": '
+                            f'{errors.read().decode(errors="replace").strip()}'
+                        )
+
+            self._connected = True
+
+    def run(
+        self,
+        arguments: Sequence[str],
+        check: bool = True
+    ) -> 'subprocess.CompletedProcess[bytes]':
+        '''
+        Run a command on the remote host through the master connection.
+
+        At most `MAX_SESSIONS` commands run at once, the limit of sessions
+        per connection of `sshd`.
+
+        Parameters:
+            arguments (Sequence[str]): Remote command line, quoted for the remote shell.
+            check (bool): Whether to raise an error if the command fails.
+        Returns:
+            subprocess.CompletedProcess[bytes]: Completed process, with output and error output.
+        Raises:
+            OSError: Expected connection available (`EIO`) and command succeeded.
+            subprocess.TimeoutExpired: Expected command finished before the timeout.
+        '''
+
+        self.connect()
+
+        with self._sessions:
+            process = subprocess.run(
+                [*self.get_command(), '--', self.host, shlex.join(arguments)],
+                stdin=subprocess.DEVNULL,
+                capture_output=True,
+                timeout=self.timeout,
+                check=False
+            )
+
+        if process.returncode == SSH_ERROR_STATUS:
+            raise OSError(
+                errno.EIO,
+                f'connection to "{self.host}" failed: '
+                f'{process.stderr.decode(errors="replace").strip()}'
+            )
+
+        if check and process.returncode != 0:
+            raise get_remote_error(process.stderr, arguments[-1])
+
+        return process
+
+    def close(self) -> None:
+        '''
+        Close the master connection.
+        '''
+
+        with self._lock:
+            subprocess.run(
+                [*self.get_command(), '-O', 'exit', '--', self.host],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                check=False
+            )
+            self._connected = False
+
+
+def get_transport(host: str) -> SshTransport:
+    '''
+    Return the transport of a remote host, shared by operators using it.
+
+    Parameters:
+        host (str): Remote host, in `ssh` syntax (`[user@]host`).
+    Returns:
+        SshTransport: A shared transport instance.
+    Raises:
+        KeyError: Expected `ssh` executable found.
+    '''
+
+    with _transports_lock:
+        transport = _transports.get(host)
+
+        if transport is None:
+            transport = SshTransport(host)
+            _transports[host] = transport
+
+        return transport
+
+
+__all__ = [
+    'CONTROL_PERSIST',
+    'MAX_SESSIONS',
+    'RemoteDirEntry',
+    'RemoteStatCache',
+    'SshTransport',
+    'get_control_directory',
+    'get_transport'
+]
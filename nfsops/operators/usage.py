@@ -0,0 +1,299 @@
+'''
+Usage operator object.
+'''
+
+import errno
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, cast
+
+from .. import utils
+from ..configurations.backup import BackupConfiguration
+from ..configurations.context import ContextConfiguration
+from ..configurations.usage import UsageConfiguration
+from ..configurations.usage_report import UsageReportConfiguration
+from ..context_type import ContextType
+from .backup import SUBPATH_VERSION_PATTERN, BackupOperator
+from .disk_usage import DiskUsage, measure_disk_usage
+from .operator import Operator
+
+#: Usage cache file name, inside the metadata directory.
+USAGE_CACHE_NAME = 'usage.json'
+
+
+class UsageOperator(Operator):
+    '''
+    Usage operator object.
+
+    Measure the disk usage of workspaces and their backup versions, counting
+    hard links once per measured tree. Backup versions are treated as
+    immutable: their totals are cached in the metadata directory and only
+    measured again when their root directory changes, so repeated reports
+    only walk new versions and live workspaces.
+    '''
+
+    #: Usage cache file path or `None` to keep the cache in memory only.
+    cache_path: Optional[Path]
+
+    def __init__(self, context: ContextConfiguration):
+        '''
+        Initialize usage operator object.
+
+        Parameters:
+            context (ContextConfiguration): Context configuration.
+        Raises:
+            ValueError: Expected local volume.
+        '''
+
+        super().__init__(context)
+        self.check_local('usage reports')
+        self.cache_path = self.metadata_path / USAGE_CACHE_NAME
+
+    def list_workspaces(self) -> List[str]:
+        '''
+        List workspace names.
+
+        In the root context, names are extracted from the directories matching
+        the root template expanded with a wildcard name. In the subpath
+        context, the volume itself is the only workspace.
+
+        Returns:
+            List[str]: Sorted workspace names.
+        '''
+
+        path = cast(Path, self.context.path)
+
+        if self.context.context != ContextType.ROOT:
+            return [path.name]
+
+        template = str(self.context.root_template)
+        names = set()
+
+        for match in path.glob(utils.expand_name_template(template, '*')):
+            name = utils.match_name_template(
+                template,
+                match.relative_to(path).as_posix()
+            )
+
+            if name is not None and match.is_dir():
+                names.add(name)
+
+        return sorted(names)
+
+    def usage(self, options: UsageConfiguration) -> List[UsageReportConfiguration]:
+        '''
+        Report the disk usage of workspaces and backup versions.
+
+        Parameters:
+            options (UsageConfiguration): Usage configuration.
+        Returns:
+            List[UsageReportConfiguration]: Usage reports, sorted as configured.
+        Raises:
+            Exception: Expected operation failed.
+        '''
+
+        path = cast(Path, self.context.path)
+        cache = {} if options.refresh else self._load_cache()
+        updated_cache = {}
+        reports = []
+
+        for name in options.names or self.list_workspaces():
+            workspace_reports = []
+
+            if self.context.context != ContextType.ROOT:
+                workspace_reports.append(
+                    self._report(
+                        name,
+                        None,
+                        path,
+                        measure_disk_usage(
+                            path,
+                            exclude={
+                                SUBPATH_VERSION_PATTERN.split('/', 1)[0],
+                                utils.get_metadata_path(path).name
+                            }
+                        )
+                    )
+                )
+
+            operator = BackupOperator(
+                self.context,
+                BackupConfiguration(
+                    name=name if self.context.context == ContextType.ROOT
+                    else None
+                )
+            )
+
+            for backup_version in operator.list_versions():
+                key = self._get_cache_key(backup_version.path)
+                cached = cache.get(str(backup_version.path))
+
+                if cached is not None and cached['key'] == key:
+                    disk_usage = DiskUsage(*cached['usage'])
+                else:
+                    self.logger.info(
+                        f'measuring backup version "{backup_version.path}".'
+                    )
+                    disk_usage = measure_disk_usage(backup_version.path)
+
+                updated_cache[str(backup_version.path)] = {
+                    'key': key,
+                    'usage': list(disk_usage)
+                }
+                workspace_reports.append(
+                    self._report(
+                        name,
+                        backup_version.version,
+                        backup_version.path,
+                        disk_usage
+                    )
+                )
+
+            if options.summarize:
+                workspace_reports = [
+                    self._report(
+                        name,
+                        None,
+                        None,
+                        DiskUsage(
+                            sum(report.files for report in workspace_reports),
+                            sum(
+                                report.apparent_bytes
+                                for report in workspace_reports
+                            ),
+                            sum(
+                                report.allocated_bytes
+                                for report in workspace_reports
+                            )
+                        )
+                    )
+                ]
+
+            reports.extend(workspace_reports)
+
+        if options.names:
+            updated_cache = {**cache, **updated_cache}
+
+        self._save_cache(updated_cache)
+
+        if options.sort == 'name':
+            reports.sort(key=lambda report: report.name)
+        elif options.sort == 'apparent':
+            reports.sort(key=lambda report: -report.apparent_bytes)
+        elif options.sort == 'allocated':
+            reports.sort(key=lambda report: -report.allocated_bytes)
+
+        return reports
+
+    @staticmethod
+    def _report(
+        name: str,
+        version: Optional[int],
+        path: Optional[Path],
+        disk_usage: DiskUsage
+    ) -> UsageReportConfiguration:
+        '''
+        Build a usage report.
+
+        Parameters:
+            name (str): Workspace name.
+            version (Optional[int]): Backup version.
+            path (Optional[Path]): Measured directory path.
+            disk_usage (DiskUsage): Disk usage totals.
+        Returns:
+            UsageReportConfiguration: A usage report.
+        '''
+
+        return UsageReportConfiguration.trusted(
+            name=name,
+            version=version,
+            path=path,
+            files=disk_usage.files,
+            apparent_bytes=disk_usage.apparent_bytes,
+            allocated_bytes=disk_usage.allocated_bytes
+        )
+
+    @staticmethod
+    def _get_cache_key(path: Path) -> List[int]:
+        '''
+        Return the cache key of a backup version from its root directory.
+
+        Parameters:
+            path (Path): Backup version directory.
+        Returns:
+            List[int]: Inode number, modification and change times.
+        '''
+
+        path_stat = os.stat(path)
+
+        return [path_stat.st_ino, path_stat.st_mtime_ns, path_stat.st_ctime_ns]
+
+    def _load_cache(self) -> Dict[str, Dict]:
+        '''
+        Load the usage cache, ignoring missing or malformed files.
+
+        Returns:
+            Dict[str, Dict]: Cached keys and totals by backup version path.
+        '''
+
+        if self.cache_path is None:
+            return {}
+
+        try:
+            with open(self.cache_path, encoding='utf-8') as file:
+                content = json.load(file)
+
+            return {
+                str(path): {
+                    'key': [int(value) for value in entry['key']],
+                    'usage': [int(value) for value in entry['usage']]
+                }
+                for path, entry in content['entries'].items()
+            }
+        except FileNotFoundError:
+            pass
+        except (ValueError, KeyError, TypeError, AttributeError):
+            self.logger.warning(
+                f'ignoring malformed usage cache "{self.cache_path}".'
+            )
+
+        return {}
+
+    def _save_cache(self, entries: Dict[str, Dict]) -> None:
+        '''
+        Write the usage cache atomically, skipping it on failure.
+
+        Parameters:
+            entries (Dict[str, Dict]): Cached keys and totals by backup version path.
+        '''
+
+        if self.cache_path is None:
+            return
+
+        temporary_path = self.cache_path.with_name(
+            f'.{self.cache_path.name}.{os.getpid()}.{threading.get_ident()}'
+        )
+
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+
+            with open(temporary_path, 'w', encoding='utf-8') as file:
+                json.dump({'entries': entries}, file)
+
+            os.replace(temporary_path, self.cache_path)
+        except OSError as exception:
+            if exception.errno not in (errno.EACCES, errno.EPERM, errno.EROFS):
+                raise
+
+            self.logger.info(
+                f'cannot write usage cache "{self.cache_path}", skipping it.'
+            )
+            self.cache_path = None
+
+
+__all__ = [
+    'USAGE_CACHE_NAME',
+    'UsageOperator'
+]
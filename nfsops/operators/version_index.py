@@ -0,0 +1,326 @@
+'''
+Backup version index object.
+'''
+
+import errno
+import fnmatch
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .. import utils
+from .stat_cache import StatCache, get_default_stat_cache
+
+
+class VersionIndex:  # pylint: disable=R0902
+    '''
+    Backup version index object.
+
+    Keep the backup version directories matching a name pattern inside a parent
+    directory in memory and mirror them into a JSON file. While the parent
+    directory modification time is unchanged, listing versions costs a single
+    `stat` call instead of a full directory scan.
+    '''
+
+    #: Parent directory containing backup version directories.
+    parent: Path
+    #: Backup version directory name pattern.
+    pattern: str
+    #: Index file path or `None` to keep the index in memory only.
+    index_path: Optional[Path]
+    #: Whether a watcher keeps the index up-to-date.
+    watched: bool
+    #: Stat cache instance.
+    stat_cache: StatCache
+    #: Logger instance.
+    logger: logging.Logger
+
+    def __init__(
+        self,
+        parent: Path,
+        pattern: str,
+        index_path: Optional[Path] = None,
+        stat_cache: Optional[StatCache] = None
+    ):
+        '''
+        Initialize backup version index object.
+
+        Parameters:
+            parent (Path): Parent directory containing backup version directories.
+            pattern (str): Backup version directory name pattern (`fnmatch` syntax).
+            index_path (Optional[Path]): Index file path or `None` to keep the index in memory only.
+            stat_cache (Optional[StatCache]): Stat cache instance, defaults to the shared one.
+        '''
+
+        self.parent = parent
+        self.pattern = pattern
+        self.index_path = index_path
+        self.watched = False
+        self.stat_cache = stat_cache or get_default_stat_cache()
+        self.logger = utils.get_default_logger()
+
+        self._lock = threading.RLock()
+        self._parent_mtime_ns: Optional[int] = None
+        self._entries: Dict[str, int] = {}
+
+        self._load()
+
+    @classmethod
+    def from_pattern(
+        cls,
+        path: Path,
+        pattern: str,
+        stat_cache: Optional[StatCache] = None,
+        metadata_path: Optional[Path] = None
+    ) -> 'VersionIndex':
+        '''
+        Create backup version index from a volume path and a relative glob pattern.
+
+        Only the last pattern component may contain wildcards, e.g. `.backup/*`
+        or `namespace-{name}-resource*` after template expansion.
+
+        Parameters:
+            path (Path): Volume path.
+            pattern (str): Backup version glob pattern relative to the volume path.
+            stat_cache (Optional[StatCache]): Stat cache instance, defaults to the shared one.
+            metadata_path (Optional[Path]): Metadata directory, defaults to the one of the volume.
+        Returns:
+            VersionIndex: A backup version index persisted in the volume metadata directory.
+        Raises:
+            ValueError: Expected pattern contains wildcards in parent components.
+        '''
+
+        relative_parent, name_pattern = os.path.split(pattern)
+
+        if any(character in relative_parent for character in '*?['):
+            raise ValueError(
+                f'"{pattern}" pattern only supports wildcards in the last component.'
+            )
+
+        parent = path / relative_parent
+        key = f'{parent.resolve()}\0{name_pattern}'.encode()
+        digest = hashlib.sha1(key).hexdigest()[:16]
+        metadata_path = metadata_path or utils.get_metadata_path(path)
+
+        return cls(
+            parent,
+            name_pattern,
+            metadata_path / 'versions' / f'{digest}.json',
+            stat_cache
+        )
+
+    def matches(self, name: str) -> bool:
+        '''
+        Check whether a directory name matches the backup version pattern.
+
+        Parameters:
+            name (str): Directory name.
+        Returns:
+            bool: `True` if the name matches the pattern, `False` otherwise.
+        '''
+
+        return fnmatch.fnmatchcase(name, self.pattern)
+
+    def new_name(self, suffix: str) -> str:
+        '''
+        Return a new backup version directory name matching the pattern.
+
+        Parameters:
+            suffix (str): Unique suffix replacing the `*` wildcard.
+        Returns:
+            str: A directory name.
+        Raises:
+            ValueError: Expected pattern wildcards not supported.
+        '''
+
+        prefix, wildcard, remainder = self.pattern.partition('*')
+
+        if any(character in self.pattern for character in '?[') or (
+            not wildcard
+        ):
+            raise ValueError(
+                f'cannot create version names for "{self.pattern}" pattern, '
+                'only "*" wildcards are supported.'
+            )
+
+        separator = '-' if prefix[-1:].isalnum() else ''
+
+        return f'{prefix}{separator}{suffix}{remainder.replace("*", "")}'
+
+    def entries(self) -> List[Tuple[Path, int]]:
+        '''
+        Return the indexed backup version directories, newest first.
+
+        Returns:
+            List[Tuple[Path, int]]: A list of directory paths and modification times (nanoseconds).
+        '''
+
+        with self._lock:
+            items = sorted(
+                self._entries.items(),
+                key=lambda item: (-item[1], item[0])
+            )
+
+        return [(self.parent / name, mtime_ns) for name, mtime_ns in items]
+
+    def refresh(self, force: bool = False) -> List[Tuple[Path, int]]:
+        '''
+        Bring the index up-to-date and return its entries.
+
+        The parent directory is rescanned only if its modification time changed
+        since the last scan. Watched indexes skip the check entirely.
+
+        Parameters:
+            force (bool): Whether to rescan regardless of the parent modification time.
+        Returns:
+            List[Tuple[Path, int]]: A list of directory paths and modification times (nanoseconds).
+        '''
+
+        with self._lock:
+            if force or not self.watched:
+                if force:
+                    self.stat_cache.invalidate(self.parent)
+
+                try:
+                    parent_mtime_ns = self.stat_cache.stat(
+                        self.parent
+                    ).st_mtime_ns
+                except FileNotFoundError:
+                    parent_mtime_ns = None
+
+                if force or parent_mtime_ns != self._parent_mtime_ns:
+                    self._scan(parent_mtime_ns)
+
+            return self.entries()
+
+    def update(self, name: str) -> None:
+        '''
+        Add or refresh a single backup version directory.
+
+        Parameters:
+            name (str): Directory name inside the parent directory.
+        '''
+
+        if not self.matches(name):
+            return
+
+        path = self.parent / name
+        self.stat_cache.invalidate(path)
+
+        try:
+            stat_result = self.stat_cache.stat(path)
+        except FileNotFoundError:
+            self.remove(name)
+            return
+
+        with self._lock:
+            if stat_result.st_mtime_ns == self._entries.get(name):
+                return
+
+            self._entries[name] = stat_result.st_mtime_ns
+            self._save()
+
+    def remove(self, name: str) -> None:
+        '''
+        Remove a single backup version directory.
+
+        Parameters:
+            name (str): Directory name inside the parent directory.
+        '''
+
+        self.stat_cache.invalidate_tree(self.parent / name)
+
+        with self._lock:
+            if self._entries.pop(name, None) is not None:
+                self._save()
+
+    def _scan(self, parent_mtime_ns: Optional[int]) -> None:
+        '''
+        Rescan the parent directory.
+
+        Parameters:
+            parent_mtime_ns (Optional[int]): Parent modification time observed before the scan.
+        '''
+
+        entries: Dict[str, int] = {}
+
+        if parent_mtime_ns is not None:
+            for entry in self.stat_cache.scandir(self.parent):
+                if self.matches(entry.name) and entry.is_dir():
+                    entries[entry.name] = self.stat_cache.stat(
+                        entry.path
+                    ).st_mtime_ns
+
+        self.logger.debug(
+            f'scanned "{self.parent}" and found {len(entries)} backup versions.'
+        )
+
+        self._entries = entries
+        self._parent_mtime_ns = parent_mtime_ns
+        self._save()
+
+    def _load(self) -> None:
+        '''
+        Load the index file, ignoring missing or malformed files.
+        '''
+
+        if self.index_path is None:
+            return
+
+        try:
+            with open(self.index_path, encoding='utf-8') as file:
+                content = json.load(file)
+
+            self._entries = {
+                str(name): int(mtime_ns) for name, mtime_ns in content['entries'].items()
+            }
+            self._parent_mtime_ns = content['parent_mtime_ns']
+        except FileNotFoundError:
+            pass
+        except (ValueError, KeyError, TypeError, AttributeError):
+            self.logger.warning(
+                f'ignoring malformed version index "{self.index_path}".'
+            )
+
+    def _save(self) -> None:
+        '''
+        Write the index file atomically, keeping the index in memory only on failure.
+        '''
+
+        if self.index_path is None:
+            return
+
+        content = {
+            'parent': str(self.parent),
+            'pattern': self.pattern,
+            'parent_mtime_ns': self._parent_mtime_ns,
+            'entries': self._entries
+        }
+        temporary_path = self.index_path.with_name(
+            f'.{self.index_path.name}.{os.getpid()}.{threading.get_ident()}'
+        )
+
+        try:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+
+            with open(temporary_path, 'w', encoding='utf-8') as file:
+                json.dump(content, file)
+
+            os.replace(temporary_path, self.index_path)
+        except OSError as exception:
+            if exception.errno not in (errno.EACCES, errno.EPERM, errno.EROFS):
+                raise
+
+            self.logger.info(
+                f'cannot write version index "{self.index_path}", keeping it in memory only.'
+            )
+            self.index_path = None
+
+
+__all__ = [
+    'VersionIndex'
+]
@@ -0,0 +1,346 @@
+'''
+Backup version watcher object.
+'''
+
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import select
+import struct
+import threading
+import time
+from typing import Optional
+
+from .. import utils
+from .version_index import VersionIndex
+
+#: File was created in the watched directory.
+IN_CREATE = 0x00000100
+#: File was deleted from the watched directory.
+IN_DELETE = 0x00000200
+#: File was moved out of the watched directory.
+IN_MOVED_FROM = 0x00000040
+#: File was moved into the watched directory.
+IN_MOVED_TO = 0x00000080
+#: Metadata changed (e.g. timestamps).
+IN_ATTRIB = 0x00000004
+#: Watched directory was deleted.
+IN_DELETE_SELF = 0x00000400
+#: Watched directory was moved.
+IN_MOVE_SELF = 0x00000800
+#: Event queue overflowed.
+IN_Q_OVERFLOW = 0x00004000
+#: Watch was removed.
+IN_IGNORED = 0x00008000
+#: Subject of the event is a directory.
+IN_ISDIR = 0x40000000
+#: Only watch the path if it is a directory.
+IN_ONLYDIR = 0x01000000
+#: Set the close-on-exec flag on the inotify descriptor.
+IN_CLOEXEC = 0o2000000
+#: Set the non-blocking flag on the inotify descriptor.
+IN_NONBLOCK = 0o4000
+
+#: Inotify event header layout (`wd`, `mask`, `cookie`, `len`).
+EVENT_HEADER = struct.Struct('iIII')
+#: Filesystem type prefixes where other clients change files behind inotify.
+NETWORK_FILESYSTEM_TYPES = ('nfs', 'cifs', 'smb', 'ceph', 'fuse.sshfs')
+
+
+class Inotify:
+    '''
+    Minimal inotify binding using `ctypes`.
+    '''
+
+    #: Inotify file descriptor.
+    fd: int
+
+    def __init__(self):
+        '''
+        Initialize inotify binding object.
+
+        Raises:
+            OSError: Expected inotify instance not available.
+        '''
+
+        library_name = ctypes.util.find_library('c')
+        libc = ctypes.CDLL(library_name, use_errno=True)
+
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError(errno.ENOSYS, 'inotify is not supported.')
+
+        self._libc = libc
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+
+        if self.fd < 0:
+            code = ctypes.get_errno()
+            raise OSError(code, os.strerror(code))
+
+    def add_watch(self, path: str, mask: int) -> int:
+        '''
+        Add a watch to a path.
+
+        Parameters:
+            path (str): Path to watch.
+            mask (int): Event mask.
+        Returns:
+            int: A watch descriptor.
+        Raises:
+            OSError: Expected watch not added (e.g. `ENOSPC` if watch limits are exhausted).
+        '''
+
+        wd = self._libc.inotify_add_watch(
+            self.fd,
+            os.fsencode(path),
+            ctypes.c_uint32(mask)
+        )
+
+        if wd < 0:
+            code = ctypes.get_errno()
+            raise OSError(code, os.strerror(code), path)
+
+        return wd
+
+    def read_events(self, timeout: float):
+        '''
+        Wait for events and yield them as `(wd, mask, cookie, name)` tuples.
+
+        Parameters:
+            timeout (float): Maximum waiting time in seconds.
+        Yields:
+            Tuple[int, int, int, str]: Inotify events.
+        '''
+
+        poller = select.poll()
+        poller.register(self.fd, select.POLLIN)
+
+        if not poller.poll(int(timeout * 1000)):
+            return
+
+        try:
+            buffer = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+
+        offset = 0
+
+        while offset < len(buffer):
+            wd, mask, cookie, length = EVENT_HEADER.unpack_from(buffer, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(buffer[offset:offset + length].rstrip(b'\0'))
+            offset += length
+
+            yield wd, mask, cookie, name
+
+    def close(self) -> None:
+        '''
+        Close inotify file descriptor.
+        '''
+
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class VersionWatcher:  # pylint: disable=R0902
+    '''
+    Backup version watcher object.
+
+    Keep a version index up-to-date in a background thread. Use inotify on the
+    index parent directory when available and fall back to periodic
+    modification-time checks if inotify is unsupported or its limits are
+    exhausted.
+
+    Inotify only reports changes made through the local kernel, so changes
+    made by other NFS clients are only noticed by the periodic checks. These
+    keep running alongside inotify, and the index keeps checking the parent
+    modification time on network filesystems.
+    '''
+
+    #: Watched backup version index.
+    index: VersionIndex
+    #: Periodic check interval in seconds.
+    interval: float
+    #: Whether inotify is used, `False` if falling back to periodic checks.
+    inotify_enabled: bool
+    #: Logger instance.
+    logger: logging.Logger
+
+    def __init__(self, index: VersionIndex, interval: float = 30.0, use_inotify: bool = True):
+        '''
+        Initialize backup version watcher object.
+
+        Parameters:
+            index (VersionIndex): Backup version index.
+            interval (float): Periodic check interval in seconds.
+            use_inotify (bool): Whether to try inotify before falling back to periodic checks.
+        '''
+
+        self.index = index
+        self.interval = interval
+        self.inotify_enabled = False
+        self.logger = utils.get_default_logger()
+
+        self._use_inotify = use_inotify
+        self._inotify: Optional[Inotify] = None
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> 'VersionWatcher':
+        self.start()
+
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        '''
+        Start watching in a background thread.
+        '''
+
+        if self._thread is not None:
+            return
+
+        self.index.refresh(force=True)
+
+        if self._use_inotify:
+            self._start_inotify()
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            name='nfsops-version-watcher',
+            daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        '''
+        Stop watching and wait for the background thread.
+        '''
+
+        self._stop_event.set()
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+        self.inotify_enabled = False
+        self.index.watched = False
+
+    def _start_inotify(self) -> None:
+        '''
+        Set up the inotify watch, falling back to periodic checks on failure.
+        '''
+
+        mask = (
+            IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_ATTRIB |
+            IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+        )
+
+        try:
+            self._inotify = Inotify()
+            self._inotify.add_watch(str(self.index.parent), mask)
+        except (OSError, AttributeError, TypeError) as exception:
+            if self._inotify is not None:
+                self._inotify.close()
+                self._inotify = None
+
+            reason = 'watch limits exhausted' if getattr(
+                exception, 'errno', None
+            ) in (errno.ENOSPC, errno.EMFILE) else str(exception)
+
+            self.logger.info(
+                f'inotify unavailable ({reason}), checking "{self.index.parent}" '
+                f'every {self.interval} seconds.'
+            )
+            return
+
+        self.inotify_enabled = True
+        self.index.watched = not self._is_network_filesystem()
+
+    def _is_network_filesystem(self) -> bool:
+        '''
+        Check whether the index parent directory is on a network filesystem,
+        where inotify misses the changes made by other clients.
+
+        Returns:
+            bool: `True` if the filesystem is a network one or unknown, `False` otherwise.
+        '''
+
+        try:
+            device = os.stat(self.index.parent).st_dev
+        except OSError:
+            return True
+
+        _, filesystem_type, _ = utils.get_mount_table().get(
+            device, ('', '', {})
+        )
+
+        return filesystem_type.startswith(NETWORK_FILESYSTEM_TYPES)
+
+    def _run(self) -> None:
+        '''
+        Background thread loop.
+        '''
+
+        checked = time.monotonic()
+
+        while not self._stop_event.is_set():
+            if self._inotify is None:
+                self._stop_event.wait(self.interval)
+                self.index.refresh()
+                continue
+
+            for _, mask, _, name in self._inotify.read_events(min(self.interval, 1.0)):
+                self._handle_event(mask, name)
+
+            if time.monotonic() - checked >= self.interval:
+                checked = time.monotonic()
+                self.index.refresh()
+
+    def _handle_event(self, mask: int, name: str) -> None:
+        '''
+        Apply an inotify event to the index.
+
+        Parameters:
+            mask (int): Event mask.
+            name (str): Entry name relative to the watched directory.
+        '''
+
+        if mask & (IN_Q_OVERFLOW | IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                self.logger.info(
+                    f'"{self.index.parent}" watch removed, checking periodically.'
+                )
+
+                if self._inotify is not None:
+                    self._inotify.close()
+                    self._inotify = None
+
+                self.inotify_enabled = False
+                self.index.watched = False
+
+            self.index.refresh(force=True)
+            return
+
+        if not mask & IN_ISDIR or not name:
+            return
+
+        if mask & (IN_DELETE | IN_MOVED_FROM):
+            self.index.remove(name)
+        else:
+            self.index.update(name)
+
+
+__all__ = [
+    'Inotify',
+    'VersionWatcher'
+]
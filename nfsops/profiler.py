@@ -0,0 +1,465 @@
+'''
+Profiling functions.
+'''
+
+import cProfile
+import os
+import pstats
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from enum import Enum
+from pathlib import Path
+from types import FrameType
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Sequence
+
+#: Number of frames kept per traced memory allocation.
+TRACEMALLOC_FRAMES = 25
+#: Number of allocation sites listed in the memory summary.
+TRACEMALLOC_TOP = 10
+
+
+class ProfileMode(str, Enum):
+    '''
+    Profiling mode enumeration.
+    '''
+
+    #: Deterministic function profile, written as `.pstats`.
+    CPROFILE = 'cprofile'
+    #: Memory allocation traces, written as a `tracemalloc` snapshot.
+    TRACEMALLOC = 'tracemalloc'
+    #: Sampled wall-clock stacks of all threads, written as collapsed stacks.
+    WALL = 'wall'
+
+
+#: Profile file suffixes by profiling mode.
+PROFILE_SUFFIXES = {
+    ProfileMode.CPROFILE: '.pstats',
+    ProfileMode.TRACEMALLOC: '.tracemalloc',
+    ProfileMode.WALL: '.collapsed'
+}
+
+
+class PhaseStats(NamedTuple):
+    '''
+    Phase statistics.
+    '''
+
+    #: Number of runs.
+    calls: int
+    #: Total running time in seconds.
+    seconds: float
+
+
+def format_size(size: float) -> str:
+    '''
+    Format a size in bytes with a binary unit.
+
+    Parameters:
+        size (float): Size in bytes.
+    Returns:
+        str: A human-readable size, e.g. `12.3 MiB`.
+    '''
+
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if size < 1024:
+            break
+
+        size /= 1024
+    else:
+        unit = 'TiB'
+
+    return f'{size:.1f} {unit}'
+
+
+class Profiler:  # pylint: disable=R0902
+    '''
+    Profiler object.
+
+    Profile a whole command, or only the phases named in `phases`, such as
+    the ones marked with `profile_phase` in operators. Function profiles
+    cover the threads started while profiling, and the wall-clock sampler
+    records the stacks of every thread while profiling is active. Phase
+    running times and the peak memory usage are always summarized.
+    '''
+
+    #: Profiling mode.
+    mode: ProfileMode
+    #: Output path prefix, suffixes are added by mode.
+    output: Path
+    #: Phases to profile, empty to profile everything.
+    phases: frozenset
+    #: Wall-clock sampling interval in seconds.
+    interval: float
+
+    def __init__(
+        self,
+        mode: ProfileMode,
+        output: Optional[Path] = None,
+        phases: Sequence[str] = (),
+        interval: float = 0.005
+    ):
+        '''
+        Initialize profiler object.
+
+        Parameters:
+            mode (ProfileMode): Profiling mode.
+            output (Optional[Path]): Output path prefix, defaults to `nfsops-profile-{pid}`.
+            phases (Sequence[str]): Phases to profile, empty to profile everything.
+            interval (float): Wall-clock sampling interval in seconds.
+        '''
+
+        self.mode = ProfileMode(mode)
+        self.output = output or Path(f'nfsops-profile-{os.getpid()}')
+        self.phases = frozenset(phases)
+        self.interval = interval
+
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._active = 0
+        self._profiles: List[cProfile.Profile] = []
+        self._samples: Counter = Counter()
+        self._phase_stats: Dict[str, PhaseStats] = {}
+        self._stopping = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._started = 0.0
+
+    @property
+    def path(self) -> Path:
+        '''
+        Return the profile file path.
+
+        Returns:
+            Path: The output path prefix with the profiling mode suffix.
+        '''
+
+        return self.output.with_name(
+            self.output.name + PROFILE_SUFFIXES[self.mode]
+        )
+
+    def start(self) -> None:
+        '''
+        Start profiling, making this profiler the active one.
+        '''
+
+        global _profiler  # pylint: disable=W0603
+
+        _profiler = self
+        self._started = time.perf_counter()
+        self._stopping.clear()
+
+        if self.mode == ProfileMode.TRACEMALLOC:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        elif self.mode == ProfileMode.WALL:
+            self._sampler = threading.Thread(
+                target=self._sample,
+                name='nfsops-profiler',
+                daemon=True
+            )
+            self._sampler.start()
+
+        if not self.phases:
+            self._enter()
+
+    def stop(self) -> str:
+        '''
+        Stop profiling and write the profile file.
+
+        Returns:
+            str: A summary of the profile, phases and peak memory usage.
+        '''
+
+        global _profiler  # pylint: disable=W0603
+
+        if not self.phases:
+            self._exit()
+
+        _profiler = None
+        self._stopping.set()
+
+        if self._sampler is not None:
+            self._sampler.join()
+
+        lines = [
+            f'profile: mode={self.mode.value} '
+            f'duration={time.perf_counter() - self._started:.3f}s '
+            f'output="{self.path}"'
+        ]
+
+        if self.mode == ProfileMode.CPROFILE:
+            lines.extend(self._write_pstats())
+        elif self.mode == ProfileMode.WALL:
+            lines.extend(self._write_collapsed())
+        else:
+            lines.extend(self._write_tracemalloc())
+
+        lines.append(
+            'peak memory: rss=' + format_size(
+                resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+            )
+        )
+        lines.extend(
+            f'phase {name}: calls={stats.calls} time={stats.seconds:.3f}s'
+            for name, stats in sorted(self._phase_stats.items())
+        )
+
+        summary = '\n'.join(lines)
+        self.output.with_name(f'{self.output.name}.summary').write_text(
+            summary + '\n',
+            encoding='utf-8'
+        )
+
+        return summary
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        '''
+        Mark a phase, profiling it if selected and recording its running time.
+
+        Parameters:
+            name (str): Phase name.
+        Yields:
+            None: Nothing, the phase runs inside the context.
+        '''
+
+        selected = name in self.phases
+        start = time.perf_counter()
+
+        if selected:
+            self._enter()
+
+        try:
+            yield
+        finally:
+            if selected:
+                self._exit()
+
+            elapsed = time.perf_counter() - start
+
+            with self._lock:
+                stats = self._phase_stats.get(name, PhaseStats(0, 0.0))
+                self._phase_stats[name] = PhaseStats(
+                    stats.calls + 1,
+                    stats.seconds + elapsed
+                )
+
+    def _enter(self) -> None:
+        '''
+        Activate profiling in the current thread.
+        '''
+
+        depth = getattr(self._local, 'depth', 0)
+        self._local.depth = depth + 1
+
+        if depth:
+            return
+
+        with self._lock:
+            self._active += 1
+
+            if self.mode != ProfileMode.CPROFILE:
+                return
+
+            if self._active == 1:
+                threading.setprofile(self._profile_thread)
+
+            self._local.profile = self._enable_profile()
+
+    def _exit(self) -> None:
+        '''
+        Deactivate profiling in the current thread.
+        '''
+
+        self._local.depth -= 1
+
+        if self._local.depth:
+            return
+
+        with self._lock:
+            self._active -= 1
+
+            if self.mode != ProfileMode.CPROFILE:
+                return
+
+            if self._local.profile is not None:
+                self._local.profile.disable()
+
+            if not self._active:
+                threading.setprofile(None)  # type: ignore
+
+    def _enable_profile(self) -> Optional[cProfile.Profile]:
+        '''
+        Start a function profile in the current thread.
+
+        Returns:
+            Optional[cProfile.Profile]: The profile, `None` if a profile already covers all threads.
+        '''
+
+        profile = cProfile.Profile()
+
+        try:
+            profile.enable()
+        except ValueError:
+            return None
+
+        self._profiles.append(profile)
+
+        return profile
+
+    def _profile_thread(self, *_args: Any) -> None:
+        '''
+        Start a function profile in a thread started while profiling.
+
+        Parameters:
+            *_args (Any): Profile hook arguments, ignored.
+        '''
+
+        self._enable_profile()
+
+    def _sample(self) -> None:
+        '''
+        Sample the stacks of all threads while profiling is active.
+        '''
+
+        own = threading.get_ident()
+
+        while not self._stopping.wait(self.interval):
+            if not self._active:
+                continue
+
+            names = {
+                thread.ident: thread.name for thread in threading.enumerate()
+            }
+
+            for ident, top in sys._current_frames().items():  # pylint: disable=W0212
+                if ident == own:
+                    continue
+
+                stack = []
+                frame: Optional[FrameType] = top
+
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(
+                        f'{code.co_name} '
+                        f'({os.path.basename(code.co_filename)}:'
+                        f'{code.co_firstlineno})'
+                    )
+                    frame = frame.f_back
+
+                stack.append(names.get(ident, str(ident)))
+                self._samples[';'.join(reversed(stack))] += 1
+
+    def _write_pstats(self) -> List[str]:
+        '''
+        Write the function profiles of all threads as `.pstats`.
+
+        Returns:
+            List[str]: Summary lines.
+        '''
+
+        if not self._profiles:
+            return ['no profiled calls.']
+
+        stats = pstats.Stats(*self._profiles)  # type: ignore
+        stats.dump_stats(self.path)
+        calls, seconds = stats.total_calls, stats.total_tt  # type: ignore
+
+        return [
+            f'threads={len(self._profiles)} calls={calls} time={seconds:.3f}s'
+        ]
+
+    def _write_collapsed(self) -> List[str]:
+        '''
+        Write the sampled stacks in collapsed format, one stack and count per line.
+
+        Returns:
+            List[str]: Summary lines.
+        '''
+
+        with open(self.path, 'w', encoding='utf-8') as stream:
+            for stack, count in sorted(self._samples.items()):
+                stream.write(f'{stack} {count}\n')
+
+        return [
+            f'samples={sum(self._samples.values())} '
+            f'stacks={len(self._samples)}'
+        ]
+
+    def _write_tracemalloc(self) -> List[str]:
+        '''
+        Write the memory allocation snapshot and stop tracing.
+
+        Returns:
+            List[str]: Summary lines, with the largest allocation sites.
+        '''
+
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        snapshot.dump(str(self.path))
+
+        lines = [
+            f'traced memory: current={format_size(current)} '
+            f'peak={format_size(peak)}'
+        ]
+
+        for statistic in snapshot.statistics('lineno')[:TRACEMALLOC_TOP]:
+            frame = statistic.traceback[0]
+            lines.append(
+                f'  {format_size(statistic.size)} in {statistic.count} blocks '
+                f'at {frame.filename}:{frame.lineno}'
+            )
+
+        return lines
+
+
+#: Active profiler, `None` when not profiling.
+_profiler: Optional[Profiler] = None  # pylint: disable=C0103
+
+
+def get_profiler() -> Optional[Profiler]:
+    '''
+    Return the active profiler.
+
+    Returns:
+        Optional[Profiler]: The active profiler or `None`.
+    '''
+
+    return _profiler
+
+
+@contextmanager
+def profile_phase(name: str) -> Iterator[None]:
+    '''
+    Mark a phase of an operation for the active profiler, if any.
+
+    Parameters:
+        name (str): Phase name, e.g. `restore.transfer`.
+    Yields:
+        None: Nothing, the phase runs inside the context.
+    '''
+
+    profiler = _profiler
+
+    if profiler is None:
+        yield
+        return
+
+    with profiler.phase(name):
+        yield
+
+
+__all__ = [
+    'PROFILE_SUFFIXES',
+    'PhaseStats',
+    'ProfileMode',
+    'Profiler',
+    'format_size',
+    'get_profiler',
+    'profile_phase'
+]
@@ -5,11 +5,26 @@ Utility functions.
 import json
 import logging
 import os
+import re
 import shutil
 import string
+import uuid
+from contextlib import contextmanager
 from datetime import datetime, timezone
 from logging import Logger
 from pathlib import Path
+from typing import (
+    BinaryIO,
+    Dict,
+    Iterable,
+    Iterator,
+    Literal,
+    Optional,
+    Tuple,
+    Union,
+    overload
+)
+from urllib.parse import quote
 
 from . import package
 from .configurations.configuration import Configuration
@@ -101,6 +116,59 @@ def get_default_volume_path(context: ContextType) -> Path:
     return default_mapping[context]
 
 
+def get_metadata_path(path: Path, host: Optional[str] = None) -> Path:
+    '''
+    Return the metadata directory path for a volume path.
+
+    The metadata directory keeps package state shared between processes
+    (e.g. version indexes) next to the data it describes. Remote volumes
+    keep it in the user cache directory of this host instead, as they are
+    only read.
+
+    Parameters:
+        path (Path): Volume path.
+        host (Optional[str]): Remote host of the volume, `None` for a local volume.
+    Returns:
+        Path: A path object referencing the metadata directory.
+    '''
+
+    if host is None:
+        return path / '.nfsops'
+
+    return Path(
+        os.getenv('XDG_CACHE_HOME', Path.home() / '.cache')
+    ) / 'nfsops' / 'remote' / quote(host, safe='') / \
+        quote(path.as_posix(), safe='')
+
+
+def parse_remote_path(value: str) -> Tuple[Optional[str], str]:
+    '''
+    Split a remote `host:/path` volume path into host and path.
+
+    Like `rsync` and `scp`, values are local paths unless a colon comes
+    before the first slash.
+
+    Parameters:
+        value (str): Volume path, local or `[user@]host:/path`.
+    Returns:
+        Tuple[Optional[str], str]: Host (`None` for local paths) and path.
+    Raises:
+        ValueError: Expected absolute remote path.
+    '''
+
+    host, separator, path = value.partition(':')
+
+    if not separator or not host or '/' in host:
+        return None, value
+
+    if not path.startswith('/'):
+        raise ValueError(
+            f'invalid remote path "{value}", use "HOST:/PATH" instead.'
+        )
+
+    return host, path
+
+
 def format_configuration_string(configuration: Configuration) -> str:
     '''
     Format configuration object to string using the formatting style
@@ -133,7 +201,7 @@ def find_executable(name: str) -> Path:
         KeyError: Expected executable path not found.
     '''
 
-    path = shutil.which('rsync')
+    path = shutil.which(name)
 
     if path is None:
         raise KeyError(f'cannot find "{name}" executable.')
@@ -141,6 +209,48 @@ def find_executable(name: str) -> Path:
     return Path(path)
 
 
+def get_mount_table() -> Dict[int, Tuple[str, str, Dict[str, str]]]:
+    '''
+    Return the mounted filesystems by device number, parsed from
+    `/proc/self/mountinfo`.
+
+    Returns:
+        Dict[int, Tuple[str, str, Dict[str, str]]]:
+            A dictionary mapping device numbers to mount point, filesystem type
+            and mount options (empty if mount information is not available).
+    '''
+
+    table: Dict[int, Tuple[str, str, Dict[str, str]]] = {}
+
+    try:
+        with open('/proc/self/mountinfo', encoding='utf-8') as file:
+            lines = file.readlines()
+    except OSError:
+        return table
+
+    for line in lines:
+        fields, _, filesystem_fields = line.partition(' - ')
+        fields_list = fields.split()
+        filesystem_list = filesystem_fields.split()
+
+        if len(fields_list) < 6 or len(filesystem_list) < 3:
+            continue
+
+        major, minor = (int(value) for value in fields_list[2].split(':'))
+        options = dict(
+            option.partition('=')[::2]
+            for option in f'{fields_list[5]},{filesystem_list[2]}'.split(',')
+        )
+
+        table[os.makedev(major, minor)] = (
+            fields_list[4].encode().decode('unicode_escape'),
+            filesystem_list[0],
+            options
+        )
+
+    return table
+
+
 def expand_name_template(template: str, name: str) -> str:
     '''
     Expand template placeholders to the name value.
@@ -178,11 +288,180 @@ def expand_name_template(template: str, name: str) -> str:
         ) from exception
 
 
+def match_name_template(template: str, path: str) -> Optional[str]:
+    '''
+    Extract the name value from a path matching an expanded template.
+
+    This is the reverse of `expand_name_template`, literal template parts may
+    contain `*` and `?` wildcards. Names matched through `{legacy_escaped_name}`
+    only are returned escaped.
+
+    Parameters:
+        template (str): Template string.
+        path (str): Relative path using `/` separators.
+    Returns:
+        Optional[str]: The name value or `None` if the path does not match.
+    Raises:
+        ValueError: Expected template placeholder not supported.
+    '''
+
+    patterns = {
+        'name': '[^/]+',
+        'legacy_escaped_name': '[a-z0-9-]+'
+    }
+    expression = ''
+
+    for literal, field, _, _ in string.Formatter().parse(template):
+        expression += ''.join(
+            '[^/]*' if character == '*' else
+            '[^/]' if character == '?' else
+            re.escape(character)
+            for character in literal
+        )
+
+        if field is None:
+            continue
+
+        if field not in patterns:
+            raise ValueError(
+                f'"{field}" placeholder not supported, use "name" or "legacy_escaped_name" instead.'
+            )
+
+        if f'(?P<{field}>' in expression:
+            expression += f'(?P={field})'
+        else:
+            expression += f'(?P<{field}>{patterns[field]})'
+
+    match = re.fullmatch(expression, path)
+
+    if match is None:
+        return None
+
+    groups = match.groupdict()
+
+    return groups.get('name') or groups.get('legacy_escaped_name')
+
+
+def parse_id_map(values: Iterable[str]) -> Dict[int, int]:
+    '''
+    Parse `SOURCE:TARGET` user or group ID mappings.
+
+    A `*` source matches any other ID and is returned as key `-1`.
+
+    Parameters:
+        values (Iterable[str]): ID mappings, e.g. `1000:2000` or `*:2000`.
+    Returns:
+        Dict[int, int]: Target IDs by source ID.
+    Raises:
+        ValueError: Expected ID mapping invalid.
+    '''
+
+    mapping = {}
+
+    for value in values:
+        source, separator, target = value.partition(':')
+
+        try:
+            if not separator or int(target) < 0 or (
+                source != '*' and int(source) < 0
+            ):
+                raise ValueError()
+
+            mapping[-1 if source == '*' else int(source)] = int(target)
+        except ValueError as exception:
+            raise ValueError(
+                f'invalid ID mapping "{value}", use "SOURCE:TARGET" instead.'
+            ) from exception
+
+    return mapping
+
+
+@overload
+def parse_version(value: str) -> Union[Literal['*'], int]: ...
+
+
+@overload
+def parse_version(value: None) -> None: ...
+
+
+def parse_version(value: Optional[str]) -> Optional[Union[Literal['*'], int]]:
+    '''
+    Parse a backup version argument, `*` or a version number.
+
+    Parameters:
+        value (Optional[str]): Backup version argument or `None`.
+    Returns:
+        Optional[Union[Literal['*'], int]]: `*`, the version number or `None`.
+    Raises:
+        ValueError: Expected backup version invalid.
+    '''
+
+    if value is None or value == '*':
+        return '*'
+
+    try:
+        return int(value)
+    except ValueError as exception:
+        raise ValueError(
+            f'invalid backup version "{value}", use "*" or a number instead.'
+        ) from exception
+
+
+def get_default_workers() -> int:
+    '''
+    Return the default number of I/O worker threads.
+
+    Returns:
+        int: Four threads per CPU, at most 32.
+    '''
+
+    return min(32, (os.cpu_count() or 1) * 4)
+
+
+@contextmanager
+def open_atomic_writer(path: 'os.PathLike[str]') -> Iterator[BinaryIO]:
+    '''
+    Open a temporary file replacing a file once closed without errors.
+
+    Temporary files have a random suffix, so threads and processes writing
+    the same file never share one, the last replacement wins.
+
+    Parameters:
+        path (os.PathLike[str]): File path.
+    Yields:
+        BinaryIO: A binary file object.
+    '''
+
+    temporary_path = \
+        f'{os.fspath(path)}.{os.getpid()}-{uuid.uuid4().hex[:8]}.tmp'
+
+    try:
+        with open(temporary_path, 'xb') as file:
+            yield file
+
+        os.replace(temporary_path, path)
+    except BaseException:
+        try:
+            os.unlink(temporary_path)
+        except FileNotFoundError:
+            pass
+
+        raise
+
+
 __all__ = [
     'timezone_aware',
     'get_default_logger',
     'get_default_volume_path',
+    'get_metadata_path',
     'format_configuration_string',
     'find_executable',
-    'expand_name_template'
+    'get_mount_table',
+    'expand_name_template',
+    'match_name_template',
+    'parse_id_map',
+    'parse_version',
+    'parse_remote_path',
+    'get_default_workers',
+    'open_atomic_writer'
 ]
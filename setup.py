@@ -72,6 +72,9 @@ setup(
         'typer>=0.4.0',
     ],
     extras_require={
+        'numpy': [
+            'numpy>=1.21.0'
+        ],
         'development': [
             'setuptools>=58.2.0',
             'wheel>=0.37.0',
@@ -0,0 +1,68 @@
+'''
+Shared unit test fixtures.
+'''
+
+from pathlib import Path
+from typing import Any, Callable
+
+import pytest
+
+from nfsops.configurations.backup import BackupConfiguration
+from nfsops.configurations.context import ContextConfiguration
+from nfsops.configurations.restore import RestoreConfiguration
+from nfsops.configurations.restore_report import RestoreReportConfiguration
+from nfsops.context_type import ContextType
+from nfsops.operators.backup import BackupOperator
+
+
+@pytest.fixture(name='backup_operator')
+def fixture_backup_operator(tmp_path: Path) -> BackupOperator:
+    '''
+    Create a backup operator of the `volume` subpath context, whose backup
+    versions are the `volume/.backup/*` directories.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+    Returns:
+        BackupOperator: A backup operator instance.
+    '''
+
+    (tmp_path / 'volume').mkdir()
+
+    return BackupOperator(
+        ContextConfiguration(
+            context=ContextType.SUBPATH,
+            path=tmp_path / 'volume'
+        ),
+        BackupConfiguration()
+    )
+
+
+@pytest.fixture(name='restore')
+def fixture_restore(
+    tmp_path: Path,
+    backup_operator: BackupOperator
+) -> Callable[..., RestoreReportConfiguration]:
+    '''
+    Return a function restoring the newest backup version of the volume with
+    the native engine into the `destination` directory, unless its restore
+    parameters say otherwise.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+        backup_operator (BackupOperator): Backup operator of the volume.
+    Returns:
+        Callable[..., RestoreReportConfiguration]: A restore function.
+    '''
+
+    def restore(**options: Any) -> RestoreReportConfiguration:
+        return backup_operator.restore(
+            RestoreConfiguration(**{
+                'version': 0,
+                'destination': tmp_path / 'destination',
+                'engine': 'native',
+                **options
+            })
+        )
+
+    return restore
@@ -0,0 +1,155 @@
+'''
+Test adaptive concurrency tuning.
+'''
+
+import time
+from pathlib import Path
+from typing import Callable, List
+
+import pytest
+
+from nfsops.configurations.restore import RestoreConfiguration
+from nfsops.configurations.restore_report import RestoreReportConfiguration
+from nfsops.operators.autotune import ConcurrencyTuner
+
+
+def run_saturated_interval(
+    tuner: ConcurrencyTuner,
+    clock: List[float],
+    seconds: float,
+    units: int
+) -> None:
+    '''
+    Run one operation per worker, all at once, over a one second interval.
+
+    Parameters:
+        tuner (ConcurrencyTuner): Concurrency tuner.
+        clock (List[float]): Patched monotonic time, advanced by one second.
+        seconds (float): Operation latency in seconds.
+        units (int): Number of units per operation.
+    '''
+
+    workers = tuner.workers
+
+    for _ in range(workers):
+        tuner.acquire()
+
+    for index in range(workers):
+        clock[0] += index == workers - 1
+        tuner.release(seconds, units)
+
+
+def test_concurrency_tuner_should_increase_then_back_off(
+    monkeypatch: pytest.MonkeyPatch
+):
+    '''
+    Test additive increases while throughput improves, reverts when it drops
+    and multiplicative decreases on failures and latency increases.
+
+    Parameters:
+        monkeypatch (pytest.MonkeyPatch): Monkeypatch fixture.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    clock = [0.0]
+    monkeypatch.setattr(time, 'monotonic', lambda: clock[0])
+
+    def fail():
+        raise OSError()
+
+    tuner = ConcurrencyTuner('test', workers=2, maximum=4)
+
+    run_saturated_interval(tuner, clock, 0.01, 100)
+    run_saturated_interval(tuner, clock, 0.01, 100)
+    run_saturated_interval(tuner, clock, 0.01, 50)
+
+    assert tuner.workers == 3
+
+    clock[0] += 1
+
+    with pytest.raises(OSError):
+        tuner.call(fail)
+
+    run_saturated_interval(tuner, clock, 1.0, 100)
+
+    report = tuner.report()
+
+    assert [step.action for step in report.trace] == [
+        'increase',
+        'increase',
+        'revert',
+        'decrease',
+        'decrease'
+    ]
+    assert [step.throughput for step in report.trace[:3]] == [200, 300, 200]
+    assert report.initial_workers == 2
+    assert report.workers == 1
+    assert report.best_workers == 3
+
+
+def test_concurrency_tuner_should_measure_latency_per_operation_size(
+    monkeypatch: pytest.MonkeyPatch
+):
+    '''
+    Test batches of small files followed by large files without contention,
+    then an overloaded server slowing the large files down.
+
+    Parameters:
+        monkeypatch (pytest.MonkeyPatch): Monkeypatch fixture.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    clock = [0.0]
+    monkeypatch.setattr(time, 'monotonic', lambda: clock[0])
+    tuner = ConcurrencyTuner('test', workers=8, maximum=16)
+
+    for _ in range(3):
+        run_saturated_interval(tuner, clock, 0.001, 4096)
+
+    for _ in range(3):
+        run_saturated_interval(tuner, clock, 0.5, 1 << 26)
+
+    assert 'decrease' not in [step.action for step in tuner.trace]
+    assert tuner.workers == 14
+
+    run_saturated_interval(tuner, clock, 2.0, 1 << 26)
+
+    assert tuner.trace[-1].action == 'decrease'
+    assert tuner.workers == 7
+
+
+def test_restore_should_report_tuned_concurrency(
+    tmp_path: Path,
+    restore: Callable[..., RestoreReportConfiguration]
+):
+    '''
+    Test autotuned restores reporting worker counts within bounds.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+        restore (Callable[..., RestoreReportConfiguration]): Restore function.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    source = tmp_path / 'volume' / '.backup' / 'version'
+
+    for index in range(20):
+        (source / f'directory-{index}').mkdir(parents=True)
+        (source / f'directory-{index}' / 'file').write_text(str(index))
+
+    report = restore(autotune=True, workers=2, min_workers=2, max_workers=4)
+
+    assert (tmp_path / 'destination' / 'directory-7' / 'file').read_text() \
+        == '7'
+    assert [item.name for item in report.concurrency] == ['scan', 'transfer']
+    assert report.concurrency[1].initial_workers == 2
+    assert all(
+        2 <= item.workers <= 4 and 2 <= item.best_workers <= 4
+        for item in report.concurrency
+    )
+
+    with pytest.raises(ValueError):
+        RestoreConfiguration(version=0, min_workers=8, max_workers=4)
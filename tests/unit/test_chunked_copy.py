@@ -0,0 +1,57 @@
+'''
+Test chunked file copies.
+'''
+
+import os
+from pathlib import Path
+
+from nfsops.operators.chunked_copy import ChunkedCopier, get_data_ranges
+from nfsops.operators.merge import walk_merged
+from nfsops.operators.transfer import NativeTransferEngine
+
+
+def test_chunked_copy_should_keep_content_and_holes(tmp_path: Path):
+    '''
+    Test copying a sparse file in chunks with the native engine.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    source = tmp_path / 'source'
+    destination = tmp_path / 'destination'
+    source.mkdir()
+    destination.mkdir()
+    data = os.urandom(1 << 20)
+
+    with open(source / 'sparse', 'wb') as file:
+        file.write(data)
+        file.seek(8 << 20)
+        file.write(data)
+        file.truncate(12 << 20)
+
+    (source / 'small').write_bytes(b'content')
+
+    reports = NativeTransferEngine(
+        ChunkedCopier(threshold=1 << 20, chunk_size=256 << 10)
+    ).transfer([source], walk_merged([source]), destination)
+
+    source_fd = os.open(source / 'sparse', os.O_RDONLY)
+    destination_fd = os.open(destination / 'sparse', os.O_RDONLY)
+
+    try:
+        source_ranges = get_data_ranges(source_fd, 12 << 20)
+        destination_ranges = get_data_ranges(destination_fd, 12 << 20)
+    finally:
+        os.close(source_fd)
+        os.close(destination_fd)
+
+    assert (destination / 'sparse').read_bytes() == \
+        (source / 'sparse').read_bytes()
+    assert (destination / 'small').read_bytes() == b'content'
+    assert [report.path for report in reports] == ['sparse']
+    assert reports[0].bytes == 12 << 20
+    assert reports[0].data_bytes == sum(length for _, length in source_ranges)
+    assert destination_ranges == source_ranges
@@ -0,0 +1,62 @@
+'''
+Test configuration models.
+'''
+
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+from pydantic import ValidationError
+
+from nfsops.configurations.backup_version import BackupVersionConfiguration
+from nfsops.configurations.context import ContextConfiguration
+from nfsops.configurations.restore_report import RestoreReportConfiguration
+
+
+def test_trusted_should_match_validated_models():
+    '''
+    Test building models without validation, filling in defaults.
+
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    values = {
+        'version': 3,
+        'timestamp': datetime(2022, 1, 1, tzinfo=timezone.utc),
+        'path': Path('/volume/.backup/3')
+    }
+    trusted = BackupVersionConfiguration.trusted(**values)
+    first, second = [
+        RestoreReportConfiguration.trusted(version=0) for _ in range(2)
+    ]
+    first.chunked_files.append(None)  # type: ignore
+
+    assert trusted == BackupVersionConfiguration(**values)
+    assert trusted.json() == BackupVersionConfiguration(**values).json()
+    assert second.chunked_files == [] and second.type == 'restore-report'
+
+
+def test_context_should_validate_environment_defaults(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch
+):
+    '''
+    Test reading lock durations from the environment.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+        monkeypatch (pytest.MonkeyPatch): Environment patcher.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    monkeypatch.setenv('NFSOPS_PATH', str(tmp_path))
+    monkeypatch.setenv('NFSOPS_LOCK_LEASE', '5')
+
+    assert ContextConfiguration().lock_lease == 5.0
+
+    monkeypatch.setenv('NFSOPS_LOCK_LEASE', '0')
+
+    with pytest.raises(ValidationError):
+        ContextConfiguration()
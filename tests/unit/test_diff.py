@@ -0,0 +1,54 @@
+'''
+Test backup version diff functions.
+'''
+
+import os
+from pathlib import Path
+
+from nfsops.operators.diff import FileSystemTree, diff_trees
+
+
+def test_diff_trees_should_report_added_removed_and_modified_paths(tmp_path: Path):
+    '''
+    Test merge-walking two trees.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    first_path = tmp_path / 'first'
+    second_path = tmp_path / 'second'
+
+    for path in (first_path, second_path):
+        (path / 'same').mkdir(parents=True)
+        (path / 'same' / 'file').write_text('same')
+        (path / 'touched').write_text('same')
+        os.utime(path / 'same' / 'file', (0, 0))
+
+    (first_path / 'removed').mkdir()
+    (first_path / 'removed' / 'file').touch()
+    (first_path / 'modified').write_text('first')
+    (first_path / 'type').touch()
+    (second_path / 'added').touch()
+    (second_path / 'modified').write_text('second-content')
+    (second_path / 'type').mkdir()
+    os.utime(second_path / 'touched', (0, 0))
+
+    differences = [
+        (entry.status, entry.path)
+        for entry in diff_trees(
+            FileSystemTree(first_path),
+            FileSystemTree(second_path)
+        )
+    ]
+
+    assert differences == [
+        ('A', 'added'),
+        ('M', 'modified'),
+        ('D', 'removed/'),
+        ('D', 'removed/file'),
+        ('D', 'type'),
+        ('A', 'type/')
+    ]
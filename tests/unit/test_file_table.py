@@ -0,0 +1,136 @@
+'''
+Test columnar file tables.
+'''
+
+from pathlib import Path
+
+import pytest
+
+from nfsops.operators.diff import FileSystemTree, diff_trees
+from nfsops.operators.file_table import FileTable, FileTableTree, SortedPaths
+from nfsops.operators.merge import walk_merged
+from nfsops.operators.path_filter import PathFilter
+
+
+def create_versions(tmp_path: Path):
+    '''
+    Create two overlapping backup versions.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+    Returns:
+        List[Path]: Backup version directories, newest first.
+    '''
+
+    newest = tmp_path / 'newest'
+    oldest = tmp_path / 'oldest'
+
+    (newest / 'directory').mkdir(parents=True)
+    (newest / 'directory' / 'new').write_text('new')
+    (newest / 'hidden').write_text('file')
+    (newest / 'a-b').write_text('file')
+    (oldest / 'directory').mkdir(parents=True)
+    (oldest / 'directory' / 'old').write_text('old')
+    (oldest / 'hidden' / 'nested').mkdir(parents=True)
+    (oldest / 'cache' / 'nested').mkdir(parents=True)
+
+    return [newest, oldest]
+
+
+def test_file_table_should_match_walk_merged(tmp_path: Path):
+    '''
+    Test merging per-version tables and selecting the newest entries.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    sources = create_versions(tmp_path)
+    tables = [
+        FileTable.from_entries(walk_merged([source]), version).sort()
+        for version, source in enumerate(sources)
+    ]
+    merged = FileTable.merge(tables)
+    expected = [
+        (entry.path, entry.version) for entry in walk_merged(sources)
+    ]
+
+    assert len(merged) == sum(len(table) for table in tables)
+    assert [
+        (record.path, record.version) for record in merged.newest_wins()
+    ] == expected
+
+    for path_filter in [
+        PathFilter(exclude=['cache']),
+        PathFilter(prefixes=['cache/nested', 'directory'], include=['new'])
+    ]:
+        assert [
+            record.path for record in merged.newest_wins().filter(path_filter)
+        ] == [
+            entry.path
+            for entry in walk_merged(sources, path_filter=path_filter)
+        ]
+
+
+def test_file_table_should_save_and_load(tmp_path: Path):
+    '''
+    Test saving a table and mapping it back.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    table = FileTable.from_entries(walk_merged(create_versions(tmp_path)))
+    table.save(tmp_path / 'table')
+
+    with FileTable.load(tmp_path / 'table') as loaded:
+        assert list(loaded) == list(table)
+        assert list(loaded.filter(lambda record: record.is_dir)) == \
+            [record for record in table if record.is_dir]
+
+
+def test_file_table_tree_should_match_file_system_diff(tmp_path: Path):
+    '''
+    Test diffing file tables like the backup version directories.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    sources = create_versions(tmp_path)
+    trees = [
+        FileTableTree(FileTable.from_entries(walk_merged([source])), source)
+        for source in sources
+    ]
+
+    assert list(diff_trees(trees[0], trees[1])) == list(
+        diff_trees(FileSystemTree(sources[0]), FileSystemTree(sources[1]))
+    )
+    assert trees[0].table.find('directory/new') is not None
+    assert trees[0].table.find('directory/old') is None
+
+
+def test_sorted_paths_should_require_row_accessors():
+    '''
+    Test that subclasses missing row accessors cannot be instantiated.
+
+    Raises:
+        AssertionError: Expected exception not raised.
+    '''
+
+    class Rows(SortedPaths):  # pylint: disable=W0223
+        '''
+        Incomplete row sequence.
+        '''
+
+        def __len__(self) -> int:
+            return 0
+
+    with pytest.raises(TypeError):
+        Rows()  # type: ignore  # pylint: disable=E0110
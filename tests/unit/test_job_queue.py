@@ -0,0 +1,189 @@
+'''
+Test restore job queues.
+'''
+
+import time
+from pathlib import Path
+from typing import Callable
+
+import pytest
+
+from nfsops.configurations.context import ContextConfiguration
+from nfsops.configurations.restore import RestoreConfiguration
+from nfsops.context_type import ContextType
+from nfsops.operators.backup import BackupOperator
+from nfsops.operators.job_queue import JobQueue, QueueOperator
+
+
+def test_claim_should_order_jobs_by_priority_and_workspace(tmp_path: Path):
+    '''
+    Test claiming jobs by priority, then fairly across workspaces, within the
+    concurrency limit.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    queue = JobQueue(tmp_path / 'queue.sqlite', concurrency=3)
+    options = RestoreConfiguration(version=0)
+    first = queue.submit(options, 'first')
+    queue.submit(options, 'first')
+    other = queue.submit(options, 'other')
+    urgent = queue.submit(options, 'first', priority=10)
+
+    claimed = [queue.claim('worker') for _ in range(4)]
+
+    assert [job.id for job in claimed[:3] if job is not None] == \
+        [urgent.id, other.id, first.id]
+    assert claimed[3] is None
+    assert queue.get_job(urgent.id).state == 'running'
+
+
+def test_checkpoint_should_preempt_and_cancel_jobs(tmp_path: Path):
+    '''
+    Test preempting the lowest priority running job for a waiting job, and
+    cancelling running jobs.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    queue = JobQueue(tmp_path / 'queue.sqlite', concurrency=2)
+    options = RestoreConfiguration(version=0)
+    low = queue.submit(options, priority=0)
+    high = queue.submit(options, priority=5)
+    running = [queue.claim('worker'), queue.claim('worker')]
+    urgent = queue.submit(options, priority=10)
+
+    assert running[0] is not None and running[0].id == high.id
+    assert queue.checkpoint(high.id, 'worker') is None
+    assert queue.checkpoint(low.id, 'worker') == 'preempted'
+    assert queue.get_job(low.id).preemptions == 1
+
+    claimed = queue.claim('worker')
+
+    assert claimed is not None and claimed.id == urgent.id
+    assert queue.cancel(high.id).state == 'cancelling'
+    assert queue.checkpoint(high.id, 'worker') == 'cancelled'
+    assert queue.cancel(low.id).state == 'cancelled'
+
+
+def test_claim_should_measure_leases_with_the_server_clock(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch
+):
+    '''
+    Test that a client clock running ahead does not expire the lease of a
+    running job.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+        monkeypatch (pytest.MonkeyPatch): Monkeypatch fixture.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    queue = JobQueue(tmp_path / 'queue.sqlite', concurrency=1, lease=60.0)
+    options = RestoreConfiguration(version=0)
+    job = queue.submit(options)
+
+    assert queue.claim('first') is not None
+
+    skewed = time.time() + 3600.0
+    monkeypatch.setattr(time, 'time', lambda: skewed)
+    queue.submit(options)
+
+    assert queue.claim('second') is None
+    assert queue.get_job(job.id).worker == 'first'
+
+
+def test_work_should_run_queued_restores(tmp_path: Path):
+    '''
+    Test draining the queue with a worker.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    version_path = tmp_path / 'volume' / '.backup' / 'version'
+    version_path.mkdir(parents=True)
+    (version_path / 'file').write_text('content')
+
+    operator = QueueOperator(
+        ContextConfiguration(
+            context=ContextType.SUBPATH,
+            path=tmp_path / 'volume'
+        )
+    )
+    job = operator.submit(
+        RestoreConfiguration(
+            version=0,
+            destination=tmp_path / 'destination',
+            engine='native'
+        ),
+        priority=1
+    )
+
+    operator.work(drain=True, poll_interval=0.01)
+    job = operator.queue.get_job(job.id)
+
+    assert job.state == 'done'
+    assert job.report is not None and job.report.files == 1
+    assert (tmp_path / 'destination' / 'file').read_text() == 'content'
+
+
+def test_run_job_should_not_fail_preempted_jobs(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch
+):
+    '''
+    Test restores raising after a preemption, while their job is claimed
+    again by another thread of the same worker.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+        monkeypatch (pytest.MonkeyPatch): Attribute patcher.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    (tmp_path / 'volume').mkdir()
+    operator = QueueOperator(
+        ContextConfiguration(
+            context=ContextType.SUBPATH,
+            path=tmp_path / 'volume'
+        ),
+        concurrency=1
+    )
+    options = RestoreConfiguration(version=0)
+    operator.queue.submit(options)
+    job = operator.queue.claim(operator.worker)
+
+    def restore(
+        _: BackupOperator,
+        options: RestoreConfiguration,
+        should_stop: Callable[[], bool]
+    ) -> None:
+        urgent = operator.queue.submit(options, priority=5)
+
+        assert should_stop()
+
+        operator.queue.cancel(urgent.id)
+        operator.queue.claim(operator.worker)
+
+        raise OSError('interrupted')
+
+    monkeypatch.setattr(BackupOperator, 'restore', restore)
+
+    assert job is not None
+    assert operator.run_job(job).state == 'running'
+    assert not operator.queue.finish(job.id, 'other', 'done')
+    assert operator.queue.finish(job.id, operator.worker, 'done')
+    assert not operator.queue.finish(job.id, operator.worker, 'failed')
+    assert operator.queue.get_job(job.id).state == 'done'
@@ -0,0 +1,76 @@
+'''
+Test latency-injecting filesystem shim.
+'''
+
+import os
+import time
+from pathlib import Path
+
+from nfsops.latency import LatencyProfile, LatencyShim
+from nfsops.operators.merge import walk_merged
+from nfsops.operators.stat_cache import StatCache
+
+
+def test_shim_should_count_round_trips_under_prefixes_only(tmp_path: Path):
+    '''
+    Test counting the round trips of a merged walk on the simulated mount.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    mount = tmp_path / 'mount'
+
+    for name in ['new', 'old']:
+        (mount / name / 'directory').mkdir(parents=True)
+        (mount / name / 'directory' / 'file').write_text(name)
+
+    (tmp_path / 'local').write_text('local')
+
+    with LatencyShim(
+        LatencyProfile('test', readdir_batch=1),
+        0.0,
+        [mount]
+    ) as shim:
+        entries = list(
+            walk_merged([mount / 'new', mount / 'old'], StatCache(maxsize=0))
+        )
+        os.stat(tmp_path / 'local')
+        (tmp_path / 'local').read_text()
+
+    assert [entry.path for entry in entries] == ['directory', 'directory/file']
+    assert shim.round_trips == {'readdir': 8, 'stat': 2}
+    assert os.stat is not shim._stat  # pylint: disable=W0212
+
+
+def test_shim_should_delay_calls_and_cap_throughput(tmp_path: Path):
+    '''
+    Test waiting for round trips and for the throughput-capped link.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    profile = LatencyProfile('test', stat=0.01, read_bandwidth=1e6)
+    (tmp_path / 'file').write_bytes(b'0' * 50000)
+    start = time.perf_counter()
+
+    with LatencyShim(profile, 1.0, [tmp_path]) as shim:
+        for _ in range(5):
+            os.stat(tmp_path / 'file')
+
+        descriptor = os.open(tmp_path / 'file', os.O_RDONLY)
+
+        try:
+            while os.read(descriptor, 10000):
+                pass
+        finally:
+            os.close(descriptor)
+
+    assert time.perf_counter() - start >= 0.1
+    assert shim.round_trips == {'stat': 5, 'open': 1}
+    assert shim.transferred == {'read': 50000}
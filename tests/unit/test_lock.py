@@ -0,0 +1,199 @@
+'''
+Test operation locks.
+'''
+
+import os
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from nfsops.configurations.backup import BackupConfiguration
+from nfsops.configurations.context import ContextConfiguration
+from nfsops.configurations.restore import RestoreConfiguration
+from nfsops.context_type import ContextType
+from nfsops.operators import backup
+from nfsops.operators.backup import BackupOperator
+from nfsops.operators.lock import EXCLUSIVE, SHARED, LockStack, OperationLock
+from nfsops.operators.operator import LOCK_DIRECTORY_NAME
+
+
+def create_lock(path: Path, mode: str, **kwargs) -> OperationLock:
+    '''
+    Create a lock polling quickly and giving up after a short time.
+
+    Parameters:
+        path (Path): Lock directory.
+        mode (str): Lock mode.
+        kwargs (Dict[str, Any]): Extra lock parameters.
+    Returns:
+        OperationLock: A lock.
+    '''
+
+    return OperationLock(
+        path,
+        mode,
+        **{'timeout': 0.2, 'poll_interval': 0.01, **kwargs}
+    )
+
+
+def test_operation_lock_should_share_readers_and_exclude_writers(tmp_path: Path):
+    '''
+    Test shared and exclusive lock conflicts.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    with create_lock(tmp_path, SHARED), create_lock(tmp_path, SHARED):
+        with pytest.raises(TimeoutError):
+            create_lock(tmp_path, EXCLUSIVE).acquire()
+
+    with create_lock(tmp_path, EXCLUSIVE) as lock:
+        assert lock.held
+
+        with pytest.raises(TimeoutError):
+            create_lock(tmp_path, SHARED).acquire()
+
+    assert not lock.held
+    assert os.listdir(tmp_path) == ['.guard']
+
+
+def test_operation_lock_should_not_starve_waiting_writers(tmp_path: Path):
+    '''
+    Test new readers waiting behind a waiting writer.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    reader = create_lock(tmp_path, SHARED)
+    writer = create_lock(tmp_path, EXCLUSIVE, timeout=5.0)
+    reader.acquire()
+    thread = threading.Thread(target=writer.acquire)
+    thread.start()
+
+    while not any(name.startswith('waiting.') for name in os.listdir(tmp_path)):
+        time.sleep(0.01)
+
+    with pytest.raises(TimeoutError):
+        create_lock(tmp_path, SHARED).acquire()
+
+    reader.release()
+    thread.join()
+
+    assert writer.held
+
+    writer.release()
+
+
+def test_operation_lock_should_expire_stale_holders(tmp_path: Path):
+    '''
+    Test removing holders whose lease was not renewed.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    (tmp_path / 'exclusive.crashed.1.00000000').touch()
+    os.utime(tmp_path / 'exclusive.crashed.1.00000000', (0, 0))
+
+    with create_lock(tmp_path, EXCLUSIVE, lease=0.3) as lock:
+        assert not (tmp_path / 'exclusive.crashed.1.00000000').exists()
+
+        time.sleep(0.3)
+
+        assert lock.renew()
+
+        for name in os.listdir(tmp_path):
+            if name.startswith('exclusive.'):
+                os.unlink(tmp_path / name)
+
+        assert not lock.renew()
+        assert lock.lost
+
+
+def test_lock_stack_should_check_entered_locks(tmp_path: Path):
+    '''
+    Test checking the locks entered into a lock stack.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    with LockStack() as stack:
+        lock = stack.enter_context(create_lock(tmp_path, SHARED))
+        stack.enter_context(threading.Lock())
+
+        assert stack.locks == [lock]
+        assert not stack.check()
+
+        lock.lost = True
+
+        with pytest.raises(RuntimeError):
+            stack.check()
+
+
+def test_restore_should_stop_when_a_lock_is_lost(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch
+):
+    '''
+    Test aborting direct restores at their next checkpoint once a lock lease
+    expired and was removed.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+        monkeypatch (pytest.MonkeyPatch): Attribute patcher.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    version_path = tmp_path / 'volume' / '.backup' / 'version'
+    version_path.mkdir(parents=True)
+
+    for index in range(3):
+        (version_path / f'file-{index}').touch()
+
+    operator = BackupOperator(
+        ContextConfiguration(
+            context=ContextType.SUBPATH,
+            path=tmp_path / 'volume',
+            lock_lease=0.3
+        ),
+        BackupConfiguration()
+    )
+    checkpoints = []
+
+    def remove_holders() -> bool:
+        for path in (operator.metadata_path / LOCK_DIRECTORY_NAME).glob('*/*'):
+            if not path.name.startswith('.'):
+                path.unlink()
+
+        time.sleep(0.3)
+        checkpoints.append(time.monotonic())
+
+        return False
+
+    monkeypatch.setattr(backup, 'CHECKPOINT_INTERVAL', 1)
+
+    with pytest.raises(RuntimeError, match='lost lock'):
+        operator.restore(
+            RestoreConfiguration(
+                version=0,
+                destination=tmp_path / 'destination',
+                engine='native'
+            ),
+            remove_holders
+        )
+
+    assert len(checkpoints) == 1
@@ -0,0 +1,127 @@
+'''
+Test backup version manifests.
+'''
+
+import os
+from pathlib import Path
+
+import pytest
+
+from nfsops.configurations.backup import BackupConfiguration
+from nfsops.configurations.context import ContextConfiguration
+from nfsops.context_type import ContextType
+from nfsops.operators.backup import BackupOperator
+from nfsops.operators.diff import FileSystemTree, diff_trees
+from nfsops.operators.file_table import FileTableTree
+from nfsops.operators.manifest import Manifest, write_manifest
+from nfsops.operators.merge import walk_merged
+
+
+def test_manifest_should_find_paths_in_any_record_order(tmp_path: Path):
+    '''
+    Test writing unsorted entries and looking them up by path.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    (tmp_path / 'source' / 'directory' / 'nested').mkdir(parents=True)
+    (tmp_path / 'source' / 'directory' / 'file').write_text('content')
+    (tmp_path / 'source' / 'directory-file').write_text('file')
+    entries = list(walk_merged([tmp_path / 'source']))
+
+    assert write_manifest(reversed(entries), tmp_path / 'manifest') == 4
+
+    with Manifest(tmp_path / 'manifest') as manifest:
+        assert [record.path for record in manifest] == \
+            [entry.path for entry in entries]
+
+        file_record = manifest.get('directory/file')
+
+        assert file_record is not None and file_record.size == 7
+        assert manifest.get('missing') is None
+        assert [
+            manifest[index].path for index in manifest.iter_children('')
+        ] == ['directory', 'directory-file']
+        assert [
+            manifest[index].path for index in manifest.subtree('directory')
+        ] == ['directory', 'directory/file', 'directory/nested']
+
+    (tmp_path / 'manifest').write_bytes(b'NFSMAN')
+
+    with pytest.raises(ValueError):
+        Manifest(tmp_path / 'manifest')
+
+
+def test_manifest_tree_should_match_file_system_diff(tmp_path: Path):
+    '''
+    Test diffing manifests like the backup version directories.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    sources = [tmp_path / 'first', tmp_path / 'second']
+
+    for source in sources:
+        (source / 'directory').mkdir(parents=True)
+        (source / 'directory' / 'file').write_text(source.name)
+
+    (sources[0] / 'removed').touch()
+    (sources[1] / 'directory' / 'added').mkdir()
+
+    for source in sources:
+        write_manifest(walk_merged([source]), tmp_path / f'{source.name}.bin')
+
+    with Manifest(tmp_path / 'first.bin') as first, \
+            Manifest(tmp_path / 'second.bin') as second:
+        assert list(
+            diff_trees(
+                FileTableTree(first, sources[0]),
+                FileTableTree(second, sources[1])
+            )
+        ) == list(
+            diff_trees(
+                FileSystemTree(sources[0]),
+                FileSystemTree(sources[1])
+            )
+        )
+
+
+def test_backup_operator_should_ignore_outdated_manifests(tmp_path: Path):
+    '''
+    Test building manifests and detecting modified backup versions.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    version_path = tmp_path / '.backup' / 'version'
+    version_path.mkdir(parents=True)
+    (version_path / 'file').touch()
+    os.utime(version_path, ns=(0, 0))
+
+    operator = BackupOperator(
+        ContextConfiguration(context=ContextType.SUBPATH, path=tmp_path),
+        BackupConfiguration()
+    )
+
+    assert operator.open_manifest(0) is None
+    assert operator.build_manifest(0).is_file()
+
+    manifest = operator.open_manifest(0)
+
+    assert manifest is not None
+
+    with manifest:
+        assert [record.path for record in manifest] == ['file']
+
+    (version_path / 'other').touch()
+
+    assert operator.open_manifest(0) is None
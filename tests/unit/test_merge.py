@@ -0,0 +1,155 @@
+'''
+Test backup version merge and archive functions.
+'''
+
+import io
+from pathlib import Path
+
+from nfsops.operators import archive
+from nfsops.operators.merge import walk_merged
+from nfsops.operators.path_filter import PathFilter
+
+
+def create_versions(path: Path) -> list:
+    '''
+    Create two backup versions sharing files and directories.
+
+    Parameters:
+        path (Path): Temporary directory.
+    Returns:
+        list: Backup version paths, newest first.
+    '''
+
+    new_path = path / 'new'
+    old_path = path / 'old'
+
+    (new_path / 'directory').mkdir(parents=True)
+    (new_path / 'directory' / 'file').write_text('new')
+    (new_path / 'shadow').write_text('new')
+    (old_path / 'directory').mkdir(parents=True)
+    (old_path / 'directory' / 'file').write_text('old')
+    (old_path / 'directory' / 'old-file').write_text('old')
+    (old_path / 'shadow').mkdir()
+    (old_path / 'shadow' / 'hidden').write_text('old')
+
+    return [new_path, old_path]
+
+
+def test_walk_merged_should_yield_newest_entries_in_sorted_order(tmp_path: Path):
+    '''
+    Test merging backup versions, newest wins.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    entries = [
+        (entry.path, entry.version)
+        for entry in walk_merged(create_versions(tmp_path))
+    ]
+
+    assert entries == [
+        ('directory', 0),
+        ('directory/file', 0),
+        ('directory/old-file', 1),
+        ('shadow', 0)
+    ]
+
+
+def test_write_archive_should_round_trip_merged_view(tmp_path: Path):
+    '''
+    Test streaming the merged view into an archive and extracting it.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    buffer = io.BytesIO()
+
+    with archive.open_compressed_writer(buffer, 'gzip') as stream:
+        archive.write_archive(walk_merged(create_versions(tmp_path)), stream)
+
+    buffer.seek(0)
+    destination = tmp_path / 'destination'
+    destination.mkdir()
+
+    with archive.open_compressed_reader(buffer) as stream:
+        files, _ = archive.extract_archive(stream, destination)
+
+    assert files == 4
+    assert (destination / 'directory' / 'file').read_text() == 'new'
+    assert (destination / 'directory' / 'old-file').read_text() == 'old'
+    assert (destination / 'shadow').read_text() == 'new'
+
+
+def test_walk_merged_should_only_visit_selected_subtrees(tmp_path: Path):
+    '''
+    Test pushing path prefixes and exclude patterns down into the walk.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    sources = create_versions(tmp_path)
+    (sources[1] / 'directory' / 'cache').mkdir()
+    (sources[1] / 'directory' / 'cache' / 'file').touch()
+
+    entries = [
+        (entry.path, entry.version)
+        for entry in walk_merged(
+            sources,
+            path_filter=PathFilter(
+                prefixes=['directory/', 'shadow/hidden'],
+                exclude=['cache']
+            )
+        )
+    ]
+
+    assert entries == [
+        ('directory', 0),
+        ('directory/file', 0),
+        ('directory/old-file', 1)
+    ]
+
+
+def test_walk_merged_should_yield_prefix_ancestors(tmp_path: Path):
+    '''
+    Test walks restricted to nested prefixes and include patterns yielding
+    every parent directory of their files.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    sources = create_versions(tmp_path)
+    (sources[1] / 'directory' / 'nested' / 'deep').mkdir(parents=True)
+    (sources[1] / 'directory' / 'nested' / 'deep' / 'file.py').touch()
+    (sources[0] / 'directory' / 'nested').mkdir()
+    (sources[0] / 'directory' / 'nested' / 'other').touch()
+
+    entries = [
+        (entry.path, entry.version)
+        for entry in walk_merged(
+            sources,
+            path_filter=PathFilter(
+                prefixes=['directory/nested/deep', 'directory/nested/other'],
+                include=['*.py', 'other']
+            )
+        )
+    ]
+
+    assert entries == [
+        ('directory', 0),
+        ('directory/nested', 0),
+        ('directory/nested/deep', 1),
+        ('directory/nested/deep/file.py', 1),
+        ('directory/nested/other', 0)
+    ]
@@ -0,0 +1,102 @@
+'''
+Test merged views of backup versions.
+'''
+
+import os
+from pathlib import Path
+
+import pytest
+
+from nfsops.configurations.backup import BackupConfiguration
+from nfsops.configurations.context import ContextConfiguration
+from nfsops.configurations.version_range import VersionRangeConfiguration
+from nfsops.context_type import ContextType
+from nfsops.latency import LatencyProfile, LatencyShim
+from nfsops.operators.backup import BackupOperator
+from nfsops.operators.merged_view import MergedView
+from nfsops.operators.stat_cache import StatCache
+
+
+def test_merged_view_should_resolve_newest_owners_from_memory(tmp_path: Path):
+    '''
+    Test resolving and listing paths, newest wins, repeated lookups without
+    round trips.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    new, old = tmp_path / 'new', tmp_path / 'old'
+    (new / 'directory').mkdir(parents=True)
+    (old / 'directory' / 'hidden').mkdir(parents=True)
+    (new / 'directory' / 'file').write_text('new')
+    (old / 'directory' / 'file').write_text('old')
+    (old / 'directory' / 'old-file').write_text('old')
+    (old / 'directory' / 'hidden' / 'file').write_text('old')
+    (new / 'directory' / 'hidden').write_text('new')
+
+    view = MergedView([new, old], StatCache(maxsize=0))
+
+    with LatencyShim(LatencyProfile('test'), 0.0, [tmp_path]) as shim:
+        with view.open('directory/file') as file:
+            content = file.read()
+
+        first = sum(shim.round_trips.values())
+
+        assert view.resolve('/directory//file').version == 0
+        assert sum(shim.round_trips.values()) == first
+
+        assert view.resolve('directory/old-file').version == 1
+        assert sum(shim.round_trips.values()) == first + 2
+
+    assert content == b'new'
+    assert [
+        (entry.path, entry.version) for entry in view.listdir('directory')
+    ] == [
+        ('directory/file', 0),
+        ('directory/hidden', 0),
+        ('directory/old-file', 1)
+    ]
+
+    with pytest.raises(FileNotFoundError):
+        view.resolve('directory/hidden/file')
+
+    with pytest.raises(IsADirectoryError):
+        view.open('directory')
+
+    with pytest.raises(NotADirectoryError):
+        view.listdir('directory/file')
+
+
+def test_open_merged_should_read_files_without_restoring(tmp_path: Path):
+    '''
+    Test reading a file from the merged view of a backup version range.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    for mtime, name in enumerate(['old', 'new']):
+        version_path = tmp_path / '.backup' / name
+        version_path.mkdir(parents=True)
+        (version_path / name).write_text(name)
+        os.utime(version_path, ns=(mtime, mtime))
+
+    operator = BackupOperator(
+        ContextConfiguration(context=ContextType.SUBPATH, path=tmp_path),
+        BackupConfiguration()
+    )
+
+    with operator.open_merged(
+        'old',
+        VersionRangeConfiguration(version=0, final_version='*')
+    ) as file:
+        assert file.read() == b'old'
+
+    with pytest.raises(FileNotFoundError):
+        with operator.open_merged('old', VersionRangeConfiguration(version=0)):
+            pass
@@ -0,0 +1,104 @@
+'''
+Test metadata application.
+'''
+
+import errno
+import os
+from pathlib import Path
+
+from nfsops.operators.merge import walk_merged
+from nfsops.operators.metadata import ANY_ID, MetadataStage, OwnershipMap
+from nfsops.operators.transfer import NativeTransferEngine
+
+
+def test_ownership_map_should_remap_owners():
+    '''
+    Test translating source owners, with a fallback for any other ID.
+
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    stat_result = os.stat_result((0o100644, 0, 0, 1, 1000, 100, 0, 0, 0, 0))
+    ownership = OwnershipMap(uids={1000: 2000}, gids={ANY_ID: 3000, 50: 60})
+
+    assert ownership.get_owner(stat_result) == (2000, 3000)
+    assert OwnershipMap().get_owner(stat_result) == (1000, 100)
+    assert OwnershipMap(False).get_owner(stat_result) == (-1, -1)
+    assert ownership.get_rsync_arguments() == [
+        '--usermap=1000:2000',
+        '--groupmap=50:60,*:3000'
+    ]
+    assert OwnershipMap(False).get_rsync_arguments() == \
+        ['--no-owner', '--no-group']
+
+
+def test_metadata_stage_should_apply_changed_metadata_after_transfer(
+    tmp_path: Path
+):
+    '''
+    Test deferring metadata to the stage, including read-only directories,
+    remapped owners when running as root and extended attributes when
+    supported, then skipping the values already in place.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    source = tmp_path / 'source'
+    destination = tmp_path / 'destination'
+    file_path = source / 'directory' / 'nested' / 'file'
+    file_path.parent.mkdir(parents=True)
+    file_path.write_bytes(b'content')
+    (source / 'link').symlink_to('directory/nested/file')
+
+    try:
+        os.setxattr(file_path, 'user.nfsops', b'value')
+        xattrs = True
+    except OSError as exception:
+        assert exception.errno in (errno.ENOTSUP, errno.EOPNOTSUPP)
+        xattrs = False
+
+    os.chmod(file_path, 0o640)
+    os.utime(file_path, ns=(1, 2))
+    os.chmod(file_path.parent, 0o555)
+    os.utime(file_path.parent, ns=(3, 4))
+    destination.mkdir()
+
+    stage = MetadataStage(OwnershipMap(uids={ANY_ID: 1234}), xattrs)
+    entries = list(walk_merged([source]))
+
+    try:
+        NativeTransferEngine(metadata=stage).transfer(
+            [source],
+            entries,
+            destination
+        )
+
+        assert os.stat(destination / 'directory' / 'nested').st_mode & \
+            0o777 != 0o555
+
+        calls = stage.apply(destination)
+        target = destination / 'directory' / 'nested' / 'file'
+        target_stat = os.stat(target)
+
+        assert calls > 0
+        assert target.read_bytes() == b'content'
+        assert target_stat.st_mode & 0o777 == 0o640
+        assert target_stat.st_mtime_ns == 2
+        assert os.stat(target.parent).st_mode & 0o777 == 0o555
+        assert os.stat(target.parent).st_mtime_ns == 4
+        assert os.readlink(destination / 'link') == 'directory/nested/file'
+        assert target_stat.st_uid == \
+            (1234 if os.geteuid() == 0 else os.geteuid())
+        assert not xattrs or os.getxattr(target, 'user.nfsops') == b'value'
+
+        for entry in entries:
+            stage.add(entry)
+
+        assert stage.apply(destination) == 0
+    finally:
+        os.chmod(file_path.parent, 0o755)
+        os.chmod(destination / 'directory' / 'nested', 0o755)
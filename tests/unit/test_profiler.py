@@ -0,0 +1,89 @@
+'''
+Test profilers.
+'''
+
+import pstats
+import threading
+import time
+from pathlib import Path
+
+from nfsops.profiler import ProfileMode, Profiler, get_profiler, profile_phase
+
+
+def busy_phase() -> None:
+    '''
+    Run a phase spending time in the main and in a worker thread.
+    '''
+
+    def spin():
+        deadline = time.perf_counter() + 0.05
+
+        while time.perf_counter() < deadline:
+            pass
+
+    with profile_phase('selected'):
+        thread = threading.Thread(target=spin)
+        thread.start()
+        spin()
+        thread.join()
+
+
+def test_cprofile_should_profile_selected_phases_only(tmp_path: Path):
+    '''
+    Test profiling the threads of a selected phase and timing every phase.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    profiler = Profiler(
+        ProfileMode.CPROFILE,
+        tmp_path / 'profile',
+        ['selected']
+    )
+    profiler.start()
+
+    assert get_profiler() is profiler
+
+    with profile_phase('other'):
+        time.sleep(0.01)
+
+    busy_phase()
+    summary = profiler.stop()
+    functions = {
+        function[2]
+        for function in pstats.Stats(str(profiler.path)).stats  # type: ignore
+    }
+
+    assert get_profiler() is None
+    assert 'spin' in functions and 'sleep' not in functions
+    assert 'phase other: calls=1' in summary
+    assert 'phase selected: calls=1' in summary
+    assert (tmp_path / 'profile.summary').read_text() == summary + '\n'
+
+
+def test_wall_profiler_should_write_collapsed_stacks(tmp_path: Path):
+    '''
+    Test sampling the stacks of all threads.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    profiler = Profiler(ProfileMode.WALL, tmp_path / 'profile', interval=0.001)
+    profiler.start()
+    busy_phase()
+    profiler.stop()
+
+    lines = (tmp_path / 'profile.collapsed').read_text().splitlines()
+
+    assert lines
+    assert all(line.rsplit(' ', 1)[1].isdigit() for line in lines)
+    assert any(
+        line.startswith('Thread-') and 'spin (test_profiler.py' in line
+        for line in lines
+    )
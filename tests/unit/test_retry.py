@@ -0,0 +1,141 @@
+'''
+Test retry policies.
+'''
+
+import errno
+import os
+import subprocess
+import time
+
+import pytest
+
+from nfsops.operators.retry import RetryPolicy, run_with_watchdog
+
+
+def create_policy(**kwargs) -> RetryPolicy:
+    '''
+    Create a retry policy without backoff delays.
+
+    Parameters:
+        **kwargs: Retry policy parameters.
+    Returns:
+        RetryPolicy: A retry policy instance.
+    '''
+
+    policy = RetryPolicy(**kwargs)
+    policy.get_delay = lambda attempt: 0.0  # type: ignore
+
+    return policy
+
+
+def test_call_should_retry_transient_errors():
+    '''
+    Test retrying an operation until it succeeds, counting the retries.
+
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    policy = create_policy(retries=3)
+    attempts = []
+
+    def operation() -> str:
+        attempts.append(None)
+
+        if len(attempts) < 3:
+            raise OSError(errno.ESTALE, os.strerror(errno.ESTALE))
+
+        return 'done'
+
+    assert policy.call(operation) == 'done'
+    assert policy.retry_count == 2
+    assert not policy.is_open
+
+    with pytest.raises(FileNotFoundError):
+        policy.call(lambda: os.lstat('/nonexistent'))
+
+    assert policy.retry_count == 2
+
+
+def test_call_should_open_the_circuit_after_repeated_failures():
+    '''
+    Test failing immediately once the failure threshold is reached.
+
+    Raises:
+        AssertionError: Expected exception not raised.
+    '''
+
+    policy = create_policy(retries=1, failure_threshold=3)
+
+    def operation() -> None:
+        raise OSError(errno.EIO, os.strerror(errno.EIO))
+
+    with pytest.raises(OSError):
+        policy.call(operation)
+
+    with pytest.raises(RuntimeError):
+        policy.call(operation)
+
+    assert policy.is_open
+
+    with pytest.raises(RuntimeError):
+        policy.call(lambda: None)
+
+
+def test_call_should_only_count_consecutive_transient_failures():
+    '''
+    Test the failure count ignoring expected errors, reset by successes and
+    by a trial operation once the circuit is half-open.
+
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    policy = create_policy(retries=0, max_delay=0.05, failure_threshold=2)
+
+    def operation() -> None:
+        raise OSError(errno.EIO, os.strerror(errno.EIO))
+
+    for _ in range(3):
+        with pytest.raises(FileNotFoundError):
+            policy.call(lambda: os.lstat('/nonexistent'))
+
+    with pytest.raises(OSError):
+        policy.call(operation)
+
+    policy.record_success()
+
+    with pytest.raises(OSError):
+        policy.call(operation)
+
+    with pytest.raises(RuntimeError):
+        policy.call(operation)
+
+    assert policy.is_open
+
+    time.sleep(0.1)
+
+    assert not policy.is_open
+    assert policy.call(lambda: 'done') == 'done'
+
+    with pytest.raises(OSError):
+        policy.call(operation)
+
+
+def test_run_with_watchdog_should_kill_hung_processes():
+    '''
+    Test killing a subprocess running past its timeout.
+
+    Raises:
+        AssertionError: Expected exception not raised.
+    '''
+
+    start = time.monotonic()
+
+    with pytest.raises(subprocess.TimeoutExpired):
+        run_with_watchdog(['sleep', '30'], 0.1)
+
+    assert time.monotonic() - start < 10
+
+    with pytest.raises(subprocess.CalledProcessError):
+        run_with_watchdog(['false'])
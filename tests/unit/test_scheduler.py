@@ -0,0 +1,153 @@
+'''
+Test I/O scheduling.
+'''
+
+import threading
+import time
+from pathlib import Path
+
+from nfsops.operators.merge import walk_merged
+from nfsops.operators.scheduler import IOScheduler
+from nfsops.operators.stat_cache import ScandirPrefetcher, StatCache
+
+
+def test_scheduler_should_batch_files_by_directory(tmp_path: Path):
+    '''
+    Test dispatching directories inline and files in per-directory batches.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    source = tmp_path / 'source'
+
+    for directory in ['a', 'b', 'b/c']:
+        (source / directory).mkdir(parents=True)
+
+        for index in range(5):
+            (source / directory / f'file-{index}').write_bytes(b'content')
+
+    (source / 'a' / 'large').write_bytes(b'content' * 100)
+
+    scheduler = IOScheduler(window_size=8, small_file_size=100, batch_size=2)
+    entries = list(walk_merged([source], StatCache(maxsize=0)))
+    directories = []
+    files = []
+    lock = threading.Lock()
+
+    def process_file(entry):
+        with lock:
+            files.append(entry.path)
+
+    scheduler.run(
+        entries,
+        lambda entry: directories.append(entry.path),
+        process_file
+    )
+
+    assert directories == ['a', 'b', 'b/c']
+    assert sorted(files) == sorted(
+        entry.path for entry in entries if not entry.is_dir
+    )
+
+    batches = scheduler.schedule(
+        [entry for entry in entries if not entry.is_dir],
+        {}
+    )
+
+    assert [['a/large']] == [
+        [entry.path for entry in batch] for batch in batches
+        if batch[0].path == 'a/large'
+    ]
+    assert all(len(batch) <= 2 for batch in batches)
+    assert all(
+        len({entry.path.rsplit('/', 1)[0] for entry in batch}) == 1
+        for batch in batches
+    )
+
+
+def test_walk_merged_should_match_with_prefetcher(tmp_path: Path):
+    '''
+    Test walking backup versions with a directory listing prefetcher.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    newest = tmp_path / 'newest'
+    oldest = tmp_path / 'oldest'
+
+    for root in [newest, oldest]:
+        for directory in ['a/b', 'c']:
+            (root / directory).mkdir(parents=True)
+            (root / directory / root.name).write_text('content')
+
+    expected = [
+        (entry.path, entry.version)
+        for entry in walk_merged([newest, oldest], StatCache(maxsize=0))
+    ]
+
+    with ScandirPrefetcher(StatCache(maxsize=0), max_pending=2) as prefetcher:
+        result = [
+            (entry.path, entry.version)
+            for entry in walk_merged(
+                [newest, oldest],
+                StatCache(maxsize=0),
+                prefetcher=prefetcher
+            )
+        ]
+
+    assert result == expected
+
+
+def test_scheduler_should_not_wait_for_slow_tasks(tmp_path: Path):
+    '''
+    Test that a slow large file task does not hold back the small file tasks
+    dispatched after it once the in-flight window is full.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    source = tmp_path / 'source'
+    (source / 'small').mkdir(parents=True)
+    (source / 'large').write_bytes(b'content' * 100)
+
+    for index in range(32):
+        (source / 'small' / f'file-{index}').write_bytes(b'content')
+
+    scheduler = IOScheduler(
+        max_workers=2,
+        max_in_flight=2,
+        small_file_size=100,
+        batch_size=1
+    )
+    small_files = []
+    small_done = threading.Event()
+    released = []
+
+    def process_file(entry):
+        if entry.path == 'large':
+            released.append(small_done.wait(timeout=5.0))
+            return
+
+        time.sleep(0.01)
+        small_files.append(entry.path)
+
+        if len(small_files) == 32:
+            small_done.set()
+
+    scheduler.run(
+        walk_merged([source], StatCache(maxsize=0)),
+        lambda entry: None,
+        process_file
+    )
+
+    assert released == [True]
+    assert len(small_files) == 32
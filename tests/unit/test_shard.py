@@ -0,0 +1,145 @@
+'''
+Test sharded restores.
+'''
+
+import os
+import stat
+import subprocess
+import sys
+import threading
+from pathlib import Path
+from typing import Callable
+
+import pytest
+
+from nfsops.configurations.restore_report import RestoreReportConfiguration
+from nfsops.latency import LatencyProfile, LatencyShim
+from nfsops.operators.backup import BackupOperator
+from nfsops.operators.file_table import FileTable
+from nfsops.operators.shard import split_shards
+
+
+def test_split_shards_should_cut_before_directories():
+    '''
+    Test splitting a restore plan by size, keeping small directories whole.
+
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    table = FileTable()
+
+    for directory in ['a', 'b', 'c']:
+        table.append(directory, 0, 0, stat.S_IFDIR | 0o755, 0)
+
+        for name in ['1', '2', '3']:
+            table.append(f'{directory}/{name}', 10, 0, stat.S_IFREG, 0)
+
+    assert [(shard.start, shard.end) for shard in split_shards(table, 20)] \
+        == [(0, 4), (4, 8), (8, 12)]
+    assert [(shard.start, shard.end) for shard in split_shards(table, 8)] \
+        == [(0, 3), (3, 4), (4, 7), (7, 8), (8, 11), (11, 12)]
+    assert len(split_shards(table, 1000)) == 1
+
+
+def test_sharded_restore_should_be_shared_with_worker_processes(
+    tmp_path: Path,
+    restore: Callable[..., RestoreReportConfiguration]
+):
+    '''
+    Test restoring shards with the coordinator and worker processes, the
+    coordinator being slowed down by simulated latency.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+        restore (Callable[..., RestoreReportConfiguration]): Restore function.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    volume = tmp_path / 'volume'
+    destination = tmp_path / 'destination'
+
+    for mtime, names in enumerate([['new', 'old'], ['new']]):
+        version_path = volume / '.backup' / f'{mtime}'
+
+        for index in range(20):
+            directory = version_path / f'{index:02d}'
+            directory.mkdir(parents=True)
+
+            for name in names:
+                (directory / name).write_text(names[-1])
+
+            os.utime(directory, ns=(mtime, mtime))
+
+        os.utime(version_path, ns=(mtime, mtime))
+
+    command = [
+        sys.executable, '-c',
+        'from nfsops.cli.main import app; app()',
+        '--context', 'subpath', '--path', str(volume),
+        'backup', 'restore-worker', '--poll-interval', '0.1'
+    ]
+    workers = [
+        subprocess.Popen(  # pylint: disable=R1732
+            command,
+            cwd=Path(__file__).parents[2],
+            stdout=subprocess.DEVNULL
+        )
+        for _ in range(2)
+    ]
+
+    try:
+        with LatencyShim(LatencyProfile('slow', open=0.05), 1.0, [destination]):
+            report = restore(version='*', sharded=True, shard_size=1)
+    finally:
+        for worker in workers:
+            worker.terminate()
+            worker.wait()
+
+    assert report.shards == 40
+    assert report.files == 60
+    assert report.bytes == 120
+    assert len(report.workers) >= 2
+    assert (destination / '05' / 'new').read_text() == 'new'
+    assert (destination / '05' / 'old').read_text() == 'old'
+    assert os.stat(destination / '19').st_mtime_ns == 1
+    assert not any((volume / '.nfsops' / 'restores').iterdir())
+    assert threading.active_count() == 1
+
+
+@pytest.mark.parametrize('manifest', [False, True])
+def test_sharded_restore_should_create_parents_of_prefixes(
+    tmp_path: Path,
+    backup_operator: BackupOperator,
+    restore: Callable[..., RestoreReportConfiguration],
+    manifest: bool
+):
+    '''
+    Test sharded restores of a nested prefix into an empty destination,
+    planned by walking the backup version or from its manifest.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+        backup_operator (BackupOperator): Backup operator of the volume.
+        restore (Callable[..., RestoreReportConfiguration]): Restore function.
+        manifest (bool): Whether to build the backup version manifest.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    source = tmp_path / 'volume' / '.backup' / 'version' / 'src' / 'lib'
+    source.mkdir(parents=True)
+    (source / 'module.py').write_text('module')
+    (source.parent / 'other.py').write_text('other')
+
+    if manifest:
+        backup_operator.build_manifest(0)
+
+    report = restore(prefixes=['src/lib'], sharded=True)
+
+    destination = tmp_path / 'destination' / 'src'
+
+    assert report.files == 3
+    assert (destination / 'lib' / 'module.py').read_text() == 'module'
+    assert not (destination / 'other.py').exists()
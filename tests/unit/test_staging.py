@@ -0,0 +1,151 @@
+'''
+Test staged restores.
+'''
+
+import errno
+import os
+import shutil
+from pathlib import Path
+from typing import Callable, Literal
+
+import pytest
+
+from nfsops.configurations.restore import RestoreConfiguration
+from nfsops.configurations.restore_report import RestoreReportConfiguration
+from nfsops.operators import staging
+from nfsops.operators.backup import BackupOperator
+
+
+def test_staged_restore_should_swap_a_linked_clone(
+    tmp_path: Path,
+    backup_operator: BackupOperator,
+    restore: Callable[..., RestoreReportConfiguration]
+):
+    '''
+    Test restoring into a staging directory and swapping it into place.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+        backup_operator (BackupOperator): Backup operator of the volume.
+        restore (Callable[..., RestoreReportConfiguration]): Restore function.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    version_path = tmp_path / 'volume' / '.backup' / 'version'
+    destination = tmp_path / 'destination'
+    (version_path / 'directory').mkdir(parents=True)
+    (version_path / 'directory' / 'unchanged').write_text('unchanged')
+    (version_path / 'restored').write_text('restored')
+    (destination / 'directory').mkdir(parents=True)
+    (destination / 'directory' / 'unchanged').write_text('unchanged')
+    (destination / 'restored').write_text('old')
+    (destination / 'kept').write_text('kept')
+    os.utime(version_path / 'directory' / 'unchanged', ns=(0, 0))
+    os.utime(destination / 'directory' / 'unchanged', ns=(0, 0))
+    unchanged_inode = os.lstat(destination / 'directory' / 'unchanged').st_ino
+
+    report = restore(staged=True)
+
+    assert report.swap in ('exchange', 'rename')
+    assert report.files == 3
+    assert (destination / 'restored').read_text() == 'restored'
+    assert (destination / 'kept').read_text() == 'kept'
+    assert os.lstat(destination / 'directory' / 'unchanged').st_ino == \
+        unchanged_inode
+    assert sorted(os.listdir(tmp_path)) == ['destination', 'volume']
+
+    with pytest.raises(ValueError):
+        backup_operator.restore(RestoreConfiguration(version=0, staged=True))
+
+
+def test_swap_directories_should_fall_back_to_rename(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch
+):
+    '''
+    Test swapping directories without atomic exchange support.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+        monkeypatch (pytest.MonkeyPatch): Attribute patching fixture.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    def rename_exchange(first: Path, second: Path) -> None:
+        raise OSError(errno.EINVAL, os.strerror(errno.EINVAL))
+
+    monkeypatch.setattr(staging, 'rename_exchange', rename_exchange)
+    (tmp_path / 'staging').mkdir()
+    (tmp_path / 'staging' / 'new').touch()
+    (tmp_path / 'destination').mkdir()
+    (tmp_path / 'destination' / 'old').touch()
+
+    replaced, method = staging.swap_directories(
+        tmp_path / 'staging',
+        tmp_path / 'destination'
+    )
+
+    assert method == 'rename'
+    assert os.listdir(tmp_path / 'destination') == ['new']
+    assert replaced is not None and os.listdir(replaced) == ['old']
+
+
+@pytest.mark.parametrize('engine', [
+    'native',
+    pytest.param(
+        'rsync',
+        marks=pytest.mark.skipif(
+            shutil.which('rsync') is None,
+            reason='rsync is not installed.'
+        )
+    )
+])
+def test_staged_restore_should_not_modify_destination_before_swap(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    restore: Callable[..., RestoreReportConfiguration],
+    engine: Literal['native', 'rsync']
+):
+    '''
+    Test staged restores leaving the metadata of destination files unchanged
+    until the staging directory is swapped into place.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+        monkeypatch (pytest.MonkeyPatch): Attribute patching fixture.
+        restore (Callable[..., RestoreReportConfiguration]): Restore function.
+        engine (Literal['native', 'rsync']): Transfer engine name.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    version_path = tmp_path / 'volume' / '.backup' / 'version'
+    destination = tmp_path / 'destination'
+    version_path.mkdir(parents=True)
+    destination.mkdir()
+
+    for path, mode in [(version_path, 0o640), (destination, 0o600)]:
+        (path / 'file').write_text('same')
+        os.chmod(path / 'file', mode)
+        os.utime(path / 'file', ns=(0, 0))
+
+    expected = os.stat(destination / 'file')
+    swapped = []
+    swap_directories = staging.swap_directories
+
+    def check_and_swap(source: Path, target: Path) -> tuple:
+        current = os.stat(target / 'file')
+        swapped.append((current.st_mode, current.st_mtime_ns))
+
+        return swap_directories(source, target)
+
+    monkeypatch.setattr(staging, 'swap_directories', check_and_swap)
+
+    restore(engine=engine, staged=True)
+
+    restored = os.stat(destination / 'file')
+
+    assert swapped == [(expected.st_mode, expected.st_mtime_ns)]
+    assert (restored.st_mode & 0o777, restored.st_mtime_ns) == (0o640, 0)
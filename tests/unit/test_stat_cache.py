@@ -0,0 +1,110 @@
+'''
+Test stat cache.
+'''
+
+import os
+from pathlib import Path
+
+from nfsops import StatCache
+from nfsops.operators.stat_cache import get_attribute_cache_timeouts
+
+
+def test_stat_should_count_hits_and_misses(tmp_path: Path):
+    '''
+    Test counting cache hits and misses.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    stat_cache = StatCache(default_timeout=60.0)
+
+    stat_cache.stat(tmp_path)
+    stat_cache.stat(tmp_path)
+
+    assert stat_cache.cache_info()[:2] == (1, 1)
+
+
+def test_scandir_should_fill_cache_with_directory_entries(tmp_path: Path):
+    '''
+    Test filling the cache in bulk from directory entries.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    (tmp_path / 'file').write_bytes(b'content')
+
+    stat_cache = StatCache(default_timeout=60.0)
+    stat_cache.scandir(tmp_path)
+
+    assert stat_cache.stat(tmp_path / 'file').st_size == 7
+    assert stat_cache.cache_info().misses == 0
+
+
+def test_invalidate_tree_should_remove_nested_entries(tmp_path: Path):
+    '''
+    Test invalidating a directory and the paths below it.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    (tmp_path / 'directory').mkdir()
+    (tmp_path / 'directory' / 'file').touch()
+    (tmp_path / 'directory-sibling').touch()
+
+    stat_cache = StatCache(default_timeout=60.0)
+    stat_cache.scandir(tmp_path)
+    stat_cache.scandir(tmp_path / 'directory')
+    stat_cache.invalidate_tree(tmp_path / 'directory')
+    os.utime(tmp_path / 'directory' / 'file', (0, 0))
+
+    assert stat_cache.stat(tmp_path / 'directory' / 'file').st_mtime == 0
+    assert stat_cache.cache_info().misses == 1
+    assert stat_cache.stat(tmp_path / 'directory-sibling')
+    assert stat_cache.cache_info().misses == 1
+
+
+def test_stat_should_evict_least_recently_used_entries(tmp_path: Path):
+    '''
+    Test bounding the cache size.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    for name in 'abc':
+        (tmp_path / name).touch()
+
+    stat_cache = StatCache(maxsize=2, default_timeout=60.0)
+
+    for name in 'abca':
+        stat_cache.stat(tmp_path / name)
+
+    assert stat_cache.cache_info()[:2] == (0, 4)
+    assert stat_cache.cache_info().currsize == 2
+
+
+def test_get_attribute_cache_timeouts_should_follow_nfs_mount_options():
+    '''
+    Test deriving timeouts from NFS mount options.
+
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    assert get_attribute_cache_timeouts({}) == (3.0, 30.0)
+    assert get_attribute_cache_timeouts(
+        {'acregmin': '1', 'acdirmin': '5'}
+    ) == (1.0, 5.0)
+    assert get_attribute_cache_timeouts({'actimeo': '7'}) == (7.0, 7.0)
+    assert get_attribute_cache_timeouts({'noac': ''}) == (0.0, 0.0)
@@ -0,0 +1,182 @@
+'''
+Test transfer engines.
+'''
+
+import errno
+import os
+from pathlib import Path
+
+import pytest
+
+from nfsops.configurations.backup import BackupConfiguration
+from nfsops.configurations.context import ContextConfiguration
+from nfsops.configurations.restore import RestoreConfiguration
+from nfsops.context_type import ContextType
+from nfsops.operators.backup import BackupOperator
+from nfsops.operators.merge import walk_merged
+from nfsops.operators.transfer import (
+    NativeTransferEngine,
+    copy_file_data,
+    get_transfer_engine
+)
+
+
+def test_native_transfer_should_copy_entries_and_metadata(tmp_path: Path):
+    '''
+    Test copying files, links and directories with the native engine.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    source = tmp_path / 'source'
+    destination = tmp_path / 'destination'
+    (source / 'directory').mkdir(parents=True)
+    (source / 'directory' / 'file').write_bytes(b'content' * 1000)
+    (source / 'link').symlink_to('directory/file')
+    os.chmod(source / 'directory' / 'file', 0o640)
+    os.utime(source / 'directory', (0, 0))
+    destination.mkdir()
+
+    NativeTransferEngine().transfer(
+        [source],
+        walk_merged([source]),
+        destination
+    )
+
+    file_path = destination / 'directory' / 'file'
+
+    assert file_path.read_bytes() == b'content' * 1000
+    assert os.stat(file_path).st_mode & 0o777 == 0o640
+    assert os.readlink(destination / 'link') == 'directory/file'
+    assert os.stat(destination / 'directory').st_mtime == 0
+
+
+def test_native_transfer_should_reapply_metadata_of_unchanged_targets(
+    tmp_path: Path
+):
+    '''
+    Test that repeated transfers restore the mode of targets whose data is
+    already up to date.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    source = tmp_path / 'source'
+    destination = tmp_path / 'destination'
+    source.mkdir()
+    destination.mkdir()
+    (source / 'file').write_bytes(b'content')
+    os.chmod(source / 'file', 0o640)
+
+    NativeTransferEngine().transfer(
+        [source],
+        walk_merged([source]),
+        destination
+    )
+    os.chmod(destination / 'file', 0o777)
+    NativeTransferEngine().transfer(
+        [source],
+        walk_merged([source]),
+        destination
+    )
+
+    assert os.stat(destination / 'file').st_mode & 0o777 == 0o640
+
+
+@pytest.mark.parametrize('options', [
+    {'prefixes': ['src/lib']},
+    {'include': ['*.py']}
+])
+def test_native_restore_should_create_parents_of_filtered_entries(
+    tmp_path: Path,
+    options: dict
+):
+    '''
+    Test native restores of a prefix or include patterns into an empty
+    destination.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+        options (dict): Restore filter options.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    source = tmp_path / 'volume' / '.backup' / 'version' / 'src' / 'lib'
+    source.mkdir(parents=True)
+    (source / 'module.py').write_text('module')
+    os.chmod(source, 0o750)
+
+    BackupOperator(
+        ContextConfiguration(
+            context=ContextType.SUBPATH,
+            path=tmp_path / 'volume'
+        ),
+        BackupConfiguration()
+    ).restore(
+        RestoreConfiguration(
+            version=0,
+            destination=tmp_path / 'destination',
+            engine='native',
+            **options
+        )
+    )
+
+    destination = tmp_path / 'destination' / 'src' / 'lib'
+
+    assert (destination / 'module.py').read_text() == 'module'
+    assert os.stat(destination).st_mode & 0o777 == 0o750
+
+
+def test_get_transfer_engine_should_reject_unknown_engines():
+    '''
+    Test selecting an unknown transfer engine.
+
+    Raises:
+        AssertionError: Expected exception not raised.
+    '''
+
+    with pytest.raises(KeyError):
+        get_transfer_engine('unknown')
+
+
+def test_copy_file_data_should_retry_partial_writes(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch
+):
+    '''
+    Test the userspace copy loop writing a few bytes at a time.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+        monkeypatch (pytest.MonkeyPatch): Attribute patcher.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    def unsupported(*_) -> int:
+        raise OSError(errno.ENOSYS, os.strerror(errno.ENOSYS))
+
+    write = os.write
+    content = os.urandom(100000)
+    (tmp_path / 'source').write_bytes(content)
+
+    monkeypatch.setattr(os, 'copy_file_range', unsupported, raising=False)
+    monkeypatch.setattr(os, 'sendfile', unsupported)
+    monkeypatch.setattr(
+        os,
+        'write',
+        lambda fd, data: write(fd, bytes(data[:4096]))
+    )
+
+    with open(tmp_path / 'source', 'rb') as source, \
+            open(tmp_path / 'destination', 'wb') as destination:
+        copy_file_data(source.fileno(), destination.fileno(), len(content))
+
+    assert (tmp_path / 'destination').read_bytes() == content
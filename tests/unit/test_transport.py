@@ -0,0 +1,207 @@
+'''
+Test remote volumes through the ssh transport.
+'''
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+from nfsops.configurations.backup import BackupConfiguration
+from nfsops.configurations.context import ContextConfiguration
+from nfsops.configurations.restore import RestoreConfiguration
+from nfsops.configurations.version_range import VersionRangeConfiguration
+from nfsops.context_type import ContextType
+from nfsops.operators.backup import BackupOperator
+from nfsops.operators.transport import get_control_directory, get_transport
+
+#: `ssh` stand-in running remote commands locally, logging connections.
+SSH_SCRIPT = f'''#!{sys.executable}
+import os
+import subprocess
+import sys
+
+log = os.environ['NFSOPS_TEST_SSH_LOG']
+arguments = sys.argv[1:]
+
+if '-O' in arguments:
+    command = arguments[arguments.index('-O') + 1]
+
+    if command == 'exit' and os.path.exists(log + '.master'):
+        os.remove(log + '.master')
+
+    sys.exit(0 if os.path.exists(log + '.master') or command == 'exit' else 255)
+
+with open(log, 'a') as file:
+    file.write('master\\n' if '-N' in arguments else 'session\\n')
+
+if '-N' in arguments:
+    open(log + '.master', 'w').close()
+    sys.exit(0)
+
+sys.exit(subprocess.run(['sh', '-c', arguments[-1]]).returncode)
+'''
+
+
+@pytest.fixture(name='ssh_log')
+def fixture_ssh_log(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    '''
+    Put the `ssh` stand-in first in `PATH`.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+        monkeypatch (pytest.MonkeyPatch): Monkeypatch fixture.
+    Returns:
+        Path: Connection log path.
+    '''
+
+    bin_path = tmp_path / 'bin'
+    bin_path.mkdir()
+    (bin_path / 'ssh').write_text(SSH_SCRIPT)
+    (bin_path / 'ssh').chmod(0o755)
+
+    monkeypatch.setenv('PATH', f'{bin_path}{os.pathsep}{os.environ["PATH"]}')
+    monkeypatch.setenv('NFSOPS_TEST_SSH_LOG', str(tmp_path / 'ssh.log'))
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+    monkeypatch.setenv('XDG_RUNTIME_DIR', str(tmp_path / 'run'))
+
+    return tmp_path / 'ssh.log'
+
+
+def test_remote_stat_cache_should_match_local_stat(tmp_path: Path, ssh_log: Path):
+    '''
+    Test remote `stat` results and listings against local ones.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+        ssh_log (Path): Connection log path.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    volume = tmp_path / 'volume'
+    (volume / 'directory').mkdir(parents=True)
+    (volume / 'file name').write_bytes(b'data')
+    (volume / 'link').symlink_to('directory')
+    (volume / 'broken').symlink_to('missing')
+
+    stat_cache = get_transport(f'stat-{tmp_path.name}').stat_cache
+    entries = {entry.name: entry for entry in stat_cache.scandir(volume)}
+
+    assert sorted(entries) == ['broken', 'directory', 'file name', 'link']
+
+    for name, entry in entries.items():
+        expected = os.lstat(volume / name)
+        result = entry.stat(follow_symlinks=False)
+
+        assert entry.path == str(volume / name)
+        assert (
+            result.st_mode,
+            result.st_ino,
+            result.st_size,
+            result.st_mtime_ns
+        ) == (
+            expected.st_mode,
+            expected.st_ino,
+            expected.st_size,
+            expected.st_mtime_ns
+        )
+
+    assert entries['link'].is_dir()
+    assert not entries['broken'].is_dir()
+    assert stat_cache.stat(volume / 'link').st_ino == \
+        os.stat(volume / 'directory').st_ino
+
+    with pytest.raises(FileNotFoundError):
+        stat_cache.stat(volume / 'missing')
+
+    with pytest.raises(NotADirectoryError):
+        stat_cache.scandir(volume / 'file name')
+
+    assert ssh_log.read_text().splitlines().count('master') == 1
+
+
+def test_backup_operator_should_list_remote_volumes(tmp_path: Path, ssh_log: Path):
+    '''
+    Test listing remote backup versions over one connection, and rejecting
+    reads of their files.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+        ssh_log (Path): Connection log path.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    volume = tmp_path / 'volume'
+    (volume / '.backup' / 'old').mkdir(parents=True)
+    (volume / '.backup' / 'old' / 'file').write_text('old')
+    os.utime(volume / '.backup' / 'old', (1, 1))
+    (volume / '.backup' / 'new').mkdir()
+    (volume / '.backup' / 'new' / 'other').write_text('new')
+
+    context = ContextConfiguration(
+        context=ContextType.SUBPATH,
+        path=Path(f'backup-{tmp_path.name}:{volume}')
+    )
+    operator = BackupOperator(context, BackupConfiguration())
+
+    assert context.host == f'backup-{tmp_path.name}'
+    assert context.path == volume
+    assert [version.path.name for version in operator.list_versions()] == [
+        'new',
+        'old'
+    ]
+    assert operator.metadata_path.parents[3] == tmp_path / 'cache'
+    assert not (volume / '.nfsops').exists()
+
+    with pytest.raises(ValueError):
+        with operator.merged_view(
+            VersionRangeConfiguration(version=0, final_version='*')
+        ):
+            pass
+
+    with pytest.raises(ValueError):
+        operator.restore(RestoreConfiguration(version=0))
+
+    with pytest.raises(KeyError):
+        operator.restore(
+            RestoreConfiguration(
+                version=0,
+                destination=tmp_path / 'out',
+                engine='native'
+            )
+        )
+
+    log = ssh_log.read_text().splitlines()
+
+    assert log.count('master') == 1
+    assert log.count('session') > 1
+
+
+def test_get_control_directory_should_require_a_private_directory(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch
+):
+    '''
+    Test creating the control socket directory and rejecting shared ones.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+        monkeypatch (pytest.MonkeyPatch): Monkeypatch fixture.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    monkeypatch.setenv('XDG_RUNTIME_DIR', str(tmp_path))
+
+    directory = get_control_directory()
+
+    assert directory == tmp_path / 'nfsops'
+    assert os.stat(directory).st_mode & 0o777 == 0o700
+
+    directory.chmod(0o1777)
+
+    with pytest.raises(PermissionError):
+        get_control_directory()
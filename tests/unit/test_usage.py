@@ -0,0 +1,70 @@
+'''
+Test disk usage accounting.
+'''
+
+import os
+from pathlib import Path
+
+from nfsops.configurations.context import ContextConfiguration
+from nfsops.configurations.usage import UsageConfiguration
+from nfsops.context_type import ContextType
+from nfsops.operators.disk_usage import measure_disk_usage
+from nfsops.operators.usage import UsageOperator
+
+
+def test_measure_disk_usage_should_count_hard_links_once(tmp_path: Path):
+    '''
+    Test measuring a tree containing hard links.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    (tmp_path / 'directory').mkdir()
+    (tmp_path / 'directory' / 'file').write_bytes(b'content' * 1000)
+    os.link(tmp_path / 'directory' / 'file', tmp_path / 'link')
+
+    usage = measure_disk_usage(tmp_path)
+    directory_size = os.lstat(tmp_path / 'directory').st_size
+
+    assert usage.files == 3
+    assert usage.apparent_bytes == \
+        os.lstat(tmp_path).st_size + directory_size + 7000
+    assert usage.allocated_bytes > 0
+
+
+def test_usage_should_report_root_context_workspaces(tmp_path: Path):
+    '''
+    Test reporting workspace usage in the root context, then from the cache.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    for name, size in [('alice', 100), ('bob', 1000)]:
+        version = tmp_path / 'backups' / name / '2024'
+        version.mkdir(parents=True)
+        (version / 'file').write_bytes(b'0' * size)
+
+    operator = UsageOperator(
+        ContextConfiguration(
+            context=ContextType.ROOT,
+            root_template='backups/{name}/*',
+            path=tmp_path
+        )
+    )
+    options = UsageConfiguration(sort='apparent')
+    reports = operator.usage(options)
+
+    assert operator.list_workspaces() == ['alice', 'bob']
+    assert [(report.name, report.version) for report in reports] == \
+        [('bob', 0), ('alice', 0)]
+
+    (tmp_path / 'backups' / 'bob' / '2024' / 'file').write_bytes(b'')
+
+    assert operator.usage(options) == reports
+    assert operator.usage(UsageConfiguration(refresh=True)) != reports
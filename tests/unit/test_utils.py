@@ -2,7 +2,13 @@
 Test utility functions.
 '''
 
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
 
 from nfsops import utils
 
@@ -36,3 +42,76 @@ def test_timezone_aware_should_return_new_timezone_aware_datetime_with_naive_tim
     actual_datetime = utils.timezone_aware(input_datetime)
 
     assert actual_datetime == expected_datetime
+
+
+def test_match_name_template_should_return_name_of_expanded_template_paths():
+    '''
+    Test extracting the name value from paths matching an expanded template.
+
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    template = 'backups/{name}/*'
+
+    assert utils.match_name_template(
+        template,
+        utils.expand_name_template(template, 'alice').replace('*', '2024')
+    ) == 'alice'
+    assert utils.match_name_template(template, 'other/alice/2024') is None
+
+
+def test_parse_id_map_should_accept_wildcards_and_reject_invalid_mappings():
+    '''
+    Test parsing user and group ID mappings.
+
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    assert utils.parse_id_map(['1000:2000', '*:3000']) == \
+        {1000: 2000, -1: 3000}
+
+    for value in ['1000', 'user:2000', '1000:-1']:
+        with pytest.raises(ValueError):
+            utils.parse_id_map([value])
+
+
+def test_parse_version_should_accept_wildcards_and_reject_invalid_versions():
+    '''
+    Test parsing backup version arguments.
+
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    assert utils.parse_version('*') == '*'
+    assert utils.parse_version('3') == 3
+
+    with pytest.raises(ValueError):
+        utils.parse_version('latest')
+
+
+def test_open_atomic_writer_should_not_share_temporary_files(tmp_path: Path):
+    '''
+    Test threads of the same process writing the same file at once.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    barrier = threading.Barrier(4)
+
+    def write(index: int) -> None:
+        with utils.open_atomic_writer(tmp_path / 'file') as file:
+            file.write(str(index).encode() * 1000)
+            barrier.wait()
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(write, range(4)))
+
+    assert (tmp_path / 'file').read_text() in \
+        [str(index) * 1000 for index in range(4)]
+    assert os.listdir(tmp_path) == ['file']
@@ -0,0 +1,147 @@
+'''
+Test backup version index and watcher.
+'''
+
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from nfsops import VersionIndex, VersionWatcher, utils
+from nfsops.operators.stat_cache import StatCache
+from nfsops.operators.watcher import Inotify
+
+
+def wait_for(condition, timeout: float = 5.0) -> bool:
+    '''
+    Wait until a condition holds or the timeout expires.
+
+    Parameters:
+        condition (Callable[[], bool]): Condition to check.
+        timeout (float): Maximum waiting time in seconds.
+    Returns:
+        bool: `True` if the condition holds, `False` otherwise.
+    '''
+
+    deadline = time.monotonic() + timeout
+
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+
+        time.sleep(0.05)
+
+    return condition()
+
+
+def test_refresh_should_return_matching_directories_newest_first(tmp_path: Path):
+    '''
+    Test listing matching backup version directories ordered by modification time.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    for mtime, name in enumerate(['resource-a', 'resource-b', 'other']):
+        (tmp_path / name).mkdir()
+        os.utime(tmp_path / name, (mtime, mtime))
+
+    (tmp_path / 'resource-file').touch()
+
+    index = VersionIndex(tmp_path, 'resource-*')
+
+    assert [path.name for path, _ in index.refresh()] == [
+        'resource-b', 'resource-a']
+
+
+def test_refresh_should_reuse_persisted_index_with_unchanged_parent(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch
+):
+    '''
+    Test loading a persisted index without rescanning an unchanged parent directory.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+        monkeypatch (pytest.MonkeyPatch): Monkeypatch fixture.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    (tmp_path / 'backup' / 'v0').mkdir(parents=True)
+
+    index = VersionIndex.from_pattern(tmp_path, 'backup/*')
+    expected_entries = index.refresh()
+
+    monkeypatch.setattr(os, 'scandir', None)
+
+    reloaded_index = VersionIndex.from_pattern(tmp_path, 'backup/*')
+
+    assert reloaded_index.refresh() == expected_entries
+
+
+@pytest.mark.parametrize('use_inotify', [True, False])
+def test_watcher_should_update_index_when_directories_appear_or_disappear(
+    tmp_path: Path,
+    use_inotify: bool
+):
+    '''
+    Test updating a watched index, with and without inotify.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+        use_inotify (bool): Whether to try inotify.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    index = VersionIndex(tmp_path, 'v-*')
+
+    with VersionWatcher(index, interval=0.1, use_inotify=use_inotify):
+        (tmp_path / 'v-0').mkdir()
+
+        assert wait_for(lambda: len(index.entries()) == 1)
+
+        (tmp_path / 'v-0').rmdir()
+
+        assert wait_for(lambda: len(index.entries()) == 0)
+
+
+def test_watcher_should_check_network_filesystems_with_inotify(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch
+):
+    '''
+    Test noticing directories created by other NFS clients, which inotify
+    does not report.
+
+    Parameters:
+        tmp_path (Path): Temporary directory.
+        monkeypatch (pytest.MonkeyPatch): Monkeypatch fixture.
+    Raises:
+        AssertionError: Expected value does not match the returned value.
+    '''
+
+    monkeypatch.setattr(
+        utils,
+        'get_mount_table',
+        lambda: {os.stat(tmp_path).st_dev: (str(tmp_path), 'nfs4', {})}
+    )
+
+    def read_events(_: Inotify, timeout: float) -> list:
+        time.sleep(timeout)
+
+        return []
+
+    monkeypatch.setattr(Inotify, 'read_events', read_events)
+
+    index = VersionIndex(tmp_path, 'v-*', stat_cache=StatCache(maxsize=0))
+
+    with VersionWatcher(index, interval=0.1):
+        (tmp_path / 'v-0').mkdir()
+
+        assert not index.watched
+        assert wait_for(lambda: len(index.entries()) == 1)